@@ -0,0 +1,322 @@
+import { ProviderError, isRateLimited } from './providers/base';
+
+export type Priority = 'interactive' | 'batch' | 'dry_run';
+
+const PRIORITY_RANK: Record<Priority, number> = { interactive: 0, batch: 1, dry_run: 2 };
+
+function envNumber(name: string, fallback: number): number {
+  const raw = process.env[name];
+  const value = Number(raw);
+  return raw !== undefined && raw !== '' && Number.isFinite(value) ? value : fallback;
+}
+
+const ENABLED = process.env.ADMISSION !== '0';
+const MAX_CONCURRENT = envNumber('ADMISSION_MAX_CONCURRENT', 8);
+const MAX_QUEUE = envNumber('ADMISSION_MAX_QUEUE', 64);
+const MAX_WAIT_MS = envNumber('ADMISSION_MAX_WAIT_MS', 120000);
+const RATE_LIMIT_ATTEMPTS = envNumber('ADMISSION_RATE_LIMIT_ATTEMPTS', 4);
+/** Pause after a 429 that came without a Retry-After header */
+const DEFAULT_PAUSE_MS = 5000;
+const WAIT_SAMPLES = 200;
+
+/** Requests and tokens per minute per router process; raise them to match the account's tier */
+const DEFAULT_LIMITS: Record<string, { rpm: number; tpm: number }> = {
+  groq: { rpm: 30, tpm: 15000 },
+  claude: { rpm: 50, tpm: 40000 },
+  gemini: { rpm: 60, tpm: 120000 }
+};
+
+export interface ProviderLimits {
+  rpm: number;
+  tpm: number;
+  concurrency: number;
+}
+
+function limitsFor(provider: string): ProviderLimits {
+  const prefix = `ADMISSION_${provider.toUpperCase()}`;
+  const defaults = DEFAULT_LIMITS[provider] ?? { rpm: 60, tpm: 100000 };
+  return {
+    rpm: envNumber(`${prefix}_RPM`, defaults.rpm),
+    tpm: envNumber(`${prefix}_TPM`, defaults.tpm),
+    concurrency: Math.max(1, envNumber(`${prefix}_CONCURRENCY`, MAX_CONCURRENT))
+  };
+}
+
+/** A call turned away before reaching the provider: its queue was full or it waited too long */
+export class AdmissionRejected extends ProviderError {
+  constructor(provider: string, reason: string) {
+    super(`${provider} call shed by admission control: ${reason}`, undefined, 503);
+    this.name = 'AdmissionRejected';
+  }
+}
+
+/** Refills continuously up to `perMinute`; zero or less means unlimited */
+class TokenBucket {
+  private level: number;
+  private updated = Date.now();
+
+  constructor(readonly perMinute: number) {
+    this.level = perMinute;
+  }
+
+  private get unlimited() {
+    return !(this.perMinute > 0);
+  }
+
+  private refill(now: number) {
+    this.level = Math.min(this.perMinute, this.level + ((now - this.updated) * this.perMinute) / 60000);
+    this.updated = now;
+  }
+
+  /** Milliseconds until `amount` can be taken; more than a full bucket only waits for a full one */
+  delay(amount: number, now = Date.now()): number {
+    if (this.unlimited) return 0;
+    this.refill(now);
+    const missing = Math.min(amount, this.perMinute) - this.level;
+    return missing <= 0 ? 0 : Math.ceil((missing * 60000) / this.perMinute);
+  }
+
+  /** May leave the bucket in debt, which later calls wait off */
+  take(amount: number) {
+    if (this.unlimited) return;
+    this.refill(Date.now());
+    this.level -= amount;
+  }
+
+  give(amount: number) {
+    if (this.unlimited) return;
+    this.level = Math.min(this.perMinute, this.level + amount);
+  }
+
+  empty() {
+    if (this.unlimited) return;
+    this.refill(Date.now());
+    this.level = Math.min(this.level, 0);
+  }
+}
+
+interface Waiter {
+  priority: Priority;
+  rank: number;
+  seq: number;
+  cost: number;
+  enqueuedAt: number;
+  resolve: (ticket: Ticket) => void;
+  reject: (error: Error) => void;
+  timer?: NodeJS.Timeout;
+}
+
+export interface Ticket {
+  /** Give the slot back; usedTokens settles the estimate the call was admitted with */
+  release(usedTokens?: number): void;
+}
+
+export interface GateStats {
+  limits: ProviderLimits;
+  inFlight: number;
+  queued: number;
+  queuedByPriority: Record<Priority, number>;
+  oldestWaitMs: number;
+  pausedForMs: number;
+  admitted: number;
+  shed: number;
+  rateLimited: number;
+  /** Queue wait of the last WAIT_SAMPLES admitted calls */
+  waitsMs: number[];
+}
+
+/**
+ * Admission for one provider key: at most `concurrency` calls in flight,
+ * request and token buckets refilled per minute, and a queue ordered by
+ * priority (interactive, then batch, then dry runs), FIFO within a priority.
+ * The head of the queue blocks the rest so a large call is not starved.
+ */
+class ProviderGate {
+  private queue: Waiter[] = [];
+  private inFlight = 0;
+  private pausedUntil = 0;
+  private timer: NodeJS.Timeout | null = null;
+  private seq = 0;
+  private waits: number[] = [];
+  private counts = { admitted: 0, shed: 0, rateLimited: 0 };
+  private readonly requests: TokenBucket;
+  private readonly tokens: TokenBucket;
+
+  constructor(readonly provider: string, readonly limits: ProviderLimits, private readonly onChange: () => void) {
+    this.requests = new TokenBucket(limits.rpm);
+    this.tokens = new TokenBucket(limits.tpm);
+  }
+
+  acquire(cost: number, priority: Priority): Promise<Ticket> {
+    const rank = PRIORITY_RANK[priority];
+    if (this.queue.length >= MAX_QUEUE) {
+      // Full: a newcomer only gets in by displacing a lower-priority call
+      const last = this.queue[this.queue.length - 1];
+      if (!last || last.rank <= rank) {
+        this.counts.shed += 1;
+        this.onChange();
+        return Promise.reject(new AdmissionRejected(this.provider, `${this.queue.length} calls already queued`));
+      }
+      this.queue.pop();
+      this.shed(last, 'displaced by a higher-priority call');
+    }
+
+    return new Promise<Ticket>((resolve, reject) => {
+      const waiter: Waiter = { priority, rank, seq: this.seq++, cost, enqueuedAt: Date.now(), resolve, reject };
+      const index = this.queue.findIndex((queued) => queued.rank > rank);
+      this.queue.splice(index === -1 ? this.queue.length : index, 0, waiter);
+      waiter.timer = setTimeout(() => {
+        const position = this.queue.indexOf(waiter);
+        if (position === -1) return;
+        this.queue.splice(position, 1);
+        this.shed(waiter, `waited over ${MAX_WAIT_MS} ms`);
+        this.pump();
+      }, MAX_WAIT_MS);
+      this.pump();
+    });
+  }
+
+  /** A 429 from the provider: hold every queued call until the limit should have cleared */
+  rateLimited(retryAfterMs?: number) {
+    this.counts.rateLimited += 1;
+    this.pausedUntil = Math.max(this.pausedUntil, Date.now() + (retryAfterMs ?? DEFAULT_PAUSE_MS));
+    this.requests.empty();
+    this.onChange();
+  }
+
+  stats(): GateStats {
+    const now = Date.now();
+    const queuedByPriority: Record<Priority, number> = { interactive: 0, batch: 0, dry_run: 0 };
+    let oldest = now;
+    for (const waiter of this.queue) {
+      queuedByPriority[waiter.priority] += 1;
+      oldest = Math.min(oldest, waiter.enqueuedAt);
+    }
+    return {
+      limits: this.limits,
+      inFlight: this.inFlight,
+      queued: this.queue.length,
+      queuedByPriority,
+      oldestWaitMs: now - oldest,
+      pausedForMs: Math.max(0, this.pausedUntil - now),
+      ...this.counts,
+      waitsMs: [...this.waits]
+    };
+  }
+
+  private pump() {
+    if (this.timer) {
+      clearTimeout(this.timer);
+      this.timer = null;
+    }
+    const now = Date.now();
+    while (this.queue.length > 0 && this.inFlight < this.limits.concurrency) {
+      const head = this.queue[0];
+      const wait = Math.max(this.pausedUntil - now, this.requests.delay(1, now), this.tokens.delay(head.cost, now));
+      if (wait > 0) {
+        this.timer = setTimeout(() => this.pump(), wait);
+        break;
+      }
+      this.queue.shift();
+      clearTimeout(head.timer);
+      this.requests.take(1);
+      this.tokens.take(head.cost);
+      this.inFlight += 1;
+      this.counts.admitted += 1;
+      this.waits.push(now - head.enqueuedAt);
+      if (this.waits.length > WAIT_SAMPLES) this.waits.splice(0, this.waits.length - WAIT_SAMPLES);
+      head.resolve(this.ticket(head.cost));
+    }
+    this.onChange();
+  }
+
+  private ticket(cost: number): Ticket {
+    let released = false;
+    return {
+      release: (usedTokens?: number) => {
+        if (released) return;
+        released = true;
+        this.inFlight -= 1;
+        if (usedTokens !== undefined && usedTokens < cost) this.tokens.give(cost - usedTokens);
+        if (usedTokens !== undefined && usedTokens > cost) this.tokens.take(usedTokens - cost);
+        this.pump();
+      }
+    };
+  }
+
+  private shed(waiter: Waiter, reason: string) {
+    clearTimeout(waiter.timer);
+    this.counts.shed += 1;
+    waiter.reject(new AdmissionRejected(this.provider, reason));
+  }
+}
+
+/**
+ * Admission control in front of the provider calls of this process. A call
+ * waits for a slot of its provider; a 429 pauses that provider for every
+ * queued call (Retry-After, or DEFAULT_PAUSE_MS) and the call is queued again
+ * instead of each caller retrying on its own.
+ */
+export class AdmissionController {
+  private gates = new Map<string, ProviderGate>();
+
+  constructor(private readonly onChange: () => void = () => {}) {}
+
+  private gate(provider: string): ProviderGate {
+    let gate = this.gates.get(provider);
+    if (!gate) {
+      gate = new ProviderGate(provider, limitsFor(provider), this.onChange);
+      this.gates.set(provider, gate);
+    }
+    return gate;
+  }
+
+  /**
+   * Run `task` once admitted. `cost` is the estimated tokens of the call;
+   * `usedTokens` reads the actual count off the result to settle the bucket.
+   */
+  async run<T>(
+    provider: string,
+    priority: Priority,
+    cost: number,
+    task: () => Promise<T>,
+    usedTokens: (result: T) => number | undefined = () => undefined
+  ): Promise<T> {
+    if (!ENABLED) return task();
+    const gate = this.gate(provider);
+    for (let attempt = 1; ; attempt++) {
+      const ticket = await gate.acquire(cost, priority);
+      let result: T;
+      try {
+        result = await task();
+      } catch (error) {
+        const limited = isRateLimited(error);
+        if (limited) gate.rateLimited((error as ProviderError).retryAfterMs);
+        ticket.release();
+        if (limited && attempt < RATE_LIMIT_ATTEMPTS) continue;
+        throw error;
+      }
+      ticket.release(usedTokens(result));
+      return result;
+    }
+  }
+
+  stats(): Record<string, GateStats> {
+    return Object.fromEntries([...this.gates].map(([provider, gate]) => [provider, gate.stats()]));
+  }
+}
+
+/** Dry runs yield to batch runs, which yield to interactive ones */
+export function priorityOf(config: { dryRun: boolean; priority?: Priority }): Priority {
+  return config.dryRun ? 'dry_run' : config.priority ?? 'interactive';
+}
+
+/** Total tokens from a provider's usage block (OpenAI/Groq, Anthropic or Gemini shape) */
+export function usageTokens(usage?: Record<string, number>): number | undefined {
+  if (!usage) return undefined;
+  const total =
+    usage.total_tokens ??
+    usage.totalTokenCount ??
+    (usage.input_tokens !== undefined ? usage.input_tokens + (usage.output_tokens ?? 0) : undefined);
+  return typeof total === 'number' && Number.isFinite(total) ? total : undefined;
+}
@@ -1,3 +1,4 @@
 export { ResumeRunRouter } from './router';
+export type { CreateRunOptions, RunContext } from './router';
 export { runConfigSchema, runSummarySchema, providerMapSchema } from './schemas';
 export type { RunConfig, RoleName, RunSummary } from './schemas';
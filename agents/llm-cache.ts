@@ -0,0 +1,219 @@
+import { createHash } from 'crypto';
+import fs from 'fs/promises';
+import path from 'path';
+import { fileURLToPath } from 'url';
+import type { Prompt, ProviderResult } from './providers/base';
+import type { RoleName } from './schemas';
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+const DEFAULT_CACHE_DIR = path.resolve(__dirname, '..', 'data', 'cache', 'llm');
+const DEFAULT_MAX_BYTES = 256 * 1024 * 1024;
+const DEFAULT_TTL_MS = 7 * 24 * 60 * 60 * 1000;
+const STATS_FLUSH_MS = 1000;
+
+export interface LlmCacheKeyInput {
+  role: RoleName;
+  provider: string;
+  model: string;
+  temperature: number;
+  prompt: Prompt;
+}
+
+interface CacheEntry {
+  key: string;
+  role: RoleName;
+  provider: string;
+  model: string;
+  temperature: number;
+  createdAt: number;
+  response: ProviderResult;
+}
+
+interface IndexEntry {
+  file: string;
+  size: number;
+  lastAccess: number;
+}
+
+export interface LlmCacheStats {
+  pid: number;
+  hits: number;
+  misses: number;
+  writes: number;
+  expired: number;
+  evictions: number;
+  updatedAt: string;
+}
+
+export interface LlmCacheOptions {
+  dir?: string;
+  maxBytes?: number;
+  ttlMs?: number;
+  enabled?: boolean;
+}
+
+/**
+ * On-disk cache of provider responses keyed by role, provider, model,
+ * temperature and a hash of the exact prompt. Entries expire after a TTL and
+ * the least recently used entries are evicted once the directory exceeds
+ * maxBytes. File mtimes record last access so LRU order survives restarts.
+ *
+ * Several processes may share the directory; each keeps its own counters in
+ * stats-<pid>.json and treats a file removed by someone else as a miss.
+ */
+export class LlmResponseCache {
+  readonly dir: string;
+  readonly maxBytes: number;
+  readonly ttlMs: number;
+  readonly enabled: boolean;
+
+  private index: Map<string, IndexEntry> | null = null;
+  private totalBytes = 0;
+  private stats: LlmCacheStats;
+  private flushTimer: NodeJS.Timeout | null = null;
+
+  constructor(options: LlmCacheOptions = {}) {
+    this.dir = options.dir ?? process.env.LLM_CACHE_DIR ?? DEFAULT_CACHE_DIR;
+    this.maxBytes = options.maxBytes ?? (Number(process.env.LLM_CACHE_MAX_MB ?? 0) * 1024 * 1024 || DEFAULT_MAX_BYTES);
+    this.ttlMs = options.ttlMs ?? (Number(process.env.LLM_CACHE_TTL_HOURS ?? 0) * 60 * 60 * 1000 || DEFAULT_TTL_MS);
+    this.enabled = options.enabled ?? process.env.LLM_CACHE_DISABLED !== '1';
+    this.stats = { pid: process.pid, hits: 0, misses: 0, writes: 0, expired: 0, evictions: 0, updatedAt: new Date().toISOString() };
+  }
+
+  keyFor(input: LlmCacheKeyInput): string {
+    const promptHash = createHash('sha256')
+      .update(input.prompt.system)
+      .update('\u0000')
+      .update(input.prompt.user)
+      .digest('hex');
+    const digest = createHash('sha256')
+      .update(JSON.stringify([input.role, input.provider, input.model, input.temperature, promptHash]))
+      .digest('hex')
+      .slice(0, 40);
+    return `${input.role}-${digest}`;
+  }
+
+  async get(key: string): Promise<ProviderResult | null> {
+    if (!this.enabled) return null;
+    const index = await this.loadIndex();
+    const file = path.join(this.dir, `${key}.json`);
+
+    let entry: CacheEntry;
+    try {
+      entry = JSON.parse(await fs.readFile(file, 'utf8')) as CacheEntry;
+    } catch (error) {
+      this.forget(key);
+      this.record('misses');
+      return null;
+    }
+
+    if (Date.now() - entry.createdAt > this.ttlMs) {
+      await fs.rm(file, { force: true });
+      this.forget(key);
+      this.record('expired');
+      this.record('misses');
+      return null;
+    }
+
+    const now = Date.now();
+    const indexed = index.get(key);
+    if (indexed) indexed.lastAccess = now;
+    await fs.utimes(file, new Date(now), new Date(now)).catch(() => undefined);
+    this.record('hits');
+    return entry.response;
+  }
+
+  async set(key: string, input: LlmCacheKeyInput, response: ProviderResult): Promise<void> {
+    if (!this.enabled) return;
+    const index = await this.loadIndex();
+    const entry: CacheEntry = {
+      key,
+      role: input.role,
+      provider: input.provider,
+      model: input.model,
+      temperature: input.temperature,
+      createdAt: Date.now(),
+      response
+    };
+    const body = JSON.stringify(entry);
+    const file = path.join(this.dir, `${key}.json`);
+    const tmp = `${file}.${process.pid}.tmp`;
+    await fs.writeFile(tmp, body, 'utf8');
+    await fs.rename(tmp, file);
+
+    this.forget(key);
+    const size = Buffer.byteLength(body);
+    index.set(key, { file, size, lastAccess: Date.now() });
+    this.totalBytes += size;
+    this.record('writes');
+
+    if (this.totalBytes > this.maxBytes) {
+      await this.evict();
+    }
+  }
+
+  snapshot(): LlmCacheStats {
+    return { ...this.stats };
+  }
+
+  private async loadIndex(): Promise<Map<string, IndexEntry>> {
+    if (this.index) return this.index;
+    await fs.mkdir(this.dir, { recursive: true });
+    this.index = await this.scan();
+    return this.index;
+  }
+
+  private async scan(): Promise<Map<string, IndexEntry>> {
+    const index = new Map<string, IndexEntry>();
+    this.totalBytes = 0;
+    const names = await fs.readdir(this.dir).catch(() => [] as string[]);
+    for (const name of names) {
+      if (!name.endsWith('.json') || name.startsWith('stats-')) continue;
+      const file = path.join(this.dir, name);
+      const stat = await fs.stat(file).catch(() => null);
+      if (!stat) continue;
+      index.set(name.slice(0, -'.json'.length), { file, size: stat.size, lastAccess: stat.mtimeMs });
+      this.totalBytes += stat.size;
+    }
+    return index;
+  }
+
+  private async evict() {
+    // Other processes write to the same directory; rescan for an accurate picture first.
+    this.index = await this.scan();
+    const target = this.maxBytes * 0.9;
+    const byAge = [...this.index.entries()].sort((a, b) => a[1].lastAccess - b[1].lastAccess);
+    for (const [key, entry] of byAge) {
+      if (this.totalBytes <= target) break;
+      await fs.rm(entry.file, { force: true });
+      this.forget(key);
+      this.record('evictions');
+    }
+  }
+
+  private forget(key: string) {
+    const existing = this.index?.get(key);
+    if (existing) {
+      this.totalBytes -= existing.size;
+      this.index?.delete(key);
+    }
+  }
+
+  private record(counter: 'hits' | 'misses' | 'writes' | 'expired' | 'evictions') {
+    this.stats[counter] += 1;
+    this.stats.updatedAt = new Date().toISOString();
+    if (this.flushTimer) return;
+    this.flushTimer = setTimeout(() => {
+      this.flushTimer = null;
+      void this.flushStats();
+    }, STATS_FLUSH_MS);
+    this.flushTimer.unref?.();
+  }
+
+  private async flushStats() {
+    const file = path.join(this.dir, `stats-${process.pid}.json`);
+    await fs.writeFile(file, JSON.stringify(this.stats), 'utf8').catch(() => undefined);
+  }
+}
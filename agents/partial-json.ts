@@ -0,0 +1,192 @@
+/** A piece of a streamed role output that is already complete */
+export interface PartialValue {
+  /** Top-level field of the output object */
+  field: string;
+  /** Position in the field's array; absent when the whole field is done */
+  index?: number;
+  value: unknown;
+}
+
+type Expect = 'key' | 'colon' | 'value' | 'element' | 'capture' | 'after_element' | 'after_value';
+
+/**
+ * Incremental JSON parser for streamed role outputs. Chunks are scanned once
+ * as they arrive: each element of a top-level array (a reviewer keyword, a
+ * SWOT item, a refiner diff) and each other top-level field is reported as
+ * soon as its text is complete. Only the value being read is buffered and
+ * it is parsed once. Text before the first `{` (a ```json fence, a
+ * preamble) and anything after the object is ignored; the caller still
+ * parses and validates the whole completion.
+ */
+export class PartialJsonParser {
+  private started = false;
+  private done = false;
+  private expect: Expect = 'key';
+  private depth = 0;
+  private inString = false;
+  private escaped = false;
+  private key = '';
+  private readingKey = false;
+  private inArray = false;
+  private index = 0;
+  private capture = '';
+  private captureDepth = 0;
+
+  constructor(private readonly onValue: (partial: PartialValue) => void) {}
+
+  reset() {
+    this.started = false;
+    this.done = false;
+    this.expect = 'key';
+    this.depth = 0;
+    this.inString = false;
+    this.escaped = false;
+    this.key = '';
+    this.readingKey = false;
+    this.inArray = false;
+    this.index = 0;
+    this.capture = '';
+  }
+
+  write(chunk: string) {
+    for (let i = 0; i < chunk.length && !this.done; i++) {
+      this.step(chunk[i]);
+    }
+  }
+
+  private step(ch: string) {
+    if (!this.started) {
+      if (ch === '{') {
+        this.started = true;
+        this.depth = 1;
+      }
+      return;
+    }
+
+    if (this.inString) {
+      if (this.readingKey) {
+        if (this.escaped) this.escaped = false;
+        else if (ch === '\\') this.escaped = true;
+        else if (ch === '"') {
+          this.inString = false;
+          this.readingKey = false;
+          this.key = parseString(this.key);
+          this.expect = 'colon';
+          return;
+        }
+        this.key += ch;
+        return;
+      }
+      this.capture += ch;
+      if (this.escaped) this.escaped = false;
+      else if (ch === '\\') this.escaped = true;
+      else if (ch === '"') {
+        this.inString = false;
+        if (this.depth === this.captureDepth) this.emit();
+      }
+      return;
+    }
+
+    if (this.expect === 'capture') {
+      if (ch === '"') {
+        this.inString = true;
+        this.capture += ch;
+      } else if (ch === '{' || ch === '[') {
+        this.depth += 1;
+        this.capture += ch;
+      } else if ((ch === '}' || ch === ']') && this.depth > this.captureDepth) {
+        this.depth -= 1;
+        this.capture += ch;
+        if (this.depth === this.captureDepth) this.emit();
+      } else if (this.depth === this.captureDepth && (ch === ',' || ch === '}' || ch === ']')) {
+        // End of a number, true, false or null
+        this.emit();
+        this.step(ch);
+      } else {
+        this.capture += ch;
+      }
+      return;
+    }
+
+    if (isSpace(ch)) return;
+    switch (this.expect) {
+      case 'key':
+        if (ch === '"') {
+          this.inString = true;
+          this.readingKey = true;
+          this.key = '';
+        } else if (ch === '}') {
+          this.done = true;
+        }
+        return;
+      case 'colon':
+        if (ch === ':') this.expect = 'value';
+        return;
+      case 'value':
+        if (ch === '[') {
+          this.inArray = true;
+          this.index = 0;
+          this.depth = 2;
+          this.expect = 'element';
+        } else {
+          this.startCapture(ch, 1);
+        }
+        return;
+      case 'element':
+        if (ch === ']') this.closeArray();
+        else this.startCapture(ch, 2);
+        return;
+      case 'after_element':
+        if (ch === ',') {
+          this.index += 1;
+          this.expect = 'element';
+        } else if (ch === ']') {
+          this.closeArray();
+        }
+        return;
+      case 'after_value':
+        if (ch === ',') this.expect = 'key';
+        else if (ch === '}') this.done = true;
+        return;
+    }
+  }
+
+  private startCapture(ch: string, depth: number) {
+    this.expect = 'capture';
+    this.captureDepth = depth;
+    this.capture = '';
+    this.step(ch);
+  }
+
+  private closeArray() {
+    this.inArray = false;
+    this.depth = 1;
+    this.expect = 'after_value';
+  }
+
+  private emit() {
+    const text = this.capture.trim();
+    this.capture = '';
+    this.expect = this.inArray ? 'after_element' : 'after_value';
+    let value: unknown;
+    try {
+      value = JSON.parse(text);
+    } catch (error) {
+      // Malformed output; the full parse after the stream reports it
+      return;
+    }
+    this.onValue(this.inArray ? { field: this.key, index: this.index, value } : { field: this.key, value });
+  }
+}
+
+function isSpace(ch: string) {
+  return ch === ' ' || ch === '\n' || ch === '\r' || ch === '\t';
+}
+
+function parseString(raw: string): string {
+  try {
+    return JSON.parse(`"${raw}"`) as string;
+  } catch (error) {
+    return raw;
+  }
+}
@@ -0,0 +1,192 @@
+import type { RoleName } from './schemas';
+
+/**
+ * Sections each role reads, most important first; '*' stands for any section
+ * not named other than cv.tex (MAIN). Files targeted by refiner diffs are
+ * always kept for judge and finalizer. When a prompt is over budget, sections
+ * are dropped from the end.
+ */
+const ROLE_SECTIONS: Record<RoleName, string[]> = {
+  reviewer: ['SUMMARY', 'SKILLS', 'EXPERIENCE', 'PROJECTS', 'EDUCATION', '*', 'MAIN'],
+  swot: ['SUMMARY', 'SKILLS', 'EXPERIENCE', 'PROJECTS', 'EDUCATION', '*'],
+  refiner: ['SUMMARY', 'SKILLS', 'EXPERIENCE', 'PROJECTS', 'EDUCATION', '*'],
+  judge: ['EXPERIENCE', 'SKILLS', 'SUMMARY', 'PROJECTS'],
+  finalizer: []
+};
+
+/** Estimated input tokens per role; override with PROMPT_BUDGET_<ROLE> */
+const DEFAULT_BUDGETS: Record<RoleName, number> = {
+  reviewer: 4000,
+  swot: 3000,
+  refiner: 4500,
+  judge: 4000,
+  finalizer: 2500
+};
+
+/** Never cut the job description below this many tokens */
+const MIN_JD_TOKENS = 200;
+
+/** Roles whose view of the resume diffs are anchored against: the refiner writes the anchors, the judge and finalizer check them */
+const ANCHORED_ROLES: RoleName[] = ['refiner', 'judge', 'finalizer'];
+
+// Layout and contact macros that carry nothing a role can act on
+const BOILERPLATE = [
+  /^\\(documentclass|usepackage|setlength|renewcommand|newcommand|vspace|hspace|small|footnotesize|normalsize|makecvheader|photo|input|include)\b/,
+  /^\\(begin|end)\{document\}/,
+  /^\\(socialinfo|github|linkedin|smartphone|email|address)\b/
+];
+
+export interface ResumeSource {
+  main: string;
+  includes: Record<string, string>;
+}
+
+export interface CompactionReport {
+  role: RoleName;
+  tokens: number;
+  budget: number;
+  fullTokens: number;
+  files: string[];
+  dropped: string[];
+  jdTruncated: boolean;
+  overBudget: boolean;
+}
+
+interface CompactFile {
+  file: string;
+  section: string;
+  content: string;
+  required: boolean;
+}
+
+export function compactionEnabled(): boolean {
+  return process.env.PROMPT_COMPACTION !== '0';
+}
+
+/** Rough token count (about four characters per token for English and LaTeX) */
+export function estimateTokens(text: string): number {
+  return Math.ceil(text.length / 4);
+}
+
+export function roleBudget(role: RoleName): number {
+  const override = Number(process.env[`PROMPT_BUDGET_${role.toUpperCase()}`]);
+  return override > 0 ? override : DEFAULT_BUDGETS[role];
+}
+
+/**
+ * Strip comments, layout macros and indentation from LaTeX. Removed lines are
+ * left empty rather than deleted so `line:N` anchors still point at the same
+ * line of the file on disk; `% SECTION:` markers are kept for section anchors.
+ * With `verbatim`, only whole comment and layout lines are emptied and every
+ * other line is kept exactly as on disk, so `regex:` anchors written against
+ * it (indentation included) match the file.
+ */
+export function stripLatex(source: string, options: { verbatim?: boolean } = {}): string {
+  const lines = source.replace(/\r?\n/g, '\n').split('\n').map((line) => {
+    const trimmed = line.trim();
+    if (trimmed.startsWith('% SECTION:')) return options.verbatim ? line : trimmed;
+    const code = line.replace(/(^|[^\\])%.*$/, '$1').trim();
+    if (!code || BOILERPLATE.some((pattern) => pattern.test(code))) return '';
+    return options.verbatim ? line : code.replace(/[ \t]{2,}/g, ' ');
+  });
+  while (lines.length && lines[lines.length - 1] === '') lines.pop();
+  return lines.join('\n');
+}
+
+function sectionOf(content: string): string {
+  const match = /%\s*SECTION:([A-Za-z0-9_-]+)/.exec(content);
+  return match ? match[1].toUpperCase() : '*';
+}
+
+function priority(order: string[], section: string): number {
+  const index = order.indexOf(section);
+  if (index !== -1 || section === 'MAIN') return index;
+  return order.indexOf('*');
+}
+
+function renderResume(files: CompactFile[]): string {
+  const main = files.find((file) => file.file === 'cv.tex');
+  const includes = files.filter((file) => file.file !== 'cv.tex');
+  const parts: string[] = [];
+  if (main) parts.push(`Main Resume (cv.tex):\n${main.content}`);
+  parts.push(`Includes:\n${includes.map((file) => `--- ${file.file} ---\n${file.content}`).join('\n\n')}`);
+  return parts.join('\n\n');
+}
+
+/** The uncompacted job description + resume block every role used to get; files keep their leading lines and indentation */
+export function fullResumeBlock(jd: string, resume: ResumeSource): string {
+  return `Job Description:\n${jd.trim()}\n\nMain Resume (cv.tex):\n${resume.main.trimEnd()}\n\nIncludes:\n${Object.entries(resume.includes)
+    .map(([file, content]) => `--- ${file} ---\n${content.trimEnd()}`)
+    .join('\n\n')}`;
+}
+
+/**
+ * Job description + resume block for one role, trimmed to the role's token
+ * budget. `reserved` is what the rest of the prompt (role template, upstream
+ * JSON, instructions) already costs. Over budget, the tail of the job
+ * description goes first (down to MIN_JD_TOKENS), then the least important
+ * sections; files targeted by refiner diffs are never dropped. The roles that
+ * write or check diff anchors see the kept lines verbatim.
+ */
+export function compactResumeBlock(
+  role: RoleName,
+  jd: string,
+  resume: ResumeSource,
+  options: { reserved: number; targets?: string[] }
+): { text: string; report: CompactionReport } {
+  const budget = roleBudget(role);
+  const order = ROLE_SECTIONS[role];
+  const targets = new Set((options.targets ?? []).map((target) => target.split('/').pop()));
+  const strip = { verbatim: ANCHORED_ROLES.includes(role) };
+
+  const candidates: CompactFile[] = [
+    { file: 'cv.tex', section: 'MAIN', content: stripLatex(resume.main, strip), required: false },
+    ...Object.entries(resume.includes).map(([file, content]) => ({
+      file,
+      section: sectionOf(content),
+      content: stripLatex(content, strip),
+      required: targets.has(file)
+    }))
+  ];
+  const kept = candidates
+    .filter((file) => file.required || priority(order, file.section) !== -1)
+    .sort((a, b) => Number(b.required) - Number(a.required) || priority(order, a.section) - priority(order, b.section));
+  const dropped = candidates.filter((file) => !kept.includes(file)).map((file) => file.file);
+
+  let jdText = jd.trim().replace(/[ \t]+/g, ' ').replace(/\n{3,}/g, '\n\n');
+  const cost = () => options.reserved + estimateTokens(`Job Description:\n${jdText}\n\n${renderResume(kept)}`);
+
+  // A long job description gives up its tail before any resume section is dropped
+  let jdTruncated = false;
+  const overflow = cost() - budget;
+  if (overflow > 0) {
+    const keepTokens = Math.max(MIN_JD_TOKENS, estimateTokens(jdText) - overflow);
+    if (keepTokens < estimateTokens(jdText)) {
+      jdText = `${jdText.slice(0, keepTokens * 4)}\n[job description truncated]`;
+      jdTruncated = true;
+    }
+  }
+
+  while (cost() > budget) {
+    const last = kept[kept.length - 1];
+    if (!last || last.required) break;
+    kept.pop();
+    dropped.push(last.file);
+  }
+
+  const text = `Job Description:\n${jdText}\n\n${renderResume(kept)}`;
+  const tokens = options.reserved + estimateTokens(text);
+  return {
+    text,
+    report: {
+      role,
+      tokens,
+      budget,
+      fullTokens: options.reserved + estimateTokens(fullResumeBlock(jd, resume)),
+      files: kept.map((file) => file.file),
+      dropped,
+      jdTruncated,
+      overBudget: tokens > budget
+    }
+  };
+}
@@ -0,0 +1,159 @@
+import fs from 'fs/promises';
+import path from 'path';
+import { fileURLToPath } from 'url';
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+const DEFAULT_STATS_DIR = path.resolve(__dirname, '..', 'data', 'cache', 'providers');
+const MAX_SAMPLES = 100;
+const WINDOW_MS = 30 * 60 * 1000;
+const STATS_FLUSH_MS = 1000;
+const UNHEALTHY_ERROR_RATE = 0.5;
+const MIN_SAMPLES_FOR_HEALTH = 4;
+/** Assumed latency of a provider we have no samples for, so it still gets tried */
+const UNTRIED_LATENCY_MS = 5000;
+
+export const PROVIDER_KEYS: Record<string, string> = {
+  groq: 'GROQ_API_KEY',
+  claude: 'ANTHROPIC_API_KEY',
+  gemini: 'GOOGLE_API_KEY'
+};
+
+export type CallOutcome = 'ok' | 'error' | 'timeout';
+
+export interface CallSample {
+  at: number;
+  latencyMs: number;
+  outcome: CallOutcome;
+}
+
+export interface ProviderHealth {
+  provider: string;
+  model: string;
+  samples: number;
+  p50Ms: number | null;
+  p95Ms: number | null;
+  errorRate: number;
+  timeoutRate: number;
+  healthy: boolean;
+}
+
+function percentile(sorted: number[], pct: number): number | null {
+  if (sorted.length === 0) return null;
+  const rank = Math.max(1, Math.round((pct / 100) * sorted.length));
+  return sorted[Math.min(rank, sorted.length) - 1];
+}
+
+export function isTimeout(error: unknown): boolean {
+  const err = error as { name?: string; message?: string; cause?: { name?: string } };
+  return err?.name === 'AbortError' || err?.name === 'TimeoutError' || err?.cause?.name === 'AbortError' || /abort|timed out/i.test(err?.message ?? '');
+}
+
+/**
+ * Rolling latency, error and timeout stats per provider and model, used to
+ * resolve the `auto` provider and to pick a hedge target.
+ *
+ * Every process keeps the last MAX_SAMPLES calls (within WINDOW_MS) per
+ * provider/model in memory and writes them to <dir>/stats-<pid>.json, which
+ * mcp-server/provider_stats.py merges for get_available_providers.
+ */
+export class ProviderRouter {
+  readonly dir: string;
+  private samples = new Map<string, CallSample[]>();
+  private flushTimer: NodeJS.Timeout | null = null;
+  private sections = new Map<string, () => unknown>();
+
+  constructor(dir?: string) {
+    this.dir = dir ?? process.env.PROVIDER_STATS_DIR ?? DEFAULT_STATS_DIR;
+  }
+
+  /** Providers with an API key set, in declaration order */
+  configured(): string[] {
+    return Object.keys(PROVIDER_KEYS).filter((provider) => Boolean(process.env[PROVIDER_KEYS[provider]]));
+  }
+
+  record(provider: string, model: string, latencyMs: number, outcome: CallOutcome) {
+    const key = `${provider}/${model}`;
+    const list = this.samples.get(key) ?? [];
+    list.push({ at: Date.now(), latencyMs, outcome });
+    if (list.length > MAX_SAMPLES) list.splice(0, list.length - MAX_SAMPLES);
+    this.samples.set(key, list);
+    this.scheduleFlush();
+  }
+
+  health(provider: string, model: string): ProviderHealth {
+    const cutoff = Date.now() - WINDOW_MS;
+    const recent = (this.samples.get(`${provider}/${model}`) ?? []).filter((sample) => sample.at >= cutoff);
+    const latencies = recent
+      .filter((sample) => sample.outcome === 'ok')
+      .map((sample) => sample.latencyMs)
+      .sort((a, b) => a - b);
+    const errors = recent.filter((sample) => sample.outcome !== 'ok').length;
+    const timeouts = recent.filter((sample) => sample.outcome === 'timeout').length;
+    const errorRate = recent.length ? errors / recent.length : 0;
+    return {
+      provider,
+      model,
+      samples: recent.length,
+      p50Ms: percentile(latencies, 50),
+      p95Ms: percentile(latencies, 95),
+      errorRate,
+      timeoutRate: recent.length ? timeouts / recent.length : 0,
+      healthy: recent.length < MIN_SAMPLES_FOR_HEALTH || errorRate < UNHEALTHY_ERROR_RATE
+    };
+  }
+
+  /**
+   * Configured providers ordered by preference for a role: healthy ones
+   * first, then by median latency (untried providers get a neutral guess).
+   */
+  rank(modelFor: (provider: string) => string, exclude: string[] = []): string[] {
+    const candidates = this.configured()
+      .filter((provider) => !exclude.includes(provider))
+      .map((provider) => ({ provider, health: this.health(provider, modelFor(provider)) }));
+    return candidates
+      .sort((a, b) => {
+        if (a.health.healthy !== b.health.healthy) return a.health.healthy ? -1 : 1;
+        return (a.health.p50Ms ?? UNTRIED_LATENCY_MS) - (b.health.p50Ms ?? UNTRIED_LATENCY_MS);
+      })
+      .map((candidate) => candidate.provider);
+  }
+
+  /** Publish another section of this process's stats file, e.g. admission queues */
+  attach(name: string, collect: () => unknown) {
+    this.sections.set(name, collect);
+  }
+
+  /** Rewrite the stats file soon after something other than a call changed */
+  touch() {
+    this.scheduleFlush();
+  }
+
+  private scheduleFlush() {
+    if (this.flushTimer) return;
+    this.flushTimer = setTimeout(() => {
+      this.flushTimer = null;
+      void this.flush();
+    }, STATS_FLUSH_MS);
+    this.flushTimer.unref?.();
+  }
+
+  private async flush() {
+    const file = path.join(this.dir, `stats-${process.pid}.json`);
+    const body = {
+      pid: process.pid,
+      updatedAt: new Date().toISOString(),
+      samples: Object.fromEntries(this.samples),
+      ...Object.fromEntries([...this.sections].map(([name, collect]) => [name, collect()]))
+    };
+    try {
+      await fs.mkdir(this.dir, { recursive: true });
+      const tmp = `${file}.tmp`;
+      await fs.writeFile(tmp, JSON.stringify(body), 'utf8');
+      await fs.rename(tmp, file);
+    } catch (error) {
+      // Stats are advisory; never fail a run over them
+    }
+  }
+}
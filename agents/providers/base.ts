@@ -3,11 +3,20 @@ export interface Prompt {
   user: string;
 }
 
+/** Receives a streamed completion as it arrives */
+export interface StreamSink {
+  /** A new attempt starts (after a retry); drop what the previous one streamed */
+  reset(): void;
+  write(chunk: string): void;
+}
+
 export interface CompletionOptions {
   model: string;
   temperature?: number;
   max_tokens?: number;
   timeoutMs?: number;
+  /** Stream the completion into this sink; the result still carries the whole content */
+  stream?: StreamSink;
 }
 
 export interface ProviderResult {
@@ -20,12 +29,52 @@ export interface ProviderResult {
 export type ProviderFn = (prompt: Prompt, opts: CompletionOptions) => Promise<ProviderResult>;
 
 export class ProviderError extends Error {
-  constructor(message: string, public readonly cause?: unknown, public readonly status?: number) {
+  constructor(
+    message: string,
+    public readonly cause?: unknown,
+    public readonly status?: number,
+    /** From a 429/503 Retry-After header */
+    public readonly retryAfterMs?: number
+  ) {
     super(message);
     this.name = 'ProviderError';
   }
 }
 
+/** Retry-After header (seconds or an HTTP date) in milliseconds */
+export function parseRetryAfter(header: string | null): number | undefined {
+  if (!header) return undefined;
+  const seconds = Number(header);
+  if (Number.isFinite(seconds)) return Math.max(0, seconds * 1000);
+  const at = Date.parse(header);
+  return Number.isNaN(at) ? undefined : Math.max(0, at - Date.now());
+}
+
+/** Error for a non-2xx provider response, carrying its status and Retry-After */
+export async function responseError(provider: string, response: Response): Promise<ProviderError> {
+  const errText = await response.text();
+  return new ProviderError(
+    `${provider} request failed: ${response.status}`,
+    errText,
+    response.status,
+    parseRetryAfter(response.headers.get('retry-after'))
+  );
+}
+
+export function isRateLimited(error: unknown): boolean {
+  return (error as ProviderError)?.status === 429;
+}
+
+/**
+ * Rate limits are left to the admission controller, which pauses every
+ * caller of the provider at once; other client errors would fail again.
+ */
+function isRetryable(error: unknown): boolean {
+  const status = (error as ProviderError)?.status;
+  if (status === undefined || status < 400) return true;
+  return status === 408 || status >= 500;
+}
+
 export async function withRetry<T>(task: () => Promise<T>, attempts = 3, baseDelayMs = 500): Promise<T> {
   let lastError: unknown;
   for (let attempt = 1; attempt <= attempts; attempt++) {
@@ -33,14 +82,47 @@ export async function withRetry<T>(task: () => Promise<T>, attempts = 3, baseDel
       return await task();
     } catch (error) {
       lastError = error;
-      if (attempt === attempts) break;
-      const backoff = baseDelayMs * Math.pow(2, attempt - 1);
+      if (attempt === attempts || !isRetryable(error)) break;
+      const retryAfter = (error as ProviderError)?.retryAfterMs;
+      // Full jitter so callers that failed together do not retry together
+      const backoff = retryAfter ?? Math.random() * baseDelayMs * Math.pow(2, attempt);
       await new Promise((resolve) => setTimeout(resolve, backoff));
     }
   }
   throw lastError;
 }
 
+/** JSON payloads of a server-sent event stream, ending at `[DONE]` or the end of the body */
+export async function* sseEvents(response: Response): AsyncGenerator<any> {
+  if (!response.body) return;
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let data: string[] = [];
+  const flush = () => {
+    const payload = data.join('\n');
+    data = [];
+    return payload;
+  };
+  for await (const chunk of response.body as unknown as AsyncIterable<Uint8Array>) {
+    buffer += decoder.decode(chunk, { stream: true });
+    let newline: number;
+    while ((newline = buffer.indexOf('\n')) !== -1) {
+      const line = buffer.slice(0, newline).replace(/\r$/, '');
+      buffer = buffer.slice(newline + 1);
+      if (line.startsWith('data:')) {
+        data.push(line.slice(5).trimStart());
+      } else if (line === '' && data.length > 0) {
+        const payload = flush();
+        if (payload === '[DONE]') return;
+        yield JSON.parse(payload);
+      }
+    }
+  }
+  if (data.length > 0 && data.join('') !== '[DONE]') {
+    yield JSON.parse(flush());
+  }
+}
+
 export function createAbortSignal(timeoutMs = 60000): AbortSignal {
   const controller = new AbortController();
   const timer = setTimeout(() => controller.abort(), timeoutMs);
@@ -1,8 +1,43 @@
-import { createAbortSignal, ProviderError, type ProviderFn, withRetry } from './base';
+import {
+  createAbortSignal,
+  ProviderError,
+  responseError,
+  sseEvents,
+  type ProviderFn,
+  type ProviderResult,
+  type StreamSink,
+  withRetry
+} from './base';
 
 const API_URL = 'https://api.anthropic.com/v1/messages';
 const API_VERSION = '2023-06-01';
 
+/** Messages stream: text deltas, input usage on message_start and output usage on message_delta */
+async function readStream(response: Response, sink: StreamSink, model: string): Promise<ProviderResult> {
+  let id: string | undefined;
+  let content = '';
+  const usage: Record<string, number> = {};
+  for await (const event of sseEvents(response)) {
+    if (event.type === 'message_start') {
+      id = event.message?.id;
+      model = event.message?.model ?? model;
+      Object.assign(usage, event.message?.usage);
+    } else if (event.type === 'content_block_delta' && typeof event.delta?.text === 'string') {
+      content += event.delta.text;
+      sink.write(event.delta.text);
+    } else if (event.type === 'message_delta') {
+      Object.assign(usage, event.usage);
+    } else if (event.type === 'error') {
+      throw new ProviderError(`Claude stream failed: ${event.error?.message ?? 'unknown error'}`, event, response.status);
+    }
+  }
+  content = content.trim();
+  if (!content) {
+    throw new ProviderError('Claude stream missing content', undefined, response.status);
+  }
+  return { id: id ?? 'claude-response', model, content, usage };
+}
+
 export const complete: ProviderFn = async (prompt, opts) => {
   const apiKey = process.env.ANTHROPIC_API_KEY;
   if (!apiKey) {
@@ -13,6 +48,7 @@ export const complete: ProviderFn = async (prompt, opts) => {
     model: opts.model,
     max_tokens: opts.max_tokens ?? 2048,
     temperature: opts.temperature ?? 0.2,
+    stream: Boolean(opts.stream),
     system: prompt.system,
     messages: [
       {
@@ -35,8 +71,12 @@ export const complete: ProviderFn = async (prompt, opts) => {
     });
 
     if (!response.ok) {
-      const errText = await response.text();
-      throw new ProviderError(`Claude request failed: ${response.status}`, errText, response.status);
+      throw await responseError('Claude', response);
+    }
+
+    if (opts.stream) {
+      opts.stream.reset();
+      return readStream(response, opts.stream, opts.model);
     }
 
     const json = (await response.json()) as any;
@@ -1,14 +1,48 @@
-import { createAbortSignal, ProviderError, type ProviderFn, withRetry } from './base';
+import {
+  createAbortSignal,
+  ProviderError,
+  responseError,
+  sseEvents,
+  type ProviderFn,
+  type ProviderResult,
+  type StreamSink,
+  withRetry
+} from './base';
 
 const API_ROOT = 'https://generativelanguage.googleapis.com/v1beta/models';
 
+/** streamGenerateContent over SSE: each event is a partial response, usageMetadata is cumulative */
+async function readStream(response: Response, sink: StreamSink, model: string): Promise<ProviderResult> {
+  let id: string | undefined;
+  let content = '';
+  let usage: Record<string, number> | undefined;
+  for await (const event of sseEvents(response)) {
+    id ??= event.responseId;
+    const text = event.candidates?.[0]?.content?.parts
+      ?.map((part: any) => (typeof part?.text === 'string' ? part.text : ''))
+      .join('');
+    if (text) {
+      content += text;
+      sink.write(text);
+    }
+    usage = event.usageMetadata ?? usage;
+  }
+  content = content.trim();
+  if (!content) {
+    throw new ProviderError('Gemini stream missing content', undefined, response.status);
+  }
+  return { id: id ?? 'gemini-response', model, content, usage };
+}
+
 export const complete: ProviderFn = async (prompt, opts) => {
   const apiKey = process.env.GOOGLE_API_KEY;
   if (!apiKey) {
     throw new ProviderError('GOOGLE_API_KEY is not set');
   }
 
-  const url = `${API_ROOT}/${opts.model}:generateContent?key=${apiKey}`;
+  const url = opts.stream
+    ? `${API_ROOT}/${opts.model}:streamGenerateContent?alt=sse&key=${apiKey}`
+    : `${API_ROOT}/${opts.model}:generateContent?key=${apiKey}`;
   const body: Record<string, unknown> = {
     contents: [
       {
@@ -48,8 +82,12 @@ export const complete: ProviderFn = async (prompt, opts) => {
     });
 
     if (!response.ok) {
-      const errText = await response.text();
-      throw new ProviderError(`Gemini request failed: ${response.status}`, errText, response.status);
+      throw await responseError('Gemini', response);
+    }
+
+    if (opts.stream) {
+      opts.stream.reset();
+      return readStream(response, opts.stream, opts.model);
     }
 
     const json = (await response.json()) as any;
@@ -66,7 +104,7 @@ export const complete: ProviderFn = async (prompt, opts) => {
       id: json.candidates?.[0]?.id ?? 'gemini-response',
       model: opts.model,
       content: text,
-      usage: json.usage
+      usage: json.usageMetadata ?? json.usage
     };
   });
 };
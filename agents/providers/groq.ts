@@ -1,7 +1,37 @@
-import { createAbortSignal, ProviderError, type ProviderFn, withRetry } from './base';
+import {
+  createAbortSignal,
+  ProviderError,
+  responseError,
+  sseEvents,
+  type ProviderFn,
+  type ProviderResult,
+  type StreamSink,
+  withRetry
+} from './base';
 
 const API_URL = 'https://api.groq.com/openai/v1/chat/completions';
 
+/** Chat completion chunks: content deltas, usage on the last one (under x_groq) */
+async function readStream(response: Response, sink: StreamSink, model: string): Promise<ProviderResult> {
+  let id: string | undefined;
+  let content = '';
+  let usage: Record<string, number> | undefined;
+  for await (const event of sseEvents(response)) {
+    id ??= event.id;
+    model = event.model ?? model;
+    const delta = event.choices?.[0]?.delta?.content;
+    if (typeof delta === 'string' && delta) {
+      content += delta;
+      sink.write(delta);
+    }
+    usage = event.usage ?? event.x_groq?.usage ?? usage;
+  }
+  if (!content) {
+    throw new ProviderError('Groq stream missing content', undefined, response.status);
+  }
+  return { id: id ?? 'groq-response', model, content, usage };
+}
+
 export const complete: ProviderFn = async (prompt, opts) => {
   const apiKey = process.env.GROQ_API_KEY;
   if (!apiKey) {
@@ -18,7 +48,7 @@ export const complete: ProviderFn = async (prompt, opts) => {
     model: opts.model,
     temperature: opts.temperature ?? 0.3,
     max_tokens: opts.max_tokens ?? 2048,
-    stream: false,
+    stream: Boolean(opts.stream),
     messages
   };
 
@@ -34,8 +64,12 @@ export const complete: ProviderFn = async (prompt, opts) => {
     });
 
     if (!response.ok) {
-      const errText = await response.text();
-      throw new ProviderError(`Groq request failed: ${response.status}`, errText, response.status);
+      throw await responseError('Groq', response);
+    }
+
+    if (opts.stream) {
+      opts.stream.reset();
+      return readStream(response, opts.stream, opts.model);
     }
 
     const json = (await response.json()) as any;
@@ -0,0 +1,175 @@
+import fs from 'fs/promises';
+import path from 'path';
+import { fileURLToPath } from 'url';
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+const REPO_ROOT = path.resolve(__dirname, '..');
+const DEFAULT_RESUME_ROOT = process.env.RESUME_DIR ?? path.join(REPO_ROOT, 'resume');
+const PROFILES_ROOT = process.env.RESUME_PROFILES_DIR ?? path.join(REPO_ROOT, 'data', 'profiles');
+const DEFAULT_MAX_BYTES = Number(process.env.RESUME_CACHE_MAX_MB ?? 64) * 1024 * 1024;
+const PROFILE_ID_PATTERN = /^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$/;
+
+export const DEFAULT_PROFILE = 'default';
+
+/** cv.tex and includes/*.tex of one profile's resume tree */
+export interface ProfileResume {
+  profileId: string;
+  root: string;
+  main: string;
+  includes: Record<string, string>;
+}
+
+export interface ResumeCacheStats {
+  profiles: number;
+  bytes: number;
+  maxBytes: number;
+  hits: number;
+  misses: number;
+  evictions: number;
+}
+
+interface CacheEntry {
+  resume: ProfileResume;
+  stamp: string;
+  bytes: number;
+}
+
+/**
+ * Resume directory of a profile: the repository's resume/ for the default
+ * profile, data/profiles/<id>/ (or RESUME_PROFILES_DIR/<id>/) for the rest.
+ */
+export function profileRoot(profileId: string = DEFAULT_PROFILE): string {
+  if (profileId === DEFAULT_PROFILE) return DEFAULT_RESUME_ROOT;
+  if (!PROFILE_ID_PATTERN.test(profileId)) {
+    throw new Error(`Invalid profile id ${profileId}`);
+  }
+  return path.join(PROFILES_ROOT, profileId);
+}
+
+/**
+ * On-disk path of a refiner diff target. Targets are written as resume/...;
+ * for other profiles they map onto the profile's own tree.
+ */
+export function profileTargetPath(root: string, targetFile: string): string {
+  if (targetFile.startsWith('resume/')) {
+    return path.join(root, targetFile.slice('resume/'.length));
+  }
+  return path.resolve(REPO_ROOT, targetFile);
+}
+
+async function fileStamp(filePath: string): Promise<string> {
+  const stat = await fs.stat(filePath);
+  return `${stat.mtimeMs}:${stat.size}`;
+}
+
+/** mtime and size of cv.tex and every include; changes whenever the tree's text does */
+async function treeStamp(root: string): Promise<{ stamp: string; includes: string[] }> {
+  const parts = [await fileStamp(path.join(root, 'cv.tex'))];
+  const includes: string[] = [];
+  try {
+    const entries = await fs.readdir(path.join(root, 'includes'), { withFileTypes: true });
+    for (const entry of entries) {
+      if (entry.isFile() && entry.name.endsWith('.tex')) includes.push(entry.name);
+    }
+  } catch (error) {
+    // includes optional; ignore if directory absent
+  }
+  includes.sort();
+  for (const name of includes) {
+    parts.push(`${name}=${await fileStamp(path.join(root, 'includes', name))}`);
+  }
+  return { stamp: parts.join(';'), includes };
+}
+
+/**
+ * Parsed resume trees by profile, least recently used first. Each lookup
+ * only stats the profile's files; they are re-read when a stamp changes.
+ * Entries beyond maxBytes of resume text are evicted, so any number of
+ * profiles can be served with only the recently used ones in memory.
+ */
+export class ResumeContextCache {
+  private entries = new Map<string, CacheEntry>();
+  private loading = new Map<string, Promise<ProfileResume>>();
+  private bytes = 0;
+  private hits = 0;
+  private misses = 0;
+  private evictions = 0;
+
+  constructor(readonly maxBytes: number = DEFAULT_MAX_BYTES) {}
+
+  async get(profileId: string = DEFAULT_PROFILE): Promise<ProfileResume> {
+    const root = profileRoot(profileId);
+    let tree: { stamp: string; includes: string[] };
+    try {
+      tree = await treeStamp(root);
+    } catch (error) {
+      throw new Error(
+        profileId === DEFAULT_PROFILE
+          ? 'Missing resume/cv.tex. Please add the base resume.'
+          : `Resume profile ${profileId} not found (no cv.tex in ${root})`
+      );
+    }
+
+    const entry = this.entries.get(profileId);
+    if (entry && entry.stamp === tree.stamp) {
+      this.hits += 1;
+      // Re-insert to mark as most recently used
+      this.entries.delete(profileId);
+      this.entries.set(profileId, entry);
+      return entry.resume;
+    }
+
+    // Concurrent misses for the same tree share one read
+    const key = `${profileId}\n${tree.stamp}`;
+    let pending = this.loading.get(key);
+    if (!pending) {
+      this.misses += 1;
+      pending = this.load(profileId, root, tree).finally(() => this.loading.delete(key));
+      this.loading.set(key, pending);
+    }
+    return pending;
+  }
+
+  stats(): ResumeCacheStats {
+    return {
+      profiles: this.entries.size,
+      bytes: this.bytes,
+      maxBytes: this.maxBytes,
+      hits: this.hits,
+      misses: this.misses,
+      evictions: this.evictions
+    };
+  }
+
+  private async load(profileId: string, root: string, tree: { stamp: string; includes: string[] }): Promise<ProfileResume> {
+    const resume: ProfileResume = { profileId, root, main: '', includes: {} };
+    resume.main = await fs.readFile(path.join(root, 'cv.tex'), 'utf8');
+    const contents = await Promise.all(tree.includes.map((name) => fs.readFile(path.join(root, 'includes', name), 'utf8')));
+    tree.includes.forEach((name, index) => {
+      resume.includes[name] = contents[index];
+    });
+
+    const bytes = resume.main.length + contents.reduce((sum, text) => sum + text.length, 0);
+    const previous = this.entries.get(profileId);
+    if (previous) {
+      this.bytes -= previous.bytes;
+      this.entries.delete(profileId);
+    }
+    this.entries.set(profileId, { resume, stamp: tree.stamp, bytes });
+    this.bytes += bytes;
+    this.evict(profileId);
+    return resume;
+  }
+
+  private evict(keep: string) {
+    for (const [profileId, entry] of this.entries) {
+      if (this.bytes <= this.maxBytes) break;
+      if (profileId === keep) continue;
+      this.entries.delete(profileId);
+      this.bytes -= entry.bytes;
+      this.evictions += 1;
+    }
+  }
+}
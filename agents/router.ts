@@ -6,16 +6,48 @@ import { fileURLToPath } from 'url';
 import { complete as groqComplete } from './providers/groq';
 import { complete as claudeComplete } from './providers/claude';
 import { complete as geminiComplete } from './providers/gemini';
-import type { CompletionOptions, ProviderFn, Prompt } from './providers/base';
+import { createAbortSignal, type CompletionOptions, type ProviderFn, type Prompt, type StreamSink } from './providers/base';
+import { LlmResponseCache } from './llm-cache';
+import { RunIndex, type RunIndexQuery } from './run-index';
+import { PROVIDER_KEYS, ProviderRouter, isTimeout } from './provider-router';
+import { AdmissionController, priorityOf, usageTokens, type Priority } from './admission';
+import {
+  DEFAULT_PROFILE,
+  ResumeContextCache,
+  profileTargetPath,
+  type ProfileResume,
+  type ResumeCacheStats
+} from './resume-profiles';
+import {
+  compactResumeBlock,
+  compactionEnabled,
+  estimateTokens,
+  fullResumeBlock,
+  type CompactionReport
+} from './prompt-compactor';
+import { StageScheduler, type StageTiming } from './stage-scheduler';
+import {
+  RunJournal,
+  RunLock,
+  readJournal,
+  readRunSummary,
+  resumeSeeds,
+  type JournalEvent,
+  type JournalEventInput
+} from './run-journal';
+import { RunStream, readStream, type RunStreamEvent } from './run-stream';
+import { PartialJsonParser } from './partial-json';
 import {
   finalizerOutputSchema,
   judgeOutputSchema,
   refinerDiffSchema,
   refinerOutputSchema,
   reviewerOutputSchema,
+  roleNames,
   runConfigSchema,
   runSummarySchema,
   swotOutputSchema,
+  type AtsPrefill,
   type FinalizerOutput,
   type JudgeOutput,
   type RefinerOutput,
@@ -30,9 +62,16 @@ const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
 const DATA_ROOT = path.resolve(__dirname, '..', 'data', 'runs');
-const RESUME_ROOT = path.resolve(__dirname, '..', 'resume');
-const INCLUDE_DIR = path.join(RESUME_ROOT, 'includes');
 const BUILD_SCRIPT = path.resolve(__dirname, '..', 'scripts', 'build-resume.sh');
+// Resume files as they were before the finalizer patched them, kept until the run's end is journaled
+const FINALIZER_BACKUP = 'finalizer-backup.json';
+// SPECULATIVE_REFINER=1 starts the second refiner while the judge decides. It is only kept for
+// a REVISE without feedback, which is rare, and a discarded call still runs to completion
+const SPECULATIVE_REFINER = process.env.SPECULATIVE_REFINER === '1';
+// 0 disables hedged provider calls
+const HEDGE_AFTER_MS = Number(process.env.LLM_HEDGE_AFTER_MS ?? 0);
+// Stream completions and publish partial role outputs; LLM_STREAM=0 waits for whole responses
+const STREAM_COMPLETIONS = process.env.LLM_STREAM !== '0';
 
 const providers: Record<string, ProviderFn> = {
   groq: groqComplete,
@@ -40,12 +79,23 @@ const providers: Record<string, ProviderFn> = {
   gemini: geminiComplete
 };
 
+const llmCache = new LlmResponseCache();
+const runIndex = new RunIndex(DATA_ROOT);
+const providerRouter = new ProviderRouter();
+const admission = new AdmissionController(() => providerRouter.touch());
+providerRouter.attach('admission', () => admission.stats());
+const resumeContexts = new ResumeContextCache();
+
 interface RoleArtifact {
   role: RoleName;
   status: 'pending' | 'running' | 'succeeded' | 'failed';
   output?: unknown;
   error?: string;
   storedPath?: string;
+  cacheHit?: boolean;
+  provider?: string;
+  durationMs?: number;
+  promptTokens?: number;
 }
 
 interface RunState {
@@ -58,13 +108,48 @@ interface RunState {
   pdfPath?: string | null;
   logPath?: string | null;
   diffSummary?: string | null;
+  error?: string | null;
+  stages?: StageTiming[];
+  journal: RunJournal;
+  stream: RunStream;
+  lock: RunLock;
+}
+
+/** Outputs of completed stages a resumed run reuses instead of calling the role again, by stage name. */
+type StageSeeds = Record<string, unknown>;
+
+type RoleTemplates = Record<RoleName, string>;
+
+/** Everything a run reads from disk before its first LLM call; shared by every run in a batch for a profile. */
+export interface RunContext extends ProfileResume {
+  templates: RoleTemplates;
 }
 
-interface ResumeContext {
-  main: string;
-  includes: Record<string, string>;
+interface RoleContext {
+  resume: RunContext;
+  reviewer?: ReviewerOutput;
+  swot?: SwotOutput;
+  refiner?: RefinerOutput;
+  judge?: JudgeOutput;
+  ats?: AtsPrefill;
+  jd: string;
 }
 
+interface RoleCall<T> {
+  output: T;
+  provider: string;
+  durationMs: number;
+  cacheHit: boolean;
+  promptTokens?: number;
+}
+
+interface BuiltPrompt {
+  prompt: Prompt;
+  compaction: CompactionReport | null;
+}
+
+type RefinerDiff = RefinerOutput['diffs'][number];
+
 function nowIso() {
   return new Date().toISOString();
 }
@@ -78,72 +163,94 @@ async function readRoleTemplate(role: RoleName): Promise<string> {
   return fs.readFile(filePath, 'utf8');
 }
 
-async function loadResumeContext(): Promise<ResumeContext> {
-  const result: ResumeContext = { main: '', includes: {} };
-  try {
-    result.main = await fs.readFile(path.join(RESUME_ROOT, 'cv.tex'), 'utf8');
-  } catch (error) {
-    throw new Error('Missing resume/cv.tex. Please add the base resume.');
-  }
-
-  try {
-    const entries = await fs.readdir(INCLUDE_DIR, { withFileTypes: true });
-    for (const entry of entries) {
-      if (entry.isFile() && entry.name.endsWith('.tex')) {
-        const content = await fs.readFile(path.join(INCLUDE_DIR, entry.name), 'utf8');
-        result.includes[entry.name] = content;
-      }
-    }
-  } catch (error) {
-    // includes optional; ignore if directory absent
-  }
-
-  return result;
+async function loadRoleTemplates(): Promise<RoleTemplates> {
+  const entries = await Promise.all(roleNames.map(async (role) => [role, await readRoleTemplate(role)] as const));
+  return Object.fromEntries(entries) as RoleTemplates;
 }
 
-function buildPrompt(role: RoleName, context: {
-  jd: string;
-  resume: ResumeContext;
-  reviewer?: ReviewerOutput;
-  swot?: SwotOutput;
-  refiner?: RefinerOutput;
-  judge?: JudgeOutput;
-}): { system: string; user: string } {
-  const base = `Job Description:\n${context.jd.trim()}\n\nMain Resume (cv.tex):\n${context.resume.main.trim()}\n\nIncludes:\n${Object.entries(context.resume.includes)
-    .map(([file, content]) => `--- ${file} ---\n${content.trim()}`)
-    .join('\n\n')}`;
+/** The run's local keyword scan, trimmed to what the Reviewer needs to start from */
+function atsPrefill(ats: AtsPrefill): string {
+  return JSON.stringify({
+    ats_keywords: ats.ats_keywords,
+    coverage: ats.coverage,
+    missing_must_have: ats.must_have.missing,
+    missing_nice_to_have: ats.nice_to_have.missing
+  });
+}
 
+/** Role-specific system text and the instructions that follow the job description + resume block */
+function rolePrompt(role: RoleName, context: RoleContext): { system: string; instructions: string } {
   switch (role) {
     case 'reviewer':
+      if (context.ats) {
+        return {
+          system: `Local ATS keyword scan: ${atsPrefill(context.ats)}`,
+          instructions:
+            '\n\nReturn Reviewer JSON. Start ats_keywords and coverage from the local ATS scan in the system prompt and correct them only where the JD or resume says otherwise.'
+        };
+      }
       return {
         system: '',
-        user: `${base}\n\nReturn Reviewer JSON.`
+        instructions: '\n\nReturn Reviewer JSON.'
       };
     case 'swot':
       return {
         system: JSON.stringify(context.reviewer ?? {}),
-        user: `${base}\n\nReviewer JSON is in the system prompt.`
+        instructions: '\n\nReviewer JSON is in the system prompt.'
       };
-    case 'refiner':
+    case 'refiner': {
+      // A revision sees the previous diffs, plus the judge's verdict unless it is speculative
+      const revision = context.refiner
+        ? `\n\nPrevious refiner output:\n${JSON.stringify(context.refiner)}\n\n${
+            context.judge
+              ? `Judge feedback:\n${JSON.stringify(context.judge)}\n\nRevise the diffs to address the judge's feedback.`
+              : 'Improve on these diffs.'
+          }`
+        : '';
       return {
         system: JSON.stringify({ reviewer: context.reviewer, swot: context.swot }),
-        user: `${base}\n\nProduce diffs adhering to the schema.`
+        instructions: `${revision}\n\nProduce diffs adhering to the schema.`
       };
+    }
     case 'judge':
       return {
         system: JSON.stringify({ reviewer: context.reviewer, swot: context.swot }),
-        user: `${base}\n\nRefiner output:\n${JSON.stringify(context.refiner)}\n\nJudge per schema.`
+        instructions: `\n\nRefiner output:\n${JSON.stringify(context.refiner)}\n\nJudge per schema.`
       };
     case 'finalizer':
       return {
         system: '',
-        user: `${base}\n\nRefiner output:\n${JSON.stringify(context.refiner)}\nJudge output:\n${JSON.stringify(context.judge)}`
+        instructions: `\n\nRefiner output:\n${JSON.stringify(context.refiner)}\nJudge output:\n${JSON.stringify(context.judge)}`
       };
     default:
       throw new Error(`Unsupported role ${role}`);
   }
 }
 
+/**
+ * Full prompt for a role. Unless PROMPT_COMPACTION=0, the job description and
+ * resume are compacted to the role's token budget (see prompt-compactor.ts).
+ */
+function buildPrompt(role: RoleName, context: RoleContext): BuiltPrompt {
+  const parts = rolePrompt(role, context);
+  const systemSections = [context.resume.templates[role].trim()];
+  if (parts.system && parts.system.trim().length > 0) {
+    systemSections.push(parts.system.trim());
+  }
+  systemSections.push('Follow the schema strictly.');
+  const system = systemSections.filter(Boolean).join('\n\n');
+
+  if (!compactionEnabled()) {
+    return { prompt: { system, user: `${fullResumeBlock(context.jd, context.resume)}${parts.instructions}` }, compaction: null };
+  }
+  const targets = role === 'judge' || role === 'finalizer' ? context.refiner?.diffs.map((diff) => diff.target_file) : undefined;
+  const { text, report } = compactResumeBlock(role, context.jd, context.resume, {
+    reserved: estimateTokens(system + parts.instructions),
+    targets
+  });
+  return { prompt: { system, user: `${text}${parts.instructions}` }, compaction: report };
+}
+
 function normalizeLineEndings(text: string): string {
   return text.replace(/\r?\n/g, '\n');
 }
@@ -246,13 +353,90 @@ function buildPreview(original: string, diff: RefinerOutput['diffs'][number], lo
   return `${header}\n${contextLines.join('\n')}\n---\n${diff.content}`;
 }
 
-async function runBuild(runId: string): Promise<{ status: 'OK' | 'FAILED'; logPath: string; pdfPath: string | null }> {
+/** Save the files the finalizer is about to patch; written atomically so it is either whole or absent */
+async function writeFinalizerBackup(runDir: string, files: string[]) {
+  const backup: Record<string, string> = {};
+  for (const file of files) {
+    const content = await fs.readFile(file, 'utf8').catch(() => null);
+    if (content !== null) backup[file] = content;
+  }
+  const target = path.join(runDir, FINALIZER_BACKUP);
+  const tmp = `${target}.${process.pid}.tmp`;
+  await fs.writeFile(tmp, JSON.stringify(backup), 'utf8');
+  await fs.rename(tmp, target);
+}
+
+/**
+ * Put back the files an interrupted finalizer of this run had patched, so
+ * its diffs are applied to the originals again and not a second time on top
+ * of themselves. Returns how many files were restored.
+ */
+async function restoreFinalizerBackup(runDir: string): Promise<number> {
+  let backup: Record<string, string>;
+  try {
+    backup = JSON.parse(await fs.readFile(path.join(runDir, FINALIZER_BACKUP), 'utf8'));
+  } catch (error) {
+    // No backup: the finalizer never got to patch anything
+    return 0;
+  }
+  await Promise.all(Object.entries(backup).map(([file, content]) => fs.writeFile(file, content, 'utf8')));
+  return Object.keys(backup).length;
+}
+
+/** Whether a verdict says what to change: flagged files or any stated reason */
+function hasActionableFeedback(verdict: JudgeOutput): boolean {
+  return verdict.flagged.length > 0 || verdict.reasons.some((reason) => reason.trim() !== '');
+}
+
+function previewDiffs(refiner: RefinerOutput): string {
+  return refiner.diffs
+    .map((diff) => `File: ${diff.target_file}\nType: ${diff.patch_type}\nAnchor: ${diff.anchor}\nContent:\n${diff.content}\n---`)
+    .join('\n');
+}
+
+/** Resolve every diff anchor against the files as they are now; returns the failures by diff. */
+async function validateAnchors(refiner: RefinerOutput, root: string): Promise<Map<RefinerDiff, string>> {
+  const files = new Map<string, Promise<string[]>>();
+  const invalid = new Map<RefinerDiff, string>();
+  await Promise.all(
+    refiner.diffs.map(async (diff) => {
+      const targetPath = profileTargetPath(root, diff.target_file);
+      if (!files.has(targetPath)) {
+        files.set(targetPath, fs.readFile(targetPath, 'utf8').then((text) => normalizeLineEndings(text).split('\n')));
+      }
+      try {
+        findAnchor(await files.get(targetPath)!, diff.anchor);
+      } catch (error) {
+        invalid.set(diff, (error as Error).message);
+      }
+    })
+  );
+  return invalid;
+}
+
+/** Touch the TeX service so a cold container or connection is ready before the finalizer builds. */
+async function warmBuild(): Promise<void> {
+  const buildUrl = process.env.TEXLIVE_URL ?? 'http://texlive:5001/build';
+  await fetch(new URL(buildUrl).origin, { method: 'HEAD', signal: createAbortSignal(2000) }).catch(() => undefined);
+}
+
+interface BuildResult {
+  status: 'OK' | 'FAILED';
+  logPath: string;
+  pdfPath: string | null;
+  cache?: 'hit' | 'miss';
+  durationMs?: number;
+}
+
+async function runBuild(runId: string, resume: ProfileResume): Promise<BuildResult> {
   await ensureDir(path.join(DATA_ROOT, runId));
   const logPath = path.join(DATA_ROOT, runId, 'build.log');
   const pdfPath = path.join(DATA_ROOT, runId, 'final.pdf');
+  const started = Date.now();
 
   const child = spawn(BUILD_SCRIPT, [runId], {
     cwd: path.resolve(__dirname, '..'),
+    env: { ...process.env, RESUME_DIR: resume.root, PROFILE_ID: resume.profileId },
     stdio: ['ignore', 'pipe', 'pipe']
   });
 
@@ -264,31 +448,80 @@ async function runBuild(runId: string): Promise<{ status: 'OK' | 'FAILED'; logPa
     child.on('close', resolve);
   });
 
-  await fs.writeFile(logPath, Buffer.concat(chunks));
+  const output = Buffer.concat(chunks);
+  await fs.writeFile(logPath, output);
+  const durationMs = Date.now() - started;
 
   if (exitCode === 0) {
-    return { status: 'OK', logPath, pdfPath };
+    // build-resume.sh reports whether the PDF came from the content-addressed build cache
+    const cache = /"cache":"(hit|miss)"/.exec(output.toString('utf8'))?.[1] as BuildResult['cache'];
+    return { status: 'OK', logPath, pdfPath, cache, durationMs };
   }
-  return { status: 'FAILED', logPath, pdfPath: null };
+  return { status: 'FAILED', logPath, pdfPath: null, durationMs };
 }
 
-async function readJsonFile<T>(filePath: string): Promise<T | null> {
-  try {
-    const text = await fs.readFile(filePath, 'utf8');
-    return JSON.parse(text) as T;
-  } catch (error) {
-    return null;
-  }
+const RUN_ID_PATTERN = /^[A-Za-z0-9][A-Za-z0-9_-]{0,127}$/;
+
+export interface CreateRunOptions {
+  /** Caller-assigned run id, e.g. when the run was queued before it started. */
+  runId?: string;
+  /** Preloaded resume and role templates for the run's profile, see loadRunContext(). */
+  context?: RunContext;
+}
+
+export interface PromptPreviewRequest {
+  role: RoleName;
+  jobDescription?: string;
+  /** Take the job description and upstream outputs from an existing run */
+  runId?: string;
+  /** Resume profile to build the prompt from; defaults to the run's profile */
+  profileId?: string;
+  /** Local keyword scan for the reviewer prompt; defaults to the run's */
+  ats?: AtsPrefill;
+  reviewer?: ReviewerOutput;
+  swot?: SwotOutput;
+  refiner?: RefinerOutput;
+  judge?: JudgeOutput;
+}
+
+export interface PromptPreview {
+  role: RoleName;
+  system: string;
+  user: string;
+  tokens: number;
+  compaction: CompactionReport | null;
 }
 
 export class ResumeRunRouter {
-  async createRun(configInput: RunConfig): Promise<RunSummary> {
+  private runIndexReady: Promise<void> | null = null;
+  private activeRuns = new Set<string>();
+  private streamListeners = new Set<(event: RunStreamEvent) => void>();
+
+  /** Follow the stream events of every run in this process; returns the unsubscribe function */
+  onStream(listener: (event: RunStreamEvent) => void): () => void {
+    this.streamListeners.add(listener);
+    return () => this.streamListeners.delete(listener);
+  }
+
+  /** Stream events a run has written after `afterSeq`, from any process */
+  async readStream(runId: string, afterSeq = 0): Promise<RunStreamEvent[]> {
+    if (!RUN_ID_PATTERN.test(runId)) {
+      throw new Error(`Invalid run id ${runId}`);
+    }
+    return readStream(path.join(DATA_ROOT, runId), afterSeq);
+  }
+
+  async createRun(configInput: RunConfig, options: CreateRunOptions = {}): Promise<RunSummary> {
     const config = runConfigSchema.parse(configInput);
-    const runId = randomUUID();
+    if (options.runId !== undefined && !RUN_ID_PATTERN.test(options.runId)) {
+      throw new Error(`Invalid run id ${options.runId}`);
+    }
+    const runId = options.runId ?? randomUUID();
     const runDir = path.join(DATA_ROOT, runId);
     await ensureDir(runDir);
+    const lock = await RunLock.acquire(runDir, runId);
 
-    const resume = await loadResumeContext();
+    const scheduler = new StageScheduler();
 
     const initialState: RunState = {
       id: runId,
@@ -304,84 +537,316 @@ export class ResumeRunRouter {
       updatedAt: nowIso(),
       pdfPath: null,
       logPath: null,
-      diffSummary: null
+      diffSummary: null,
+      error: null,
+      stages: scheduler.timings,
+      journal: new RunJournal(runDir),
+      stream: new RunStream(runId, runDir, (event) => this.publish(event)),
+      lock
     };
 
-    await fs.writeFile(path.join(runDir, 'config.json'), JSON.stringify(config, null, 2));
-    await this.writeState(runDir, initialState);
+    try {
+      await fs.writeFile(path.join(runDir, 'config.json'), JSON.stringify(config, null, 2));
+      await this.record(initialState, { type: 'created', summary: this.summaryOf(initialState) }, true);
+    } catch (error) {
+      await lock.release();
+      throw error;
+    }
+    return this.executeRun(runDir, initialState, scheduler, options.context);
+  }
 
+  /**
+   * Restart a failed or interrupted run at the first stage that did not
+   * complete. Outputs of the stages that did (reviewer.json, swot.json, ...,
+   * as recorded in the run's journal) are reused instead of calling their
+   * role again; the finalizer always runs, from the resume files as they were
+   * before an interrupted finalizer patched them. The run's lock file keeps
+   * every other router process from resuming or running it at the same time.
+   */
+  async resumeRun(runId: string, options: { context?: RunContext } = {}): Promise<RunSummary> {
+    if (!RUN_ID_PATTERN.test(runId)) {
+      throw new Error(`Invalid run id ${runId}`);
+    }
+    if (this.activeRuns.has(runId)) {
+      throw new Error(`Run ${runId} is still in progress`);
+    }
+    const runDir = path.join(DATA_ROOT, runId);
+    const lock = await RunLock.acquire(runDir, runId).catch((error: NodeJS.ErrnoException) => {
+      throw error.code === 'ENOENT' ? new Error(`Run ${runId} not found`) : error;
+    });
+    let state: RunState;
+    let scheduler: StageScheduler;
+    let seeds: StageSeeds;
     try {
-      const reviewer = await this.invokeReviewer(runDir, initialState, resume);
-      const swot = await this.invokeSwot(runDir, initialState, resume, reviewer);
-      const { refiner, diffPreview } = await this.invokeRefiner(runDir, initialState, resume, reviewer, swot);
-      const judge = await this.invokeJudge(runDir, initialState, resume, reviewer, swot, refiner);
-
-      if (judge.status === 'REVISE') {
-        const { refiner: secondRefiner, diffPreview: diffPreview2 } = await this.invokeRefiner(
-          runDir,
-          initialState,
-          resume,
-          reviewer,
-          swot,
-          refiner,
-          judge
-        );
-        const secondJudge = await this.invokeJudge(
-          runDir,
-          initialState,
-          resume,
-          reviewer,
-          swot,
-          secondRefiner,
-          judge
-        );
-        if (secondJudge.status === 'REVISE') {
-          initialState.status = 'needs_review';
-          initialState.diffSummary = diffPreview2;
-          await this.finalizeState(runDir, initialState);
-          return this.readSummary(runDir);
-        }
-        initialState.diffSummary = diffPreview2;
-        const finalOutput = await this.invokeFinalizer(
-          runDir,
-          initialState,
-          resume,
-          secondRefiner,
-          secondJudge,
-          config.dryRun
-        );
-        initialState.pdfPath = finalOutput.build.pdf_path;
-        initialState.logPath = finalOutput.build.log_path;
-        initialState.status = finalOutput.build.status === 'OK' ? 'completed' : 'needs_review';
-        initialState.diffSummary = diffPreview2;
-        await this.finalizeState(runDir, initialState);
-        return this.readSummary(runDir);
-      }
+      ({ state, scheduler, seeds } = await this.resumeState(runId, runDir, lock));
+    } catch (error) {
+      await lock.release();
+      throw error;
+    }
+    return this.executeRun(runDir, state, scheduler, options.context, seeds);
+  }
+
+  private async resumeState(runId: string, runDir: string, lock: RunLock) {
+    const summary = await this.getRun(runId);
+    if (summary.status === 'completed' || summary.status === 'needs_review') {
+      throw new Error(`Run ${runId} already finished (${summary.status})`);
+    }
 
-      initialState.diffSummary = diffPreview;
-      const finalOutput = await this.invokeFinalizer(runDir, initialState, resume, refiner, judge, config.dryRun);
-      initialState.pdfPath = finalOutput.build.pdf_path;
-      initialState.logPath = finalOutput.build.log_path;
-      initialState.status = finalOutput.build.status === 'OK' ? 'completed' : 'needs_review';
-      await this.finalizeState(runDir, initialState);
+    // Before anchors are validated or the resume is read: the files as the first attempt found them
+    await restoreFinalizerBackup(runDir);
+    const seeds = resumeSeeds(summary, await readJournal(runDir));
+    const kept = new Set(Object.keys(seeds).map((stage) => stage.replace(/_(revise|\d+)$/, '')));
+    const pending = summary.artifacts.map((artifact) => artifact.role).filter((role) => !kept.has(role));
+    const scheduler = new StageScheduler();
+    const state: RunState = {
+      id: summary.id,
+      status: 'running',
+      config: summary.config,
+      artifacts: summary.artifacts.map((artifact) =>
+        pending.includes(artifact.role) ? { role: artifact.role, status: 'pending' } : artifact
+      ),
+      createdAt: summary.createdAt,
+      updatedAt: nowIso(),
+      pdfPath: null,
+      logPath: null,
+      diffSummary: null,
+      error: null,
+      stages: scheduler.timings,
+      journal: await RunJournal.open(runDir),
+      stream: await RunStream.open(summary.id, runDir, (event) => this.publish(event)),
+      lock
+    };
+    await this.record(state, { type: 'resumed', reused: Object.keys(seeds), pending }, true);
+    return { state, scheduler, seeds };
+  }
+
+  /** Run the stage graph and journal how it ended. */
+  private async executeRun(
+    runDir: string,
+    state: RunState,
+    scheduler: StageScheduler,
+    context?: RunContext,
+    seeds: StageSeeds = {}
+  ): Promise<RunSummary> {
+    this.activeRuns.add(state.id);
+    try {
+      state.status = await this.runStages(runDir, state, scheduler, context, seeds);
+      await this.record(
+        state,
+        {
+          type: 'state',
+          status: state.status,
+          pdfPath: state.pdfPath ?? null,
+          logPath: state.logPath ?? null,
+          diffSummary: state.diffSummary ?? null,
+          stages: state.stages
+        },
+        true
+      );
+      // The run is over; a failed one keeps the backup for resumeRun
+      await fs.rm(path.join(runDir, FINALIZER_BACKUP), { force: true });
       return this.readSummary(runDir);
     } catch (error) {
-      initialState.status = 'failed';
-      initialState.updatedAt = nowIso();
-      await this.writeState(runDir, initialState);
+      state.status = 'failed';
+      state.error = (error as Error).message;
+      await this.record(state, { type: 'state', status: 'failed', error: state.error, stages: state.stages }, true);
       throw error;
+    } finally {
+      this.activeRuns.delete(state.id);
+      await state.stream.settled();
+      await state.lock.release();
     }
   }
 
-  async listRuns(): Promise<RunSummary[]> {
-    await ensureDir(DATA_ROOT);
-    const entries = await fs.readdir(DATA_ROOT);
-    const summaries: RunSummary[] = [];
-    for (const id of entries) {
-      const summary = await this.readSummary(path.join(DATA_ROOT, id));
-      if (summary) summaries.push(summary);
+  /**
+   * The pipeline as a stage graph. Resume and template loading overlap, the
+   * TeX service is warmed while the LLM roles run, anchors are validated while
+   * the judge decides, and on REVISE the refiner runs again with the verdict.
+   * With SPECULATIVE_REFINER=1 a second refiner starts alongside the judge; it
+   * never saw the verdict, so it is only adopted when the judge asks for a
+   * revision without saying what to change. Seeded stages
+   * (a resumed run) resolve to their stored output.
+   */
+  private async runStages(
+    runDir: string,
+    state: RunState,
+    scheduler: StageScheduler,
+    sharedContext?: RunContext,
+    seeds: StageSeeds = {}
+  ): Promise<RunState['status']> {
+    const { config } = state;
+    const reuse = <T>(stage: string, run: () => Promise<T>): Promise<T> =>
+      stage in seeds ? Promise.resolve(seeds[stage] as T) : run();
+    const refinerRound = (stage: string, run: () => Promise<{ refiner: RefinerOutput; diffPreview: string }>) => {
+      const stored = seeds[stage] as RefinerOutput | undefined;
+      return stored ? Promise.resolve({ refiner: stored, diffPreview: previewDiffs(stored) }) : run();
+    };
+    const context = sharedContext
+      ? scheduler.root('context', async () => sharedContext)
+      : scheduler.stage(
+          'context',
+          [scheduler.root('resume', () => resumeContexts.get(config.profileId)), scheduler.root('templates', loadRoleTemplates)],
+          async (resume, templates) => ({ ...resume, templates })
+        );
+    if (!config.dryRun) {
+      // Best effort and never awaited: wakes the TeX service before the finalizer needs it
+      scheduler.root('warm_build', warmBuild);
     }
-    return summaries.sort((a, b) => (a.createdAt < b.createdAt ? 1 : -1));
+
+    const reviewer = scheduler.stage('reviewer', [context], (resume) =>
+      reuse('reviewer', () => this.invokeReviewer(runDir, state, resume))
+    );
+    const swot = scheduler.stage('swot', [context, reviewer], (resume, review) =>
+      reuse('swot', () => this.invokeSwot(runDir, state, resume, review))
+    );
+    const refiner = scheduler.stage('refiner', [context, reviewer, swot], (resume, review, analysis) =>
+      refinerRound('refiner', () => this.invokeRefiner(runDir, state, resume, review, analysis))
+    );
+    const anchors = scheduler.stage('validate_anchors', [context, refiner], async (resume, first) =>
+      validateAnchors(first.refiner, resume.root)
+    );
+    const judge = scheduler.stage('judge', [context, reviewer, swot, refiner], (resume, review, analysis, first) =>
+      reuse('judge', () => this.invokeJudge(runDir, state, resume, review, analysis, first.refiner))
+    );
+    // A stored verdict leaves nothing for a speculative revision to overlap with
+    const speculative = SPECULATIVE_REFINER && !('judge' in seeds)
+      ? scheduler.stage(
+          'refiner_2',
+          [context, reviewer, swot, refiner],
+          (resume, review, analysis, first) =>
+            this.callRole<RefinerOutput>('refiner', refinerOutputSchema, state, {
+              resume,
+              reviewer: review,
+              swot: analysis,
+              refiner: first.refiner,
+              jd: config.jobDescription
+            }),
+          { speculative: true }
+        )
+      : null;
+
+    const [resume, review, analysis, first, verdict] = await Promise.all([
+      context.promise,
+      reviewer.promise,
+      swot.promise,
+      refiner.promise,
+      judge.promise
+    ]);
+
+    if (verdict.status !== 'REVISE') {
+      if (speculative) scheduler.discard(speculative);
+      state.diffSummary = first.diffPreview;
+      const finalOutput = await scheduler.stage('finalizer', [anchors], (invalid) =>
+        this.invokeFinalizer(runDir, state, resume, first.refiner, verdict, config.dryRun, invalid)
+      ).promise;
+      return this.recordBuild(state, finalOutput);
+    }
+
+    // A revision made without the verdict cannot have addressed its feedback
+    const speculate = speculative && !hasActionableFeedback(verdict) ? speculative : null;
+    if (speculative && !speculate) scheduler.discard(speculative);
+    const adopted = speculate ? await speculate.promise.catch(() => null) : null;
+    let second: { refiner: RefinerOutput; diffPreview: string };
+    if (adopted) {
+      await this.recordRole('refiner', runDir, state, adopted);
+      second = { refiner: adopted.output, diffPreview: previewDiffs(adopted.output) };
+    } else {
+      second = await scheduler.stage('refiner_revise', [], () =>
+        refinerRound('refiner_revise', () =>
+          this.invokeRefiner(runDir, state, resume, review, analysis, first.refiner, verdict)
+        )
+      ).promise;
+    }
+
+    const secondAnchors = scheduler.root('validate_anchors_2', async () => validateAnchors(second.refiner, resume.root));
+    const secondVerdict = await scheduler.stage('judge_2', [], () =>
+      reuse('judge_2', () => this.invokeJudge(runDir, state, resume, review, analysis, second.refiner, verdict))
+    ).promise;
+    state.diffSummary = second.diffPreview;
+    if (secondVerdict.status === 'REVISE') {
+      return 'needs_review';
+    }
+
+    const finalOutput = await scheduler.stage('finalizer', [secondAnchors], (invalid) =>
+      this.invokeFinalizer(runDir, state, resume, second.refiner, secondVerdict, config.dryRun, invalid)
+    ).promise;
+    state.diffSummary = second.diffPreview;
+    return this.recordBuild(state, finalOutput);
+  }
+
+  private recordBuild(state: RunState, finalOutput: FinalizerOutput): RunState['status'] {
+    state.pdfPath = finalOutput.build.pdf_path;
+    state.logPath = finalOutput.build.log_path;
+    return finalOutput.build.status === 'OK' ? 'completed' : 'needs_review';
+  }
+
+  /** A profile's resume tree (from the context cache) and every role template. */
+  async loadRunContext(profileId: string = DEFAULT_PROFILE): Promise<RunContext> {
+    const [resume, templates] = await Promise.all([resumeContexts.get(profileId), loadRoleTemplates()]);
+    return { ...resume, templates };
+  }
+
+  resumeCacheStats(): ResumeCacheStats {
+    return resumeContexts.stats();
+  }
+
+  async listRuns(query: RunIndexQuery = {}): Promise<RunSummary[]> {
+    await this.ensureRunIndex();
+    // Filter, order and limit in the index; only the page's summaries are read
+    const entries = await runIndex.list(query);
+    const summaries = await Promise.all(
+      entries.map((entry) => this.readSummary(path.join(DATA_ROOT, entry.id)).catch(() => null))
+    );
+    return summaries.filter((summary): summary is RunSummary => summary !== null);
+  }
+
+  async rebuildRunIndex(): Promise<{ runs: number; file: string }> {
+    const runs = await runIndex.rebuild((runDir) => this.readSummary(runDir));
+    return { runs, file: runIndex.file };
+  }
+
+  /** The prompt a role would be sent, after compaction, with its estimated token count */
+  async previewPrompt(request: PromptPreviewRequest): Promise<PromptPreview> {
+    const upstream: Partial<Pick<RoleContext, 'reviewer' | 'swot' | 'refiner' | 'judge'>> = {};
+    let jd = request.jobDescription;
+    let profileId = request.profileId;
+    let ats = request.ats;
+    if (request.runId) {
+      const summary = await this.getRun(request.runId);
+      jd = jd ?? summary.config.jobDescription;
+      profileId = profileId ?? summary.config.profileId;
+      ats = ats ?? summary.config.ats;
+      for (const artifact of summary.artifacts) {
+        if (artifact.status === 'succeeded' && artifact.role !== 'finalizer') {
+          Object.assign(upstream, { [artifact.role]: artifact.output });
+        }
+      }
+    }
+    if (!jd) {
+      throw new Error('jobDescription or runId is required');
+    }
+    const role = roleNames.includes(request.role) ? request.role : null;
+    if (!role) {
+      throw new Error(`Unknown role ${request.role}`);
+    }
+
+    const resume = await this.loadRunContext(profileId);
+    const { prompt, compaction } = buildPrompt(role, {
+      jd,
+      resume,
+      ats,
+      reviewer: request.reviewer ?? upstream.reviewer,
+      swot: request.swot ?? upstream.swot,
+      refiner: request.refiner ?? upstream.refiner,
+      judge: request.judge ?? upstream.judge
+    });
+    return {
+      role,
+      system: prompt.system,
+      user: prompt.user,
+      tokens: compaction?.tokens ?? estimateTokens(prompt.system + prompt.user),
+      compaction
+    };
   }
 
   async getRun(runId: string): Promise<RunSummary> {
@@ -392,15 +857,16 @@ export class ResumeRunRouter {
     return summary;
   }
 
-  private async invokeReviewer(runDir: string, state: RunState, resume: ResumeContext) {
+  private async invokeReviewer(runDir: string, state: RunState, resume: RunContext) {
     return this.invokeLLM<ReviewerOutput>('reviewer', reviewerOutputSchema, runDir, state, {
       resume,
       reviewer: undefined,
+      ats: state.config.ats,
       jd: state.config.jobDescription
     });
   }
 
-  private async invokeSwot(runDir: string, state: RunState, resume: ResumeContext, reviewer: ReviewerOutput) {
+  private async invokeSwot(runDir: string, state: RunState, resume: RunContext, reviewer: ReviewerOutput) {
     return this.invokeLLM<SwotOutput>('swot', swotOutputSchema, runDir, state, {
       resume,
       reviewer,
@@ -411,7 +877,7 @@ export class ResumeRunRouter {
   private async invokeRefiner(
     runDir: string,
     state: RunState,
-    resume: ResumeContext,
+    resume: RunContext,
     reviewer: ReviewerOutput,
     swot: SwotOutput,
     prevRefiner?: RefinerOutput,
@@ -425,16 +891,13 @@ export class ResumeRunRouter {
       judge,
       jd: state.config.jobDescription
     });
-    const diffPreview = refiner.diffs
-      .map((diff) => `File: ${diff.target_file}\nType: ${diff.patch_type}\nAnchor: ${diff.anchor}\nContent:\n${diff.content}\n---`)
-      .join('\n');
-    return { refiner, diffPreview };
+    return { refiner, diffPreview: previewDiffs(refiner) };
   }
 
   private async invokeJudge(
     runDir: string,
     state: RunState,
-    resume: ResumeContext,
+    resume: RunContext,
     reviewer: ReviewerOutput,
     swot: SwotOutput,
     refiner: RefinerOutput,
@@ -453,20 +916,34 @@ export class ResumeRunRouter {
   private async invokeFinalizer(
     runDir: string,
     state: RunState,
-    resume: ResumeContext,
+    resume: RunContext,
     refiner: RefinerOutput,
     judge: JudgeOutput,
-    dryRun: boolean
+    dryRun: boolean,
+    invalidAnchors: Map<RefinerDiff, string> = new Map()
   ) {
     const artifacts = state.artifacts.find((a) => a.role === 'finalizer');
     if (artifacts) artifacts.status = 'running';
-    await this.writeState(runDir, state);
+    await this.record(state, { type: 'role', role: 'finalizer', status: 'running' });
 
     const applied: Array<{ path: string; backup: string }> = [];
     const previews: string[] = [];
+    const touched = new Set<string>();
+    if (!dryRun) {
+      await writeFinalizerBackup(runDir, [
+        ...new Set(refiner.diffs.map((diff) => profileTargetPath(resume.root, diff.target_file)))
+      ]);
+    }
 
     for (const diff of refiner.diffs) {
-      const targetPath = path.resolve(__dirname, '..', diff.target_file);
+      const targetPath = profileTargetPath(resume.root, diff.target_file);
+      // Validation ran against the original files; only trust it until an earlier diff edits the file
+      const anchorError = touched.has(targetPath) ? undefined : invalidAnchors.get(diff);
+      touched.add(targetPath);
+      if (anchorError) {
+        previews.push(`Failed to apply ${diff.target_file}: ${anchorError}`);
+        continue;
+      }
       try {
         refinerDiffSchema.parse(diff);
         const result = await applyDiff(targetPath, diff, dryRun);
@@ -479,10 +956,10 @@ export class ResumeRunRouter {
       }
     }
 
-    let buildResult = dryRun ? { status: 'OK' as const, logPath: 'dry-run', pdfPath: null } : { status: 'OK' as const, logPath: path.join(runDir, 'build.log'), pdfPath: path.join(runDir, 'final.pdf') };
+    let buildResult: BuildResult = dryRun ? { status: 'OK' as const, logPath: 'dry-run', pdfPath: null } : { status: 'OK' as const, logPath: path.join(runDir, 'build.log'), pdfPath: path.join(runDir, 'final.pdf') };
 
     if (!dryRun) {
-      buildResult = await runBuild(state.id);
+      buildResult = await runBuild(state.id, resume);
       if (buildResult.status === 'FAILED' && applied.length > 0) {
         const lastChange = applied[applied.length - 1];
         await fs.writeFile(lastChange.path, lastChange.backup, 'utf8');
@@ -496,19 +973,22 @@ export class ResumeRunRouter {
       build: {
         status: buildResult.status,
         log_path: buildResult.logPath,
-        pdf_path: buildResult.pdfPath
+        pdf_path: buildResult.pdfPath,
+        cache: buildResult.cache,
+        duration_ms: buildResult.durationMs
       }
     });
 
-    await fs.writeFile(path.join(runDir, 'finalizer.json'), JSON.stringify(finalOutput, null, 2));
+    const storedPath = path.join(runDir, 'finalizer.json');
+    await fs.writeFile(storedPath, JSON.stringify(finalOutput, null, 2));
+    const status = finalOutput.build.status === 'OK' ? 'succeeded' : 'failed';
     if (artifacts) {
-      artifacts.status = finalOutput.build.status === 'OK' ? 'succeeded' : 'failed';
+      artifacts.status = status;
       artifacts.output = finalOutput;
-      artifacts.storedPath = path.join(runDir, 'finalizer.json');
+      artifacts.storedPath = storedPath;
     }
     state.diffSummary = previews.length > 0 ? previews.join('\n\n') : null;
-    state.updatedAt = nowIso();
-    await this.writeState(runDir, state);
+    await this.record(state, { type: 'role', role: 'finalizer', status, output: finalOutput, storedPath });
     return finalOutput;
   }
 
@@ -517,51 +997,112 @@ export class ResumeRunRouter {
     schema: { parse: (input: unknown) => T },
     runDir: string,
     state: RunState,
-    context: {
-      resume: ResumeContext;
-      reviewer?: ReviewerOutput;
-      swot?: SwotOutput;
-      refiner?: RefinerOutput;
-      judge?: JudgeOutput;
-      jd: string;
-    }
+    context: RoleContext
   ): Promise<T> {
     const artifact = state.artifacts.find((item) => item.role === role);
     if (!artifact) {
       throw new Error(`Artifact for role ${role} missing`);
     }
     artifact.status = 'running';
-    state.updatedAt = nowIso();
-    await this.writeState(runDir, state);
+    await this.record(state, { type: 'role', role, status: 'running' });
 
-    const promptParts = buildPrompt(role, context);
-    const roleTemplate = await readRoleTemplate(role);
+    let call: RoleCall<T>;
+    try {
+      call = await this.callRole(role, schema, state, context);
+    } catch (error) {
+      artifact.status = 'failed';
+      await this.record(state, { type: 'role', role, status: 'failed', error: (error as Error).message });
+      throw error;
+    }
+    await this.recordRole(role, runDir, state, call);
+    return call.output;
+  }
 
-    const providerId = state.config.providers[role];
+  /** Prompt, call (or replay from cache) and validate one role without touching run state. */
+  private async callRole<T>(
+    role: RoleName,
+    schema: { parse: (input: unknown) => T },
+    state: RunState,
+    context: RoleContext
+  ): Promise<RoleCall<T>> {
+    const { prompt, compaction } = buildPrompt(role, context);
+    const promptTokens = compaction?.tokens ?? estimateTokens(prompt.system + prompt.user);
+
+    const configured = state.config.providers[role];
+    const primary = configured === 'auto' ? this.pickProvider(role) : configured;
+    const priority = priorityOf(state.config);
+    const streamFor = STREAM_COMPLETIONS ? this.roleStream(role, state) : () => undefined;
+    const attempt = (providerId: string) =>
+      this.attemptRole(role, schema, providerId, prompt, priority, promptTokens, streamFor(providerId)).then((call) => ({
+        ...call,
+        promptTokens
+      }));
+    if (HEDGE_AFTER_MS > 0) {
+      return this.hedge(role, primary, attempt);
+    }
+    return attempt(primary);
+  }
+
+  /**
+   * One provider call for a role: cache lookup, request (through admission
+   * control, at the run's priority, streamed into `stream` when given), JSON
+   * parse and schema check
+   */
+  private async attemptRole<T>(
+    role: RoleName,
+    schema: { parse: (input: unknown) => T },
+    providerId: string,
+    prompt: Prompt,
+    priority: Priority,
+    promptTokens: number,
+    stream?: StreamSink
+  ): Promise<RoleCall<T>> {
     const provider = providers[providerId];
     if (!provider) {
       throw new Error(`Provider ${providerId} not implemented`);
     }
 
-    const systemSections = [roleTemplate.trim()];
-    if (promptParts.system && promptParts.system.trim().length > 0) {
-      systemSections.push(promptParts.system.trim());
-    }
-    systemSections.push('Follow the schema strictly.');
-
-    const prompt: Prompt = {
-      system: systemSections.filter(Boolean).join('\n\n'),
-      user: promptParts.user
-    };
-
     const options: CompletionOptions = {
       model: this.resolveModel(providerId, role),
       temperature: 0.2,
       max_tokens: 2048,
-      timeoutMs: 60000
+      timeoutMs: 60000,
+      stream
     };
 
-    const response = await provider(prompt, options);
+    const cacheInput = {
+      role,
+      provider: providerId,
+      model: options.model,
+      temperature: options.temperature ?? 0.2,
+      prompt
+    };
+    const cacheKey = llmCache.keyFor(cacheInput);
+    const started = Date.now();
+    const cached = await llmCache.get(cacheKey);
+    let response = cached;
+    if (!response) {
+      const cost = promptTokens + (options.max_tokens ?? 0);
+      response = await admission.run(
+        providerId,
+        priority,
+        cost,
+        async () => {
+          // Latency stats cover the provider, not the time spent queued for it
+          const sent = Date.now();
+          try {
+            const result = await provider(prompt, options);
+            providerRouter.record(providerId, options.model, Date.now() - sent, 'ok');
+            return result;
+          } catch (error) {
+            providerRouter.record(providerId, options.model, Date.now() - sent, isTimeout(error) ? 'timeout' : 'error');
+            throw error;
+          }
+        },
+        (result) => usageTokens(result.usage)
+      );
+    }
+    const durationMs = Date.now() - started;
     let parsed: unknown;
     try {
       parsed = JSON.parse(response.content);
@@ -570,16 +1111,122 @@ export class ResumeRunRouter {
     }
 
     const validated = schema.parse(parsed);
+    if (!cached) {
+      // Only responses that passed the schema are worth replaying
+      await llmCache.set(cacheKey, cacheInput, response);
+    }
+    return { output: validated, provider: providerId, durationMs, cacheHit: cached !== null };
+  }
+
+  /**
+   * Stream sinks for the attempts at one role. Each completed field or array
+   * element of the output (a reviewer keyword, a SWOT item, a refiner diff)
+   * is published as a `partial` event while the rest is still generating.
+   * With a hedge, only the first provider to stream is shown.
+   */
+  private roleStream(role: RoleName, state: RunState): (providerId: string) => StreamSink {
+    let owner: string | null = null;
+    return (providerId) => {
+      const parser = new PartialJsonParser((partial) =>
+        state.stream.append({ type: 'partial', role, provider: providerId, ...partial })
+      );
+      return {
+        reset: () => {
+          parser.reset();
+          if (owner === providerId) state.stream.append({ type: 'reset', role, provider: providerId });
+        },
+        write: (chunk) => {
+          owner ??= providerId;
+          if (owner === providerId) parser.write(chunk);
+        }
+      };
+    };
+  }
+
+  /** Fastest healthy configured provider for a role, for the `auto` provider setting */
+  private pickProvider(role: RoleName): string {
+    const [best] = providerRouter.rank((providerId) => this.resolveModel(providerId, role));
+    if (!best) {
+      throw new Error(`No provider configured for role ${role}; set one of ${Object.values(PROVIDER_KEYS).join(', ')}`);
+    }
+    return best;
+  }
+
+  /**
+   * Hedged call: if the primary provider has not produced a schema-valid
+   * answer after HEDGE_AFTER_MS (or has already failed), fire the same role at
+   * the best other provider and keep whichever valid answer arrives first.
+   */
+  private hedge<T>(role: RoleName, primary: string, attempt: (providerId: string) => Promise<RoleCall<T>>): Promise<RoleCall<T>> {
+    return new Promise<RoleCall<T>>((resolve, reject) => {
+      const errors: unknown[] = [];
+      let pending = 0;
+      let settled = false;
+      let hedged = false;
+
+      const fail = () => {
+        if (settled || pending > 0) return;
+        settled = true;
+        reject(errors[0] ?? new Error(`No provider available to hedge role ${role}`));
+      };
+      const launch = (providerId: string) => {
+        pending += 1;
+        attempt(providerId).then(
+          (call) => {
+            pending -= 1;
+            if (settled) return;
+            settled = true;
+            clearTimeout(timer);
+            resolve(call);
+          },
+          (error) => {
+            pending -= 1;
+            errors.push(error);
+            if (!hedged) startHedge();
+            else fail();
+          }
+        );
+      };
+      const startHedge = () => {
+        if (hedged || settled) return;
+        hedged = true;
+        clearTimeout(timer);
+        const [backup] = providerRouter.rank((providerId) => this.resolveModel(providerId, role), [primary]);
+        if (backup) launch(backup);
+        else fail();
+      };
+
+      const timer = setTimeout(startHedge, HEDGE_AFTER_MS);
+      launch(primary);
+    });
+  }
+
+  private async recordRole<T>(role: RoleName, runDir: string, state: RunState, call: RoleCall<T>) {
+    const artifact = state.artifacts.find((item) => item.role === role);
+    if (!artifact) {
+      throw new Error(`Artifact for role ${role} missing`);
+    }
     const artifactPath = path.join(runDir, `${role}.json`);
-    await fs.writeFile(artifactPath, JSON.stringify(validated, null, 2));
+    await fs.writeFile(artifactPath, JSON.stringify(call.output, null, 2));
 
     artifact.status = 'succeeded';
-    artifact.output = validated;
+    artifact.output = call.output;
     artifact.storedPath = artifactPath;
-    state.updatedAt = nowIso();
-    await this.writeState(runDir, state);
-
-    return validated;
+    artifact.provider = call.provider;
+    artifact.durationMs = call.durationMs;
+    artifact.cacheHit = call.cacheHit;
+    artifact.promptTokens = call.promptTokens;
+    await this.record(state, {
+      type: 'role',
+      role,
+      status: 'succeeded',
+      output: call.output,
+      storedPath: artifactPath,
+      provider: call.provider,
+      durationMs: call.durationMs,
+      cacheHit: call.cacheHit,
+      promptTokens: call.promptTokens
+    });
   }
 
   private resolveModel(providerId: string, role: RoleName): string {
@@ -591,28 +1238,62 @@ export class ResumeRunRouter {
     return defaults[providerId] ?? 'gpt-4o-mini';
   }
 
-  private async writeState(runDir: string, state: RunState) {
-    const summary: RunSummary = {
+  private summaryOf(state: RunState): RunSummary {
+    return {
       id: state.id,
       status: state.status,
       config: state.config,
       artifacts: state.artifacts,
       createdAt: state.createdAt,
-      updatedAt: nowIso(),
+      updatedAt: state.updatedAt,
       pdfPath: state.pdfPath ?? null,
       logPath: state.logPath ?? null,
-      diffSummary: state.diffSummary ?? null
+      diffSummary: state.diffSummary ?? null,
+      error: state.error ?? null,
+      stages: state.stages
     };
-    await fs.writeFile(path.join(runDir, 'summary.json'), JSON.stringify(summary, null, 2));
   }
 
-  private async finalizeState(runDir: string, state: RunState) {
+  /**
+   * Append one state change to the run's journal. summary.json is only
+   * rewritten as a snapshot every few events, or now when `snapshot` is set.
+   */
+  private async record(state: RunState, event: JournalEventInput, snapshot = false) {
     state.updatedAt = nowIso();
-    await this.writeState(runDir, state);
+    const summary = this.summaryOf(state);
+    await state.journal.append({ ...event, at: state.updatedAt } as JournalEvent, summary, snapshot);
+    if (event.type === 'role') {
+      const { role, status, output, error, provider } = event;
+      state.stream.append({ type: 'role', role, status, output, error, provider });
+    } else if (event.type === 'state' && event.status) {
+      state.stream.append({ type: 'state', status: event.status, error: event.error });
+    } else if (event.type === 'created' || event.type === 'resumed') {
+      state.stream.append({ type: 'state', status: 'running' });
+    }
+    await this.ensureRunIndex();
+    await runIndex.record(summary);
+  }
+
+  private publish(event: RunStreamEvent) {
+    for (const listener of this.streamListeners) {
+      try {
+        listener(event);
+      } catch (error) {
+        // A failing listener must not break the run
+      }
+    }
+  }
+
+  private ensureRunIndex(): Promise<void> {
+    // Build the index from existing summaries the first time it is missing
+    this.runIndexReady ??= fs.access(runIndex.file).catch(async () => {
+      await this.rebuildRunIndex();
+    });
+    return this.runIndexReady;
   }
 
   private async readSummary(runDir: string): Promise<RunSummary> {
-    const summary = await readJsonFile<RunSummary>(path.join(runDir, 'summary.json'));
+    const summary = await readRunSummary(runDir);
     if (!summary) {
       throw new Error(`No summary at ${runDir}`);
     }
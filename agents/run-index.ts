@@ -0,0 +1,344 @@
+import { createReadStream, type Stats } from 'fs';
+import fs from 'fs/promises';
+import path from 'path';
+import { DEFAULT_PROFILE } from './resume-profiles';
+import type { RunSummary } from './schemas';
+
+type RunStatus = RunSummary['status'];
+
+export interface RunIndexEntry {
+  id: string;
+  status: RunStatus;
+  createdAt: string;
+  updatedAt: string;
+  profileId?: string;
+}
+
+export interface RunIndexQuery {
+  status?: RunStatus;
+  profileId?: string;
+  /** Page size, 1-100 (default 100) */
+  limit?: number;
+}
+
+export interface RunIndexOptions {
+  file?: string;
+  compactAfter?: number;
+}
+
+const DEFAULT_COMPACT_AFTER = 1000;
+/** Page size bounds of list(), the same as the Python list_runs tools */
+const DEFAULT_LIST_LIMIT = 100;
+const MAX_LIST_LIMIT = 100;
+/** A compaction lock older than this was left by a process that died mid-compaction */
+const COMPACT_LOCK_STALE_MS = 60_000;
+/** Attempts at appending a line while other processes keep compacting the file under it */
+const APPEND_ATTEMPTS = 3;
+const COMPACT_POLL_MS = 20;
+
+/** Newest first: createdAt descending, id as a tie breaker */
+function compareEntries(a: RunIndexEntry, b: RunIndexEntry): number {
+  if (a.createdAt !== b.createdAt) return a.createdAt < b.createdAt ? 1 : -1;
+  return a.id < b.id ? 1 : a.id > b.id ? -1 : 0;
+}
+
+function toEntry(summary: Pick<RunSummary, 'id' | 'status' | 'createdAt' | 'updatedAt' | 'config'>): RunIndexEntry {
+  return {
+    id: summary.id,
+    status: summary.status,
+    createdAt: summary.createdAt,
+    updatedAt: summary.updatedAt,
+    profileId: summary.config?.profileId ?? DEFAULT_PROFILE
+  };
+}
+
+/** Identity of the file at a path: a rewrite renamed over it can reuse the old inode number */
+function fileIdOf(stat: Stats): string {
+  return `${stat.ino}:${stat.birthtimeMs}`;
+}
+
+/** Key of the (profile, status) bucket; NUL cannot appear in a profile id */
+function profileStatusKey(profileId: string, status: RunStatus): string {
+  return `${profileId}\u0000${status}`;
+}
+
+function bucketFor<K>(buckets: Map<K, RunIndexEntry[]>, key: K): RunIndexEntry[] {
+  let bucket = buckets.get(key);
+  if (!bucket) {
+    bucket = [];
+    buckets.set(key, bucket);
+  }
+  return bucket;
+}
+
+function insertSorted(list: RunIndexEntry[], entry: RunIndexEntry) {
+  let lo = 0;
+  let hi = list.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (compareEntries(list[mid], entry) < 0) lo = mid + 1;
+    else hi = mid;
+  }
+  list.splice(lo, 0, entry);
+}
+
+function removeSorted(list: RunIndexEntry[], entry: RunIndexEntry) {
+  let lo = 0;
+  let hi = list.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (compareEntries(list[mid], entry) < 0) lo = mid + 1;
+    else hi = mid;
+  }
+  if (list[lo]?.id === entry.id) list.splice(lo, 1);
+}
+
+/**
+ * Append-only index of run ids, statuses and timestamps (data/runs/index.jsonl).
+ * writeState appends one line per state change; later lines win. Lists are
+ * answered from in-memory arrays kept sorted by createdAt, one overall, one
+ * per status, one per resume profile and one per profile and status, so a
+ * page (at most 100 entries) costs O(log n + limit) instead of a directory
+ * scan.
+ *
+ * Several processes (bridge workers, the HTTP server) append to the same
+ * file; before answering, each one replays whatever was appended since it last
+ * read. Once the log holds compactAfter more lines than live runs it is
+ * rewritten atomically by one process at a time, holding index.jsonl.lock;
+ * an append made while the lock is held is written again if it landed in the
+ * file the rewrite replaced. The run summaries (summary.json and its journal)
+ * stay the source of truth: rebuild() recreates the index from them if it is
+ * lost or out of date.
+ */
+export class RunIndex {
+  readonly file: string;
+  readonly compactAfter: number;
+
+  private entries = new Map<string, RunIndexEntry>();
+  private all: RunIndexEntry[] = [];
+  private byStatus = new Map<RunStatus, RunIndexEntry[]>();
+  private byProfile = new Map<string, RunIndexEntry[]>();
+  private byProfileStatus = new Map<string, RunIndexEntry[]>();
+  private offset = 0;
+  private fileId = '';
+  private lines = 0;
+  private refreshing: Promise<void> = Promise.resolve();
+
+  constructor(private readonly runsRoot: string, options: RunIndexOptions = {}) {
+    this.file = options.file ?? process.env.RUN_INDEX_PATH ?? path.join(runsRoot, 'index.jsonl');
+    this.compactAfter = options.compactAfter ?? DEFAULT_COMPACT_AFTER;
+  }
+
+  async record(summary: Pick<RunSummary, 'id' | 'status' | 'createdAt' | 'updatedAt' | 'config'>): Promise<void> {
+    await this.refresh();
+    const entry = toEntry(summary);
+    const existing = this.entries.get(summary.id);
+    if (
+      existing &&
+      existing.status === entry.status &&
+      existing.createdAt === entry.createdAt &&
+      existing.profileId === entry.profileId
+    ) {
+      // Only status changes matter for listing; skip per-role progress writes
+      return;
+    }
+    await this.append(`${JSON.stringify(entry)}\n`);
+    // Our own append is replayed on the next refresh along with everyone else's
+    await this.refresh();
+
+    if (this.lines - this.entries.size > this.compactAfter) {
+      await this.compact();
+    }
+  }
+
+  async list(query: RunIndexQuery = {}): Promise<RunIndexEntry[]> {
+    await this.refresh();
+    let source: RunIndexEntry[];
+    if (query.profileId && query.status) {
+      source = this.byProfileStatus.get(profileStatusKey(query.profileId, query.status)) ?? [];
+    } else if (query.profileId) {
+      source = this.byProfile.get(query.profileId) ?? [];
+    } else {
+      source = query.status ? this.byStatus.get(query.status) ?? [] : this.all;
+    }
+    const limit = Math.max(1, Math.min(Math.floor(query.limit || DEFAULT_LIST_LIMIT), MAX_LIST_LIMIT));
+    return source.slice(0, limit);
+  }
+
+  async size(): Promise<number> {
+    await this.refresh();
+    return this.entries.size;
+  }
+
+  /** Recreate the index from every data/runs/<id>/summary.json */
+  async rebuild(readSummary: (runDir: string) => Promise<RunSummary>): Promise<number> {
+    await fs.mkdir(this.runsRoot, { recursive: true });
+    const names = await fs.readdir(this.runsRoot, { withFileTypes: true });
+    const entries: RunIndexEntry[] = [];
+    for (const dirent of names) {
+      if (!dirent.isDirectory()) continue;
+      try {
+        const summary = await readSummary(path.join(this.runsRoot, dirent.name));
+        entries.push(toEntry(summary));
+      } catch (error) {
+        // Runs without a (valid) summary never made it into the listing either
+      }
+    }
+    while (!(await this.underLock(() => this.writeAll(entries)))) await this.compacted();
+    return entries.length;
+  }
+
+  private refresh(): Promise<void> {
+    // Serialize replays so concurrent calls never apply the same bytes twice
+    this.refreshing = this.refreshing.catch(() => undefined).then(() => this.catchUp());
+    return this.refreshing;
+  }
+
+  private async catchUp() {
+    let stat;
+    try {
+      stat = await fs.stat(this.file);
+    } catch (error) {
+      this.reset();
+      return;
+    }
+
+    // Compacted or replaced by another process: start over
+    if (fileIdOf(stat) !== this.fileId || stat.size < this.offset) {
+      this.reset();
+      this.fileId = fileIdOf(stat);
+    }
+    if (stat.size > this.offset) {
+      await this.replay(this.offset, stat.size);
+    }
+  }
+
+  /**
+   * Append one line. A compaction holding the lock when the line was written
+   * may have read the file before it; once the compaction is over, a line
+   * that went to the file it replaced is written again (if the compaction
+   * did pick it up, the duplicate is harmless).
+   */
+  private async append(line: string) {
+    for (let attempt = 0; attempt < APPEND_ATTEMPTS; attempt += 1) {
+      const handle = await fs.open(this.file, 'a');
+      let current;
+      let written;
+      try {
+        await handle.appendFile(line, 'utf8');
+        await this.compacted();
+        // Still open, so the file we wrote to cannot have given its inode number to the rewrite
+        written = await handle.stat();
+        current = await fs.stat(this.file).catch(() => null);
+      } finally {
+        await handle.close();
+      }
+      if (!current || current.ino === written.ino) return;
+    }
+  }
+
+  /** Wait for a compaction in any process to finish (or its lock to go stale) */
+  private async compacted() {
+    for (;;) {
+      const stat = await fs.stat(`${this.file}.lock`).catch(() => null);
+      if (!stat || Date.now() - stat.mtimeMs > COMPACT_LOCK_STALE_MS) return;
+      await new Promise((resolve) => setTimeout(resolve, COMPACT_POLL_MS));
+    }
+  }
+
+  private async replay(start: number, end: number) {
+    const chunks: Buffer[] = [];
+    await new Promise<void>((resolve, reject) => {
+      createReadStream(this.file, { start, end: end - 1 })
+        .on('data', (chunk) => chunks.push(Buffer.from(chunk)))
+        .on('end', resolve)
+        .on('error', reject);
+    });
+    const text = Buffer.concat(chunks).toString('utf8');
+    // Only consume complete lines; a concurrent append may still be in progress
+    const complete = text.lastIndexOf('\n') + 1;
+    for (const line of text.slice(0, complete).split('\n')) {
+      if (!line) continue;
+      try {
+        this.apply(JSON.parse(line) as RunIndexEntry);
+      } catch (error) {
+        // Skip torn or corrupt lines
+      }
+      this.lines += 1;
+    }
+    this.offset = start + Buffer.byteLength(text.slice(0, complete));
+  }
+
+  private apply(entry: RunIndexEntry) {
+    // Entries written before profiles existed belong to the default resume
+    entry.profileId ??= DEFAULT_PROFILE;
+    const previous = this.entries.get(entry.id);
+    if (previous) {
+      removeSorted(this.all, previous);
+      const bucket = this.byStatus.get(previous.status);
+      if (bucket) removeSorted(bucket, previous);
+      const profileBucket = this.byProfile.get(previous.profileId!);
+      if (profileBucket) removeSorted(profileBucket, previous);
+      const pairBucket = this.byProfileStatus.get(profileStatusKey(previous.profileId!, previous.status));
+      if (pairBucket) removeSorted(pairBucket, previous);
+    }
+    this.entries.set(entry.id, entry);
+    insertSorted(this.all, entry);
+    insertSorted(bucketFor(this.byStatus, entry.status), entry);
+    insertSorted(bucketFor(this.byProfile, entry.profileId), entry);
+    insertSorted(bucketFor(this.byProfileStatus, profileStatusKey(entry.profileId, entry.status)), entry);
+  }
+
+  private reset() {
+    this.entries.clear();
+    this.all = [];
+    this.byStatus.clear();
+    this.byProfile.clear();
+    this.byProfileStatus.clear();
+    this.offset = 0;
+    this.fileId = '';
+    this.lines = 0;
+  }
+
+  private async compact() {
+    // If another process is compacting, the next record() tries again
+    await this.underLock(async () => {
+      // Catch up under the lock: another process may have compacted since our last read
+      await this.refresh();
+      if (this.lines - this.entries.size > this.compactAfter) {
+        await this.writeAll([...this.entries.values()]);
+      }
+    });
+  }
+
+  /** Run `rewrite` holding index.jsonl.lock; false if another process holds it */
+  private async underLock(rewrite: () => Promise<void>): Promise<boolean> {
+    const lock = `${this.file}.lock`;
+    await fs.mkdir(path.dirname(this.file), { recursive: true });
+    try {
+      await (await fs.open(lock, 'wx')).close();
+    } catch (error) {
+      if ((error as NodeJS.ErrnoException).code !== 'EEXIST') throw error;
+      const stat = await fs.stat(lock).catch(() => null);
+      if (stat && Date.now() - stat.mtimeMs > COMPACT_LOCK_STALE_MS) await fs.rm(lock, { force: true });
+      return false;
+    }
+    try {
+      await rewrite();
+      return true;
+    } finally {
+      await fs.rm(lock, { force: true });
+    }
+  }
+
+  private async writeAll(entries: RunIndexEntry[]) {
+    await fs.mkdir(path.dirname(this.file), { recursive: true });
+    const body = entries.map((entry) => JSON.stringify(entry)).join('\n');
+    const tmp = `${this.file}.${process.pid}.tmp`;
+    await fs.writeFile(tmp, body ? `${body}\n` : '', 'utf8');
+    await fs.rename(tmp, this.file);
+    // Force the next catch-up to reload from the new file
+    this.fileId = '';
+    await this.refresh();
+  }
+}
@@ -0,0 +1,267 @@
+import fs from 'fs/promises';
+import os from 'os';
+import path from 'path';
+import type { RoleName, RunSummary } from './schemas';
+
+const SNAPSHOT_EVERY = Math.max(1, Number(process.env.RUN_JOURNAL_SNAPSHOT_EVERY ?? 8));
+
+export const JOURNAL_FILE = 'journal.jsonl';
+export const SUMMARY_FILE = 'summary.json';
+export const LOCK_FILE = 'run.lock';
+
+/** A run lock not refreshed for this long was left by a process that is gone */
+const LOCK_STALE_MS = 120000;
+const LOCK_HEARTBEAT_MS = 30000;
+
+type RunStatus = RunSummary['status'];
+type ArtifactStatus = RunSummary['artifacts'][number]['status'];
+
+export type JournalEvent =
+  | { type: 'created'; at: string; summary: RunSummary }
+  | {
+      type: 'role';
+      at: string;
+      role: RoleName;
+      status: ArtifactStatus;
+      output?: unknown;
+      error?: string;
+      storedPath?: string;
+      provider?: string;
+      durationMs?: number;
+      cacheHit?: boolean;
+      promptTokens?: number;
+    }
+  | {
+      type: 'state';
+      at: string;
+      status?: RunStatus;
+      error?: string;
+      pdfPath?: string | null;
+      logPath?: string | null;
+      diffSummary?: string | null;
+      stages?: RunSummary['stages'];
+    }
+  | { type: 'resumed'; at: string; reused: string[]; pending: RoleName[] };
+
+/** An event before the journal stamps it */
+export type JournalEventInput = JournalEvent extends infer E ? (E extends JournalEvent ? Omit<E, 'at'> : never) : never;
+
+/** A summary with the events after its snapshot applied; `created` starts from scratch */
+export function applyEvent(summary: RunSummary | null, event: JournalEvent): RunSummary | null {
+  if (event.type === 'created') {
+    return structuredClone(event.summary);
+  }
+  if (!summary) return null;
+  summary.updatedAt = event.at;
+  if (event.type === 'role') {
+    const { type, at, role, ...fields } = event;
+    const artifact = summary.artifacts.find((item) => item.role === role);
+    if (artifact) Object.assign(artifact, fields);
+  } else if (event.type === 'state') {
+    const { type, at, ...fields } = event;
+    Object.assign(summary, fields);
+  } else if (event.type === 'resumed') {
+    summary.status = 'running';
+    summary.error = null;
+    summary.artifacts = summary.artifacts.map((artifact) =>
+      event.pending.includes(artifact.role) ? { role: artifact.role, status: 'pending' } : artifact
+    );
+  }
+  return summary;
+}
+
+function parseLines(text: string): JournalEvent[] {
+  const events: JournalEvent[] = [];
+  for (const line of text.split('\n')) {
+    if (!line.trim()) continue;
+    try {
+      events.push(JSON.parse(line) as JournalEvent);
+    } catch (error) {
+      // A line torn by a crash mid-append; the events around it stand
+    }
+  }
+  return events;
+}
+
+export async function readJournal(runDir: string): Promise<JournalEvent[]> {
+  try {
+    return parseLines(await fs.readFile(path.join(runDir, JOURNAL_FILE), 'utf8'));
+  } catch (error) {
+    return [];
+  }
+}
+
+/**
+ * Current summary of a run: the last summary.json snapshot plus the journal
+ * events written after it. Runs from before the journal only have the
+ * snapshot; a missing or torn snapshot is rebuilt from the whole journal.
+ */
+export async function readRunSummary(runDir: string): Promise<RunSummary | null> {
+  let snapshot: RunSummary | null = null;
+  try {
+    snapshot = JSON.parse(await fs.readFile(path.join(runDir, SUMMARY_FILE), 'utf8')) as RunSummary;
+  } catch (error) {
+    snapshot = null;
+  }
+  if (snapshot && snapshot.journalSeq === undefined) {
+    return snapshot;
+  }
+  const events = await readJournal(runDir);
+  let summary = snapshot;
+  for (const event of events.slice(snapshot?.journalSeq ?? 0)) {
+    summary = applyEvent(summary, event);
+  }
+  return summary;
+}
+
+/**
+ * Completed stage outputs a resumed run can reuse, keyed by the stage that
+ * produced them. The journal tells the first refiner/judge round from the
+ * revision; without one only reviewer and swot (and a refiner the judge
+ * accepted) are trusted. The finalizer always runs again.
+ */
+export function resumeSeeds(summary: RunSummary, events: JournalEvent[]): Record<string, unknown> {
+  const seeds: Record<string, unknown> = {};
+  const roles = events.filter(
+    (event): event is Extract<JournalEvent, { type: 'role' }> => event.type === 'role' && event.status === 'succeeded'
+  );
+  if (roles.length > 0) {
+    const rounds: Record<string, number> = {};
+    for (const event of roles) {
+      if (event.role === 'finalizer') continue;
+      const round = (rounds[event.role] = (rounds[event.role] ?? 0) + 1);
+      const stage = round === 1 ? event.role : event.role === 'refiner' ? 'refiner_revise' : `${event.role}_${round}`;
+      seeds[stage] = event.output;
+    }
+    return seeds;
+  }
+
+  for (const artifact of summary.artifacts) {
+    if (artifact.status === 'succeeded' && artifact.output !== undefined && artifact.role !== 'finalizer') {
+      seeds[artifact.role] = artifact.output;
+    }
+  }
+  const judge = seeds.judge as { status?: string } | undefined;
+  if (judge?.status === 'REVISE') {
+    // Unknown whether the stored refiner is the first round or the revision
+    delete seeds.refiner;
+    delete seeds.judge;
+  }
+  return seeds;
+}
+
+/**
+ * Append-only event log of one run. Every state change is one JSON line in
+ * journal.jsonl; summary.json is only rewritten as a snapshot every
+ * RUN_JOURNAL_SNAPSHOT_EVERY events (and when asked, e.g. on creation and
+ * when the run ends), recording how many events it covers in `journalSeq`.
+ * Appends and snapshots are serialized so a snapshot never skips an event.
+ */
+export class RunJournal {
+  private chain: Promise<unknown> = Promise.resolve();
+  private sinceSnapshot = 0;
+
+  constructor(readonly runDir: string, private seq = 0, private readonly snapshotEvery = SNAPSHOT_EVERY) {}
+
+  /** Journal of an existing run, continuing after its last event */
+  static async open(runDir: string): Promise<RunJournal> {
+    const file = path.join(runDir, JOURNAL_FILE);
+    const text = await fs.readFile(file, 'utf8').catch(() => '');
+    if (text && !text.endsWith('\n')) {
+      // Terminate a torn last line so the next event starts on its own line
+      await fs.appendFile(file, '\n', 'utf8');
+    }
+    return new RunJournal(runDir, parseLines(text).length);
+  }
+
+  append(event: JournalEvent, summary: RunSummary, snapshot = false): Promise<void> {
+    const next = this.chain.then(async () => {
+      await fs.appendFile(path.join(this.runDir, JOURNAL_FILE), `${JSON.stringify(event)}\n`, 'utf8');
+      this.seq += 1;
+      this.sinceSnapshot += 1;
+      if (snapshot || this.sinceSnapshot >= this.snapshotEvery) {
+        await this.writeSnapshot(summary);
+      }
+    });
+    // Keep the chain going after a failed write; the caller still sees the error
+    this.chain = next.catch(() => undefined);
+    return next;
+  }
+
+  private async writeSnapshot(summary: RunSummary) {
+    const file = path.join(this.runDir, SUMMARY_FILE);
+    const tmp = `${file}.${process.pid}.tmp`;
+    await fs.writeFile(tmp, JSON.stringify({ ...summary, journalSeq: this.seq }, null, 2));
+    // Readers never see a half-written snapshot
+    await fs.rename(tmp, file);
+    this.sinceSnapshot = 0;
+  }
+}
+
+function processAlive(pid: number): boolean {
+  try {
+    process.kill(pid, 0);
+    return true;
+  } catch (error) {
+    return (error as NodeJS.ErrnoException).code === 'EPERM';
+  }
+}
+
+/** Lock files this process holds */
+const heldLocks = new Set<string>();
+
+/** Whether the lock file belongs to a process that is still running the run */
+async function lockHeld(file: string): Promise<boolean> {
+  try {
+    const [stat, text] = await Promise.all([fs.stat(file), fs.readFile(file, 'utf8')]);
+    if (Date.now() - stat.mtimeMs > LOCK_STALE_MS) return false;
+    const owner = JSON.parse(text) as { pid?: number; host?: string };
+    if (owner.host !== os.hostname() || typeof owner.pid !== 'number') return true;
+    // Our own pid on a lock this process does not hold was left by an earlier process with that pid
+    return owner.pid === process.pid ? heldLocks.has(file) : processAlive(owner.pid);
+  } catch (error) {
+    // Gone meanwhile, or torn by a crash while it was written
+    return false;
+  }
+}
+
+/**
+ * Marks a run directory as being executed, so no other router process (a
+ * second bridge worker, the orchestrator server) starts another pipeline on
+ * it. The holder refreshes the file's mtime while the run goes on; a lock
+ * whose process is gone, or that was not refreshed for LOCK_STALE_MS, is
+ * taken over. mcp-server/job_queue.py reads the same file.
+ */
+export class RunLock {
+  private constructor(private readonly file: string, private readonly heartbeat: NodeJS.Timeout) {}
+
+  static async acquire(runDir: string, runId: string): Promise<RunLock> {
+    const file = path.join(runDir, LOCK_FILE);
+    const owner = JSON.stringify({ pid: process.pid, host: os.hostname(), at: new Date().toISOString() });
+    for (let attempt = 0; ; attempt++) {
+      try {
+        await fs.writeFile(file, owner, { flag: 'wx' });
+        break;
+      } catch (error) {
+        if ((error as NodeJS.ErrnoException).code !== 'EEXIST') throw error;
+        if (attempt > 0 || (await lockHeld(file))) {
+          throw new Error(`Run ${runId} is still in progress`);
+        }
+        await fs.rm(file, { force: true });
+      }
+    }
+    heldLocks.add(file);
+    const heartbeat = setInterval(() => {
+      const now = new Date();
+      fs.utimes(file, now, now).catch(() => undefined);
+    }, LOCK_HEARTBEAT_MS);
+    heartbeat.unref();
+    return new RunLock(file, heartbeat);
+  }
+
+  async release() {
+    clearInterval(this.heartbeat);
+    heldLocks.delete(this.file);
+    await fs.rm(this.file, { force: true });
+  }
+}
@@ -0,0 +1,98 @@
+import fs from 'fs/promises';
+import path from 'path';
+import type { RoleName, RunSummary } from './schemas';
+
+export const STREAM_FILE = 'stream.jsonl';
+
+type RunStatus = RunSummary['status'];
+type ArtifactStatus = RunSummary['artifacts'][number]['status'];
+
+export type RunStreamEvent = { seq: number; at: string; runId: string } & (
+  /** A complete piece of a role output that is still streaming: a field, or one element of an array field */
+  | { type: 'partial'; role: RoleName; provider: string; field: string; index?: number; value: unknown }
+  /** The role's stream restarted (a retried call); partials shown so far are void */
+  | { type: 'reset'; role: RoleName; provider: string }
+  | { type: 'role'; role: RoleName; status: ArtifactStatus; output?: unknown; error?: string; provider?: string }
+  | { type: 'state'; status: RunStatus; error?: string }
+);
+
+/** An event before the stream numbers and stamps it */
+export type RunStreamEventInput = RunStreamEvent extends infer E
+  ? E extends RunStreamEvent
+    ? Omit<E, 'seq' | 'at' | 'runId'>
+    : never
+  : never;
+
+function parseLines(text: string): RunStreamEvent[] {
+  const events: RunStreamEvent[] = [];
+  for (const line of text.split('\n')) {
+    if (!line.trim()) continue;
+    try {
+      events.push(JSON.parse(line) as RunStreamEvent);
+    } catch (error) {
+      // A line torn by a crash or still being written
+    }
+  }
+  return events;
+}
+
+/** Stream events of a run after `afterSeq`, oldest first */
+export async function readStream(runDir: string, afterSeq = 0): Promise<RunStreamEvent[]> {
+  const text = await fs.readFile(path.join(runDir, STREAM_FILE), 'utf8').catch(() => '');
+  return parseLines(text).filter((event) => event.seq > afterSeq);
+}
+
+/**
+ * Live view of a run for clients that show it as it happens: role and run
+ * state changes plus partial role outputs while a completion streams in.
+ * Events go to the router's listeners right away and are appended to
+ * stream.jsonl in the run directory in batches, so readers in other
+ * processes can tail it. Unlike the journal it is advisory: nothing is
+ * rebuilt from it and a failed write is dropped.
+ */
+export class RunStream {
+  private pending: string[] = [];
+  private writing: Promise<void> | null = null;
+
+  constructor(
+    readonly runId: string,
+    readonly runDir: string,
+    private readonly publish: (event: RunStreamEvent) => void,
+    private seq = 0
+  ) {}
+
+  /** Stream of an existing run, continuing its numbering */
+  static async open(runId: string, runDir: string, publish: (event: RunStreamEvent) => void): Promise<RunStream> {
+    const events = await readStream(runDir);
+    return new RunStream(runId, runDir, publish, events.length > 0 ? events[events.length - 1].seq : 0);
+  }
+
+  append(input: RunStreamEventInput): RunStreamEvent {
+    this.seq += 1;
+    const event = { ...input, seq: this.seq, at: new Date().toISOString(), runId: this.runId } as RunStreamEvent;
+    this.pending.push(`${JSON.stringify(event)}\n`);
+    this.flush();
+    this.publish(event);
+    return event;
+  }
+
+  /** Resolves once every event appended so far is written */
+  async settled() {
+    while (this.writing) {
+      await this.writing;
+    }
+  }
+
+  private flush() {
+    if (this.writing || this.pending.length === 0) return;
+    const lines = this.pending.join('');
+    this.pending = [];
+    this.writing = fs
+      .appendFile(path.join(this.runDir, STREAM_FILE), lines, 'utf8')
+      .catch(() => undefined)
+      .then(() => {
+        this.writing = null;
+        this.flush();
+      });
+  }
+}
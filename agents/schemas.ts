@@ -82,7 +82,9 @@ export const finalizerOutputSchema = z.object({
   build: z.object({
     status: z.enum(['OK', 'FAILED']),
     log_path: z.string(),
-    pdf_path: z.string().nullable()
+    pdf_path: z.string().nullable(),
+    cache: z.enum(['hit', 'miss']).optional(),
+    duration_ms: z.number().nonnegative().optional()
   })
 });
 
@@ -94,7 +96,7 @@ export const roleSchemaMap = {
   finalizer: finalizerOutputSchema
 } satisfies Record<RoleName, z.ZodTypeAny>;
 
-export const providerNameSchema = z.enum(['groq', 'claude', 'gemini']);
+export const providerNameSchema = z.enum(['groq', 'claude', 'gemini', 'auto']);
 
 export const providerMapSchema = z.object({
   reviewer: providerNameSchema,
@@ -104,10 +106,30 @@ export const providerMapSchema = z.object({
   finalizer: providerNameSchema
 });
 
+export const profileIdSchema = z.string().regex(/^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$/);
+
+const keywordSplitSchema = z.object({
+  matched: z.array(z.string()),
+  missing: z.array(z.string())
+});
+
+/** Local keyword scoring (mcp-server/ats_engine.py) the Reviewer starts from */
+export const atsPrefillSchema = z.object({
+  ats_keywords: reviewerOutputSchema.shape.ats_keywords,
+  coverage: reviewerOutputSchema.shape.coverage,
+  must_have: keywordSplitSchema,
+  nice_to_have: keywordSplitSchema,
+  score: z.number().min(0).max(100)
+});
+
 export const runConfigSchema = z.object({
   jobDescription: z.string().min(10),
   dryRun: z.boolean(),
-  providers: providerMapSchema
+  providers: providerMapSchema,
+  profileId: profileIdSchema.optional(),
+  ats: atsPrefillSchema.optional(),
+  /** Admission priority of the run's provider calls; dry runs always go last */
+  priority: z.enum(['interactive', 'batch', 'dry_run']).optional()
 });
 
 export type ReviewerOutput = z.infer<typeof reviewerOutputSchema>;
@@ -116,6 +138,7 @@ export type RefinerOutput = z.infer<typeof refinerOutputSchema>;
 export type JudgeOutput = z.infer<typeof judgeOutputSchema>;
 export type FinalizerOutput = z.infer<typeof finalizerOutputSchema>;
 export type RunConfig = z.infer<typeof runConfigSchema>;
+export type AtsPrefill = z.infer<typeof atsPrefillSchema>;
 
 export type RoleOutputMap = {
   reviewer: ReviewerOutput;
@@ -130,7 +153,21 @@ export const runArtifactSchema = z.object({
   status: z.enum(['pending', 'running', 'succeeded', 'failed']),
   output: z.unknown().optional(),
   error: z.string().optional(),
-  storedPath: z.string().optional()
+  storedPath: z.string().optional(),
+  cacheHit: z.boolean().optional(),
+  provider: z.string().optional(),
+  durationMs: z.number().nonnegative().optional(),
+  promptTokens: z.number().int().nonnegative().optional()
+});
+
+export const stageTimingSchema = z.object({
+  stage: z.string(),
+  dependsOn: z.array(z.string()),
+  status: z.enum(['succeeded', 'failed', 'discarded']),
+  startedAt: z.string(),
+  durationMs: z.number().nonnegative(),
+  speculative: z.boolean().optional(),
+  error: z.string().optional()
 });
 
 export const runSummarySchema = z.object({
@@ -142,7 +179,12 @@ export const runSummarySchema = z.object({
   artifacts: z.array(runArtifactSchema),
   pdfPath: z.string().nullable().optional(),
   logPath: z.string().nullable().optional(),
-  diffSummary: z.string().nullable().optional()
+  diffSummary: z.string().nullable().optional(),
+  stages: z.array(stageTimingSchema).optional(),
+  /** Why the run failed */
+  error: z.string().nullable().optional(),
+  /** Journal events (run-journal.ts) this summary.json snapshot includes */
+  journalSeq: z.number().int().nonnegative().optional()
 });
 
 export type RunSummary = z.infer<typeof runSummarySchema>;
@@ -0,0 +1,98 @@
+export type StageStatus = 'succeeded' | 'failed' | 'discarded';
+
+export interface StageTiming {
+  stage: string;
+  dependsOn: string[];
+  status: StageStatus;
+  startedAt: string;
+  durationMs: number;
+  speculative?: boolean;
+  error?: string;
+}
+
+export interface StageOptions {
+  /** The result may be thrown away with discard() */
+  speculative?: boolean;
+}
+
+export interface StageHandle<T> {
+  name: string;
+  promise: Promise<T>;
+}
+
+type Results<D extends StageHandle<unknown>[]> = {
+  [K in keyof D]: D[K] extends StageHandle<infer R> ? R : never;
+};
+
+/**
+ * Runs a pipeline as a dependency graph: each stage starts as soon as the
+ * stages it depends on have finished, so independent stages overlap. Every
+ * stage records when it actually started and how long it ran in `timings`,
+ * in start order; the array is live so it can be written into the run summary
+ * while stages are still running.
+ *
+ * Speculative stages run like any other but may be discard()ed, for example
+ * a second refiner started while the judge is still deciding. A stage that
+ * fails rejects its own promise; the failure reaches whoever awaits it.
+ */
+export class StageScheduler {
+  readonly timings: StageTiming[] = [];
+  private readonly records = new Map<string, StageTiming>();
+  private readonly discarded = new Set<string>();
+
+  // `| []` makes TypeScript infer dependsOn as a tuple, so results keep their types
+  stage<T, D extends StageHandle<unknown>[] | []>(
+    name: string,
+    dependsOn: D,
+    run: (...results: Results<D>) => Promise<T>,
+    options: StageOptions = {}
+  ): StageHandle<T> {
+    const deps = dependsOn as StageHandle<unknown>[];
+    const promise = Promise.all(deps.map((dep) => dep.promise)).then(async (results) => {
+      const started = Date.now();
+      const record: StageTiming = {
+        stage: name,
+        dependsOn: deps.map((dep) => dep.name),
+        status: 'succeeded',
+        startedAt: new Date(started).toISOString(),
+        durationMs: 0,
+        ...(options.speculative ? { speculative: true } : {})
+      };
+      this.records.set(name, record);
+      this.timings.push(record);
+      if (this.discarded.has(name)) {
+        record.status = 'discarded';
+        throw new Error(`Stage ${name} was discarded before it started`);
+      }
+      try {
+        return await run(...(results as unknown as Results<D>));
+      } catch (error) {
+        if (record.status !== 'discarded') {
+          record.status = 'failed';
+          record.error = (error as Error).message;
+        }
+        throw error;
+      } finally {
+        record.durationMs = Date.now() - started;
+      }
+    });
+    // Stages nobody ends up awaiting (discarded, or downstream of a failure) must not crash the process
+    promise.catch(() => undefined);
+    return { name, promise };
+  }
+
+  /** Start a stage without waiting on anything else */
+  root<T>(name: string, run: () => Promise<T>, options: StageOptions = {}): StageHandle<T> {
+    return this.stage(name, [], run, options);
+  }
+
+  /** Mark a speculative stage as unused; it may still be running */
+  discard(handle: StageHandle<unknown>) {
+    this.discarded.add(handle.name);
+    const record = this.records.get(handle.name);
+    if (record) {
+      record.status = 'discarded';
+      delete record.error;
+    }
+  }
+}
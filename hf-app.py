@@ -1,20 +1,57 @@
 # Hugging Face Spaces App - Resume Orchestrator
+import asyncio
+import time
 import gradio as gr
-import requests
+import httpx
 import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Optional
 
 # Configuration
-ORCHESTRATOR_URL = "http://localhost:4000"
+ORCHESTRATOR_URL = os.getenv("ORCHESTRATOR_URL", "http://localhost:4000")
 DASHBOARD_URL = "http://localhost:7860"
 
+# HTTP client tuning (one keep-alive pool shared by every Gradio session)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+
+# Run polling
+POLL_INTERVAL = float(os.getenv("RUN_POLL_INTERVAL", "2"))
+RUN_DEADLINE = float(os.getenv("RUN_DEADLINE", "300"))  # 5 minutes
+
+# Live run events (GET /runs/:id/events) with partial role outputs; RUN_STREAM=0 polls instead
+RUN_STREAM = os.getenv("RUN_STREAM", "1") != "0"
+RENDER_INTERVAL = float(os.getenv("RUN_RENDER_INTERVAL", "0.3"))
+
+# Gradio queue: async handlers don't hold a worker thread while they poll
+GRADIO_CONCURRENCY = int(os.getenv("GRADIO_CONCURRENCY", "32"))
+GRADIO_MAX_QUEUE = int(os.getenv("GRADIO_MAX_QUEUE", "256"))
+
+FINISHED_STATUSES = {"completed", "failed", "needs_review"}
+ROLE_ORDER = ["reviewer", "swot", "refiner", "judge", "finalizer"]
+
 class ResumeOrchestrator:
     def __init__(self):
         self.orchestrator_url = ORCHESTRATOR_URL
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared async client with a keep-alive connection pool"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.orchestrator_url,
+                limits=httpx.Limits(
+                    max_connections=HTTP_POOL_SIZE,
+                    max_keepalive_connections=HTTP_POOL_SIZE
+                ),
+                timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+            )
+        return self._client
         
-    def create_run(self, job_description: str, dry_run: bool = True) -> Dict[str, Any]:
-        """Create a new resume optimization run"""
+    async def create_run(self, job_description: str, dry_run: bool = True) -> Dict[str, Any]:
+        """Create a new resume optimization run (returns as soon as it is queued)"""
         try:
             payload = {
                 "jobDescription": job_description,
@@ -28,121 +65,234 @@ class ResumeOrchestrator:
                 }
             }
             
-            response = requests.post(
-                f"{self.orchestrator_url}/runs",
-                json=payload,
-                timeout=300  # 5 minutes timeout
-            )
+            response = await self.client.post("/runs", params={"wait": "false"}, json=payload)
             
-            if response.status_code == 200:
+            if response.status_code in (200, 201, 202):
                 return response.json()
             else:
                 return {"error": f"API Error: {response.status_code} - {response.text}"}
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {"error": f"Connection Error: {str(e)}"}
     
-    def get_run_status(self, run_id: str) -> Dict[str, Any]:
-        """Get the status of a resume optimization run"""
+    async def get_run_status(self, run_id: str) -> Dict[str, Any]:
+        """Get the status of a resume optimization run, including role outputs and PDF path"""
         try:
-            response = requests.get(f"{self.orchestrator_url}/runs/{run_id}")
+            response = await self.client.get(f"/runs/{run_id}")
             
             if response.status_code == 200:
                 return response.json()
             else:
                 return {"error": f"API Error: {response.status_code} - {response.text}"}
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {"error": f"Connection Error: {str(e)}"}
     
     def download_pdf(self, run_id: str) -> str:
-        """Get download link for generated PDF"""
-        try:
-            response = requests.get(f"{self.orchestrator_url}/runs/{run_id}/pdf")
-            
-            if response.status_code == 200:
-                return response.json().get("downloadUrl", "PDF not available")
-            else:
-                return f"Error: {response.status_code}"
-                
-        except requests.exceptions.RequestException as e:
-            return f"Connection Error: {str(e)}"
+        """Download link for the generated PDF (served by GET /runs/:id/pdf)"""
+        return f"{self.orchestrator_url}/runs/{run_id}/pdf"
+
+    async def watch_run(self, run_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Poll a run until it finishes or the deadline passes, yielding each status"""
+        deadline = time.monotonic() + RUN_DEADLINE
+        while time.monotonic() < deadline:
+            status = await self.get_run_status(run_id)
+            yield status
+            if status.get("status") in FINISHED_STATUSES:
+                return
+            await asyncio.sleep(POLL_INTERVAL)
+        yield {"error": f"Run did not finish within {RUN_DEADLINE:.0f} seconds", "timeout": True}
+
+    async def stream_run(self, run_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Follow a run's server-sent events, yielding its status with the partial
+        outputs of the roles still streaming; at most every RENDER_INTERVAL
+        seconds, except for role and run state changes.
+        """
+        deadline = time.monotonic() + RUN_DEADLINE
+        status = new_live_status()
+        last_yield = 0.0
+        async with self.client.stream("GET", f"/runs/{run_id}/events") as response:
+            response.raise_for_status()
+            data = []
+            async for line in response.aiter_lines():
+                if time.monotonic() >= deadline:
+                    yield {"error": f"Run did not finish within {RUN_DEADLINE:.0f} seconds", "timeout": True}
+                    return
+                if line.startswith("data:"):
+                    data.append(line[5:].lstrip())
+                    continue
+                if line or not data:
+                    continue
+                event = json.loads("\n".join(data))
+                data = []
+                apply_run_event(status, event)
+                if status["status"] in FINISHED_STATUSES:
+                    # The final summary also carries the PDF path
+                    final = await self.get_run_status(run_id)
+                    yield final if "status" in final else status
+                    return
+                now = time.monotonic()
+                if event.get("type") != "partial" or now - last_yield >= RENDER_INTERVAL:
+                    last_yield = now
+                    yield status
+
+    async def follow_run(self, run_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Live events when the orchestrator streams them, polling otherwise"""
+        if RUN_STREAM:
+            try:
+                async for status in self.stream_run(run_id):
+                    yield status
+                return
+            except httpx.HTTPError:
+                # An orchestrator without /events, or the stream dropped: poll from here
+                pass
+        async for status in self.watch_run(run_id):
+            yield status
 
 # Initialize the orchestrator
 orchestrator = ResumeOrchestrator()
 
-def process_resume(job_description: str, dry_run: bool) -> str:
-    """Process resume optimization request"""
-    if not job_description.strip():
-        return "Please enter a job description."
-    
-    # Create run
-    result = orchestrator.create_run(job_description, dry_run)
-    
-    if "error" in result:
-        return f"❌ Error: {result['error']}"
-    
-    run_id = result.get("id", "unknown")
-    
-    # Get run status
-    status = orchestrator.get_run_status(run_id)
-    
-    if "error" in status:
-        return f"❌ Status Error: {status['error']}"
-    
-    # Format response
+def new_live_status() -> Dict[str, Any]:
+    return {
+        "status": "pending",
+        "artifacts": [{"role": role, "status": "pending"} for role in ROLE_ORDER],
+        "partials": {}
+    }
+
+def apply_run_event(status: Dict[str, Any], event: Dict[str, Any]):
+    """Fold one run event into a get_run-shaped status plus the partial outputs of streaming roles"""
+    kind = event.get("type")
+    role = event.get("role")
+    partials = status["partials"]
+    if kind == "state":
+        status["status"] = event.get("status", status["status"])
+        if event.get("error"):
+            status["error"] = event["error"]
+    elif kind == "role":
+        for artifact in status["artifacts"]:
+            if artifact["role"] == role:
+                artifact.update({key: event[key] for key in ("status", "output", "error", "provider") if key in event})
+        # A role that starts (again) or finishes has no partial output to show
+        partials.pop(role, None)
+    elif kind == "reset":
+        partials.pop(role, None)
+    elif kind == "partial":
+        output = partials.setdefault(role, {})
+        if "index" in event:
+            items = output.setdefault(event["field"], [])
+            if event["index"] < len(items):
+                items[event["index"]] = event["value"]
+            else:
+                items.append(event["value"])
+        else:
+            output[event["field"]] = event["value"]
+
+def _role_outputs(status: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        artifact["role"]: artifact.get("output")
+        for artifact in status.get("artifacts", [])
+        if artifact.get("status") == "succeeded" and artifact.get("output")
+    }
+
+def _role_progress(status: Dict[str, Any]) -> str:
+    icons = {"pending": "⏳", "running": "🔄", "succeeded": "✅", "failed": "❌"}
+    return " → ".join(
+        f"{icons.get(a.get('status'), '⏳')} {a.get('role', '?')}"
+        for a in status.get("artifacts", [])
+    )
+
+def render_status(run_id: str, status: Dict[str, Any], dry_run: bool) -> str:
+    """Render whatever role results have arrived so far"""
+    run_status = status.get("status", "pending")
+    finished = run_status in FINISHED_STATUSES
+    title = "## 🎯 Resume Optimization Complete!" if finished else "## ⏳ Resume Optimization In Progress..."
+
     response = f"""
-## 🎯 Resume Optimization Complete!
+{title}
 
 **Run ID:** {run_id}
-**Status:** {status.get('status', 'unknown')}
+**Status:** {run_status}
 **Dry Run:** {'Yes' if dry_run else 'No'}
+**Progress:** {_role_progress(status) or 'starting'}
 
 ### 📊 Results:
 """
-    
-    if status.get('results'):
-        results = status['results']
-        
-        # Reviewer results
-        if 'reviewer' in results:
-            reviewer = results['reviewer']
-            response += f"""
-**🔍 Review Analysis:**
-- Match Score: {reviewer.get('matchScore', 'N/A')}%
-- Strengths: {reviewer.get('strengths', 'N/A')}
-- Weaknesses: {reviewer.get('weaknesses', 'N/A')}
+    results = _role_outputs(status)
+    # Roles still generating show what has streamed in so far
+    streaming = {role: output for role, output in status.get("partials", {}).items() if role not in results}
+    results = {**streaming, **results}
+    live = lambda role: " *(streaming…)*" if role in streaming else ""
+
+    # Reviewer results
+    if 'reviewer' in results:
+        reviewer = results['reviewer']
+        coverage = reviewer.get('coverage', {})
+        response += f"""
+**🔍 Review Analysis:**{live('reviewer')}
+- Must-have Coverage: {coverage.get('must_have_pct', 'N/A')}%
+- Nice-to-have Coverage: {coverage.get('nice_to_have_pct', 'N/A')}%
+- ATS Keywords: {', '.join(reviewer.get('ats_keywords', [])[:20]) or 'N/A'}
 """
-        
-        # SWOT Analysis
-        if 'swot' in results:
-            swot = results['swot']
-            response += f"""
-**📈 SWOT Analysis:**
-- Strengths: {swot.get('strengths', 'N/A')}
-- Weaknesses: {swot.get('weaknesses', 'N/A')}
-- Opportunities: {swot.get('opportunities', 'N/A')}
-- Threats: {swot.get('threats', 'N/A')}
+
+    # SWOT Analysis
+    if 'swot' in results:
+        swot = results['swot']
+        response += f"""
+**📈 SWOT Analysis:**{live('swot')}
+- Strengths: {'; '.join(swot.get('strengths', [])) or 'N/A'}
+- Weaknesses: {'; '.join(swot.get('weaknesses', [])) or 'N/A'}
+- Opportunities: {'; '.join(swot.get('opportunities', [])) or 'N/A'}
+- Threats: {'; '.join(swot.get('threats', [])) or 'N/A'}
 """
-        
-        # Refinements
-        if 'refinements' in results:
-            refinements = results['refinements']
-            response += f"""
-**✨ Proposed Refinements:**
-{refinements.get('summary', 'No refinements suggested')}
+
+    # Refinements
+    if 'refiner' in results:
+        diffs = results['refiner'].get('diffs', [])
+        summary = "\n".join(
+            f"- `{d.get('target_file')}` ({d.get('patch_type')}): {d.get('rationale')}" for d in diffs
+        )
+        response += f"""
+**✨ Proposed Refinements:**{live('refiner')}
+{summary or 'No refinements suggested'}
 """
-    
+
     # Add PDF download link if available
-    if not dry_run:
-        pdf_url = orchestrator.download_pdf(run_id)
-        if pdf_url and not pdf_url.startswith("Error"):
-            response += f"""
-**📄 Download PDF:** {pdf_url}
+    if finished and not dry_run and status.get("pdfPath"):
+        response += f"""
+**📄 Download PDF:** {orchestrator.download_pdf(run_id)}
 """
-    
+
     return response
 
+async def process_resume(job_description: str, dry_run: bool) -> AsyncIterator[str]:
+    """Process resume optimization request, streaming partial results while roles generate"""
+    if not job_description.strip():
+        yield "Please enter a job description."
+        return
+    
+    # Create run
+    result = await orchestrator.create_run(job_description, dry_run)
+    
+    if "error" in result:
+        yield f"❌ Error: {result['error']}"
+        return
+    
+    run_id = result.get("runId") or result.get("id", "unknown")
+    yield render_status(run_id, {"status": "pending"}, dry_run)
+    
+    last_status: Dict[str, Any] = {"status": "pending"}
+    async for status in orchestrator.follow_run(run_id):
+        if status.get("timeout"):
+            yield render_status(run_id, last_status, dry_run) + f"\n❌ {status['error']}"
+            return
+        if "status" not in status:
+            # A request error (summaries carry an `error` field of their own); the run
+            # directory may not exist for the first moment, keep polling
+            continue
+        last_status = status
+        yield render_status(run_id, status, dry_run)
+
 # Create Gradio interface
 def create_interface():
     with gr.Blocks(
@@ -224,6 +374,10 @@ def create_interface():
 # Launch the interface
 if __name__ == "__main__":
     interface = create_interface()
+    interface.queue(
+        default_concurrency_limit=GRADIO_CONCURRENCY,
+        max_size=GRADIO_MAX_QUEUE
+    )
     interface.launch(
         server_name="0.0.0.0",
         server_port=7860,
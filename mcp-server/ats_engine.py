@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Local ATS keyword scoring
+Extracts the keywords of a job description, splits them into must-have and
+nice-to-have, and matches them against the resume includes, which is the
+`ats_keywords` / `coverage` part of the Reviewer's work done in milliseconds
+and without an LLM call.
+
+Both texts are tokenized the same way (lowercase, `c++`, `c#`, `node.js` and
+`802.15.4` kept whole, `/` and `-` split, plurals folded) and run through one
+multi-pattern matcher compiled from VOCABULARY, which maps aliases such as
+`k8s` onto their canonical term. Lowercase aliases match in any case; an
+alias with capitals, and a canonical term that is an acronym (`SQL`, `CAN`),
+only matches as spelled, and the ones that are also plain words (`C` as in
+"Series C", `REST` as in "the REST of") need another term close by.
+Technical tokens the vocabulary does not know (acronyms like `BSP`, tokens
+with digits or `+#.` like `v4l2`) are picked up as keywords too. The resume side is tokenized once per snapshot
+etag, so scoring one resume against thousands of job descriptions only
+tokenizes the job descriptions.
+"""
+
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from resume_index import plain_text
+from resume_snapshot import MAIN_SECTION, Snapshot
+
+MAX_KEYWORDS = 200  # reviewerOutputSchema caps ats_keywords at 200
+MAX_ATS_BATCH = 10000
+RESUME_TERMS_CACHE_SIZE = 16
+# Attach the local scores to new runs so the Reviewer prompt starts from them
+ATS_PREFILL = os.getenv("ATS_PREFILL", "1") != "0"
+
+# Canonical term -> aliases; the canonical spelling is what gets reported. An
+# alias with capitals matches case-sensitively, and the canonical term is an
+# alias of its own only when it is all capitals. Plain English words ("can",
+# "rest", "drivers") are only listed inside a phrase that makes them technical.
+VOCABULARY: Dict[str, Tuple[str, ...]] = {
+    # Languages
+    "C": ("c programming", "c language", "ansi c"),
+    "C++": ("c++", "cpp", "modern c++"),
+    "C#": ("c#", "csharp"),
+    "Embedded C": ("embedded c",),
+    "Python": ("python", "python3"),
+    "Java": ("java",),
+    "Go": ("Go", "golang", "go lang"),
+    "Rust": ("rust",),
+    "JavaScript": ("javascript", "js", "ecmascript"),
+    "TypeScript": ("typescript",),
+    "Shell": ("shell scripting", "shell script", "bash"),
+    "Assembly": ("Assembly", "assembly language", "asm", "arm assembly"),
+    "SQL": ("sql",),
+    "MATLAB": ("matlab",),
+    "VHDL": ("vhdl",),
+    "Verilog": ("verilog", "systemverilog"),
+    # Embedded and kernel
+    "Embedded Linux": ("embedded linux",),
+    "Linux": ("linux", "gnu/linux"),
+    "Linux kernel": ("linux kernel", "kernel development", "kernel programming"),
+    "Device drivers": ("device drivers", "device driver", "linux drivers", "kernel drivers"),
+    "Firmware": ("firmware",),
+    "RTOS": ("rtos", "real time operating system", "freertos", "zephyr"),
+    "Bare metal": ("bare metal",),
+    "Yocto": ("yocto", "yocto project", "openembedded", "bitbake"),
+    "Buildroot": ("buildroot",),
+    "BSP": ("bsp", "board support package"),
+    "U-Boot": ("u-boot", "uboot", "bootloader"),
+    "systemd": ("systemd",),
+    "Board bring-up": ("bring-up", "board bring-up", "bringup", "hardware bring-up"),
+    "I2C": ("i2c",),
+    "SPI": ("spi",),
+    "UART": ("uart",),
+    "GPIO": ("gpio",),
+    "DMA": ("dma",),
+    "Interrupts": ("interrupts", "irq", "isr", "interrupt handling"),
+    "PCIe": ("pcie", "pci express"),
+    "USB": ("usb",),
+    "CAN": ("can bus", "canbus"),
+    "Ethernet": ("ethernet",),
+    "MIPI CSI-2": ("mipi csi-2", "mipi csi", "csi-2", "mipi"),
+    "V4L2": ("v4l2", "video4linux"),
+    "ARM": ("arm cortex", "arm64", "aarch64", "cortex-m", "cortex-a"),
+    "Xilinx Zynq": ("zynq", "xilinx zynq", "zynqmp"),
+    "FPGA": ("fpga",),
+    "JTAG": ("jtag",),
+    "Oscilloscope": ("oscilloscope",),
+    "Logic analyzer": ("logic analyzer",),
+    "AUTOSAR": ("autosar",),
+    "CANoe": ("CANoe", "canalyzer"),
+    "Zigbee": ("zigbee", "802.15.4"),
+    "BLE": ("ble", "bluetooth low energy", "bluetooth"),
+    "OTA": ("ota", "fota", "over-the-air"),
+    "IoT": ("iot", "internet of things"),
+    "Power management": ("power management", "power optimization", "low power"),
+    # Telecom
+    "RAN": ("radio access network", "cloud ran", "o-ran", "oran"),
+    "5G": ("5g", "5g nr"),
+    "LTE": ("lte", "4g"),
+    # Cloud-native and backend
+    "Docker": ("docker", "containerization", "containerized"),
+    "Kubernetes": ("kubernetes", "k8s"),
+    "Helm": ("Helm", "helm chart"),
+    "Microservices": ("microservices", "microservice", "micro-services"),
+    "gRPC": ("grpc",),
+    "REST": ("restful", "rest api", "rest apis"),
+    "GraphQL": ("graphql",),
+    "Kafka": ("kafka", "apache kafka"),
+    "RabbitMQ": ("rabbitmq",),
+    "Redis": ("redis",),
+    "PostgreSQL": ("postgresql", "postgres"),
+    "MySQL": ("mysql",),
+    "MongoDB": ("mongodb", "mongo"),
+    "AWS": ("aws", "amazon web services"),
+    "GCP": ("gcp", "google cloud"),
+    "Azure": ("azure",),
+    "Terraform": ("terraform",),
+    "Ansible": ("ansible",),
+    "Observability": ("observability", "prometheus", "grafana"),
+    "Node.js": ("node.js", "nodejs"),
+    "React": ("React", "react.js", "reactjs"),
+    "Django": ("django",),
+    "Flask": ("flask",),
+    "FastAPI": ("fastapi",),
+    "Spring": ("Spring", "spring boot", "spring framework"),
+    # Tooling and practice
+    "Git": ("git", "github", "gitlab"),
+    "CI/CD": ("ci/cd", "ci pipeline", "continuous integration", "continuous delivery", "continuous deployment"),
+    "Jenkins": ("jenkins",),
+    "Test automation": ("test automation", "automated testing", "automation testing"),
+    "Robot Framework": ("robot framework",),
+    "pytest": ("pytest",),
+    "Unit testing": ("unit testing", "unit tests", "unit test"),
+    "Integration testing": ("integration testing", "integration tests"),
+    "Debugging": ("debugging", "debug", "troubleshooting"),
+    "Profiling": ("profiling", "performance tuning", "performance optimization"),
+    "JIRA": ("jira",),
+    "DOORS": ("ibm doors",),
+    "Requirements traceability": ("requirements traceability", "traceability"),
+    "Agile": ("agile", "scrum", "kanban"),
+    "Multithreading": ("multithreading", "multi-threading", "concurrency", "pthreads"),
+    "Networking": ("network protocol", "networking protocol", "networking stack", "tcp/ip", "tcp", "udp", "socket programming"),
+    "Security": ("cybersecurity", "application security", "network security", "secure boot", "cryptography"),
+    "Machine learning": ("machine learning", "ml", "deep learning"),
+}
+
+# Spellings that are also plain words ("Series C", "CAN do", "the REST of",
+# "Go further"); they only count with another vocabulary term at most
+# CONTEXT_WINDOW tokens away, as in "C/C++" or "Go or Python"
+CONTEXT_ALIASES = {"C", "CAN", "RAN", "REST", "ARM", "DOORS", "Go", "Assembly", "Spring"}
+CONTEXT_WINDOW = 2
+
+# Headings that switch the lines below them to nice-to-have / must-have
+NICE_PATTERN = re.compile(
+    r"\b(nice[- ]to[- ]haves?|preferred|bonus|(?:is |are )?a plus|desirable|good[- ]to[- ]have|optional|would be great)\b",
+    re.IGNORECASE,
+)
+MUST_PATTERN = re.compile(
+    r"\b(requirements?|required|must[- ]haves?|must|qualifications?|what you(?:'ll)? (?:bring|need|have)|you have|minimum|skills|responsibilities)\b",
+    re.IGNORECASE,
+)
+BULLET_PATTERN = re.compile(r"^\s*(?:[-*•·▪◦]|\d+[.)])\s+")
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*", re.IGNORECASE)
+ACRONYM_PATTERN = re.compile(r"\b[A-Z][A-Z0-9]{1,5}s?\b")
+# Uppercase words that are not technologies
+ACRONYM_STOPWORDS = {
+    "A", "I", "AN", "AND", "OR", "THE", "TO", "IN", "OF", "FOR", "ON", "AT", "BY", "AS", "IS", "BE", "ARE",
+    "WE", "OUR", "YOU", "YOUR", "US", "USA", "UK", "EU", "IT", "ALL", "NEW", "WHO", "WHAT", "WHY", "HOW",
+    "ROLE", "JOB", "TEAM", "ABOUT", "PLUS", "NICE", "MUST", "ETC", "EEO", "HR", "CEO", "CTO", "VP", "PTO",
+    "LLC", "INC", "LTD", "FAQ", "YEARS", "YRS", "BS", "MS", "ME", "PHD", "OK", "NOTE", "TBD",
+    # All-caps headings ("WHAT YOU WILL DO", "WHO WE ARE")
+    "DO", "WILL", "CAN", "NOT", "NO", "IF", "SO", "UP", "WITH", "THIS", "THAT", "HAVE", "JOIN", "WORK", "PERKS",
+}
+
+
+def normalize_token(token: str) -> str:
+    """Fold plurals so `drivers` matches `driver` (applied to both texts alike)"""
+    if len(token) > 3 and token.endswith("s") and token[-2] not in "su" and token[-2].isalpha() and not token.endswith("is") and "." not in token:
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase tokens; `/` and `-` split words, `.+#` inside a token are kept"""
+    return [normalize_token(token.lower()) for token in TOKEN_PATTERN.findall(text)]
+
+
+def tokenize_cased(text: str) -> Tuple[List[str], List[str]]:
+    """tokenize() plus the same tokens as spelled, for the case-sensitive aliases"""
+    tokens: List[str] = []
+    cased: List[str] = []
+    for token in TOKEN_PATTERN.findall(text):
+        folded = normalize_token(token.lower())
+        tokens.append(folded)
+        cased.append(token[:len(folded)])
+    return tokens, cased
+
+
+def is_technical(token: str) -> bool:
+    """A token that names a technology by its shape: `v4l2`, `c++`, `f#`, `vue.js` (not `401k`, `e.g`)"""
+    if not any(char.isalpha() for char in token):
+        return False
+    if "." in token:
+        return any(len(part) > 1 for part in token.split("."))
+    return "+" in token or "#" in token or (token[0].isalpha() and any(char.isdigit() for char in token))
+
+
+# Lowercase tokens, the spelled tokens for a case-sensitive alias (else None), canonical term, needs context
+Pattern = Tuple[Tuple[str, ...], Optional[Tuple[str, ...]], str, bool]
+
+
+def _aliases(canonical: str, aliases: Iterable[str]) -> Iterable[str]:
+    # An acronym (`SQL`, `C++`, `5G`) is an alias of itself; `Go` or `Spring` only if listed
+    if canonical == canonical.upper():
+        yield canonical
+    yield from aliases
+
+
+class KeywordMatcher:
+    """Vocabulary compiled into a first-token index; matches are longest-first and non-overlapping"""
+
+    def __init__(self, vocabulary: Dict[str, Iterable[str]] = VOCABULARY):
+        patterns: Dict[str, Dict[Tuple[str, ...], Pattern]] = {}
+        for canonical, aliases in vocabulary.items():
+            for alias in _aliases(canonical, aliases):
+                tokens, cased = tokenize_cased(alias)
+                if not tokens:
+                    continue
+                spelled = tuple(cased) if alias != alias.lower() else None
+                candidates = patterns.setdefault(tokens[0], {})
+                known = candidates.get(tuple(tokens))
+                # `sql` also covers `SQL`; the first canonical term to claim a spelling keeps it
+                if known is None or (known[1] is not None and spelled is None and known[2] == canonical):
+                    candidates[tuple(tokens)] = (tuple(tokens), spelled, canonical, alias in CONTEXT_ALIASES)
+        self._index: Dict[str, List[Pattern]] = {
+            first: sorted(candidates.values(), key=lambda pattern: -len(pattern[0]))
+            for first, candidates in patterns.items()
+        }
+        # Every token a vocabulary term consists of, so its parts are not also reported as unknown terms
+        self.known_tokens = {token for candidates in self._index.values() for pattern in candidates for token in pattern[0]}
+
+    def find(
+        self,
+        tokens: Sequence[str],
+        overlapping: bool = False,
+        cased: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[int, str]]:
+        """
+        (token position, canonical term) of every vocabulary match. With
+        overlapping, shorter terms inside a longer match are reported too
+        (`embedded linux` also yields Linux). `cased` is `tokens` as spelled
+        (tokenize_cased); without it the case-sensitive aliases never match.
+        """
+        # (start, end, canonical term, needs context)
+        spans: List[Tuple[int, int, str, bool]] = []
+        position = 0
+        while position < len(tokens):
+            step = 1
+            for pattern, spelled, canonical, needs_context in self._index.get(tokens[position], ()):
+                end = position + len(pattern)
+                if tuple(tokens[position:end]) != pattern:
+                    continue
+                if spelled is not None and (cased is None or tuple(cased[position:end]) != spelled):
+                    continue
+                spans.append((position, end, canonical, needs_context))
+                if not overlapping:
+                    step = len(pattern)
+                    break
+            position += step
+
+        def in_context(span: Tuple[int, int, str, bool]) -> bool:
+            start, end, canonical, _ = span
+            return any(
+                other_canonical != canonical and other_start <= end + CONTEXT_WINDOW and other_end >= start - CONTEXT_WINDOW
+                for other_start, other_end, other_canonical, _ in spans
+            )
+
+        return [(span[0], span[2]) for span in spans if not span[3] or in_context(span)]
+
+
+_matcher: Optional[KeywordMatcher] = None
+
+
+def get_matcher() -> KeywordMatcher:
+    global _matcher
+    if _matcher is None:
+        _matcher = KeywordMatcher()
+    return _matcher
+
+
+@dataclass
+class TextTerms:
+    """Canonical vocabulary terms and technical tokens found in a text"""
+    terms: Counter = field(default_factory=Counter)
+    tokens: set = field(default_factory=set)
+    # Normalized form -> first spelling seen, for terms outside the vocabulary
+    extra: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def of(cls, text: str, matcher: KeywordMatcher, discover: bool = True) -> "TextTerms":
+        """Keywords of a job description (discover) or everything a resume can match (not discover)"""
+        tokens, cased = tokenize_cased(text)
+        found = cls(Counter(canonical for _, canonical in matcher.find(tokens, overlapping=not discover, cased=cased)), set(tokens))
+        if discover:
+            for match in TOKEN_PATTERN.finditer(text):
+                token = normalize_token(match.group(0).lower())
+                if is_technical(token) and token not in matcher.known_tokens:
+                    found.extra.setdefault(token, match.group(0))
+                    found.terms[token] += 1
+            for match in ACRONYM_PATTERN.finditer(text):
+                word = match.group(0)
+                key = normalize_token(word.lower())
+                if word.rstrip("s") in ACRONYM_STOPWORDS or key in matcher.known_tokens:
+                    continue
+                found.extra.setdefault(key, word.rstrip("s") if word.endswith("s") and len(word) > 2 else word)
+                found.terms[key] += 1
+        return found
+
+
+def split_requirements(job_description: str) -> Tuple[str, str]:
+    """Must-have and nice-to-have text of a job description, by heading and by line"""
+    must: List[str] = []
+    nice: List[str] = []
+    mode_nice = False
+    for line in job_description.splitlines():
+        stripped = line.strip().lstrip("#").strip()
+        if not stripped:
+            continue
+        # A heading: `## ...`, `...:`, ALL CAPS, or a short line that is no sentence or list
+        heading = not BULLET_PATTERN.match(line) and (
+            stripped.endswith(":")
+            or line.lstrip().startswith("#")
+            or stripped.isupper()
+            or (len(stripped.split()) <= 6 and "," not in stripped and not stripped.endswith("."))
+        )
+        if heading and NICE_PATTERN.search(stripped):
+            mode_nice = True
+        elif heading and MUST_PATTERN.search(stripped):
+            mode_nice = False
+        (nice if mode_nice or NICE_PATTERN.search(stripped) else must).append(line)
+    return "\n".join(must), "\n".join(nice)
+
+
+def _ranked(terms: Counter) -> List[str]:
+    # Most frequent first; Counter keeps first-seen order among equal counts
+    return [term for term, _ in sorted(terms.items(), key=lambda item: -item[1])]
+
+
+class ResumeTerms:
+    """Terms of a resume's includes, matched once per snapshot"""
+
+    def __init__(self, snapshot: Snapshot, matcher: Optional[KeywordMatcher] = None):
+        matcher = matcher or get_matcher()
+        # Braces become spaces so `\skill{Languages}{C, ...}` does not run the words together
+        text = "\n".join(
+            plain_text(re.sub(r"(?<!\\)[{}]", " ", cached.content))
+            for name, cached in snapshot.sections.items()
+            if name != MAIN_SECTION
+        )
+        self.etag = snapshot.etag
+        self.found = TextTerms.of(text, matcher, discover=False)
+
+    def has(self, term: str) -> bool:
+        return term in self.found.terms or term in self.found.tokens
+
+
+_resume_terms: "OrderedDict[Tuple[str, str], ResumeTerms]" = OrderedDict()
+_resume_terms_lock = threading.Lock()
+
+
+def resume_terms(snapshot: Snapshot) -> ResumeTerms:
+    """ResumeTerms of a snapshot, reused while its etag is unchanged"""
+    key = (str(snapshot.resume_path), snapshot.etag)
+    with _resume_terms_lock:
+        cached = _resume_terms.get(key)
+        if cached is not None:
+            _resume_terms.move_to_end(key)
+            return cached
+    terms = ResumeTerms(snapshot)
+    with _resume_terms_lock:
+        _resume_terms[key] = terms
+        while len(_resume_terms) > RESUME_TERMS_CACHE_SIZE:
+            _resume_terms.popitem(last=False)
+    return terms
+
+
+def _pct(matched: int, total: int) -> float:
+    # Nothing asked for means nothing missing
+    return round(100.0 * matched / total, 1) if total else 100.0
+
+
+def score_job_description(
+    job_description: str,
+    resume: ResumeTerms,
+    matcher: Optional[KeywordMatcher] = None,
+) -> Dict[str, Any]:
+    """
+    ATS keywords of a job description and the resume's coverage of them, in the
+    shape of the Reviewer's `ats_keywords` and `coverage` fields plus the matched
+    and missing terms and a weighted score (must-haves count double).
+    """
+    matcher = matcher or get_matcher()
+    must_text, nice_text = split_requirements(job_description)
+    must = TextTerms.of(must_text, matcher)
+    nice = TextTerms.of(nice_text, matcher)
+    spelling = {**nice.extra, **must.extra}
+
+    must_terms = _ranked(must.terms)
+    nice_terms = [term for term in _ranked(nice.terms) if term not in must.terms]
+
+    def split(terms: List[str]) -> Dict[str, List[str]]:
+        matched = [spelling.get(term, term) for term in terms if resume.has(term)]
+        missing = [spelling.get(term, term) for term in terms if not resume.has(term)]
+        return {"matched": matched, "missing": missing}
+
+    must_split = split(must_terms)
+    nice_split = split(nice_terms)
+    weighted_total = 2 * len(must_terms) + len(nice_terms)
+    weighted_matched = 2 * len(must_split["matched"]) + len(nice_split["matched"])
+    return {
+        "ats_keywords": [spelling.get(term, term) for term in must_terms + nice_terms][:MAX_KEYWORDS],
+        "coverage": {
+            "must_have_pct": _pct(len(must_split["matched"]), len(must_terms)),
+            "nice_to_have_pct": _pct(len(nice_split["matched"]), len(nice_terms)),
+        },
+        "must_have": must_split,
+        "nice_to_have": nice_split,
+        "score": _pct(weighted_matched, weighted_total),
+    }
+
+
+def score_batch(
+    job_descriptions: Sequence[str],
+    resume: ResumeTerms,
+    matcher: Optional[KeywordMatcher] = None,
+) -> List[Dict[str, Any]]:
+    """score_job_description for many job descriptions against one resume, in input order"""
+    matcher = matcher or get_matcher()
+    return [{"index": index, **score_job_description(jd, resume, matcher)} for index, jd in enumerate(job_descriptions)]
+
+
+def rank_scores(
+    results: List[Dict[str, Any]],
+    top: Optional[int] = None,
+    min_score: float = 0.0,
+    include_keywords: bool = False,
+) -> List[Dict[str, Any]]:
+    """Batch results best first, for triage; without include_keywords only the missing must-haves are kept"""
+    ranked = sorted((r for r in results if r["score"] >= min_score), key=lambda r: (-r["score"], r["index"]))
+    if top is not None:
+        ranked = ranked[:max(0, top)]
+    if include_keywords:
+        return ranked
+    return [
+        {"index": r["index"], "score": r["score"], "coverage": r["coverage"], "missing_must_have": r["must_have"]["missing"]}
+        for r in ranked
+    ]
+
+__all__ = [
+    'ATS_PREFILL', 'MAX_ATS_BATCH', 'KeywordMatcher', 'ResumeTerms', 'TextTerms', 'VOCABULARY', 'get_matcher',
+    'rank_scores', 'resume_terms', 'score_batch', 'score_job_description', 'split_requirements', 'tokenize',
+    'tokenize_cased'
+]
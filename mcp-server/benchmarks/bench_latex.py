@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Cold vs precompiled-preamble LaTeX build times
+Compiles resume/cv.tex from a fresh scratch copy each time, once with the
+plain engine and once with the preamble format from latex_format.py, and
+reports per-build latency for both. Needs lualatex (TeX Live) on PATH.
+
+Usage:
+    python benchmarks/bench_latex.py
+    python benchmarks/bench_latex.py --builds 10
+
+Results are written to benchmarks/results/<timestamp>-<commit>-latex.json.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).parent
+MCP_DIR = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+
+sys.path.insert(0, str(MCP_DIR))
+
+from bench_tools import git_commit, percentile  # noqa: E402
+from latex_format import FormatCache  # noqa: E402
+from latex_service import LATEX_ENGINE, RESUME_DIR  # noqa: E402
+
+
+def compile_once(workdir: Path, fmt: Optional[str], env: Optional[Dict[str, str]]) -> float:
+    """One engine pass over a fresh copy of resume/; returns milliseconds"""
+    scratch = workdir / "scratch"
+    shutil.rmtree(scratch, ignore_errors=True)
+    shutil.copytree(RESUME_DIR, scratch)
+    command = [LATEX_ENGINE, "-interaction=nonstopmode", "-halt-on-error"]
+    if fmt:
+        command.append(f"-fmt={fmt}")
+    command.append("cv.tex")
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=scratch, env=env, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        tail = "\n".join(result.stdout.splitlines()[-20:])
+        raise RuntimeError(f"{' '.join(command)} failed:\n{tail}")
+    return elapsed
+
+
+def summarize(mode: str, latencies: List[float]) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "mode": mode,
+        "builds": len(ordered),
+        "p50_ms": round(percentile(ordered, 50), 1),
+        "mean_ms": round(sum(ordered) / len(ordered), 1),
+        "min_ms": round(ordered[0], 1),
+        "max_ms": round(ordered[-1], 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare cold and precompiled-preamble LaTeX builds")
+    parser.add_argument("--builds", type=int, default=5, help="Builds per mode")
+    parser.add_argument("--output", type=Path, default=None, help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    if not shutil.which(LATEX_ENGINE):
+        sys.exit(f"{LATEX_ENGINE} not found on PATH; install TeX Live to run this benchmark")
+
+    workdir = Path(tempfile.mkdtemp(prefix="latex-bench-"))
+    try:
+        formats = FormatCache(RESUME_DIR, LATEX_ENGINE, directory=workdir / "formats")
+        started = time.perf_counter()
+        fmt = await formats.ensure()
+        format_ms = round((time.perf_counter() - started) * 1000, 1)
+        if not fmt:
+            failed = next((workdir / "formats").glob("*.failed"), None)
+            sys.exit(f"Could not build the preamble format:\n{failed.read_text() if failed else ''}")
+
+        # The first build pays for luaotfload's font cache; keep it out of both series
+        compile_once(workdir, None, None)
+        results = [
+            summarize("cold", [compile_once(workdir, None, None) for _ in range(args.builds)]),
+            summarize("precompiled", [compile_once(workdir, fmt, formats.env()) for _ in range(args.builds)]),
+        ]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    cold, precompiled = results
+    print(f"{'mode':<12} {'builds':>6} {'p50 ms':>9} {'mean ms':>9} {'min ms':>9} {'max ms':>9}")
+    for r in results:
+        print(f"{r['mode']:<12} {r['builds']:>6} {r['p50_ms']:>9} {r['mean_ms']:>9} {r['min_ms']:>9} {r['max_ms']:>9}")
+    speedup = round(cold["p50_ms"] / precompiled["p50_ms"], 2) if precompiled["p50_ms"] else None
+    print(f"\nFormat built in {format_ms} ms; p50 speedup {speedup}x")
+
+    commit = git_commit()
+    version = subprocess.run([LATEX_ENGINE, "--version"], capture_output=True, text=True).stdout.splitlines()[0]
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "engine": version,
+        "platform": platform.platform(),
+        "params": {"builds": args.builds},
+        "format_build_ms": format_ms,
+        "speedup_p50": speedup,
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'nogit'}-latex.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nResults written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Latency benchmarks for the FastMCP tools
+Calls the tools of server.py and server-direct.py directly and through an
+in-memory FastMCP client, plus raw NodeJSRouter round trips against
+stub_worker.mjs. Routers and providers are stubbed so everything runs offline.
+
+Usage:
+    python benchmarks/bench_tools.py
+    python benchmarks/bench_tools.py --runs 10 1000 100000 --clients 1 8 32 --calls 500
+
+Results are written to benchmarks/results/<timestamp>-<commit>.json.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).parent
+MCP_DIR = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+STUB_WORKER = BENCH_DIR / "stub_worker.mjs"
+STATUSES = ("pending", "running", "needs_review", "failed", "completed")
+ROLES = ("reviewer", "swot", "refiner", "judge", "finalizer")
+
+sys.path.insert(0, str(MCP_DIR))
+
+Call = Callable[[], Awaitable[Any]]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def failed(result: Any) -> bool:
+    """
+    Whether a tool call failed: an `error` key in a direct call's dict, or,
+    through the client, an isError result or an `error` key in its
+    structured or JSON text content
+    """
+    if isinstance(result, dict):
+        return "error" in result
+    if getattr(result, "is_error", False):
+        return True
+    structured = getattr(result, "structured_content", None)
+    if isinstance(structured, dict) and "error" in structured:
+        return True
+    for block in getattr(result, "content", None) or []:
+        try:
+            payload = json.loads(getattr(block, "text", "") or "null")
+        except ValueError:
+            continue
+        if isinstance(payload, dict) and "error" in payload:
+            return True
+    return False
+
+
+async def measure(make_call: Callable[[int], Call], calls: int, clients: int) -> Dict[str, Any]:
+    """Issue `calls` requests from `clients` concurrent callers and summarize latency"""
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(calls))
+
+    async def client(index: int):
+        nonlocal errors
+        call = make_call(index)
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                if failed(await call()):
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "clients": clients,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0,
+    }
+
+
+def make_runs(count: int) -> List[Dict[str, Any]]:
+    """Synthetic run summaries shaped like the ones the router writes"""
+    base = datetime(2024, 1, 1)
+    runs = []
+    for i in range(count):
+        created = (base + timedelta(seconds=i)).isoformat()
+        runs.append({
+            "id": f"bench-{i:06d}",
+            "status": STATUSES[i % len(STATUSES)],
+            "jobDescription": f"Benchmark job description {i}",
+            "dryRun": True,
+            "profileId": "default",
+            "providers": {role: "claude" for role in ROLES},
+            "createdAt": created,
+            "updatedAt": created,
+            "artifacts": [{"role": role, "status": "completed", "provider": "claude"} for role in ROLES],
+        })
+    return runs
+
+
+class StubRouter:
+    """Stands in for NodeJSRouter; pipelines sleep instead of calling providers"""
+
+    def __init__(self, runs: List[Dict[str, Any]], runs_root: Path, provider_latency: float):
+        self.runs = runs
+        self.runs_root = runs_root
+        self.provider_latency = provider_latency
+
+    async def list_runs(
+        self,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        profile_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        runs = [run for run in self.runs if run["status"] == status] if status else self.runs
+        if profile_id:
+            runs = [run for run in runs if run["profileId"] == profile_id]
+        return runs[:limit] if limit else runs
+
+    async def execute_run(self, run_id: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        for _ in ROLES:
+            await asyncio.sleep(self.provider_latency)
+        summary = {"id": run_id, "status": "needs_review", "config": config,
+                   "artifacts": [{"role": role, "status": "completed"} for role in ROLES]}
+        run_dir = self.runs_root / run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+        (run_dir / "summary.json").write_text(json.dumps(summary), encoding="utf-8")
+        return summary
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": 0, "stub": True}
+
+
+def load_module(name: str, path: Path):
+    """Import a server module by path (server-direct.py is not a valid module name)"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def tool_calls(module, sample_ids: List[str]) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Arguments for each benchmarked tool, as (function, kwargs factory) pairs"""
+    return {
+        "list_runs": (module.list_runs, lambda: {"limit": 100}),
+        "list_runs_status": (module.list_runs, lambda: {"status": "completed", "limit": 100}),
+        "get_run": (module.get_run, lambda: {"run_id": random.choice(sample_ids)}),
+        # Every sample sends the same job description; reuse would measure the near-duplicate short-circuit
+        "create_run": (module.create_run, lambda: {"job_description": "Benchmark job", "dry_run": True, "reuse": False}),
+        "get_resume_info": (module.get_resume_info, lambda: {}),
+        "check_health": (module.check_health, lambda: {}),
+    }
+
+
+async def bench_server(label: str, module, sample_ids: List[str], args) -> List[Dict[str, Any]]:
+    from fastmcp import Client
+
+    results = []
+    for tool, (fn, kwargs) in tool_calls(module, sample_ids).items():
+        for clients in args.clients:
+            stats = await measure(lambda _i: (lambda: fn(**kwargs())), args.calls, clients)
+            results.append({"server": label, "mode": "direct", "tool": tool, **stats})
+
+            sessions = [Client(module.mcp) for _ in range(clients)]
+            for session in sessions:
+                await session.__aenter__()
+            try:
+                name = fn.__name__
+
+                def via_client(i: int) -> Call:
+                    return lambda: sessions[i].call_tool(name, kwargs(), raise_on_error=False)
+
+                stats = await measure(via_client, args.calls, clients)
+            finally:
+                for session in sessions:
+                    await session.__aexit__(None, None, None)
+            results.append({"server": label, "mode": "client", "tool": tool, **stats})
+    return results
+
+
+async def bench_bridge(run_count: int, args) -> List[Dict[str, Any]]:
+    """Round trips through NodeJSRouter to long-lived stub workers"""
+    if not shutil.which("node"):
+        print("node not found, skipping bridge benchmarks", file=sys.stderr)
+        return []
+    from bridge import NodeJSRouter, NodeWorker
+
+    os.environ["STUB_RUN_COUNT"] = str(run_count)
+    router = NodeJSRouter(str(MCP_DIR.parent / "orchestrator"), pool_size=args.workers)
+    router.workers = [NodeWorker(["node", str(STUB_WORKER)], BENCH_DIR) for _ in range(args.workers)]
+    sample_ids = [f"run-{random.randrange(run_count)}" for _ in range(100)]
+
+    results = []
+    try:
+        await router.get_run(sample_ids[0])
+        for clients in args.clients:
+            for method, call in (
+                ("getRun", lambda: router.get_run(random.choice(sample_ids))),
+                ("listRuns", lambda: router.list_runs(limit=100)),
+            ):
+                stats = await measure(lambda _i: call, args.calls, clients)
+                results.append({"server": "bridge", "mode": f"workers={args.workers}", "tool": method, **stats})
+    finally:
+        await router.close()
+    return results
+
+
+async def bench_run_count(run_count: int, args, workdir: Path) -> List[Dict[str, Any]]:
+    runs = make_runs(run_count)
+    sample_ids = [run["id"] for run in random.sample(runs, min(len(runs), 100))]
+
+    # server-direct.py reads RUN_STORE_PATH when it is imported; the servers open JD_INDEX_PATH on first use
+    os.environ["RUN_STORE_PATH"] = str(workdir / f"runs-{run_count}.db")
+    os.environ["JD_INDEX_PATH"] = str(workdir / f"jd-index-{run_count}.db")
+    direct = load_module(f"bench_server_direct_{run_count}", MCP_DIR / "server-direct.py")
+    direct.runs_storage.put_many(runs)
+
+    bridged = load_module(f"bench_server_{run_count}", MCP_DIR / "server.py")
+    bridged.RUNS_ROOT = workdir / f"runs-{run_count}"
+    bridged.router = StubRouter(runs, bridged.RUNS_ROOT, args.provider_latency)
+    for run_id in sample_ids:
+        run_dir = bridged.RUNS_ROOT / run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+        summary = next(run for run in runs if run["id"] == run_id)
+        (run_dir / "summary.json").write_text(json.dumps(summary), encoding="utf-8")
+
+    results = []
+    results += await bench_server("server-direct", direct, sample_ids, args)
+    results += await bench_server("server", bridged, sample_ids, args)
+    # Let the pipelines queued by create_run drain before the next scale
+    for job in list(bridged.run_queue.jobs.values()):
+        await bridged.run_queue.wait(job.run_id, poll_interval=0.01)
+    direct.runs_storage.close()
+    results += await bench_bridge(run_count, args)
+
+    for entry in results:
+        entry["runs"] = run_count
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=MCP_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results: List[Dict[str, Any]]):
+    header = f"{'runs':>7} {'server':<14} {'mode':<10} {'tool':<17} {'clients':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>9} {'err':>4}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['runs']:>7} {r['server']:<14} {r['mode']:<10} {r['tool']:<17} {r['clients']:>7} "
+              f"{r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['throughput_rps']:>9.1f} {r['errors']:>4}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the FastMCP resume orchestrator tools")
+    parser.add_argument("--runs", type=int, nargs="+", default=[10, 1000, 10000, 100000],
+                        help="Stored run counts to benchmark against")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32],
+                        help="Concurrent client counts")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per tool and client count")
+    parser.add_argument("--workers", type=int, default=2, help="Stub router workers for bridge benchmarks")
+    parser.add_argument("--provider-latency", type=float, default=0.0,
+                        help="Seconds each stubbed provider call sleeps in queued pipelines")
+    parser.add_argument("--output", type=Path, default=None, help="Where to write the JSON results")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    commit = git_commit()
+    results: List[Dict[str, Any]] = []
+    workdir = Path(tempfile.mkdtemp(prefix="mcp-bench-"))
+    try:
+        for run_count in args.runs:
+            print(f"Benchmarking with {run_count} runs...", file=sys.stderr)
+            results += await bench_run_count(run_count, args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(results)
+
+    from fastmcp import __version__ as fastmcp_version
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "fastmcp": fastmcp_version,
+        "platform": platform.platform(),
+        "params": {
+            "runs": args.runs,
+            "clients": args.clients,
+            "calls": args.calls,
+            "workers": args.workers,
+            "provider_latency": args.provider_latency,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nResults written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env node
+/**
+ * Stub router worker for benchmarks
+ * Speaks the same Content-Length framed JSON-RPC protocol as
+ * orchestrator/src/router-bridge.js --worker, but answers from memory so
+ * bridge round trips can be measured without providers or the TS router.
+ */
+
+const RUN_COUNT = Number(process.env.STUB_RUN_COUNT || 100);
+const HEADER_DELIMITER = Buffer.from('\r\n\r\n');
+
+const runs = Array.from({ length: RUN_COUNT }, (_, i) => ({
+    id: `run-${i}`,
+    status: i % 3 === 0 ? 'completed' : 'needs_review',
+    createdAt: new Date(Date.UTC(2024, 0, 1) + i * 1000).toISOString(),
+    artifacts: []
+}));
+
+const handlers = {
+    listRuns: (params) => runs.filter((run) => !params.status || run.status === params.status).slice(0, params.limit ?? runs.length),
+    getRun: (params) => runs.find((run) => run.id === params.runId) ?? runs[0],
+    createRun: (params) => ({ ...runs[0], id: params.runId ?? 'stub-run' }),
+    ping: () => ({ pong: true, pid: process.pid })
+};
+
+function writeFrame(message) {
+    const body = Buffer.from(JSON.stringify(message), 'utf8');
+    process.stdout.write(`Content-Length: ${body.length}\r\n\r\n`);
+    process.stdout.write(body);
+}
+
+let buffer = Buffer.alloc(0);
+process.stdin.on('data', (chunk) => {
+    buffer = Buffer.concat([buffer, chunk]);
+    for (;;) {
+        const headerEnd = buffer.indexOf(HEADER_DELIMITER);
+        if (headerEnd === -1) return;
+        const length = Number(/Content-Length:\s*(\d+)/i.exec(buffer.subarray(0, headerEnd).toString('ascii'))[1]);
+        const bodyStart = headerEnd + HEADER_DELIMITER.length;
+        if (buffer.length < bodyStart + length) return;
+        const { id, method, params } = JSON.parse(buffer.subarray(bodyStart, bodyStart + length).toString('utf8'));
+        buffer = buffer.subarray(bodyStart + length);
+        const handler = handlers[method];
+        if (handler) {
+            writeFrame({ jsonrpc: '2.0', id, result: handler(params ?? {}) });
+        } else {
+            writeFrame({ jsonrpc: '2.0', id, error: { code: -32601, message: `Unknown function: ${method}` } });
+        }
+    }
+});
+process.stdin.on('end', () => process.exit(0));
@@ -2,89 +2,265 @@
 """
 Bridge between FastMCP and Node.js orchestrator
 This allows FastMCP to call the existing Node.js router functions
+
+Calls are served by a small pool of long-lived ``router-bridge.js --worker``
+processes. Requests and responses are JSON-RPC 2.0 messages framed with a
+``Content-Length`` header, so many calls can be in flight on one worker.
 """
 
 import asyncio
+import itertools
 import json
-import subprocess
+import os
+import shutil
 import sys
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+import metrics
+
+# Defaults, overridable through the environment
+DEFAULT_POOL_SIZE = int(os.getenv("ROUTER_WORKERS", "2"))
+DEFAULT_CALL_TIMEOUT = float(os.getenv("ROUTER_CALL_TIMEOUT", "30"))
+DEFAULT_CREATE_TIMEOUT = float(os.getenv("ROUTER_CREATE_TIMEOUT", "900"))
+
+
+class NodeWorkerError(Exception):
+    """Raised when a worker call fails, times out or the worker dies"""
+
+
+class NodeWorker:
+    """A single long-lived router-bridge.js process"""
+
+    def __init__(self, command: List[str], cwd: Path):
+        self.command = command
+        self.cwd = cwd
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.restarts = 0
+        self._ids = itertools.count(1)
+        self._reader_task: Optional[asyncio.Task] = None
+        self._stderr_task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        # Once the reader stops, responses can no longer arrive even if the process lingers
+        reading = self._reader_task is None or not self._reader_task.done()
+        return self.process is not None and self.process.returncode is None and reading
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.pending)
+
+    async def ensure_started(self):
+        """Start the worker, or restart it if the previous process exited"""
+        if self.alive:
+            return
+        async with self._start_lock:
+            if self.alive:
+                return
+            if self.process is not None:
+                self.restarts += 1
+                if self.process.returncode is None:
+                    # Still running after its reader gave up on a malformed frame
+                    self.process.kill()
+                code = await self.process.wait()
+                print(f"⚠️ Node.js worker exited ({code}), restarting")
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                cwd=str(self.cwd),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            self._reader_task = asyncio.create_task(self._read_frames(self.process))
+            self._stderr_task = asyncio.create_task(self._drain_stderr(self.process))
+
+    async def call(self, method: str, params: Dict[str, Any], timeout: float) -> Any:
+        """Send one JSON-RPC request and wait for its response"""
+        await self.ensure_started()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+
+        body = json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}).encode("utf-8")
+        try:
+            async with self._write_lock:
+                self.process.stdin.write(f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+                await self.process.stdin.drain()
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise NodeWorkerError(f"{method} timed out after {timeout:.0f}s")
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise NodeWorkerError(f"Node.js worker unavailable: {e}")
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def close(self):
+        """Stop the worker and fail any outstanding calls"""
+        if self.alive:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+        for task in (self._reader_task, self._stderr_task):
+            if task:
+                task.cancel()
+        self._fail_pending("Node.js worker closed")
+
+    async def _read_frames(self, process: asyncio.subprocess.Process):
+        stdout = process.stdout
+        reason = None
+        try:
+            while True:
+                header = await stdout.readuntil(b"\r\n\r\n")
+                length = None
+                for line in header.decode("ascii").split("\r\n"):
+                    name, _, value = line.partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value.strip())
+                if length is None:
+                    continue
+                message = json.loads(await stdout.readexactly(length))
+                self._dispatch(message)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        except Exception as e:
+            # A malformed frame leaves stdout out of step with the framing; kill the
+            # worker so the next call starts a fresh one instead of hanging on it
+            reason = f"Node.js worker sent an unreadable frame: {e}"
+            print(f"⚠️ {reason}", file=sys.stderr)
+            if process.returncode is None:
+                process.kill()
+        finally:
+            self._fail_pending(reason or f"Node.js worker exited ({process.returncode})")
+
+    def _dispatch(self, message: Dict[str, Any]):
+        future = self.pending.get(message.get("id"))
+        if future is None or future.done():
+            # Notifications (e.g. "ready") and late responses after a timeout
+            return
+        if "error" in message:
+            future.set_exception(NodeWorkerError(message["error"].get("message", "Unknown error")))
+        else:
+            future.set_result(message.get("result"))
+
+    def _fail_pending(self, reason: str):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(NodeWorkerError(reason))
+
+    async def _drain_stderr(self, process: asyncio.subprocess.Process):
+        while True:
+            line = await process.stderr.readline()
+            if not line:
+                return
+            print(f"[router-bridge] {line.decode(errors='replace').rstrip()}", file=sys.stderr)
+
 
 class NodeJSRouter:
     """Bridge to call Node.js router functions from Python"""
-    
-    def __init__(self, orchestrator_path: str):
+
+    def __init__(
+        self,
+        orchestrator_path: str,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        call_timeout: float = DEFAULT_CALL_TIMEOUT,
+        create_timeout: float = DEFAULT_CREATE_TIMEOUT,
+    ):
         self.orchestrator_path = Path(orchestrator_path)
         self.node_script = self.orchestrator_path / "src" / "router-bridge.js"
-        
-    async def list_runs(self) -> List[Dict[str, Any]]:
-        """Call the Node.js listRuns function"""
+        self.call_timeout = call_timeout
+        self.create_timeout = create_timeout
+        command = self._worker_command()
+        self.workers = [NodeWorker(command, self.orchestrator_path) for _ in range(max(1, pool_size))]
+
+    def _worker_command(self) -> List[str]:
+        """Resolve how to launch router-bridge.js (it imports the TypeScript router via tsx)"""
+        local_tsx = self.orchestrator_path / "node_modules" / ".bin" / "tsx"
+        if local_tsx.exists():
+            return [str(local_tsx), str(self.node_script), "--worker"]
+        if shutil.which("tsx"):
+            return ["tsx", str(self.node_script), "--worker"]
+        return ["npx", "--yes", "tsx", str(self.node_script), "--worker"]
+
+    async def list_runs(
+        self,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        profile_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Call the Node.js listRuns function; status, profile and limit are applied by the run index"""
+        filters = (("status", status), ("limit", limit), ("profileId", profile_id))
+        params = {key: value for key, value in filters if value is not None}
         try:
-            result = await self._call_node_function("listRuns", {})
-            return result.get("runs", [])
+            return await self._call_node_function("listRuns", params) or []
         except Exception as e:
             print(f"Error calling listRuns: {e}")
             return []
-    
+
     async def get_run(self, run_id: str) -> Dict[str, Any]:
         """Call the Node.js getRun function"""
         try:
-            result = await self._call_node_function("getRun", {"runId": run_id})
-            return result.get("run", {})
+            return await self._call_node_function("getRun", {"runId": run_id}) or {}
         except Exception as e:
             print(f"Error calling getRun: {e}")
             return {}
-    
+
+    async def rebuild_run_index(self) -> Dict[str, Any]:
+        """Recreate data/runs/index.jsonl from the run summaries; errors propagate"""
+        return await self._call_node_function("rebuildRunIndex", {}, timeout=self.create_timeout)
+
+    async def preview_prompt(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Compacted prompt for one role plus its token estimate; errors propagate"""
+        return await self._call_node_function("previewPrompt", request)
+
     async def create_run(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Call the Node.js createRun function"""
         try:
-            result = await self._call_node_function("createRun", config)
-            return result.get("summary", {})
+            return await self._call_node_function("createRun", config, timeout=self.create_timeout) or {}
         except Exception as e:
             print(f"Error calling createRun: {e}")
             return {}
-    
-    async def _call_node_function(self, function_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Call a Node.js function via subprocess"""
-        # Create a temporary script to call the function
-        script_content = f"""
-const {{ ResumeRunRouter }} = require('./agents/index.js');
-
-async function callFunction() {{
-    const router = new ResumeRunRouter();
-    const result = await router.{function_name}({json.dumps(args)});
-    console.log(JSON.stringify({{ result }}));
-}}
-
-callFunction().catch(console.error);
-"""
-        
-        script_path = self.orchestrator_path / "temp_call.js"
-        with open(script_path, 'w') as f:
-            f.write(script_content)
-        
+
+    async def execute_run(self, run_id: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the full pipeline under a caller-assigned run id; errors propagate"""
+        return await self._call_node_function("createRun", {**config, "runId": run_id}, timeout=self.create_timeout)
+
+    async def resume_run(self, run_id: str) -> Dict[str, Any]:
+        """Restart a failed or interrupted run from its first unfinished stage; errors propagate"""
+        return await self._call_node_function("resumeRun", {"runId": run_id}, timeout=self.create_timeout)
+
+    async def close(self):
+        """Shut down all workers"""
+        await asyncio.gather(*(worker.close() for worker in self.workers))
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool status for health checks"""
+        return {
+            "workers": len(self.workers),
+            "alive": sum(1 for w in self.workers if w.alive),
+            "in_flight": sum(w.in_flight for w in self.workers),
+            "restarts": sum(w.restarts for w in self.workers),
+        }
+
+    async def _call_node_function(
+        self, function_name: str, args: Dict[str, Any], timeout: Optional[float] = None
+    ) -> Any:
+        """Call a Node.js function on the least busy worker"""
+        worker = min(self.workers, key=lambda w: (not w.alive, w.in_flight))
+        started = time.perf_counter()
         try:
-            # Run the Node.js script
-            process = await asyncio.create_subprocess_exec(
-                'node', str(script_path),
-                cwd=str(self.orchestrator_path),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                raise Exception(f"Node.js error: {stderr.decode()}")
-            
-            result = json.loads(stdout.decode())
-            return result.get("result", {})
-            
+            return await worker.call(function_name, args, timeout or self.call_timeout)
+        except Exception:
+            metrics.bridge_errors.inc(method=function_name)
+            raise
         finally:
-            # Clean up temporary script
-            if script_path.exists():
-                script_path.unlink()
+            metrics.bridge_latency.observe(time.perf_counter() - started, method=function_name)
 
 # Global router instance
 router = None
@@ -96,6 +272,7 @@ async def initialize_router():
         orchestrator_path = Path(__file__).parent.parent / "orchestrator"
         router = NodeJSRouter(str(orchestrator_path))
         print("✅ Node.js Router bridge initialized")
+    return router
 
 # Export for use in server.py
-__all__ = ['NodeJSRouter', 'initialize_router']
+__all__ = ['NodeJSRouter', 'NodeWorker', 'NodeWorkerError', 'initialize_router']
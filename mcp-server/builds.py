@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+LaTeX build helper for the FastMCP servers
+Runs scripts/build-resume.sh, which serves PDFs from a content-addressed
+build cache (data/cache/builds) and only calls the TeX service on a miss.
+"""
+
+import asyncio
+import json
+import re
+import time
+from pathlib import Path
+from typing import Dict, Any
+
+import metrics
+
+ROOT_DIR = Path(__file__).parent.parent
+BUILD_SCRIPT = ROOT_DIR / "scripts" / "build-resume.sh"
+RUNS_ROOT = ROOT_DIR / "data" / "runs"
+RUN_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,127}$")
+BUILD_TIMEOUT = 300
+
+
+def _parse_result(output: str) -> Dict[str, Any]:
+    """Pick the cache report line emitted by build-resume.sh"""
+    for line in reversed(output.strip().splitlines()):
+        line = line.strip()
+        if line.startswith("{") and '"cache"' in line:
+            try:
+                return json.loads(line)
+            except json.JSONDecodeError:
+                continue
+    return {}
+
+
+async def run_build(run_id: str = "manual", timeout: float = BUILD_TIMEOUT) -> Dict[str, Any]:
+    """Build the resume for a run, reporting whether the build cache was hit"""
+    if not RUN_ID_PATTERN.match(run_id):
+        raise ValueError(f"Invalid run id {run_id}")
+
+    run_dir = RUNS_ROOT / run_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+    log_path = run_dir / "build.log"
+    pdf_path = run_dir / "final.pdf"
+
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        "bash", str(BUILD_SCRIPT), run_id,
+        cwd=str(ROOT_DIR),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise TimeoutError(f"Build for {run_id} timed out after {timeout:.0f}s")
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    output = stdout.decode("utf-8", errors="replace")
+    log_path.write_text(output, encoding="utf-8")
+    report = _parse_result(output)
+    ok = process.returncode == 0
+    metrics.build_latency.observe(duration_ms / 1000, status="OK" if ok else "FAILED", cache=report.get("cache") or "none")
+
+    return {
+        "status": "OK" if ok else "FAILED",
+        "run_id": run_id,
+        "cache": report.get("cache"),
+        "input_hash": report.get("inputHash"),
+        "pdf_path": str(pdf_path) if ok and pdf_path.exists() else None,
+        "log_path": str(log_path),
+        "duration_ms": duration_ms,
+    }
+
+__all__ = ['run_build', 'BUILD_SCRIPT']
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Batched Refiner diff engine for the direct server
+Python counterpart of applyDiff in agents/router.ts. Diffs are grouped by
+target file; each file is taken from the resume snapshot cache (or read once),
+every anchor is resolved against the file's structural index
+(resume_index.py), and all patches are applied in a single pass over the
+lines before the file is written once.
+
+Besides the router's `line:N`, `regex:...` and `SECTION:NAME` anchors, an
+`ENTRY:<key>` anchor addresses an entry or bullet by its index key (for
+example `ENTRY:EXPERIENCE/capgemini-software-engineer/2`).
+
+Anchors are resolved against the file as the Refiner saw it, so a `line:`
+anchor in a later diff is not shifted by lines an earlier diff inserted.
+Patches whose ranges intersect an earlier patch in the same file are
+skipped; an insert at the line a replace or delete starts at is not an
+overlap, whichever order the two diffs came in.
+"""
+
+import bisect
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from resume_index import FileStructure, file_structure
+from resume_snapshot import get_snapshot_cache
+
+ROOT_DIR = Path(__file__).parent.parent
+RESUME_DIR = ROOT_DIR / "resume"
+RUNS_ROOT = ROOT_DIR / "data" / "runs"
+RUN_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,127}$")
+ANNOTATION = "% [agent:finalizer]"
+PATCH_TYPES = ("insert", "replace", "delete")
+
+
+class AnchorError(ValueError):
+    pass
+
+
+class FileIndex:
+    """One file's lines, line offsets and structure, for anchor lookups"""
+
+    def __init__(self, structure: FileStructure):
+        self.structure = structure
+        self.text = self.structure.text
+        self.lines = self.structure.lines
+        self.offsets = self.structure.offsets
+
+    def line_of(self, offset: int) -> int:
+        return bisect.bisect_right(self.offsets, offset) - 1
+
+    def resolve(self, anchor: str) -> Tuple[int, int]:
+        """Line range [start, end) an anchor refers to, same rules as findAnchor"""
+        if anchor.startswith("line:"):
+            try:
+                number = int(anchor.split(":")[1])
+            except ValueError:
+                raise AnchorError(f"Invalid line anchor: {anchor}")
+            index = max(0, min(len(self.lines), number - 1))
+            return index, index + 1
+        if anchor.startswith("regex:"):
+            pattern = anchor[len("regex:"):]
+            try:
+                match = re.search(pattern, self.text, re.MULTILINE)
+            except re.error as e:
+                raise AnchorError(f"Invalid regex anchor {pattern}: {e}")
+            if not match:
+                raise AnchorError(f"Regex anchor not found: {pattern}")
+            start = self.line_of(match.start())
+            return start, start + match.group(0).count("\n") + 1
+        if anchor.startswith("SECTION:"):
+            key = anchor[len("SECTION:"):].strip()
+            index = self.structure.marker_line(key)
+            if index is None:
+                raise AnchorError(f"Section anchor not found: {key}")
+            return index + 1, index + 1
+        if anchor.startswith("ENTRY:"):
+            key = anchor[len("ENTRY:"):].strip()
+            node = self.structure.nodes.get(key)
+            if node is None:
+                raise AnchorError(f"Entry anchor not found: {key}")
+            return node.start, node.end
+        raise AnchorError(f"Unsupported anchor format: {anchor}")
+
+    def preview(self, diff: Dict[str, Any], start: int, end: int) -> str:
+        header = f"# Diff for {diff['target_file']} ({diff['patch_type']} @ {diff['anchor']})"
+        context = self.lines[max(0, start - 3):end + 3]
+        return "\n".join([header, *context, "---", diff["content"]])
+
+
+@dataclass
+class Patch:
+    order: int
+    diff: Dict[str, Any]
+    start: int
+    end: int
+
+    @property
+    def position(self) -> int:
+        """Line the patch takes effect at: inserts go after the anchor, the rest replace it"""
+        return self.end if self.diff["patch_type"] == "insert" else self.start
+
+
+@dataclass
+class FileResult:
+    target_file: str
+    path: Path
+    applied: List[int] = field(default_factory=list)
+    skipped: List[Dict[str, Any]] = field(default_factory=list)
+    written: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "target_file": self.target_file,
+            "applied": self.applied,
+            "skipped": self.skipped,
+            "written": self.written,
+        }
+
+
+def annotate(content: str) -> List[str]:
+    """Mark inserted LaTeX the way the TypeScript finalizer does"""
+    trimmed = content.replace("\r\n", "\n").strip()
+    if not trimmed.startswith(ANNOTATION):
+        trimmed = f"{ANNOTATION}\n{trimmed}"
+    return trimmed.split("\n")
+
+
+def resolve_target(target_file: str, root: Path = ROOT_DIR, allowed: Path = RESUME_DIR) -> Path:
+    """
+    Path of a diff target; only files under the resume directory may be
+    patched. Refiner targets are written as resume/..., which maps onto the
+    profile's own tree when `allowed` is not the repository's resume/.
+    """
+    if target_file.startswith("resume/"):
+        path = (allowed / target_file[len("resume/"):]).resolve()
+    else:
+        path = (root / target_file).resolve()
+    if not path.is_relative_to(allowed.resolve()):
+        raise ValueError(f"Diff target outside {allowed.name}/: {target_file}")
+    return path
+
+
+def load_run_diffs(run_id: str, runs_root: Path = RUNS_ROOT) -> List[Dict[str, Any]]:
+    """Refiner diffs a router run stored in data/runs/<id>/refiner.json"""
+    if not RUN_ID_PATTERN.match(run_id):
+        raise ValueError(f"Invalid run id {run_id}")
+    path = runs_root / run_id / "refiner.json"
+    if not path.exists():
+        raise FileNotFoundError(f"Run {run_id} has no refiner output")
+    return json.loads(path.read_text(encoding="utf-8")).get("diffs", [])
+
+
+def _validate(diff: Dict[str, Any]) -> Optional[str]:
+    for key in ("target_file", "patch_type", "anchor", "content"):
+        if not isinstance(diff.get(key), str):
+            return f"Missing or invalid {key}"
+    if diff["patch_type"] not in PATCH_TYPES:
+        return f"Unknown patch type {diff['patch_type']}"
+    return None
+
+
+def _apply(index: FileIndex, patches: List[Patch], result: FileResult) -> List[str]:
+    """Single pass over the original lines, splicing patches in position order"""
+    output: List[str] = []
+    cursor = 0
+    # At one position inserts go first: an insert after a section marker and a replace of the
+    # line below it touch the same spot without overlapping
+    ordered = sorted(patches, key=lambda p: (p.position, p.diff["patch_type"] != "insert", p.order))
+    for patch in ordered:
+        position = patch.position
+        patch_type = patch.diff["patch_type"]
+        if position < cursor:
+            result.skipped.append({"index": patch.order, "error": "Overlaps an earlier diff in the same file"})
+            continue
+        output.extend(index.lines[cursor:position])
+        cursor = position
+        if patch_type != "delete":
+            output.extend(annotate(patch.diff["content"]))
+        if patch_type != "insert":
+            cursor = max(cursor, patch.end)
+        result.applied.append(patch.order)
+    output.extend(index.lines[cursor:])
+    return output
+
+
+def _write(path: Path, lines: List[str]):
+    content = "\n".join(lines)
+    if not content.endswith("\n"):
+        content += "\n"
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(content, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def apply_diffs(
+    diffs: List[Dict[str, Any]],
+    dry_run: bool = True,
+    root: Path = ROOT_DIR,
+    allowed: Path = RESUME_DIR,
+) -> Dict[str, Any]:
+    """
+    Apply Refiner diffs grouped by file. Returns one preview per diff (in diff
+    order) plus per-file applied/skipped diff indexes; with dry_run nothing is
+    written.
+    """
+    previews: List[Optional[str]] = [None] * len(diffs)
+    groups: Dict[Path, List[Tuple[int, Dict[str, Any]]]] = {}
+    files: Dict[Path, FileResult] = {}
+    errors: List[Dict[str, Any]] = []
+    # Files the snapshot cache already holds come with their parsed structure
+    cached_files = {
+        cached.path.resolve(): (name, cached)
+        for name, cached in get_snapshot_cache(allowed).snapshot().sections.items()
+    } if allowed.is_dir() else {}
+
+    for order, diff in enumerate(diffs):
+        problem = _validate(diff)
+        path = None
+        if not problem:
+            try:
+                path = resolve_target(diff["target_file"], root, allowed)
+            except ValueError as e:
+                problem = str(e)
+        if problem:
+            errors.append({"index": order, "error": problem})
+            previews[order] = f"Failed to apply {diff.get('target_file')}: {problem}"
+            continue
+        groups.setdefault(path, []).append((order, diff))
+        files.setdefault(path, FileResult(diff["target_file"], path))
+
+    for path, entries in groups.items():
+        result = files[path]
+        try:
+            if path in cached_files:
+                index = FileIndex(file_structure(*cached_files[path]))
+            else:
+                index = FileIndex(FileStructure(path.name, path.read_text(encoding="utf-8")))
+        except OSError as e:
+            for order, diff in entries:
+                result.skipped.append({"index": order, "error": f"Cannot read {diff['target_file']}: {e.strerror}"})
+                previews[order] = f"Failed to apply {diff['target_file']}: {e.strerror}"
+            continue
+
+        patches: List[Patch] = []
+        for order, diff in entries:
+            try:
+                start, end = index.resolve(diff["anchor"])
+            except AnchorError as e:
+                result.skipped.append({"index": order, "error": str(e)})
+                previews[order] = f"Failed to apply {diff['target_file']}: {e}"
+                continue
+            patches.append(Patch(order, diff, start, end))
+            previews[order] = index.preview(diff, start, end)
+
+        lines = _apply(index, patches, result)
+        for skipped in result.skipped:
+            if previews[skipped["index"]] and not previews[skipped["index"]].startswith("Failed"):
+                previews[skipped["index"]] = f"Failed to apply {result.target_file}: {skipped['error']}"
+        if result.applied and not dry_run:
+            _write(path, lines)
+            result.written = True
+
+    applied = sum(len(result.applied) for result in files.values())
+    return {
+        "dry_run": dry_run,
+        "applied": 0 if dry_run else applied,
+        "applicable": applied,
+        "skipped": len(diffs) - applied,
+        "files": [result.to_dict() for result in files.values()],
+        "errors": errors,
+        "previews": previews,
+    }
+
+__all__ = ['apply_diffs', 'load_run_diffs', 'FileIndex', 'AnchorError', 'resolve_target']
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate job description index
+Every run's job description is reduced to a MinHash signature of its word
+shingles and filed under LSH band buckets in an embedded SQLite database, so
+reposts of the same role with small wording changes are found without
+comparing against every past run. create_run checks it first and hands back
+an earlier run of the same profile, resume snapshot (etag), dry-run mode and
+role providers when the estimated Jaccard similarity reaches
+JD_REUSE_THRESHOLD.
+
+With 32 bands of 4 rows, pairs at similarity 0.5 become candidates ~87% of
+the time and pairs at 0.8 or more practically always; lower thresholds are
+best effort.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import struct
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / "data" / "jd_index.db"
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+MERSENNE_PRIME = (1 << 61) - 1
+# create_run reuses an earlier run at or above this similarity; JD_REUSE=0 turns reuse off
+JD_REUSE = os.getenv("JD_REUSE", "1") != "0"
+JD_REUSE_THRESHOLD = float(os.getenv("JD_REUSE_THRESHOLD", "0.8"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jd_signatures (
+    run_id TEXT PRIMARY KEY,
+    profile_id TEXT NOT NULL,
+    resume_etag TEXT,
+    dry_run INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    providers TEXT
+);
+CREATE TABLE IF NOT EXISTS jd_bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    run_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jd_bands_bucket ON jd_bands (band, bucket);
+CREATE INDEX IF NOT EXISTS jd_bands_run ON jd_bands (run_id);
+"""
+
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+SIGNATURE_FORMAT = f"<{NUM_PERM}Q"
+
+# Fixed seed: signatures stored by one process must compare with the next one's
+_rng = random.Random(0x5EED)
+PERMUTATIONS: List[Tuple[int, int]] = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)
+]
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> Set[int]:
+    """Hashes of the overlapping size-word windows of a text (case and punctuation ignored)"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {_hash64(" ".join(words).encode("utf-8"))}
+    return {_hash64(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+def signature(text: str) -> Tuple[int, ...]:
+    """MinHash signature: the minimum of each permuted shingle hash"""
+    hashes = shingles(text)
+    return tuple(min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in PERMUTATIONS)
+
+
+def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_PERM
+
+
+def providers_key(providers: Optional[Dict[str, str]]) -> Optional[str]:
+    """Canonical form of a role -> provider mapping, so equal mappings compare equal in SQL"""
+    return json.dumps(providers, sort_keys=True, separators=(",", ":")) if providers is not None else None
+
+
+def band_buckets(sig: Tuple[int, ...]) -> List[Tuple[int, int]]:
+    """(band, bucket) of each LSH band; a bucket is a signed 64-bit hash so SQLite can store it"""
+    buckets = []
+    for band in range(BANDS):
+        rows = struct.pack(f"<{ROWS}Q", *sig[band * ROWS:(band + 1) * ROWS])
+        buckets.append((band, int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), "big", signed=True)))
+    return buckets
+
+
+class SimilarityIndex:
+    """MinHash/LSH index of run job descriptions, persisted in SQLite"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or os.getenv("JD_INDEX_PATH", str(DEFAULT_DB_PATH)))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jd_signatures)")}
+        if "providers" not in columns:
+            # Indexes written before providers were recorded; their runs never match a providers filter
+            self._conn.execute("ALTER TABLE jd_signatures ADD COLUMN providers TEXT")
+
+    def add(
+        self,
+        run_id: str,
+        job_description: str,
+        profile_id: str,
+        resume_etag: Optional[str],
+        dry_run: bool,
+        providers: Optional[Dict[str, str]] = None,
+        sig: Optional[Tuple[int, ...]] = None,
+    ):
+        """Index one run's job description; pass sig when it was already computed for a query"""
+        self.add_many([(run_id, sig or job_description, profile_id, resume_etag, dry_run, providers)])
+
+    def add_many(self, runs: Iterable[Tuple[str, Any, str, Optional[str], bool, Optional[Dict[str, str]]]]):
+        """
+        Index many runs in a single transaction. Each run is (run_id,
+        job_description or its signature, profile_id, resume_etag, dry_run,
+        providers).
+        """
+        now = datetime.now().isoformat()
+        rows, bands = [], []
+        for run_id, text, profile_id, resume_etag, dry_run, providers in runs:
+            sig = signature(text) if isinstance(text, str) else text
+            rows.append((
+                run_id, profile_id, resume_etag, int(dry_run), now,
+                struct.pack(SIGNATURE_FORMAT, *sig), providers_key(providers),
+            ))
+            bands.extend((band, bucket, run_id) for band, bucket in band_buckets(sig))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("DELETE FROM jd_bands WHERE run_id = ?", [(row[0],) for row in rows])
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO jd_signatures "
+                    "(run_id, profile_id, resume_etag, dry_run, created_at, signature, providers) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.executemany("INSERT INTO jd_bands (band, bucket, run_id) VALUES (?, ?, ?)", bands)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def remove(self, run_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM jd_bands WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM jd_signatures WHERE run_id = ?", (run_id,))
+
+    def query(
+        self,
+        job_description: str,
+        threshold: float = 0.5,
+        limit: int = 10,
+        profile_id: Optional[str] = None,
+        resume_etag: Optional[str] = None,
+        dry_run: Optional[bool] = None,
+        providers: Optional[Dict[str, str]] = None,
+        sig: Optional[Tuple[int, ...]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Indexed runs at or above threshold, most similar first; filters narrow the candidates"""
+        sig = sig or signature(job_description)
+        buckets = band_buckets(sig)
+        clauses = ["(" + " OR ".join("(b.band = ? AND b.bucket = ?)" for _ in buckets) + ")"]
+        params: List[Any] = [value for pair in buckets for value in pair]
+        if profile_id is not None:
+            clauses.append("s.profile_id = ?")
+            params.append(profile_id)
+        if resume_etag is not None:
+            clauses.append("s.resume_etag = ?")
+            params.append(resume_etag)
+        if dry_run is not None:
+            clauses.append("s.dry_run = ?")
+            params.append(int(dry_run))
+        if providers is not None:
+            clauses.append("s.providers = ?")
+            params.append(providers_key(providers))
+        query = (
+            "SELECT DISTINCT s.run_id, s.profile_id, s.resume_etag, s.dry_run, s.created_at, s.signature, s.providers "
+            f"FROM jd_bands b JOIN jd_signatures s ON s.run_id = b.run_id WHERE {' AND '.join(clauses)}"
+        )
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        matches = []
+        for run_id, profile, etag, dry, created_at, blob, run_providers in rows:
+            score = similarity(sig, struct.unpack(SIGNATURE_FORMAT, blob))
+            if score >= threshold:
+                matches.append({
+                    "run_id": run_id,
+                    "similarity": round(score, 3),
+                    "profile_id": profile,
+                    "resume_etag": etag,
+                    "dry_run": bool(dry),
+                    "providers": json.loads(run_providers) if run_providers else None,
+                    "indexed_at": created_at,
+                })
+        # Most similar first, the most recently indexed among equals
+        matches.sort(key=lambda match: match["indexed_at"], reverse=True)
+        matches.sort(key=lambda match: -match["similarity"])
+        return matches[:max(0, limit)]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jd_signatures").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+__all__ = ['SimilarityIndex', 'JD_REUSE', 'JD_REUSE_THRESHOLD', 'signature', 'similarity', 'shingles', 'providers_key']
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Background job queue for resume pipeline runs
+create_run hands the pipeline to this queue and returns immediately; a fixed
+number of asyncio workers execute queued runs so a single server can keep
+many pipelines in flight without holding MCP calls open.
+"""
+
+import asyncio
+import copy
+import itertools
+import json
+import os
+import socket
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import metrics
+
+DEFAULT_CONCURRENCY = int(os.getenv("RUN_CONCURRENCY", "4"))
+DEFAULT_BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+MAX_BATCH_SIZE = 500
+MAX_FINISHED_JOBS = 1000
+# Finished job and batch records are kept this long in the shared job store
+JOB_RECORD_TTL_S = 7 * 24 * 3600
+JOURNAL_FILE = "journal.jsonl"
+STREAM_FILE = "stream.jsonl"
+LOCK_FILE = "run.lock"
+# A run.lock not refreshed for this long was left by a router process that is gone (LOCK_STALE_MS)
+LOCK_STALE_S = 120
+
+ROLE_ORDER = ["reviewer", "swot", "refiner", "judge", "finalizer"]
+# Queue order of a run's config priority, as priorityOf in agents/admission.ts
+PRIORITY_RANK = {"interactive": 0, "batch": 1, "dry_run": 2}
+INTERRUPTED = "Interrupted by server shutdown; restart it with resume_run"
+
+Runner = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def _process_start(pid: int) -> Optional[str]:
+    """Start time of a process in clock ticks since boot (Linux /proc), None where unavailable"""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # starttime is field 22; fields are counted after the command name, which may hold spaces
+    fields = stat[stat.rfind(b")") + 2:].split()
+    return fields[19].decode() if len(fields) > 19 else None
+
+
+_boot_tokens: Dict[int, str] = {}
+
+
+def _boot_token() -> str:
+    """Tells this process apart from an earlier one with the same pid, e.g. before a container restart"""
+    pid = os.getpid()
+    if pid not in _boot_tokens:
+        _boot_tokens[pid] = _process_start(pid) or uuid.uuid4().hex[:12]
+    return _boot_tokens[pid]
+
+
+def worker_id() -> str:
+    """host:pid:boot token of this process; computed per call so every serve.py worker gets its own"""
+    return f"{socket.gethostname()}:{os.getpid()}:{_boot_token()}"
+
+
+def _worker_alive(worker: Optional[str]) -> bool:
+    """False only for a worker of this host whose process is gone or whose pid now belongs to another process"""
+    host, pid, token = ((worker or "").split(":") + ["", ""])[:3]
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # Worker ids written before boot tokens carry none; a uuid token cannot be checked from outside
+    started = _process_start(int(pid)) if token else None
+    return started is None or started == token
+
+
+@dataclass
+class RunJob:
+    run_id: str
+    config: Dict[str, Any]
+    status: str = "queued"  # queued, running, completed, failed
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    summary: Optional[Dict[str, Any]] = None
+    # Overrides the queue's runner for this job, e.g. to resume instead of create
+    runner: Optional[Runner] = None
+    worker: str = field(default_factory=worker_id)
+    # Set once the job is done; only jobs submitted in this process have one
+    finished: Optional[asyncio.Event] = field(default=None, repr=False, compare=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    @property
+    def priority(self) -> int:
+        """Dry runs after batch runs after interactive ones"""
+        if self.config.get("dryRun"):
+            return PRIORITY_RANK["dry_run"]
+        return PRIORITY_RANK.get(self.config.get("priority") or "interactive", 0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "job_status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "worker": self.worker,
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        """What the shared job store keeps: to_dict() plus the config to run again"""
+        return {**self.to_dict(), "config": self.config}
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "RunJob":
+        """A job queued by another worker; one whose worker died unfinished reads as failed"""
+        job = cls(
+            run_id=record["run_id"],
+            config=record.get("config") or {},
+            status=record["job_status"],
+            submitted_at=record["submitted_at"],
+            started_at=record.get("started_at"),
+            finished_at=record.get("finished_at"),
+            error=record.get("error"),
+            worker=record.get("worker", ""),
+        )
+        if not job.done and not _worker_alive(job.worker):
+            job.status = "failed"
+            job.error = f"Worker {job.worker} exited before the run finished"
+        return job
+
+
+class RunJobQueue:
+    """Bounded-concurrency asyncio queue of pipeline runs, interactive runs first"""
+
+    def __init__(self, runner: Runner, concurrency: int = DEFAULT_CONCURRENCY, store: Optional[Any] = None):
+        self.runner = runner
+        self.concurrency = max(1, concurrency)
+        self.jobs: "OrderedDict[str, RunJob]" = OrderedDict()
+        # Shared job store (run_store.JobStore) so other worker processes see these jobs
+        self.store = store
+        self.draining = False
+        self._finished = 0
+        self._seq = itertools.count()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: list = []
+
+    def _save(self, job: RunJob):
+        if self.store:
+            self.store.put_job(job.to_record())
+
+    def _ensure_workers(self):
+        # Created lazily so the queue binds to the server's running event loop
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    def submit(self, run_id: str, config: Dict[str, Any], runner: Optional[Runner] = None) -> RunJob:
+        """Queue a run and return its job record without waiting for it"""
+        if self.draining:
+            raise RuntimeError("Server is shutting down, not accepting new runs")
+        self._ensure_workers()
+        job = RunJob(run_id=run_id, config=config, runner=runner, finished=asyncio.Event())
+        self.jobs[run_id] = job
+        self._save(job)
+        self._queue.put_nowait((job.priority, next(self._seq), job))
+        return job
+
+    async def run_batch(self, batch: "RunBatch", items: List[Dict[str, Any]]) -> "RunBatch":
+        """
+        Feed the runs of a batch ({"runId", "config"} items) into the queue
+        with at most batch.concurrency of them queued or running at once, so
+        they share the queue's workers with single runs. Every item is
+        recorded as a queued job up front; the batch fails if any run does.
+        """
+        jobs = [RunJob(run_id=item["runId"], config=item["config"]) for item in items]
+        for job in jobs:
+            self._save(job)
+        batch.status = "running"
+        self._save_batch(batch)
+        submitted: List[RunJob] = []
+        in_flight: Set[asyncio.Task] = set()
+        interrupted = None
+        try:
+            for job in jobs:
+                while len(in_flight) >= batch.concurrency:
+                    _, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                submitted.append(self.submit(job.run_id, job.config))
+                in_flight.add(asyncio.create_task(submitted[-1].finished.wait()))
+        except RuntimeError as e:
+            # submit() refuses while draining; the rest of the batch stays resumable
+            interrupted = str(e)
+            for job in jobs[len(submitted):]:
+                job.status = "failed"
+                job.error = INTERRUPTED
+                job.finished_at = time.time()
+                self._save(job)
+        if in_flight:
+            await asyncio.wait(in_flight)
+
+        failed = sum(1 for job in submitted if job.status == "failed") + len(jobs) - len(submitted)
+        batch.status = "failed" if failed else "completed"
+        if failed:
+            batch.error = f"{failed} of {len(jobs)} runs failed" + (f" ({interrupted})" if interrupted else "")
+        batch.finished_at = time.time()
+        self._save_batch(batch)
+        return batch
+
+    def _save_batch(self, batch: "RunBatch"):
+        if self.store:
+            self.store.put_batch(batch.to_record())
+
+    def get(self, run_id: str) -> Optional[RunJob]:
+        """A job of this process, or else one another worker recorded in the shared store"""
+        job = self.jobs.get(run_id)
+        if job is None and self.store:
+            record = self.store.get_job(run_id)
+            job = RunJob.from_record(record) if record else None
+        return job
+
+    async def wait(self, run_id: str, poll_interval: float = 0.5) -> Optional[RunJob]:
+        """Wait until a job finishes (mostly useful for scripts and tests)"""
+        job = self.jobs.get(run_id)
+        while job and not job.done:
+            if job.finished:
+                await job.finished.wait()
+            else:
+                await asyncio.sleep(poll_interval)
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return {"concurrency": self.concurrency, **counts}
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            self._save(job)
+            try:
+                job.summary = await (job.runner or self.runner)(job.run_id, job.config)
+                job.status = "completed"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                self._save(job)
+                job.finished.set()
+                self._finished += 1
+                metrics.observe_run_job(job)
+                self._queue.task_done()
+                self._prune()
+
+    async def drain(self, timeout: float, poll_interval: float = 0.2) -> int:
+        """
+        Stop accepting runs and wait up to timeout for the queued and running
+        ones. Jobs still unfinished are recorded as failed so resume_run can
+        pick them up later; returns how many there were.
+        """
+        self.draining = True
+        deadline = time.monotonic() + timeout
+        while any(not job.done for job in self.jobs.values()) and time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+        unfinished = [job for job in self.jobs.values() if not job.done]
+        for task in self._workers:
+            task.cancel()
+        for job in unfinished:
+            job.status = "failed"
+            job.error = INTERRUPTED
+            job.finished_at = time.time()
+            self._save(job)
+            if job.finished:
+                job.finished.set()
+        return len(unfinished)
+
+    def _prune(self):
+        finished = [run_id for run_id, job in self.jobs.items() if job.done]
+        for run_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[run_id]
+        if self.store and self._finished % 100 == 0:
+            self.store.prune(JOB_RECORD_TTL_S)
+
+
+@dataclass
+class RunBatch:
+    batch_id: str
+    run_ids: List[str]
+    concurrency: int
+    status: str = "queued"  # queued, running, completed, failed
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    worker: str = field(default_factory=worker_id)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "batch_id": self.batch_id,
+            "batch_status": self.status,
+            "size": len(self.run_ids),
+            "concurrency": self.concurrency,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        return {**self.to_dict(), "run_ids": self.run_ids, "worker": self.worker}
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "RunBatch":
+        """A batch another worker runs; one whose worker died unfinished reads as failed"""
+        batch = cls(
+            batch_id=record["batch_id"],
+            run_ids=record["run_ids"],
+            concurrency=record["concurrency"],
+            status=record["batch_status"],
+            created_at=record["created_at"],
+            finished_at=record.get("finished_at"),
+            error=record.get("error"),
+            worker=record.get("worker", ""),
+        )
+        if batch.status in ("queued", "running") and not _worker_alive(batch.worker):
+            batch.status = "failed"
+            batch.error = f"Worker {batch.worker} exited before the batch finished"
+        return batch
+
+
+def aggregate_batch(
+    run_ids: List[str],
+    summaries: Dict[str, Optional[Dict[str, Any]]],
+    jobs: Optional[Dict[str, Optional[RunJob]]] = None,
+) -> Dict[str, Any]:
+    """
+    Aggregate progress and per-item results for a batch of runs. A run whose
+    job failed before the router wrote its summary counts as failed.
+    """
+    counts = {"pending": 0, "running": 0, "needs_review": 0, "failed": 0, "completed": 0}
+    items = []
+    for run_id in run_ids:
+        summary = summaries.get(run_id)
+        job = (jobs or {}).get(run_id)
+        status = (summary or {}).get("status", "failed" if job and job.status == "failed" else "pending")
+        counts[status] = counts.get(status, 0) + 1
+        item = {"run_id": run_id, "status": status, "progress": summarize_progress(summary)}
+        if summary and status in ("completed", "needs_review", "failed"):
+            item["pdfPath"] = summary.get("pdfPath")
+            item["diffSummary"] = summary.get("diffSummary")
+        elif status == "failed":
+            item["error"] = job.error
+        items.append(item)
+    finished = counts["completed"] + counts["needs_review"] + counts["failed"]
+    return {
+        "counts": counts,
+        "finished": finished,
+        "total": len(run_ids),
+        "percent": round(100 * finished / len(run_ids), 1) if run_ids else 100.0,
+        "items": items,
+    }
+
+
+def apply_journal_event(summary: Optional[Dict[str, Any]], event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Apply one journal.jsonl event to a summary, like applyEvent in agents/run-journal.ts"""
+    kind = event.get("type")
+    if kind == "created":
+        return copy.deepcopy(event.get("summary"))
+    if summary is None:
+        return None
+    summary["updatedAt"] = event.get("at", summary.get("updatedAt"))
+    fields = {key: value for key, value in event.items() if key not in ("type", "at", "role", "summary")}
+    if kind == "role":
+        for artifact in summary.get("artifacts", []):
+            if artifact.get("role") == event.get("role"):
+                artifact.update(fields)
+    elif kind == "state":
+        summary.update(fields)
+    elif kind == "resumed":
+        summary["status"] = "running"
+        summary["error"] = None
+        pending = set(event.get("pending") or [])
+        summary["artifacts"] = [
+            {"role": artifact.get("role"), "status": "pending"} if artifact.get("role") in pending else artifact
+            for artifact in summary.get("artifacts", [])
+        ]
+    return summary
+
+
+def read_run_journal(run_dir: Path) -> List[Dict[str, Any]]:
+    """Events of a run's journal.jsonl; a line torn by a crash is skipped"""
+    try:
+        with open(run_dir / JOURNAL_FILE, "r", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+    except FileNotFoundError:
+        return []
+    events = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            events.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return events
+
+
+def read_run_summary(runs_root: Path, run_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a run's summary straight from disk (no Node round trip): the last
+    summary.json snapshot plus the journal events written after it.
+    """
+    run_dir = Path(runs_root) / run_id
+    try:
+        with open(run_dir / "summary.json", "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        snapshot = None
+    if snapshot is not None and "journalSeq" not in snapshot:
+        # Written before runs had a journal
+        return snapshot
+    summary = snapshot
+    for event in read_run_journal(run_dir)[(snapshot or {}).get("journalSeq", 0):]:
+        summary = apply_journal_event(summary, event)
+    return summary
+
+
+def read_run_stream(runs_root: Path, run_id: str, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Events of a run's stream.jsonl (agents/run-stream.ts) from byte offset on,
+    and the offset to continue from; a line still being written is left for
+    the next read.
+    """
+    try:
+        with open(Path(runs_root) / run_id / STREAM_FILE, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], offset
+    end = data.rfind(b"\n") + 1
+    events = []
+    for line in data[:end].split(b"\n"):
+        if not line.strip():
+            continue
+        try:
+            events.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return events, offset + end
+
+
+def run_locked(runs_root: Path, run_id: str) -> bool:
+    """
+    Whether a router process (any bridge worker or the orchestrator server)
+    is executing the run now, by the run.lock RunLock in agents/run-journal.ts
+    holds and keeps refreshing while it runs.
+    """
+    path = Path(runs_root) / run_id / LOCK_FILE
+    try:
+        if time.time() - path.stat().st_mtime > LOCK_STALE_S:
+            return False
+        owner = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return _worker_alive(f"{owner.get('host', '')}:{owner.get('pid', '')}")
+
+
+def summarize_progress(summary: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-role artifact statuses as written by the router"""
+    roles = {role: "pending" for role in ROLE_ORDER}
+    for artifact in (summary or {}).get("artifacts", []):
+        roles[artifact.get("role")] = artifact.get("status", "pending")
+    succeeded = sum(1 for status in roles.values() if status == "succeeded")
+    current = next((role for role, status in roles.items() if status == "running"), None)
+    return {
+        "roles": roles,
+        "current_role": current,
+        "completed_roles": succeeded,
+        "total_roles": len(roles),
+    }
+
+__all__ = [
+    'RunJob', 'RunJobQueue', 'RunBatch', 'worker_id', 'aggregate_batch', 'read_run_summary', 'read_run_journal',
+    'read_run_stream', 'run_locked', 'apply_journal_event', 'summarize_progress',
+    'DEFAULT_CONCURRENCY', 'DEFAULT_BATCH_CONCURRENCY', 'MAX_BATCH_SIZE'
+]
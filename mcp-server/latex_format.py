@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Precompiled preamble format for the awesome-source-cv class
+Most of a two-page build is spent loading the class's packages (TikZ,
+tcolorbox, xcolor, ...) before cv.tex's short body is reached. This dumps
+those packages into a format file once, keyed by a hash of the class, style
+files, fontawesome symbol tables, fonts and the engine version, so any change
+to them produces a new format on the next build.
+
+LuaLaTeX cannot dump fonts loaded through fontspec/luaotfload, so only the
+font-free packages the class requires are preloaded (with the class's own
+options, so there is no option clash); fonts still load at run time from
+luaotfload's cache. If a format cannot be built, or a build using it fails,
+the key is marked failed and builds fall back to the cold command.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from builds import ROOT_DIR
+
+FORMAT_DIR = Path(os.getenv("LATEX_FORMAT_DIR", str(ROOT_DIR / "data" / "cache" / "formats")))
+FORMAT_INPUTS = ("*.cls", "*.sty", "fontawesomesymbols-*.tex", "fonts/*")
+# Class dependencies that load no fonts and do not need the document class
+PRELOADABLE = ("xcolor", "etoolbox", "url", "pgf", "tikz", "tcolorbox")
+FORMAT_TIMEOUT = 300
+
+PACKAGE_PATTERN = re.compile(r"\\(?:RequirePackage|usepackage)\s*(\[[^\]]*\])?\s*\{([^}]*)\}")
+
+
+def preload_lines(class_text: str) -> List[str]:
+    """`\\RequirePackage` lines for the preloadable packages, with the options the class uses"""
+    code = "\n".join(re.sub(r"(^|[^\\])%.*$", r"\1", line) for line in class_text.splitlines())
+    lines = []
+    for options, names in PACKAGE_PATTERN.findall(code):
+        for name in (n.strip() for n in names.split(",")):
+            if name in PRELOADABLE:
+                lines.append(f"\\RequirePackage{options}{{{name}}}")
+    return lines
+
+
+def engine_version(engine: str) -> str:
+    try:
+        result = subprocess.run([engine, "--version"], capture_output=True, text=True, timeout=30)
+        return result.stdout.splitlines()[0] if result.stdout else ""
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def format_key(resume_dir: Path, engine: str, version: str) -> str:
+    digest = hashlib.sha256(f"{engine}\n{version}\n".encode("utf-8"))
+    paths = sorted({path for pattern in FORMAT_INPUTS for path in resume_dir.glob(pattern) if path.is_file()})
+    for path in paths:
+        digest.update(str(path.relative_to(resume_dir)).encode("utf-8"))
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return f"cv-{digest.hexdigest()[:16]}"
+
+
+class FormatCache:
+    """Builds the preamble format on demand and hands its name to the build command"""
+
+    def __init__(self, resume_dir: Path, engine: str = "lualatex", directory: Path = FORMAT_DIR):
+        self.resume_dir = resume_dir
+        self.engine = engine
+        self.directory = directory
+        self.builds = 0
+        self._version: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    def env(self) -> Dict[str, str]:
+        """Environment that lets the engine find formats in the cache (trailing separator keeps the defaults)"""
+        return {**os.environ, "TEXFORMATS": f"{self.directory}{os.pathsep}"}
+
+    def key(self, resume_dir: Optional[Path] = None) -> str:
+        if self._version is None:
+            self._version = engine_version(self.engine)
+        return format_key(resume_dir or self.resume_dir, self.engine, self._version)
+
+    async def ensure(self, resume_dir: Optional[Path] = None) -> Optional[str]:
+        """
+        Name of an up-to-date format for a resume tree (default: the one the
+        cache was created for), building it first if needed; None when
+        unavailable. Profiles sharing the class and fonts share the format.
+        """
+        resume_dir = resume_dir or self.resume_dir
+        async with self._lock:
+            key = await asyncio.to_thread(self.key, resume_dir)
+            if (self.directory / f"{key}.fmt").exists():
+                return key
+            if (self.directory / f"{key}.failed").exists():
+                return None
+            return await self._build(key, resume_dir)
+
+    def mark_failed(self, key: str, log: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{key}.failed").write_text(log, encoding="utf-8")
+        (self.directory / f"{key}.fmt").unlink(missing_ok=True)
+
+    async def _build(self, key: str, resume_dir: Path) -> Optional[str]:
+        class_files = sorted(resume_dir.glob("*.cls"))
+        lines = [line for path in class_files for line in preload_lines(path.read_text(encoding="utf-8"))]
+        if not lines:
+            return None
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        workdir = Path(tempfile.mkdtemp(prefix="latex-format-"))
+        try:
+            (workdir / "preload.tex").write_text("\n".join([*lines, "\\dump", ""]), encoding="utf-8")
+            process = await asyncio.create_subprocess_exec(
+                self.engine, "-ini", f"-jobname={key}", "-interaction=nonstopmode", f"&{self.engine}", "preload.tex",
+                cwd=str(workdir),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+            try:
+                stdout, _ = await asyncio.wait_for(process.communicate(), FORMAT_TIMEOUT)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                self.mark_failed(key, f"Format build timed out after {FORMAT_TIMEOUT}s")
+                return None
+            built = workdir / f"{key}.fmt"
+            if process.returncode != 0 or not built.exists():
+                self.mark_failed(key, stdout.decode("utf-8", errors="replace"))
+                return None
+            shutil.move(str(built), self.directory / f"{key}.fmt")
+            self.builds += 1
+            return key
+        except OSError as e:
+            # Engine missing or not runnable: build without a format
+            self.mark_failed(key, str(e))
+            return None
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+__all__ = ['FormatCache', 'preload_lines', 'format_key', 'FORMAT_DIR']
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Local LaTeX build service
+Drop-in replacement for the texlive microservice behind TEXLIVE_URL: POST /build
+with {"runId": ...} answers {"status", "runId", "durationMs", "log"} like
+texlive/src/server.js. Builds run on a pool of workers, each with its own
+scratch copy of resume/ that keeps latexmk's aux files between builds, so
+concurrent runs compile in parallel and a worker only recompiles what changed.
+A "profileId" in the request builds that profile's resume tree instead (see
+profiles.py). The PDF and the TeX log are written straight to
+data/runs/<id>/final.pdf and latex.log.
+
+    python latex_service.py --port 5001 --workers 4
+    TEXLIVE_URL=http://localhost:5001/build bash scripts/build-resume.sh <run_id>
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import signal
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from builds import ROOT_DIR, RUN_ID_PATTERN, RUNS_ROOT
+from latex_format import FormatCache
+from profiles import DEFAULT_RESUME_DIR as RESUME_DIR, ProfileNotFound, resolve_profile
+
+SCRATCH_ROOT = Path(os.getenv("LATEX_SCRATCH_DIR", str(ROOT_DIR / "data" / "cache" / "latex-workers")))
+LATEX_ENGINE = "lualatex"
+LATEX_FLAGS = ["-interaction=nonstopmode", "-halt-on-error", "cv.tex"]
+# A custom command replaces the default latexmk call and disables the precompiled format
+CUSTOM_COMMAND = os.getenv("LATEX_COMMAND", "").split()
+LATEX_PRECOMPILE = not CUSTOM_COMMAND and os.getenv("LATEX_PRECOMPILE", "1") != "0"
+LATEX_WORKERS = int(os.getenv("LATEX_WORKERS", str(os.cpu_count() or 2)))
+LATEX_QUEUE_SIZE = int(os.getenv("LATEX_QUEUE_SIZE", "32"))
+LATEX_BUILD_TIMEOUT = float(os.getenv("LATEX_BUILD_TIMEOUT", "120"))
+
+
+class QueueFull(Exception):
+    pass
+
+
+def latex_command(fmt: Optional[str] = None) -> List[str]:
+    """latexmk call for a build, loading the precompiled preamble format when there is one"""
+    if CUSTOM_COMMAND:
+        return CUSTOM_COMMAND
+    if fmt:
+        return ["latexmk", f"-{LATEX_ENGINE}", f"-{LATEX_ENGINE}={LATEX_ENGINE} -fmt={fmt} %O %S", *LATEX_FLAGS]
+    return ["latexmk", f"-{LATEX_ENGINE}", *LATEX_FLAGS]
+
+
+class LatexWorker:
+    """One scratch directory mirroring a resume tree; aux files survive between builds"""
+
+    def __init__(self, index: int, scratch: Path, source: Path = RESUME_DIR):
+        self.index = index
+        self.scratch = scratch
+        self.source = source
+        self.builds = 0
+        self._stamps: Dict[str, Tuple[int, int]] = {}
+
+    def sync(self, source: Optional[Path] = None) -> int:
+        """Copy new or changed inputs into the scratch directory; returns the number copied"""
+        if source is not None and source != self.source:
+            # Another profile: recopy every file, and drop ones the new tree lacks
+            self.source = source
+            self._stamps = {relative: (-1, -1) for relative in self._stamps}
+        self.scratch.mkdir(parents=True, exist_ok=True)
+        seen = set()
+        copied = 0
+        for path in self.source.rglob("*"):
+            if not path.is_file():
+                continue
+            relative = str(path.relative_to(self.source))
+            stat = path.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            seen.add(relative)
+            if self._stamps.get(relative) == stamp:
+                continue
+            target = self.scratch / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, target)
+            self._stamps[relative] = stamp
+            copied += 1
+        for relative in set(self._stamps) - seen:
+            (self.scratch / relative).unlink(missing_ok=True)
+            del self._stamps[relative]
+        return copied
+
+    async def build(
+        self,
+        timeout: float,
+        command: List[str],
+        env: Optional[Dict[str, str]] = None,
+        source: Optional[Path] = None,
+    ) -> Tuple[int, str]:
+        await asyncio.to_thread(self.sync, source)
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            cwd=str(self.scratch),
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            # Own process group so a timeout also kills the engine latexmk started
+            start_new_session=True,
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            os.killpg(process.pid, signal.SIGKILL)
+            await process.wait()
+            raise TimeoutError(f"Build timed out after {timeout:.0f}s")
+        self.builds += 1
+        return process.returncode or 0, stdout.decode("utf-8", errors="replace")
+
+
+class LatexBuildPool:
+    """Fixed set of warm workers behind a bounded queue"""
+
+    def __init__(
+        self,
+        workers: int = LATEX_WORKERS,
+        queue_size: int = LATEX_QUEUE_SIZE,
+        timeout: float = LATEX_BUILD_TIMEOUT,
+        scratch_root: Path = SCRATCH_ROOT,
+        runs_root: Path = RUNS_ROOT,
+        precompile: bool = LATEX_PRECOMPILE,
+    ):
+        self.workers = [LatexWorker(i, scratch_root / f"worker-{i}") for i in range(max(1, workers))]
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.runs_root = runs_root
+        self.pending = 0
+        self.counts = {"completed": 0, "failed": 0, "timeouts": 0, "rejected": 0, "precompiled": 0}
+        self.formats = FormatCache(RESUME_DIR, LATEX_ENGINE) if precompile else None
+        self._idle: Optional[asyncio.Queue] = None
+
+    def _idle_workers(self) -> asyncio.Queue:
+        # Created lazily so the queue binds to the server's event loop
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for worker in self.workers:
+                self._idle.put_nowait(worker)
+        return self._idle
+
+    async def build(self, run_id: str, source: Path = RESUME_DIR) -> Dict[str, Any]:
+        """Build a resume tree on the next free worker and publish final.pdf / latex.log into the run directory"""
+        if self.pending >= len(self.workers) + self.queue_size:
+            self.counts["rejected"] += 1
+            raise QueueFull(f"{self.pending} builds in flight, queue is full")
+        self.pending += 1
+        idle = self._idle_workers()
+        try:
+            queued = time.perf_counter()
+            worker = await idle.get()
+            started = time.perf_counter()
+            try:
+                code, log, fmt = await self._compile(worker, source)
+                artifacts = await asyncio.to_thread(self._publish, worker, run_id, code == 0, log)
+            finally:
+                idle.put_nowait(worker)
+        except TimeoutError:
+            self.counts["timeouts"] += 1
+            raise
+        finally:
+            self.pending -= 1
+
+        self.counts["completed" if code == 0 else "failed"] += 1
+        return {
+            "status": "OK" if code == 0 else "FAILED",
+            "runId": run_id,
+            "durationMs": round((time.perf_counter() - started) * 1000),
+            "queuedMs": round((started - queued) * 1000),
+            "worker": worker.index,
+            "format": fmt,
+            "log": log,
+            **artifacts,
+        }
+
+    async def _compile(self, worker: LatexWorker, source: Path) -> Tuple[int, str, Optional[str]]:
+        """Build with the precompiled format when available; a failure with it retries cold"""
+        fmt = await self.formats.ensure(source) if self.formats else None
+        if fmt:
+            code, fmt_log = await worker.build(self.timeout, latex_command(fmt), self.formats.env(), source)
+            if code == 0:
+                self.counts["precompiled"] += 1
+                return code, fmt_log, fmt
+        code, log = await worker.build(self.timeout, latex_command(), source=source)
+        if fmt and code == 0:
+            # Only the format was at fault; stop using it until its inputs change
+            self.formats.mark_failed(fmt, fmt_log)
+        return code, log, None
+
+    def _publish(self, worker: LatexWorker, run_id: str, ok: bool, log: str) -> Dict[str, Any]:
+        run_dir = self.runs_root / run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+        artifacts: Dict[str, Any] = {}
+        tex_log = worker.scratch / "cv.log"
+        log_path = run_dir / "latex.log"
+        log_path.write_text(tex_log.read_text(encoding="utf-8", errors="replace") if tex_log.exists() else log, encoding="utf-8")
+        artifacts["logPath"] = str(log_path)
+        pdf = worker.scratch / "cv.pdf"
+        if ok and pdf.exists():
+            # Publish atomically so readers never see a partial PDF
+            tmp = run_dir / f".final.pdf.{worker.index}.tmp"
+            shutil.copyfile(pdf, tmp)
+            os.replace(tmp, run_dir / "final.pdf")
+            artifacts["pdfPath"] = str(run_dir / "final.pdf")
+        return artifacts
+
+    def stats(self) -> Dict[str, Any]:
+        idle = self._idle.qsize() if self._idle else len(self.workers)
+        busy = len(self.workers) - idle
+        return {
+            "workers": len(self.workers),
+            "busy": busy,
+            "queued": self.pending - busy,
+            "queue_size": self.queue_size,
+            "timeout_s": self.timeout,
+            "precompile": self.formats is not None,
+            **self.counts,
+        }
+
+
+def create_app(pool: Optional[LatexBuildPool] = None) -> Starlette:
+    pool = pool or LatexBuildPool()
+
+    async def build(request: Request) -> JSONResponse:
+        try:
+            body = await request.json()
+        except ValueError:
+            body = {}
+        run_id = str((body or {}).get("runId") or "manual")
+        if not RUN_ID_PATTERN.match(run_id):
+            return JSONResponse({"status": "FAILED", "runId": run_id, "error": "Invalid run id"}, status_code=400)
+        try:
+            source = resolve_profile((body or {}).get("profileId"))
+        except ProfileNotFound as e:
+            return JSONResponse({"status": "FAILED", "runId": run_id, "error": str(e)}, status_code=404)
+        except ValueError as e:
+            return JSONResponse({"status": "FAILED", "runId": run_id, "error": str(e)}, status_code=400)
+        try:
+            result = await pool.build(run_id, source)
+        except QueueFull as e:
+            return JSONResponse({"status": "FAILED", "runId": run_id, "error": str(e)}, status_code=503)
+        except Exception as e:
+            return JSONResponse({"status": "FAILED", "runId": run_id, "error": str(e)}, status_code=500)
+        return JSONResponse(result, status_code=200 if result["status"] == "OK" else 500)
+
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({"status": "healthy", **pool.stats()})
+
+    app = Starlette(routes=[
+        Route("/build", build, methods=["POST"]),
+        Route("/health", health, methods=["GET"]),
+        # The router's warm_build stage pings the service origin
+        Route("/", health, methods=["GET"]),
+    ])
+    app.state.pool = pool
+    return app
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Local LaTeX build service (TEXLIVE_URL drop-in)")
+    parser.add_argument("--host", default=os.getenv("LATEX_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("LATEX_PORT", "5001")))
+    parser.add_argument("--workers", type=int, default=LATEX_WORKERS, help="concurrent builds (warm scratch directories)")
+    parser.add_argument("--queue-size", type=int, default=LATEX_QUEUE_SIZE, help="builds allowed to wait for a worker")
+    parser.add_argument("--timeout", type=float, default=LATEX_BUILD_TIMEOUT, help="seconds per build")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    pool = LatexBuildPool(workers=args.workers, queue_size=args.queue_size, timeout=args.timeout)
+    print(f"🧾 LaTeX build service: {len(pool.workers)} workers, queue {args.queue_size}, timeout {args.timeout:.0f}s")
+    uvicorn.run(create_app(pool), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Read-side helpers for the on-disk LLM response cache
+The cache itself is written by agents/llm-cache.ts; entries are
+``<role>-<hash>.json`` files and every router process keeps its hit/miss
+counters in ``stats-<pid>.json`` in the same directory.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "data" / "cache" / "llm"
+COUNTERS = ("hits", "misses", "writes", "expired", "evictions")
+
+
+def cache_dir() -> Path:
+    return Path(os.getenv("LLM_CACHE_DIR", str(DEFAULT_CACHE_DIR)))
+
+
+def _entries(directory: Path):
+    for path in directory.glob("*.json"):
+        if not path.name.startswith("stats-"):
+            yield path
+
+
+def cache_stats(directory: Optional[Path] = None) -> Dict[str, Any]:
+    """Aggregate counters across router processes plus entry counts per role"""
+    directory = directory or cache_dir()
+    totals = {counter: 0 for counter in COUNTERS}
+    processes = 0
+    if directory.exists():
+        for stats_file in directory.glob("stats-*.json"):
+            try:
+                stats = json.loads(stats_file.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                continue
+            processes += 1
+            for counter in COUNTERS:
+                totals[counter] += int(stats.get(counter, 0))
+
+    by_role: Dict[str, Dict[str, int]] = {}
+    total_bytes = 0
+    if directory.exists():
+        for entry in _entries(directory):
+            try:
+                size = entry.stat().st_size
+            except FileNotFoundError:
+                continue
+            role = entry.name.split("-", 1)[0]
+            bucket = by_role.setdefault(role, {"entries": 0, "bytes": 0})
+            bucket["entries"] += 1
+            bucket["bytes"] += size
+            total_bytes += size
+
+    lookups = totals["hits"] + totals["misses"]
+    return {
+        "cache_dir": str(directory),
+        **totals,
+        "hit_rate": round(totals["hits"] / lookups, 4) if lookups else None,
+        "entries": sum(bucket["entries"] for bucket in by_role.values()),
+        "bytes": total_bytes,
+        "by_role": by_role,
+        "processes": processes,
+    }
+
+
+def purge_cache(
+    directory: Optional[Path] = None,
+    role: Optional[str] = None,
+    older_than_hours: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Delete cached responses, optionally only for one role or older than a cutoff"""
+    directory = directory or cache_dir()
+    removed = 0
+    freed = 0
+    if directory.exists():
+        cutoff = time.time() - older_than_hours * 3600 if older_than_hours else None
+        for entry in _entries(directory):
+            if role and not entry.name.startswith(f"{role}-"):
+                continue
+            try:
+                stat = entry.stat()
+                if cutoff and stat.st_mtime > cutoff:
+                    continue
+                entry.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += stat.st_size
+    return {"removed": removed, "bytes_freed": freed}
+
+__all__ = ['cache_stats', 'purge_cache', 'cache_dir']
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Prometheus-style metrics for the FastMCP servers
+A small in-process registry rendered in the Prometheus text exposition
+format, served at /metrics over HTTP and by the get_metrics tool.
+
+Tool calls are timed by ToolMetricsMiddleware. Bridge calls, builds and
+finished pipelines are recorded by the modules that perform them; per-role
+LLM latency comes from the durationMs the router writes on each artifact.
+
+With MCP_METRICS_DIR set (serve.py does this for several workers) every
+process writes its counters and histograms to ``stats-<pid>-<token>.json``
+there and /metrics sums all of them, so one scrape of any worker reports the
+whole server. Files of exited workers are kept until serve.py starts again,
+so totals never go backwards.
+"""
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from fastmcp.server.middleware import Middleware
+except ImportError:  # fastmcp without middleware support
+    Middleware = object
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; tool calls are fast, LLM calls and builds take far longer
+FAST_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0, 900.0)
+
+DEFAULT_METRICS_DIR = Path(__file__).parent.parent / "data" / "cache" / "metrics"
+FLUSH_SECONDS = float(os.getenv("MCP_METRICS_FLUSH_S", "5"))
+
+LabelValues = Tuple[str, ...]
+Snapshot = Dict[LabelValues, Any]
+
+
+def multiprocess_dir() -> Optional[Path]:
+    directory = os.getenv("MCP_METRICS_DIR")
+    return Path(directory) if directory else None
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def snapshot(self) -> Optional[Snapshot]:
+        """Values this process shares with the other workers, None for metrics that are not shared"""
+        return None
+
+    def _merge(self, values: Snapshot, other: Snapshot):
+        pass
+
+    def render(self, workers: Iterable[Dict[str, Any]] = ()) -> List[str]:
+        values = self.snapshot()
+        if values is None:
+            values = self._collect_local()
+        else:
+            for worker in workers:
+                self._merge(values, {tuple(labels): value for labels, value in worker.get(self.name, [])})
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples(values)]
+
+    def _collect_local(self) -> Snapshot:
+        return {}
+
+    def _samples(self, values: Snapshot) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+        _start_flusher()
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def snapshot(self) -> Snapshot:
+        with self._lock:
+            return dict(self._values)
+
+    def _merge(self, values: Snapshot, other: Snapshot):
+        for key, value in other.items():
+            values[key] = values.get(key, 0.0) + value
+
+    def _samples(self, values: Snapshot) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in sorted(values.items())]
+
+
+class Gauge(_Metric):
+    """
+    Gauge whose value is read from a callback when metrics are rendered
+    A per_worker gauge counts something only this process sees and is summed
+    over the live workers; otherwise the callback reads shared state and the
+    worker serving the scrape answers alone.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._collect: Optional[Callable[[], Dict[LabelValues, float]]] = None
+        self.per_worker = False
+
+    def set_function(self, collect: Callable[[], Dict[LabelValues, float]], per_worker: bool = False):
+        self._collect = collect
+        self.per_worker = per_worker
+        if per_worker:
+            _start_flusher()
+
+    def _collect_local(self) -> Snapshot:
+        if not self._collect:
+            return {}
+        try:
+            return dict(self._collect())
+        except Exception:
+            return {}
+
+    def snapshot(self) -> Optional[Snapshot]:
+        return self._collect_local() if self.per_worker else None
+
+    def _merge(self, values: Snapshot, other: Snapshot):
+        for key, value in other.items():
+            values[key] = values.get(key, 0.0) + value
+
+    def _samples(self, values: Snapshot) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=FAST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, seconds: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            # Per-bucket counts followed by sum and count
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += seconds
+            series[-1] += 1
+        _start_flusher()
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(self._key(labels))
+        return int(series[-1]) if series else 0
+
+    def snapshot(self) -> Snapshot:
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+    def _merge(self, values: Snapshot, other: Snapshot):
+        for key, series in other.items():
+            if len(series) != len(self.buckets) + 2:
+                continue  # written with other buckets, by a worker of an older version
+            mine = values.setdefault(key, [0.0] * len(series))
+            for i, value in enumerate(series):
+                mine[i] += value
+
+    def _samples(self, values: Snapshot) -> List[str]:
+        lines = []
+        for key, series in sorted(values.items()):
+            cumulative = 0.0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(round(series[-2], 6))}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {_number(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Shared values of every metric, as written to this worker's stats file"""
+        metrics = {}
+        for metric in self._metrics.values():
+            values = metric.snapshot()
+            if values:
+                metrics[metric.name] = sorted([list(key), value] for key, value in values.items())
+        return metrics
+
+    def render(self) -> str:
+        workers = _other_workers()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render(workers))
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _process_alive(pid: Any) -> bool:
+    if not isinstance(pid, int):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_tokens: Dict[int, str] = {}
+
+
+def _stats_file(directory: Path) -> Path:
+    """This process's file; the token keeps a reused pid from overwriting an exited worker's totals"""
+    pid = os.getpid()
+    token = _tokens.setdefault(pid, uuid.uuid4().hex[:8])
+    return directory / f"stats-{pid}-{token}.json"
+
+
+def _other_workers() -> List[Dict[str, Any]]:
+    """Metrics written by the other workers; per-worker gauges only count while their worker runs"""
+    directory = multiprocess_dir()
+    if directory is None or not directory.exists():
+        return []
+    own = _stats_file(directory).name
+    workers = []
+    for stats_file in directory.glob("stats-*.json"):
+        if stats_file.name == own:
+            continue
+        try:
+            stats = json.loads(stats_file.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        values = stats.get("metrics") or {}
+        if not _process_alive(stats.get("pid")):
+            values = {name: series for name, series in values.items()
+                      if not getattr(registry._metrics.get(name), "per_worker", False)}
+        workers.append(values)
+    return workers
+
+
+_flusher: Optional[threading.Thread] = None
+_flusher_lock = threading.Lock()
+_last_written: Optional[str] = None
+
+
+def flush():
+    """Write this worker's counters and histograms to its stats file if they changed"""
+    global _last_written
+    directory = multiprocess_dir()
+    if directory is None:
+        return
+    body = json.dumps({"pid": os.getpid(), "metrics": registry.snapshot()})
+    if body == _last_written:
+        return
+    target = _stats_file(directory)
+    tmp = target.with_suffix(".tmp")
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(body, encoding="utf-8")
+        os.replace(tmp, target)
+        _last_written = body
+    except OSError:
+        pass
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_SECONDS)
+        flush()
+
+
+def _start_flusher():
+    """Flush every FLUSH_SECONDS and at exit, from the first recorded value on (multiprocess mode only)"""
+    global _flusher
+    if _flusher is not None or multiprocess_dir() is None:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True)
+            _flusher.start()
+            atexit.register(flush)
+
+
+def clear_worker_stats(directory: Path):
+    """Drop the stats files of an earlier server; serve.py calls this before starting its workers"""
+    if not directory.exists():
+        return
+    for stats_file in directory.glob("stats-*"):
+        try:
+            stats_file.unlink()
+        except FileNotFoundError:
+            pass
+
+tool_calls = registry.register(Counter(
+    "mcp_tool_calls_total", "MCP tool calls", ["tool"]))
+tool_errors = registry.register(Counter(
+    "mcp_tool_errors_total", "MCP tool calls that raised or returned an error", ["tool"]))
+tool_latency = registry.register(Histogram(
+    "mcp_tool_duration_seconds", "MCP tool call latency", ["tool"]))
+
+bridge_latency = registry.register(Histogram(
+    "router_bridge_call_duration_seconds", "Round trip of calls to router-bridge.js workers",
+    ["method"], buckets=FAST_BUCKETS + SLOW_BUCKETS[5:]))
+bridge_errors = registry.register(Counter(
+    "router_bridge_errors_total", "Failed, timed out or crashed router-bridge.js calls", ["method"]))
+
+llm_latency = registry.register(Histogram(
+    "llm_call_duration_seconds", "LLM latency per pipeline role and provider",
+    ["role", "provider", "cache"], buckets=SLOW_BUCKETS))
+build_latency = registry.register(Histogram(
+    "resume_build_duration_seconds", "LaTeX build duration",
+    ["status", "cache"], buckets=SLOW_BUCKETS))
+
+run_queue_wait = registry.register(Histogram(
+    "run_queue_wait_seconds", "Time runs spent queued before a worker picked them up", buckets=SLOW_BUCKETS))
+run_duration = registry.register(Histogram(
+    "run_duration_seconds", "Wall time of whole pipeline runs", ["status"], buckets=SLOW_BUCKETS))
+runs_by_state = registry.register(Gauge(
+    "mcp_runs", "Runs known to the server by state", ["state"]))
+
+
+def observe_run_summary(summary: Optional[Dict[str, Any]]):
+    """Record per-role LLM latency and the build duration of a finished run"""
+    if not summary:
+        return
+    providers = (summary.get("config") or {}).get("providers", {})
+    for artifact in summary.get("artifacts", []):
+        role = artifact.get("role", "unknown")
+        if artifact.get("durationMs") is not None:
+            llm_latency.observe(
+                artifact["durationMs"] / 1000,
+                role=role,
+                provider=artifact.get("provider") or providers.get(role, "unknown"),
+                cache="hit" if artifact.get("cacheHit") else "miss",
+            )
+        build = (artifact.get("output") or {}).get("build") if role == "finalizer" else None
+        if build and build.get("duration_ms") is not None:
+            build_latency.observe(build["duration_ms"] / 1000, status=build.get("status", "unknown"), cache=build.get("cache") or "none")
+
+
+def observe_run_job(job):
+    """Record queue wait and total duration of a finished RunJob"""
+    if job.started_at:
+        run_queue_wait.observe(job.started_at - job.submitted_at)
+    if job.started_at and job.finished_at:
+        run_duration.observe(job.finished_at - job.started_at, status=job.status)
+
+
+def track_run_states(collect: Callable[[], Dict[str, int]], per_worker: bool = False):
+    """
+    Expose run counts by state (queued, running, ...) as the runs gauge
+    per_worker when collect only sees this process's runs, so workers are summed
+    """
+    runs_by_state.set_function(lambda: {(state,): count for state, count in collect().items()}, per_worker=per_worker)
+
+
+def render() -> str:
+    return registry.render()
+
+
+class ToolMetricsMiddleware(Middleware):
+    """Counts and times every tools/call handled by the server"""
+
+    async def on_call_tool(self, context, call_next):
+        tool = getattr(context.message, "name", "unknown")
+        started = time.perf_counter()
+        failed = False
+        try:
+            result = await call_next(context)
+            structured = getattr(result, "structured_content", None)
+            failed = isinstance(structured, dict) and "error" in structured
+            return result
+        except Exception:
+            failed = True
+            raise
+        finally:
+            tool_calls.inc(tool=tool)
+            tool_latency.observe(time.perf_counter() - started, tool=tool)
+            if failed:
+                tool_errors.inc(tool=tool)
+
+__all__ = [
+    'CONTENT_TYPE', 'Counter', 'Gauge', 'Histogram', 'MetricsRegistry', 'ToolMetricsMiddleware',
+    'registry', 'render', 'observe_run_summary', 'observe_run_job', 'track_run_states',
+    'DEFAULT_METRICS_DIR', 'multiprocess_dir', 'flush', 'clear_worker_stats',
+    'tool_calls', 'tool_errors', 'tool_latency', 'bridge_latency', 'bridge_errors',
+    'llm_latency', 'build_latency', 'run_queue_wait', 'run_duration',
+]
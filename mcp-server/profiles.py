@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Resume profiles
+Each candidate profile has its own resume tree (cv.tex, includes/, class and
+font files). The default profile is the repository's resume/ directory; every
+other profile lives in data/profiles/<profile_id>/, or under
+RESUME_PROFILES_DIR when set. Nothing is read here, so resolving a profile is
+free no matter how many exist.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+ROOT_DIR = Path(__file__).parent.parent
+DEFAULT_PROFILE = "default"
+DEFAULT_RESUME_DIR = Path(os.getenv("RESUME_DIR", str(ROOT_DIR / "resume")))
+PROFILES_ROOT = Path(os.getenv("RESUME_PROFILES_DIR", str(ROOT_DIR / "data" / "profiles")))
+PROFILE_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+
+class ProfileNotFound(ValueError):
+    pass
+
+
+def normalize_profile_id(profile_id: Optional[str]) -> str:
+    """Profile id to use for a request; None means the default profile"""
+    if profile_id is None or profile_id == "":
+        return DEFAULT_PROFILE
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        raise ValueError(f"Invalid profile id {profile_id}")
+    return profile_id
+
+
+def profile_path(profile_id: Optional[str] = None, profiles_root: Path = PROFILES_ROOT) -> Path:
+    """Resume directory of a profile (not checked for existence)"""
+    profile_id = normalize_profile_id(profile_id)
+    if profile_id == DEFAULT_PROFILE:
+        return DEFAULT_RESUME_DIR
+    return profiles_root / profile_id
+
+
+def resolve_profile(profile_id: Optional[str] = None, profiles_root: Path = PROFILES_ROOT) -> Path:
+    """Resume directory of an existing profile; raises ProfileNotFound otherwise"""
+    path = profile_path(profile_id, profiles_root)
+    if not path.is_dir():
+        raise ProfileNotFound(f"Resume profile {normalize_profile_id(profile_id)} not found")
+    return path
+
+__all__ = ['DEFAULT_PROFILE', 'PROFILES_ROOT', 'ProfileNotFound', 'normalize_profile_id', 'profile_path', 'resolve_profile']
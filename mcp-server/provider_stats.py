@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Read-side helpers for the live provider latency stats
+agents/provider-router.ts keeps the recent calls of every provider/model in
+memory and each router process writes them to ``stats-<pid>.json``; this
+merges them into the same health view the router uses to resolve ``auto``.
+The same files carry each process's admission queues (agents/admission.ts),
+summed here into one view per provider.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_STATS_DIR = Path(__file__).parent.parent / "data" / "cache" / "providers"
+WINDOW_SECONDS = 30 * 60
+UNHEALTHY_ERROR_RATE = 0.5
+MIN_SAMPLES_FOR_HEALTH = 4
+UNTRIED_LATENCY_MS = 5000
+
+
+def stats_dir() -> Path:
+    return Path(os.getenv("PROVIDER_STATS_DIR", str(DEFAULT_STATS_DIR)))
+
+
+def _percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _health(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    latencies = sorted(s["latencyMs"] for s in samples if s.get("outcome") == "ok")
+    errors = sum(1 for s in samples if s.get("outcome") != "ok")
+    timeouts = sum(1 for s in samples if s.get("outcome") == "timeout")
+    error_rate = errors / len(samples) if samples else 0.0
+    return {
+        "samples": len(samples),
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "error_rate": round(error_rate, 3),
+        "timeout_rate": round(timeouts / len(samples), 3) if samples else 0.0,
+        "healthy": len(samples) < MIN_SAMPLES_FOR_HEALTH or error_rate < UNHEALTHY_ERROR_RATE,
+    }
+
+
+def provider_stats(directory: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+    """Health per provider and model over the last WINDOW_SECONDS, merged across router processes"""
+    directory = directory or stats_dir()
+    cutoff_ms = (time.time() - WINDOW_SECONDS) * 1000
+    merged: Dict[str, List[Dict[str, Any]]] = {}
+    if directory.exists():
+        for stats_file in directory.glob("stats-*.json"):
+            try:
+                stats = json.loads(stats_file.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                continue
+            for key, samples in (stats.get("samples") or {}).items():
+                recent = [s for s in samples if s.get("at", 0) >= cutoff_ms]
+                if recent:
+                    merged.setdefault(key, []).extend(recent)
+
+    result: Dict[str, Dict[str, Any]] = {}
+    for key, samples in merged.items():
+        provider, _, model = key.partition("/")
+        result.setdefault(provider, {})[model] = _health(samples)
+    return result
+
+
+def _process_alive(pid: Any) -> bool:
+    if not isinstance(pid, int):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def admission_stats(directory: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Admission control per provider, summed over the live router processes:
+    queue depth by priority, calls in flight, how many were admitted, shed or
+    rate limited, and the queue wait of recently admitted calls. Limits are
+    per process, so with several processes the provider sees their sum.
+    """
+    directory = directory or stats_dir()
+    merged: Dict[str, Dict[str, Any]] = {}
+    waits: Dict[str, List[float]] = {}
+    if directory.exists():
+        for stats_file in directory.glob("stats-*.json"):
+            try:
+                stats = json.loads(stats_file.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                continue
+            if not stats.get("admission") or not _process_alive(stats.get("pid")):
+                continue
+            for provider, gate in stats["admission"].items():
+                entry = merged.setdefault(provider, {
+                    "processes": 0,
+                    "limits": gate.get("limits", {}),
+                    "queued": 0,
+                    "queued_by_priority": {"interactive": 0, "batch": 0, "dry_run": 0},
+                    "in_flight": 0,
+                    "admitted": 0,
+                    "shed": 0,
+                    "rate_limited": 0,
+                    "oldest_wait_ms": 0,
+                    "paused_for_ms": 0,
+                })
+                entry["processes"] += 1
+                entry["queued"] += gate.get("queued", 0)
+                for priority, count in (gate.get("queuedByPriority") or {}).items():
+                    entry["queued_by_priority"][priority] = entry["queued_by_priority"].get(priority, 0) + count
+                entry["in_flight"] += gate.get("inFlight", 0)
+                entry["admitted"] += gate.get("admitted", 0)
+                entry["shed"] += gate.get("shed", 0)
+                entry["rate_limited"] += gate.get("rateLimited", 0)
+                entry["oldest_wait_ms"] = max(entry["oldest_wait_ms"], gate.get("oldestWaitMs", 0))
+                entry["paused_for_ms"] = max(entry["paused_for_ms"], gate.get("pausedForMs", 0))
+                waits.setdefault(provider, []).extend(gate.get("waitsMs") or [])
+
+    for provider, entry in merged.items():
+        recent = sorted(waits.get(provider, []))
+        entry["wait_p50_ms"] = _percentile(recent, 50)
+        entry["wait_p95_ms"] = _percentile(recent, 95)
+    return merged
+
+
+def auto_order(available: List[str], stats: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    Order providers the way the `auto` setting picks them: healthy first, then
+    by median latency, untried providers at a neutral guess. Models are pooled
+    per provider here since the router's choice depends on the role's model.
+    """
+    def key(provider: str):
+        models = stats.get(provider, {}).values()
+        healthy = all(m["healthy"] for m in models)
+        medians = [m["p50_ms"] for m in models if m["p50_ms"] is not None]
+        latency = min(medians) if medians else UNTRIED_LATENCY_MS
+        return (0 if healthy else 1, latency)
+
+    return sorted(available, key=key)
+
+__all__ = ['provider_stats', 'admission_stats', 'auto_order', 'stats_dir']
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Structural index of the resume sources
+Parses cv.tex and includes/*.tex into sections, entries and bullets with
+their line ranges, so a client can fetch one section or entry by key and the
+diff engine can resolve anchors without scanning the text.
+
+Keys are the section name (`EXPERIENCE`, from the `% SECTION:` marker or the
+`\\sectionTitle`), then `EXPERIENCE/<slug>` for an entry (an `\\experience` or
+`\\skill` macro, or a paragraph that opens with `\\textbf{...}`) and
+`EXPERIENCE/<slug>/<n>` for its n-th `\\item`. Each file's structure is
+attached to its entry in the snapshot cache (resume_snapshot.py), so a file
+is only re-parsed when its content hash changes and is dropped together with
+its profile when the cache evicts it.
+"""
+
+import bisect
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from resume_snapshot import MAIN_SECTION, CachedFile, Snapshot, content_hash
+
+# Entry macros of the awesome-source-cv class: argument count and the
+# arguments (0-based) that name the entry
+ENTRY_MACROS = {
+    "experience": (7, (2, 1)),  # {end}{position}{company}{location}{start}{body}{extra}
+    "skill": (2, (0,)),
+    "scholarshipentry": (2, (1,)),
+}
+
+MARKER_PATTERN = re.compile(r"%\s*SECTION:([A-Za-z0-9_-]+)")
+ENTRY_PATTERN = re.compile(r"\\(" + "|".join(ENTRY_MACROS) + r")(?![A-Za-z])")
+SECTION_TITLE_PATTERN = re.compile(r"\\(?:sectionTitle|section)\*?(?![A-Za-z])")
+ITEM_PATTERN = re.compile(r"\\item(?![A-Za-z])")
+LIST_END_PATTERN = re.compile(r"\\end\{(?:itemize|enumerate)\}")
+COMMENT_PATTERN = re.compile(r"(?<!\\)%.*$")
+
+
+def mask_comments(text: str) -> str:
+    """Blank out comments (keeping every offset) so braces in them are ignored"""
+    return "\n".join(COMMENT_PATTERN.sub(lambda m: " " * len(m.group(0)), line) for line in text.split("\n"))
+
+
+def read_group(masked: str, position: int) -> Optional[Tuple[int, int]]:
+    """Span of the `{...}` group starting at position (after whitespace): (content start, end after `}`)"""
+    while position < len(masked) and masked[position].isspace():
+        position += 1
+    if position >= len(masked) or masked[position] != "{":
+        return None
+    depth = 0
+    index = position
+    while index < len(masked):
+        char = masked[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return position + 1, index + 1
+        index += 1
+    return None
+
+
+def plain_text(latex: str) -> str:
+    """Readable text of a LaTeX fragment, for titles"""
+    text = mask_comments(latex)
+    text = text.replace("$\\sim$", "~").replace("\\\\", " ")
+    text = re.sub(r"\\([&%$#_])", r"\1", text)
+    text = re.sub(r"\\[A-Za-z]+\*?", " ", text)
+    text = re.sub(r"[{}$]", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:60] or "entry"
+
+
+@dataclass
+class Node:
+    kind: str
+    key: str
+    title: str
+    file: str
+    start: int
+    end: int
+    children: List["Node"] = field(default_factory=list)
+
+    def text(self, lines: List[str]) -> str:
+        return "\n".join(lines[self.start:self.end])
+
+    def summary(self) -> Dict[str, Any]:
+        """Key, title and 1-based inclusive line range"""
+        return {
+            "key": self.key,
+            "kind": self.kind,
+            "title": self.title,
+            "file": self.file,
+            "start_line": self.start + 1,
+            "end_line": self.end,
+        }
+
+
+class FileStructure:
+    """Sections, entries and bullets of one file, by key"""
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text.replace("\r\n", "\n")
+        self.lines = self.text.split("\n")
+        self.masked = mask_comments(self.text)
+        self.offsets: List[int] = []
+        position = 0
+        for line in self.lines:
+            self.offsets.append(position)
+            position += len(line) + 1
+        self.markers: List[Tuple[int, str]] = [
+            (index, match.group(1))
+            for index, line in enumerate(self.lines)
+            if (match := MARKER_PATTERN.search(line))
+        ]
+        self.sections: List[Node] = []
+        self.nodes: Dict[str, Node] = {}
+        self._parse()
+
+    def line_of(self, offset: int) -> int:
+        return bisect.bisect_right(self.offsets, offset) - 1
+
+    def marker_line(self, key: str) -> Optional[int]:
+        """Line of the `% SECTION:key` marker; like findAnchor, a marker containing the key also matches"""
+        marker = f"SECTION:{key}"
+        exact = next((index for index, name in self.markers if name == key), None)
+        if exact is not None:
+            return exact
+        return next((index for index, _ in self.markers if marker in self.lines[index]), None)
+
+    def _trim(self, start: int, end: int) -> int:
+        while end > start + 1 and not self.masked_line(end - 1).strip():
+            end -= 1
+        return end
+
+    def masked_line(self, index: int) -> str:
+        return self.masked[self.offsets[index]:self.offsets[index] + len(self.lines[index])]
+
+    def _add(self, node: Node, parent: Optional[Node] = None) -> Node:
+        key = node.key
+        suffix = 2
+        while key in self.nodes:
+            key = f"{node.key}-{suffix}"
+            suffix += 1
+        node.key = key
+        self.nodes[key] = node
+        if parent:
+            parent.children.append(node)
+        return node
+
+    def _parse(self):
+        if self.markers:
+            bounds = [(index, name.upper()) for index, name in self.markers]
+        else:
+            match = SECTION_TITLE_PATTERN.search(self.masked)
+            if match:
+                group = read_group(self.masked, match.end())
+                title = plain_text(self.text[group[0]:group[1] - 1]) if group else ""
+                bounds = [(self.line_of(match.start()), re.sub(r"[^A-Z0-9]+", "_", title.upper()).strip("_") or "SECTION")]
+            else:
+                bounds = [(0, "MAIN" if self.name == MAIN_SECTION else slugify(self.name.rsplit(".", 1)[0]).upper())]
+
+        for position, (start, key) in enumerate(bounds):
+            end = bounds[position + 1][0] if position + 1 < len(bounds) else len(self.lines)
+            end = self._trim(start, end)
+            section = self._add(Node("section", key, self._section_title(start, end, key), self.name, start, end))
+            self.sections.append(section)
+            self._parse_entries(section)
+
+    def _section_title(self, start: int, end: int, key: str) -> str:
+        begin, finish = self.offsets[start], self.offsets[end - 1] + len(self.lines[end - 1])
+        match = SECTION_TITLE_PATTERN.search(self.masked, begin, finish)
+        if match:
+            group = read_group(self.masked, match.end())
+            if group:
+                return plain_text(self.text[group[0]:group[1] - 1])
+        return key.replace("_", " ").title()
+
+    def _parse_entries(self, section: Node):
+        begin = self.offsets[section.start]
+        finish = self.offsets[section.end - 1] + len(self.lines[section.end - 1])
+        entries = 0
+        for match in ENTRY_PATTERN.finditer(self.masked, begin, finish):
+            count, naming = ENTRY_MACROS[match.group(1)]
+            groups: List[Tuple[int, int]] = []
+            position = match.end()
+            for _ in range(count):
+                group = read_group(self.masked, position)
+                if not group:
+                    break
+                groups.append(group)
+                position = group[1]
+            if len(groups) < count:
+                continue
+            title = " ".join(plain_text(self.text[groups[i][0]:groups[i][1] - 1]) for i in naming)
+            entry = self._add(Node(
+                "entry", f"{section.key}/{slugify(title)}", title, self.name,
+                self.line_of(match.start()), self.line_of(position - 1) + 1,
+            ), section)
+            self._parse_bullets(entry)
+            entries += 1
+
+        if not entries:
+            # Paragraph entries: a paragraph (after a blank line or \begin{...}) that opens with \textbf{...}
+            index = section.start
+            while index < section.end:
+                previous = self.masked_line(index - 1).strip() if index > section.start else ""
+                opens = not previous or previous.startswith("\\begin{")
+                if not (opens and self.masked_line(index).lstrip().startswith("\\textbf{")):
+                    index += 1
+                    continue
+                stop = index + 1
+                while stop < section.end and self.masked_line(stop).strip() and not self.masked_line(stop).lstrip().startswith("\\end{"):
+                    stop += 1
+                offset = self.offsets[index] + self.lines[index].index("\\textbf{") + len("\\textbf")
+                group = read_group(self.masked, offset)
+                title = plain_text(self.text[group[0]:group[1] - 1]) if group else self.lines[index].strip()
+                entry = self._add(Node("entry", f"{section.key}/{slugify(title)}", title, self.name, index, stop), section)
+                self._parse_bullets(entry)
+                entries += 1
+                index = stop
+
+        if not entries:
+            self._parse_bullets(section)
+
+    def _parse_bullets(self, parent: Node):
+        begin = self.offsets[parent.start]
+        finish = self.offsets[parent.end - 1] + len(self.lines[parent.end - 1])
+        items = [match.start() for match in ITEM_PATTERN.finditer(self.masked, begin, finish)]
+        for number, offset in enumerate(items, start=1):
+            boundary = items[number] if number < len(items) else finish
+            list_end = LIST_END_PATTERN.search(self.masked, offset, boundary)
+            if list_end:
+                boundary = list_end.start()
+            start = self.line_of(offset)
+            end = max(start + 1, self.line_of(boundary) if boundary < finish else parent.end)
+            title = plain_text(self.text[offset + len("\\item"):self.offsets[start] + len(self.lines[start])])
+            self._add(Node("bullet", f"{parent.key}/{number}", title[:80], self.name, start, end), parent)
+
+
+def file_structure(name: str, cached: CachedFile) -> FileStructure:
+    """Parsed structure of a cached file; parsed once per content hash"""
+    if cached.structure is None:
+        cached.structure = FileStructure(name, cached.content)
+    return cached.structure
+
+
+class ResumeStructure:
+    """Every file's structure in one snapshot, looked up by key"""
+
+    def __init__(self, snapshot: Snapshot):
+        self.snapshot = snapshot
+        self.files: Dict[str, FileStructure] = {
+            name: file_structure(name, cached) for name, cached in snapshot.sections.items()
+        }
+        self.nodes: Dict[str, Tuple[FileStructure, Node]] = {}
+        for structure in self.files.values():
+            for key, node in structure.nodes.items():
+                self.nodes.setdefault(key, (structure, node))
+
+    def outline(self) -> List[Dict[str, Any]]:
+        """Sections and their entries (keys, titles, line ranges) without text"""
+        sections = []
+        for structure in self.files.values():
+            for section in structure.sections:
+                lines = section.text(structure.lines)
+                sections.append({
+                    **section.summary(),
+                    "hash": content_hash(lines),
+                    "entries": [
+                        {**child.summary(), "bullets": len(child.children)} if child.kind == "entry" else child.summary()
+                        for child in section.children
+                    ],
+                })
+        return sections
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """One section, entry or bullet with its text; section keys are case-insensitive"""
+        section, _, rest = key.partition("/")
+        found = self.nodes.get(key) or self.nodes.get(f"{section.upper()}/{rest}" if rest else section.upper())
+        if not found:
+            return None
+        structure, node = found
+        text = node.text(structure.lines)
+        return {
+            **node.summary(),
+            "hash": content_hash(text),
+            "text": text,
+            "children": [child.key for child in node.children],
+        }
+
+__all__ = ['ResumeStructure', 'FileStructure', 'Node', 'file_structure', 'plain_text', 'ENTRY_MACROS']
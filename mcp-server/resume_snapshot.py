@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Change-aware snapshot of the resume sources for get_resume_info
+Files are only re-read when their mtime or size changes, and every section
+(cv.tex plus each resume/includes/*.tex) carries a content hash so clients
+can ask for just the sections that changed since their last poll.
+
+One cache is kept per resume directory (one per profile, see profiles.py).
+The caches sit in an LRU capped by the bytes of resume text they hold, so
+thousands of profiles can be served while only the recently used ones stay
+in memory.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+MAIN_SECTION = "cv.tex"
+CACHE_MAX_BYTES = int(float(os.getenv("RESUME_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+
+def content_hash(text: str) -> str:
+    """Short, stable hash used as a per-section ETag"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class CachedFile:
+    path: Path
+    stamp: Tuple[int, int]
+    content: str
+    hash: str
+    # Parsed sections/entries/bullets (resume_index.py), built on first use
+    structure: Optional[Any] = field(default=None, repr=False, compare=False)
+
+
+@dataclass
+class Snapshot:
+    resume_path: Path
+    main_file: Optional[Path]
+    sections: Dict[str, CachedFile] = field(default_factory=dict)
+    etag: str = ""
+
+    @property
+    def section_hashes(self) -> Dict[str, str]:
+        return {name: cached.hash for name, cached in self.sections.items()}
+
+
+class ResumeSnapshotCache:
+    """In-process cache of the resume tree, invalidated by mtime and content hash"""
+
+    def __init__(self, resume_path: Path):
+        self.resume_path = Path(resume_path)
+        self.includes_path = self.resume_path / "includes"
+        self._files: Dict[str, CachedFile] = {}
+        self._includes_stamp: Optional[int] = None
+        self._include_names: List[str] = []
+        self._lock = threading.Lock()
+        self.reads = 0
+        # Approximate bytes held, kept up to date as files are cached and dropped
+        self.size = 0
+        # Called with the change in size, so an owning LRU can keep a running total
+        self.on_resize: Optional[Callable[[int], None]] = None
+
+    @staticmethod
+    def _footprint(cached: Optional[CachedFile]) -> int:
+        # A file counts twice its text: once for the content, once for the structure parsed from it
+        return 2 * len(cached.content) if cached else 0
+
+    def _resize(self, delta: int):
+        if delta:
+            self.size += delta
+            if self.on_resize:
+                self.on_resize(delta)
+
+    def snapshot(self) -> Snapshot:
+        """Return the current snapshot, re-reading only files that changed on disk"""
+        with self._lock:
+            wanted: Dict[str, Path] = {MAIN_SECTION: self.resume_path / MAIN_SECTION}
+            for name in self._list_includes():
+                wanted[name] = self.includes_path / name
+
+            sections: Dict[str, CachedFile] = {}
+            for name, path in wanted.items():
+                cached = self._refresh(name, path)
+                if cached:
+                    sections[name] = cached
+            for stale in set(self._files) - set(sections):
+                self._resize(-self._footprint(self._files.pop(stale)))
+
+        main = sections.get(MAIN_SECTION)
+        etag = content_hash("".join(f"{name}:{cached.hash};" for name, cached in sorted(sections.items())))
+        return Snapshot(
+            resume_path=self.resume_path,
+            main_file=main.path if main else None,
+            sections=sections,
+            etag=etag,
+        )
+
+    def _list_includes(self) -> List[str]:
+        # The directory mtime changes when files are added, removed or renamed
+        try:
+            stamp = os.stat(self.includes_path).st_mtime_ns
+        except FileNotFoundError:
+            self._includes_stamp = None
+            self._include_names = []
+            return []
+        if stamp != self._includes_stamp:
+            self._include_names = sorted(p.name for p in self.includes_path.glob("*.tex") if p.is_file())
+            self._includes_stamp = stamp
+        return self._include_names
+
+    def _refresh(self, name: str, path: Path) -> Optional[CachedFile]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self._files.get(name)
+        if cached and cached.stamp == stamp:
+            return cached
+
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        self.reads += 1
+        digest = content_hash(content)
+        if cached and cached.hash == digest:
+            # Touched but unchanged; keep the cached content
+            cached.stamp = stamp
+            return cached
+        self._resize(2 * len(content) - self._footprint(cached))
+        cached = CachedFile(path=path, stamp=stamp, content=content, hash=digest)
+        self._files[name] = cached
+        return cached
+
+
+def build_resume_info(
+    snapshot: Snapshot,
+    known_hashes: Optional[Dict[str, str]] = None,
+    if_none_match: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Shape a snapshot into the get_resume_info response, omitting sections the client already holds"""
+    main = snapshot.sections.get(MAIN_SECTION)
+    include_names = [name for name in snapshot.sections if name != MAIN_SECTION]
+
+    response: Dict[str, Any] = {
+        "resume_path": str(snapshot.resume_path),
+        "main_file": str(snapshot.main_file) if snapshot.main_file else None,
+        "sections": include_names,
+        "etag": snapshot.etag,
+        "section_hashes": snapshot.section_hashes,
+    }
+
+    if if_none_match and if_none_match == snapshot.etag:
+        response.update({
+            "not_modified": True,
+            "sections_content": {},
+            "unchanged": list(snapshot.sections),
+            "message": "Resume unchanged since the supplied etag"
+        })
+        return response
+
+    known = known_hashes or {}
+    changed = {name: cached for name, cached in snapshot.sections.items() if known.get(name) != cached.hash}
+    response.update({
+        "not_modified": False,
+        "sections_content": {name: cached.content for name, cached in changed.items() if name != MAIN_SECTION},
+        "unchanged": [name for name in snapshot.sections if name not in changed],
+        "removed": [name for name in known if name not in snapshot.sections],
+        "message": "Resume information retrieved successfully"
+    })
+    if main is None or MAIN_SECTION in changed:
+        response["main_content"] = main.content if main else None
+    return response
+
+
+class SnapshotCacheLRU:
+    """Per-directory snapshot caches, least recently used evicted beyond max_bytes"""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._caches: "OrderedDict[str, ResumeSnapshotCache]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Running total of every held cache's size, updated as caches grow, shrink or are evicted
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, resume_path: Path) -> ResumeSnapshotCache:
+        key = str(Path(resume_path).resolve())
+        with self._lock:
+            cache = self._caches.get(key)
+            if cache is None:
+                self.misses += 1
+                cache = ResumeSnapshotCache(Path(resume_path))
+                cache.on_resize = self._tracker(key, cache)
+                self._caches[key] = cache
+            else:
+                self.hits += 1
+                self._caches.move_to_end(key)
+            self._evict()
+        return cache
+
+    def _tracker(self, key: str, cache: ResumeSnapshotCache) -> Callable[[int], None]:
+        def resized(delta: int):
+            with self._lock:
+                # An evicted cache still in use by a caller no longer counts
+                if self._caches.get(key) is cache:
+                    self._bytes += delta
+        return resized
+
+    def _evict(self):
+        # Sizes are updated by snapshot() after get() returns, so the total is
+        # checked on the next access; the most recent cache is never evicted
+        while self._bytes > self.max_bytes and len(self._caches) > 1:
+            _, evicted = self._caches.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "profiles": len(self._caches),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_caches = SnapshotCacheLRU()
+
+
+def get_snapshot_cache(resume_path: Path) -> ResumeSnapshotCache:
+    """Process-wide cache per resume directory, held in a memory-capped LRU"""
+    return _caches.get(resume_path)
+
+
+def snapshot_cache_stats() -> Dict[str, Any]:
+    return _caches.stats()
+
+__all__ = ['ResumeSnapshotCache', 'SnapshotCacheLRU', 'Snapshot', 'build_resume_info', 'get_snapshot_cache', 'snapshot_cache_stats', 'content_hash', 'MAIN_SECTION']
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Persistent run store for the FastMCP servers
+Runs are kept in an embedded SQLite database (WAL mode) with a primary key on
+the run id and indexes on (status, createdAt), createdAt and (profile, createdAt), so lookups
+are O(1) and listings only read the requested page.
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / "data" / "runs.db"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    batch_id TEXT,
+    profile_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_status_created ON runs (status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created_at DESC, id DESC);
+"""
+
+# Columns added after the first release, applied to existing databases on open
+MIGRATIONS = {
+    "batch_id": "ALTER TABLE runs ADD COLUMN batch_id TEXT",
+    # Runs stored before profiles existed all used the default resume
+    "profile_id": "ALTER TABLE runs ADD COLUMN profile_id TEXT; UPDATE runs SET profile_id = 'default';",
+}
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS runs_batch ON runs (batch_id) WHERE batch_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS runs_profile_created ON runs (profile_id, created_at DESC, id DESC) WHERE profile_id IS NOT NULL;
+"""
+
+
+def encode_cursor(created_at: str, run_id: str) -> str:
+    """Encode the last row of a page as an opaque cursor"""
+    raw = json.dumps([created_at, run_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        created_at, run_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(created_at), str(run_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+class RunStore:
+    """SQLite-backed store of run summaries, newest first"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or os.getenv("RUN_STORE_PATH", str(DEFAULT_DB_PATH)))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._conn.executescript(INDEXES)
+
+    def _migrate(self):
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                self._conn.executescript(statement)
+
+    @staticmethod
+    def _row(run: Dict[str, Any]) -> tuple:
+        return (
+            run["id"],
+            run["status"],
+            run["createdAt"],
+            run.get("updatedAt", run["createdAt"]),
+            run.get("batchId"),
+            run.get("profileId"),
+            json.dumps(run),
+        )
+
+    def put(self, run: Dict[str, Any]):
+        """Insert or replace a run"""
+        self.put_many([run])
+
+    def put_many(self, runs: List[Dict[str, Any]]):
+        """Insert or replace many runs in a single transaction"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO runs (id, status, created_at, updated_at, batch_id, profile_id, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [self._row(run) for run in runs],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def update(self, run_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """Merge fields into a stored run and return the updated run"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT data FROM runs WHERE id = ?", (run_id,)).fetchone()
+                if row is None:
+                    self._conn.execute("ROLLBACK")
+                    return None
+                run = json.loads(row[0])
+                run.update(fields)
+                self._conn.execute(
+                    "UPDATE runs SET status = ?, updated_at = ?, data = ? WHERE id = ?",
+                    (run["status"], run.get("updatedAt", run["createdAt"]), json.dumps(run), run_id),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return run
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a run by id"""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list(
+        self,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        profile_id: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return one page of runs (newest first) and the cursor for the next page"""
+        page_size = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if profile_id:
+            clauses.append("profile_id = ?")
+            params.append(profile_id)
+        if cursor:
+            created_at, run_id = decode_cursor(cursor)
+            clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend([created_at, created_at, run_id])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT id, created_at, data FROM runs {where} ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(page_size + 1)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+        return [json.loads(row[2]) for row in rows], next_cursor
+
+    def list_batch(self, batch_id: str) -> List[Dict[str, Any]]:
+        """All runs created by one batch, in submission order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM runs WHERE batch_id = ? ORDER BY rowid", (batch_id,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self, status: Optional[str] = None) -> int:
+        """Number of stored runs, optionally for one status"""
+        with self._lock:
+            if status:
+                return self._conn.execute("SELECT COUNT(*) FROM runs WHERE status = ?", (status,)).fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    run_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+
+class JobStore:
+    """
+    Queue jobs and batches of server.py, shared by every worker process (see
+    serve.py) so get_run, get_batch and resume_run answer the same whichever
+    worker queued the work. Lives next to the runs table in the same database.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or os.getenv("RUN_STORE_PATH", str(DEFAULT_DB_PATH)))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(JOB_SCHEMA)
+
+    def put_job(self, job: Dict[str, Any]):
+        """Insert or replace a job record (RunJob.to_record())"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (run_id, status, updated_at, data) VALUES (?, ?, ?, ?)",
+                (job["run_id"], job["job_status"], time.time(), json.dumps(job)),
+            )
+
+    def get_job(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_batch(self, batch: Dict[str, Any]):
+        """Insert or replace a batch record (RunBatch.to_record())"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO batches (batch_id, updated_at, data) VALUES (?, ?, ?)",
+                (batch["batch_id"], time.time(), json.dumps(batch)),
+            )
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM batches WHERE batch_id = ?", (batch_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def prune(self, older_than_s: float) -> int:
+        """Drop finished jobs and batches last updated more than older_than_s ago"""
+        cutoff = time.time() - older_than_s
+        with self._lock:
+            jobs = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND updated_at < ?", (cutoff,)
+            ).rowcount
+            batches = self._conn.execute("DELETE FROM batches WHERE updated_at < ?", (cutoff,)).rowcount
+        return jobs + batches
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+__all__ = ['RunStore', 'JobStore', 'encode_cursor', 'decode_cursor', 'DEFAULT_PAGE_SIZE', 'MAX_PAGE_SIZE']
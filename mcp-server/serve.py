@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Production HTTP serving for the FastMCP servers
+Runs server.py or server-direct.py over streamable HTTP (or SSE) under
+uvicorn with several worker processes, so tool calls use every core. Each
+worker imports the server module and builds its own ASGI app; state a later
+request may need from another worker lives in shared stores: runs in SQLite
+(run_store.py), summaries and journals under data/runs, and server.py's queue
+jobs and batches in run_store.JobStore.
+
+Sessions are stateless by default (MCP_STATELESS_HTTP=1): no request depends
+on an earlier one reaching the same worker. With MCP_STATELESS_HTTP=0 every
+request of a session must reach the worker that created it, so run one
+worker per instance and let nginx hash on the mcp-session-id header (see
+nginx-fastmcp.conf).
+
+With several workers, metrics go through MCP_METRICS_DIR (data/cache/metrics
+unless set): each worker writes its counters there and /metrics on any worker
+reports the sum, see metrics.py.
+
+On SIGTERM uvicorn stops accepting connections and waits up to
+MCP_DRAIN_TIMEOUT seconds for open requests, then each worker calls the
+server's drain(), which lets queued pipelines and background work finish
+within the same budget.
+
+    python serve.py server-direct --workers 4 --port 8000
+    python serve.py server --transport sse --port 8000
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import ModuleType
+from typing import List, Optional
+
+import metrics
+
+HERE = Path(__file__).parent
+SERVER_FILES = {"server": "server.py", "server-direct": "server-direct.py"}
+TRANSPORTS = ("http", "sse")
+
+MCP_SERVER = os.getenv("MCP_SERVER", "server-direct")
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "http")
+MCP_PATH = os.getenv("MCP_PATH", "/mcp")
+MCP_WORKERS = int(os.getenv("MCP_WORKERS", str(os.cpu_count() or 1)))
+MCP_STATELESS_HTTP = os.getenv("MCP_STATELESS_HTTP", "1") != "0"
+MCP_DRAIN_TIMEOUT = float(os.getenv("MCP_DRAIN_TIMEOUT", "30"))
+
+
+def load_server(name: str) -> ModuleType:
+    """Import server.py or server-direct.py by file (the latter is not a valid module name)"""
+    if name not in SERVER_FILES:
+        raise ValueError(f"Unknown server {name}, expected one of {', '.join(SERVER_FILES)}")
+    module_name = name.replace("-", "_")
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, HERE / SERVER_FILES[name])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def create_app(server: Optional[str] = None, transport: Optional[str] = None):
+    """ASGI app of one worker: the server's MCP endpoint, draining the server on shutdown"""
+    module = load_server(server or os.getenv("MCP_SERVER", MCP_SERVER))
+    transport = transport or os.getenv("MCP_TRANSPORT", MCP_TRANSPORT)
+    if transport == "sse":
+        app = module.mcp.http_app(path=MCP_PATH, transport="sse")
+    else:
+        app = module.mcp.http_app(path=MCP_PATH, transport="http", stateless_http=MCP_STATELESS_HTTP)
+
+    serve_mcp = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(scope_app):
+        async with serve_mcp(scope_app):
+            yield
+            drain = getattr(module, "drain", None)
+            if drain:
+                await drain(MCP_DRAIN_TIMEOUT)
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+def build_parser(server: Optional[str] = None) -> argparse.ArgumentParser:
+    """Command line of serve.py; with a server given (its own __main__) stdio is the default transport"""
+    parser = argparse.ArgumentParser(description="Serve the FastMCP tools over HTTP with several worker processes")
+    if server is None:
+        parser.add_argument("server", nargs="?", choices=list(SERVER_FILES), default=MCP_SERVER)
+        parser.add_argument("--transport", choices=TRANSPORTS, default=MCP_TRANSPORT)
+    else:
+        parser.set_defaults(server=server)
+        parser.add_argument("--transport", choices=("stdio", *TRANSPORTS), default="stdio")
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=MCP_WORKERS, help="worker processes")
+    return parser
+
+
+def serve(args: argparse.Namespace):
+    import uvicorn
+
+    # Spawned workers build their app from these, see create_app()
+    os.environ["MCP_SERVER"] = args.server
+    os.environ["MCP_TRANSPORT"] = args.transport
+    workers = max(1, args.workers)
+    stateless = args.transport == "http" and MCP_STATELESS_HTTP
+    if not stateless and workers > 1:
+        # A session lives in the process that opened it; scale with more instances behind nginx instead
+        print(f"⚠️  {args.transport} sessions are per process, serving with 1 worker instead of {workers}")
+        workers = 1
+    if workers > 1:
+        metrics_dir = Path(os.environ.setdefault("MCP_METRICS_DIR", str(metrics.DEFAULT_METRICS_DIR)))
+        metrics.clear_worker_stats(metrics_dir)
+    mode = "stateless" if stateless else "sessions"
+    print(f"🌐 {args.server} over {args.transport} ({mode}) at http://{args.host}:{args.port}{MCP_PATH}, {workers} workers")
+    uvicorn.run(
+        "serve:create_app",
+        factory=True,
+        app_dir=str(HERE),
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        timeout_graceful_shutdown=MCP_DRAIN_TIMEOUT,
+        proxy_headers=True,
+    )
+
+
+def main(argv: Optional[List[str]] = None):
+    serve(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,47 +5,128 @@ This version directly implements the MCP tools without Node.js dependency
 """
 
 import asyncio
+import hashlib
 import json
 import os
+import random
 import sys
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 import uuid
 from datetime import datetime
 
 from fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+import metrics
+from ats_engine import ATS_PREFILL, MAX_ATS_BATCH, rank_scores, resume_terms, score_batch, score_job_description
+from builds import run_build
+from diff_engine import apply_diffs as apply_refiner_diffs, load_run_diffs
+from jd_similarity import JD_REUSE, JD_REUSE_THRESHOLD, SimilarityIndex, signature
+from llm_cache import cache_stats, purge_cache
+from profiles import ProfileNotFound, normalize_profile_id, resolve_profile
+from provider_stats import admission_stats, auto_order, provider_stats
+from resume_index import ResumeStructure
+from resume_snapshot import build_resume_info, get_snapshot_cache, snapshot_cache_stats
+from run_store import RunStore
+from stage_graph import StageGraph
 
 # Initialize FastMCP server
 mcp = FastMCP("AI Resume Orchestrator")
+mcp.add_middleware(metrics.ToolMetricsMiddleware())
+
+# Persistent run storage (SQLite, see run_store.py)
+runs_storage = RunStore()
+
+RUN_STATUSES = ("pending", "running", "needs_review", "failed", "completed")
+metrics.track_run_states(lambda: {status: runs_storage.count(status) for status in RUN_STATUSES})
+
+_similar_runs: Optional[SimilarityIndex] = None
+
+
+def similar_runs() -> SimilarityIndex:
+    """
+    Job descriptions of stored runs, for near-duplicate reuse and find_similar_runs
+    Opened on first use rather than at import, so loading the module touches no database
+    """
+    global _similar_runs
+    if _similar_runs is None:
+        _similar_runs = SimilarityIndex()
+    return _similar_runs
+
+DEFAULT_PROVIDERS = {
+    "reviewer": "claude",
+    "swot": "claude",
+    "refiner": "claude",
+    "judge": "claude",
+    "finalizer": "claude"
+}
+
+MAX_BATCH_SIZE = 500
+
+# Fire-and-forget work (index updates) that drain() waits for
+background_tasks: Set[asyncio.Task] = set()
+
+def _in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
 
-# Global state for runs (in production, use a database)
-runs_storage = []
+async def drain(timeout: float):
+    """Graceful shutdown (called by serve.py): let background index updates finish, up to timeout seconds"""
+    if background_tasks:
+        await asyncio.wait(list(background_tasks), timeout=timeout)
+
+def _new_run(job_description: str, dry_run: bool, providers: Dict[str, str], **extra: Any) -> Dict[str, Any]:
+    """Build a pending run record"""
+    now = datetime.now().isoformat()
+    return {
+        "id": str(uuid.uuid4()),
+        "status": "pending",
+        "jobDescription": job_description,
+        "dryRun": dry_run,
+        "providers": providers,
+        "createdAt": now,
+        "updatedAt": now,
+        "artifacts": [],
+        "message": "Run created successfully. In a full implementation, this would trigger the multi-agent pipeline.",
+        **extra
+    }
 
 @mcp.tool
-async def list_runs(status: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+async def list_runs(
+    status: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    profile_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
-    List stored resume automation runs. Optionally filter by status or limit the number returned.
+    List stored resume automation runs, newest first. Optionally filter by status or limit the number returned.
     
     Args:
         status: Filter runs by status (pending, running, needs_review, failed, completed)
-        limit: Limit the number of runs returned (1-100)
+        limit: Limit the number of runs returned (1-100, default 100)
+        cursor: Cursor returned by a previous call to fetch the next page
+        profile_id: Only list runs for this resume profile
     
     Returns:
-        Dictionary containing the list of runs
+        Dictionary containing the list of runs and the cursor for the next page
     """
     try:
-        runs = runs_storage.copy()
-        
-        # Apply filters
-        if status:
-            runs = [run for run in runs if run.get('status') == status]
-        
-        if limit:
-            runs = runs[:limit]
+        runs, next_cursor = runs_storage.list(
+            status=status,
+            limit=limit,
+            cursor=cursor,
+            profile_id=normalize_profile_id(profile_id) if profile_id else None
+        )
         
         return {
             "runs": runs,
             "count": len(runs),
+            "next_cursor": next_cursor,
             "message": f"Found {len(runs)} resume runs"
         }
     except Exception as e:
@@ -63,7 +144,7 @@ async def get_run(run_id: str) -> Dict[str, Any]:
         Dictionary containing the run details
     """
     try:
-        run = next((r for r in runs_storage if r.get('id') == run_id), None)
+        run = runs_storage.get(run_id)
         
         if not run:
             return {"error": f"Run {run_id} not found"}
@@ -79,15 +160,21 @@ async def get_run(run_id: str) -> Dict[str, Any]:
 async def create_run(
     job_description: str,
     dry_run: bool = False,
-    providers: Optional[Dict[str, str]] = None
+    providers: Optional[Dict[str, str]] = None,
+    profile_id: Optional[str] = None,
+    reuse: bool = True
 ) -> Dict[str, Any]:
     """
     Kick off a new resume automation run using the supplied configuration.
+    When an earlier run of the same resume, dry-run mode and providers had a near-identical
+    job description, that run is returned instead (reused=true).
     
     Args:
         job_description: The job description to optimize the resume for
         dry_run: Whether to run in dry-run mode (no actual changes)
-        providers: Dictionary mapping roles to LLM providers (groq, claude, gemini)
+        providers: Dictionary mapping roles to LLM providers (groq, claude, gemini, or auto)
+        profile_id: Resume profile to optimize (default: the repository's resume/)
+        reuse: Return a near-duplicate earlier run instead of creating a new one
     
     Returns:
         Dictionary containing the run ID and summary
@@ -95,33 +182,46 @@ async def create_run(
     try:
         # Default providers if not provided
         if not providers:
-            providers = {
-                "reviewer": "claude",
-                "swot": "claude", 
-                "refiner": "claude",
-                "judge": "claude",
-                "finalizer": "claude"
-            }
+            providers = dict(DEFAULT_PROVIDERS)
+        
+        resume_path = resolve_profile(profile_id)
+        profile = normalize_profile_id(profile_id)
+        snapshot = get_snapshot_cache(resume_path).snapshot()
+        sig = await asyncio.to_thread(signature, job_description)
+        if reuse and JD_REUSE:
+            matches = similar_runs().query(
+                job_description, JD_REUSE_THRESHOLD, 5, profile, snapshot.etag, dry_run, providers, sig=sig
+            )
+            for match in matches:
+                existing = runs_storage.get(match["run_id"])
+                if existing and existing["status"] != "failed":
+                    return {
+                        "run_id": existing["id"],
+                        "reused": True,
+                        "similarity": match["similarity"],
+                        "summary": existing,
+                        "message": (
+                            f"Reused run {existing['id']} ({match['similarity']:.0%} similar job description, same resume). "
+                            "Pass reuse=false to create a new run."
+                        ),
+                        "status": "reused"
+                    }
+        
+        extra: Dict[str, Any] = {"profileId": profile, "resumeEtag": snapshot.etag}
+        if ATS_PREFILL:
+            extra["ats"] = score_job_description(job_description, resume_terms(snapshot))
         
         # Create new run
-        run_id = str(uuid.uuid4())
-        run = {
-            "id": run_id,
-            "status": "pending",
-            "jobDescription": job_description,
-            "dryRun": dry_run,
-            "providers": providers,
-            "createdAt": datetime.now().isoformat(),
-            "updatedAt": datetime.now().isoformat(),
-            "artifacts": [],
-            "message": "Run created successfully. In a full implementation, this would trigger the multi-agent pipeline."
-        }
+        run = _new_run(job_description, dry_run, providers, **extra)
+        run_id = run["id"]
         
         # Add to storage
-        runs_storage.append(run)
+        runs_storage.put(run)
+        similar_runs().add(run_id, job_description, profile, snapshot.etag, dry_run, providers, sig=sig)
         
         return {
             "run_id": run_id,
+            "reused": False,
             "summary": run,
             "message": f"Created new resume run: {run_id}",
             "status": "success"
@@ -130,45 +230,375 @@ async def create_run(
         return {"error": f"Failed to create run: {str(e)}"}
 
 @mcp.tool
-async def get_resume_info() -> Dict[str, Any]:
+async def create_runs_batch(
+    job_descriptions: List[str],
+    dry_run: bool = False,
+    providers: Optional[Dict[str, str]] = None,
+    profile_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Create one resume automation run per job description with shared provider settings.
+    The resume snapshot is read once and all runs are stored in a single transaction.
+    
+    Args:
+        job_descriptions: The job descriptions to optimize the resume for (up to 500)
+        dry_run: Whether to run in dry-run mode (no actual changes)
+        providers: Dictionary mapping roles to LLM providers (groq, claude, gemini, or auto)
+        profile_id: Resume profile every run in the batch optimizes
+    
+    Returns:
+        Dictionary containing the batch ID and the run ID of every item
+    """
+    if not job_descriptions:
+        return {"error": "job_descriptions must not be empty"}
+    if len(job_descriptions) > MAX_BATCH_SIZE:
+        return {"error": f"A batch holds at most {MAX_BATCH_SIZE} job descriptions"}
+    
+    try:
+        snapshot = get_snapshot_cache(resolve_profile(profile_id)).snapshot()
+        shared_providers = providers or dict(DEFAULT_PROVIDERS)
+        batch_id = str(uuid.uuid4())
+        profile = normalize_profile_id(profile_id)
+        terms = resume_terms(snapshot) if ATS_PREFILL else None
+        runs = [
+            _new_run(
+                jd, dry_run, shared_providers, batchId=batch_id, profileId=profile, resumeEtag=snapshot.etag,
+                **({"ats": score_job_description(jd, terms)} if terms else {})
+            )
+            for jd in job_descriptions
+        ]
+        runs_storage.put_many(runs)
+        # Index the batch for later near-duplicate lookups without holding up the response
+        _in_background(asyncio.to_thread(
+            similar_runs().add_many,
+            [(run["id"], run["jobDescription"], profile, snapshot.etag, dry_run, shared_providers) for run in runs]
+        ))
+        
+        return {
+            "batch_id": batch_id,
+            "run_ids": [run["id"] for run in runs],
+            "size": len(runs),
+            "profile_id": profile,
+            "resume_etag": snapshot.etag,
+            "message": f"Created batch {batch_id} with {len(runs)} runs",
+            "status": "success"
+        }
+    except Exception as e:
+        return {"error": f"Failed to create batch: {str(e)}"}
+
+@mcp.tool
+async def find_similar_runs(
+    job_description: str,
+    profile_id: Optional[str] = None,
+    threshold: float = 0.5,
+    limit: int = 10,
+    same_resume: bool = False
+) -> Dict[str, Any]:
+    """
+    Find stored runs whose job description is a near duplicate of this one (MinHash estimate of
+    word-shingle Jaccard similarity).
+    
+    Args:
+        job_description: The job description to look up
+        profile_id: Only consider runs of this resume profile
+        threshold: Minimum similarity, 0-1 (below ~0.5 some matches may be missed)
+        limit: Maximum number of runs to return
+        same_resume: Only consider runs made against the profile's current resume snapshot
+    
+    Returns:
+        Dictionary containing the matching runs, most similar first, with their status
+    """
+    try:
+        profile = normalize_profile_id(profile_id) if profile_id or same_resume else None
+        etag = get_snapshot_cache(resolve_profile(profile)).snapshot().etag if same_resume else None
+        matches = await asyncio.to_thread(similar_runs().query, job_description, threshold, limit, profile, etag)
+        runs = []
+        for match in matches:
+            run = runs_storage.get(match["run_id"])
+            if run:
+                runs.append({**match, "status": run["status"]})
+        return {
+            "matches": runs,
+            "indexed": similar_runs().count(),
+            "message": f"Found {len(runs)} runs with similarity >= {threshold}"
+        }
+    except Exception as e:
+        return {"error": f"Failed to find similar runs: {str(e)}"}
+
+@mcp.tool
+async def get_batch(batch_id: str) -> Dict[str, Any]:
+    """
+    Report aggregate progress and per-item results for a batch created by create_runs_batch.
+    
+    Args:
+        batch_id: The identifier returned by create_runs_batch
+    
+    Returns:
+        Dictionary containing status counts and one entry per run
+    """
+    try:
+        runs = runs_storage.list_batch(batch_id)
+        if not runs:
+            return {"error": f"Batch {batch_id} not found"}
+        
+        counts: Dict[str, int] = {}
+        for run in runs:
+            counts[run["status"]] = counts.get(run["status"], 0) + 1
+        finished = sum(counts.get(s, 0) for s in ("completed", "needs_review", "failed"))
+        
+        return {
+            "batch_id": batch_id,
+            "counts": counts,
+            "finished": finished,
+            "total": len(runs),
+            "percent": round(100 * finished / len(runs), 1),
+            "items": [{"run_id": run["id"], "status": run["status"]} for run in runs],
+            "message": f"Retrieved batch {batch_id}"
+        }
+    except Exception as e:
+        return {"error": f"Failed to get batch {batch_id}: {str(e)}"}
+
+@mcp.tool
+async def get_resume_info(
+    known_hashes: Optional[Dict[str, str]] = None,
+    if_none_match: Optional[str] = None,
+    profile_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Get information about the current resume structure and available sections.
     
+    Args:
+        known_hashes: Section hashes (from section_hashes) the client already holds;
+            only sections whose hash differs are returned with content
+        if_none_match: Snapshot etag from a previous call; when it still matches,
+            no section content is returned
+        profile_id: Resume profile to describe (default: the repository's resume/)
+    
     Returns:
         Dictionary containing resume information
     """
     try:
-        resume_path = Path(__file__).parent.parent / "resume"
+        try:
+            resume_path = resolve_profile(profile_id)
+        except ProfileNotFound as e:
+            return {"error": str(e)}
         
-        if not resume_path.exists():
-            return {"error": "Resume directory not found"}
+        snapshot = get_snapshot_cache(resume_path).snapshot()
+        return {"profile_id": normalize_profile_id(profile_id), **build_resume_info(snapshot, known_hashes, if_none_match)}
+    except Exception as e:
+        return {"error": f"Failed to get resume info: {str(e)}"}
+
+@mcp.tool
+async def get_resume_outline(profile_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    List the resume's sections and their entries (keys, titles and line ranges) without any text.
+    
+    Args:
+        profile_id: Resume profile to describe (default: the repository's resume/)
+    
+    Returns:
+        Dictionary containing one item per section with its entries and bullet counts
+    """
+    try:
+        try:
+            resume_path = resolve_profile(profile_id)
+        except ProfileNotFound as e:
+            return {"error": str(e)}
         
-        # Get main resume file
-        main_file = resume_path / "cv.tex"
-        if main_file.exists():
-            with open(main_file, 'r', encoding='utf-8') as f:
-                main_content = f.read()
-        else:
-            main_content = None
+        snapshot = get_snapshot_cache(resume_path).snapshot()
+        sections = ResumeStructure(snapshot).outline()
+        return {
+            "profile_id": normalize_profile_id(profile_id),
+            "etag": snapshot.etag,
+            "sections": sections,
+            "message": f"Resume has {len(sections)} sections"
+        }
+    except Exception as e:
+        return {"error": f"Failed to get resume outline: {str(e)}"}
+
+@mcp.tool
+async def get_resume_section(
+    key: str,
+    profile_id: Optional[str] = None,
+    if_none_match: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Fetch one section, entry or bullet of the resume by its key, with its LaTeX and line range.
+    
+    Args:
+        key: Key from get_resume_outline, e.g. EXPERIENCE, EXPERIENCE/<entry> or EXPERIENCE/<entry>/<n>
+        profile_id: Resume profile to read (default: the repository's resume/)
+        if_none_match: Hash from a previous call; when it still matches, no text is returned
+    
+    Returns:
+        Dictionary containing the section or entry, its hash and the keys of its children
+    """
+    try:
+        try:
+            resume_path = resolve_profile(profile_id)
+        except ProfileNotFound as e:
+            return {"error": str(e)}
         
-        # Get includes directory
-        includes_path = resume_path / "includes"
-        sections = {}
-        if includes_path.exists():
-            for section_file in includes_path.glob("*.tex"):
-                with open(section_file, 'r', encoding='utf-8') as f:
-                    sections[section_file.name] = f.read()
+        node = ResumeStructure(get_snapshot_cache(resume_path).snapshot()).lookup(key)
+        if not node:
+            return {"error": f"No section or entry with key {key}"}
+        if if_none_match and if_none_match == node["hash"]:
+            node.pop("text")
+            return {**node, "not_modified": True, "message": f"{node['key']} unchanged since the supplied hash"}
+        return {**node, "not_modified": False, "message": f"Retrieved {node['kind']} {node['key']}"}
+    except Exception as e:
+        return {"error": f"Failed to get resume section {key}: {str(e)}"}
+
+@mcp.tool
+async def score_ats_coverage(job_description: str, profile_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Score the resume against a job description locally: ATS keywords, must-have and
+    nice-to-have coverage, and which keywords the resume is missing. No LLM call.
+    
+    Args:
+        job_description: The job description to score
+        profile_id: Resume profile to score (default: the repository's resume/)
+    
+    Returns:
+        Dictionary containing ats_keywords, coverage, matched/missing keywords and a weighted score
+    """
+    try:
+        try:
+            resume_path = resolve_profile(profile_id)
+        except ProfileNotFound as e:
+            return {"error": str(e)}
         
+        snapshot = get_snapshot_cache(resume_path).snapshot()
+        result = score_job_description(job_description, resume_terms(snapshot))
+        coverage = result["coverage"]
         return {
-            "resume_path": str(resume_path),
-            "main_file": str(main_file) if main_file.exists() else None,
-            "sections": list(sections.keys()),
-            "sections_content": sections,
-            "main_content": main_content,
-            "message": "Resume information retrieved successfully"
+            "profile_id": normalize_profile_id(profile_id),
+            "resume_etag": snapshot.etag,
+            **result,
+            "message": f"Must-have coverage {coverage['must_have_pct']}%, nice-to-have {coverage['nice_to_have_pct']}%"
         }
     except Exception as e:
-        return {"error": f"Failed to get resume info: {str(e)}"}
+        return {"error": f"Failed to score ATS coverage: {str(e)}"}
+
+@mcp.tool
+async def score_ats_batch(
+    job_descriptions: List[str],
+    profile_id: Optional[str] = None,
+    top: Optional[int] = None,
+    min_score: float = 0.0,
+    include_keywords: bool = False
+) -> Dict[str, Any]:
+    """
+    Score one resume against many job descriptions locally and rank them, to triage
+    which ones are worth a full pipeline run.
+    
+    Args:
+        job_descriptions: The job descriptions to score (up to 10000)
+        profile_id: Resume profile to score (default: the repository's resume/)
+        top: Only return the best N job descriptions
+        min_score: Only return job descriptions scoring at least this (0-100)
+        include_keywords: Return every keyword list, not just the missing must-haves
+    
+    Returns:
+        Dictionary containing the ranked results, each with its index in job_descriptions
+    """
+    if not job_descriptions:
+        return {"error": "job_descriptions must not be empty"}
+    if len(job_descriptions) > MAX_ATS_BATCH:
+        return {"error": f"A batch holds at most {MAX_ATS_BATCH} job descriptions"}
+    
+    try:
+        try:
+            resume_path = resolve_profile(profile_id)
+        except ProfileNotFound as e:
+            return {"error": str(e)}
+        
+        started = time.perf_counter()
+        snapshot = get_snapshot_cache(resume_path).snapshot()
+        # Up to MAX_ATS_BATCH descriptions take seconds; keep them off the event loop
+        results = await asyncio.to_thread(score_batch, job_descriptions, resume_terms(snapshot))
+        ranked = rank_scores(results, top, min_score, include_keywords)
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        return {
+            "profile_id": normalize_profile_id(profile_id),
+            "resume_etag": snapshot.etag,
+            "scored": len(results),
+            "duration_ms": duration_ms,
+            "results": ranked,
+            "message": f"Scored {len(results)} job descriptions in {duration_ms} ms; returning {len(ranked)}"
+        }
+    except Exception as e:
+        return {"error": f"Failed to score ATS batch: {str(e)}"}
+
+@mcp.tool
+async def build_resume(run_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build the resume PDF, reusing a cached PDF when the resume inputs are unchanged.
+    
+    Args:
+        run_id: Run to place final.pdf and build.log under (defaults to "manual")
+    
+    Returns:
+        Dictionary containing the build status and whether the build cache was hit
+    """
+    try:
+        result = await run_build(run_id or "manual")
+        cache = result["cache"] or "disabled"
+        return {**result, "message": f"Build {result['status']} (cache {cache}) in {result['duration_ms']} ms"}
+    except Exception as e:
+        return {"error": f"Failed to build resume: {str(e)}"}
+
+@mcp.tool
+async def get_llm_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit/miss statistics and size of the LLM response cache used by the pipeline roles.
+    
+    Returns:
+        Dictionary containing aggregated cache counters and entries per role
+    """
+    try:
+        stats = cache_stats()
+        return {**stats, "message": f"{stats['entries']} cached responses, hit rate {stats['hit_rate']}"}
+    except Exception as e:
+        return {"error": f"Failed to read LLM cache stats: {str(e)}"}
+
+@mcp.tool
+async def purge_llm_cache(role: Optional[str] = None, older_than_hours: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Purge cached LLM responses.
+    
+    Args:
+        role: Only purge responses for this role (reviewer, swot, refiner, judge, finalizer)
+        older_than_hours: Only purge responses not used for this many hours
+    
+    Returns:
+        Dictionary containing the number of removed entries
+    """
+    try:
+        result = purge_cache(role=role, older_than_hours=older_than_hours)
+        return {**result, "message": f"Purged {result['removed']} cached responses"}
+    except Exception as e:
+        return {"error": f"Failed to purge LLM cache: {str(e)}"}
+
+@mcp.tool
+async def get_metrics() -> Dict[str, Any]:
+    """
+    Export server metrics in the Prometheus text format: tool call counts, errors and
+    latency, bridge latency, per-role/provider LLM latency, build durations and run states.
+    The same text is served over HTTP at /metrics.
+    
+    Returns:
+        Dictionary containing the metrics text and its content type
+    """
+    return {
+        "content_type": metrics.CONTENT_TYPE,
+        "metrics": metrics.render()
+    }
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint (HTTP transports only)"""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 @mcp.tool
 async def check_health() -> Dict[str, Any]:
@@ -184,6 +614,13 @@ async def check_health() -> Dict[str, Any]:
         "timestamp": asyncio.get_event_loop().time()
     }
     
+    # Check run store
+    try:
+        health_status["runs_stored"] = runs_storage.count()
+        health_status["components"]["run_store"] = "available"
+    except Exception:
+        health_status["components"]["run_store"] = "unavailable"
+    
     # Check resume directory
     resume_path = Path(__file__).parent.parent / "resume"
     health_status["components"]["resume_directory"] = "available" if resume_path.exists() else "unavailable"
@@ -191,6 +628,7 @@ async def check_health() -> Dict[str, Any]:
     # Check includes directory
     includes_path = resume_path / "includes"
     health_status["components"]["includes_directory"] = "available" if includes_path.exists() else "unavailable"
+    health_status["resume_cache"] = snapshot_cache_stats()
     
     # Check if any components are unavailable
     if any(status == "unavailable" for status in health_status["components"].values()):
@@ -203,6 +641,13 @@ async def get_available_providers() -> Dict[str, Any]:
     """
     Get information about available LLM providers and their configuration.
     
+    Each provider also carries its live stats per model (samples, p50/p95 latency,
+    error and timeout rate, health) from the last 30 minutes of router calls, and
+    `auto_order` is the order in which the `auto` provider setting picks them.
+    `admission` shows each provider's admission queue: depth by priority
+    (interactive, batch, dry_run), calls in flight, p50/p95 queue wait of recent
+    calls, and how many were shed or hit a rate limit.
+    
     Returns:
         Dictionary containing provider information
     """
@@ -227,48 +672,137 @@ async def get_available_providers() -> Dict[str, Any]:
         }
     }
     
+    stats = provider_stats()
+    admission = admission_stats()
+    for provider_id, info in providers.items():
+        info["stats"] = stats.get(provider_id, {})
+        info["admission"] = admission.get(provider_id, {})
+    
     available_count = sum(1 for p in providers.values() if p["available"])
     
     return {
         "providers": providers,
         "available_count": available_count,
         "total_count": len(providers),
+        "auto_order": auto_order([pid for pid, p in providers.items() if p["available"]], stats),
         "message": f"{available_count}/{len(providers)} providers are configured and available"
     }
 
+@mcp.tool
+async def apply_diffs(
+    diffs: Optional[List[Dict[str, Any]]] = None,
+    run_id: Optional[str] = None,
+    dry_run: bool = True,
+    profile_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Apply Refiner diffs to the resume sources without the Node.js router.
+    
+    Diffs are grouped by target file, every anchor (line:N, regex:..., SECTION:NAME)
+    is resolved against the file as it is now, and each file is written once.
+    
+    Args:
+        diffs: Refiner diffs (target_file, patch_type, anchor, content, rationale)
+        run_id: Take the diffs from data/runs/<run_id>/refiner.json instead
+        dry_run: Only preview the changes (default); set to false to write the files
+        profile_id: Resume profile whose files the resume/... targets refer to
+    
+    Returns:
+        Dictionary containing per-diff previews and per-file applied/skipped diffs
+    """
+    try:
+        if diffs is None:
+            if not run_id:
+                return {"error": "Provide diffs or run_id"}
+            diffs = load_run_diffs(run_id)
+        
+        allowed = resolve_profile(profile_id)
+        result = await asyncio.to_thread(apply_refiner_diffs, diffs, dry_run, allowed=allowed)
+        verb = "Would apply" if dry_run else "Applied"
+        return {**result, "message": f"{verb} {result['applicable']}/{len(diffs)} diffs across {len(result['files'])} files"}
+    except Exception as e:
+        return {"error": f"Failed to apply diffs: {str(e)}"}
+
 @mcp.tool
 async def simulate_resume_optimization(
     job_description: str,
     dry_run: bool = True
 ) -> Dict[str, Any]:
     """
-    Simulate the multi-agent resume optimization process.
+    Simulate the multi-agent resume optimization process on the same stage graph as a
+    real run: independent stages overlap, and on REVISE the refiner runs again with the
+    judge's feedback. With SPECULATIVE_REFINER=1 a second refiner starts alongside the
+    judge, and is only kept for a REVISE without feedback, as in runStages.
     
     Args:
         job_description: The job description to optimize for
         dry_run: Whether to run in simulation mode
     
     Returns:
-        Dictionary containing the simulation results
+        Dictionary containing the simulation results and per-stage timings
     """
+    started = time.perf_counter()
     try:
-        # Simulate the multi-agent pipeline
-        steps = [
-            {"agent": "Reviewer", "action": "Analyzing resume against job description", "status": "completed"},
-            {"agent": "SWOT", "action": "Performing SWOT analysis", "status": "completed"},
-            {"agent": "Refiner", "action": "Generating optimization suggestions", "status": "completed"},
-            {"agent": "Judge", "action": "Evaluating suggestions quality", "status": "completed"},
-            {"agent": "Finalizer", "action": "Applying final changes", "status": "completed"}
-        ]
+        # Same stage graph as ResumeRunRouter.createRun, with simulated stage durations
+        rng = random.Random(hashlib.sha256(job_description.encode("utf-8")).hexdigest())
+        graph = StageGraph()
+        
+        def simulated(result: Any, low: float, high: float):
+            async def run(*_):
+                await asyncio.sleep(rng.uniform(low, high))
+                return result
+            return run
         
-        # Simulate processing time
-        await asyncio.sleep(1)
+        judge_verdict = "REVISE" if rng.random() < 0.4 else "PASS"
+        # A REVISE nearly always flags files or gives reasons for the revision to address
+        judge_feedback = judge_verdict == "REVISE" and rng.random() >= 0.05
+        speculative = os.getenv("SPECULATIVE_REFINER") == "1"
+        graph.stage("resume", [], simulated("resume", 0.01, 0.03))
+        graph.stage("templates", [], simulated("templates", 0.01, 0.02))
+        graph.stage("context", ["resume", "templates"], simulated("context", 0.0, 0.001))
+        if not dry_run:
+            graph.stage("warm_build", [], simulated("warm", 0.05, 0.15))
+        graph.stage("reviewer", ["context"], simulated("reviewer", 0.1, 0.2))
+        graph.stage("swot", ["context", "reviewer"], simulated("swot", 0.08, 0.15))
+        graph.stage("refiner", ["context", "reviewer", "swot"], simulated("refiner", 0.1, 0.2))
+        graph.stage("validate_anchors", ["refiner"], simulated("anchors", 0.005, 0.01))
+        judge = graph.stage("judge", ["context", "reviewer", "swot", "refiner"], simulated(judge_verdict, 0.08, 0.15))
+        if speculative:
+            graph.stage(
+                "refiner_2", ["context", "reviewer", "swot", "refiner"], simulated("refiner_2", 0.1, 0.2), speculative=True
+            )
         
+        verdict = await judge
+        if verdict == "PASS":
+            if speculative:
+                graph.discard("refiner_2")
+            final_deps = ["validate_anchors"]
+        else:
+            # The speculative revision never saw the verdict; with feedback, revise again after the judge
+            if speculative and not judge_feedback:
+                revised = "refiner_2"
+            else:
+                if speculative:
+                    graph.discard("refiner_2")
+                revised = "refiner_revise"
+                graph.stage(revised, ["judge"], simulated("refiner_revise", 0.1, 0.2))
+            graph.stage("judge_2", [revised], simulated("PASS", 0.08, 0.15))
+            graph.stage("validate_anchors_2", [revised], simulated("anchors", 0.005, 0.01))
+            final_deps = ["judge_2", "validate_anchors_2"]
+        if not dry_run:
+            final_deps.append("warm_build")
+        await graph.stage("finalizer", final_deps, simulated("finalizer", 0.05, 0.1))
+        
+        wall_ms = round((time.perf_counter() - started) * 1000, 1)
         return {
             "simulation": True,
             "dry_run": dry_run,
             "job_description": job_description,
-            "steps": steps,
+            "judge": verdict,
+            "judge_feedback": judge_feedback,
+            "stages": graph.timings,
+            "wall_clock_ms": wall_ms,
+            "sequential_ms": graph.sequential_ms(),
             "result": "Resume optimization simulation completed successfully",
             "message": "This is a simulation. In production, this would call the actual multi-agent pipeline."
         }
@@ -276,16 +810,30 @@ async def simulate_resume_optimization(
         return {"error": f"Simulation failed: {str(e)}"}
 
 if __name__ == "__main__":
+    import serve
+    
     print("🚀 Starting AI Resume Orchestrator FastMCP Server...")
     print("📊 Available tools:")
     print("  - list_runs: List all resume optimization runs")
     print("  - get_run: Get detailed run information")
     print("  - create_run: Start new optimization pipeline")
+    print("  - create_runs_batch / get_batch: Fan out many job descriptions")
+    print("  - find_similar_runs: Past runs with a near-duplicate job description")
     print("  - get_resume_info: Get current resume structure")
+    print("  - get_resume_outline / get_resume_section: Section and entry keys, or one section by key")
+    print("  - score_ats_coverage / score_ats_batch: Local ATS keyword coverage, one or many job descriptions")
+    print("  - build_resume: Build the PDF (cached by input hash)")
     print("  - check_health: Check system health")
+    print("  - get_metrics: Prometheus metrics (also served at /metrics over HTTP)")
+    print("  - get_llm_cache_stats / purge_llm_cache: Inspect or clear the LLM response cache")
     print("  - get_available_providers: List configured LLM providers")
+    print("  - apply_diffs: Preview or apply Refiner diffs to the resume")
     print("  - simulate_resume_optimization: Simulate the optimization process")
     print()
     
-    # Run the MCP server
-    mcp.run()
+    args = serve.build_parser("server-direct").parse_args()
+    if args.transport == "stdio":
+        mcp.run()
+    else:
+        # Streamable HTTP or SSE under uvicorn, see serve.py
+        serve.serve(args)
@@ -9,49 +9,159 @@ import json
 import os
 import sys
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 import subprocess
+import time
+import uuid
 
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+import metrics
+from ats_engine import ATS_PREFILL, MAX_ATS_BATCH, rank_scores, resume_terms, score_batch, score_job_description
+from builds import RUN_ID_PATTERN, run_build
+from jd_similarity import JD_REUSE, JD_REUSE_THRESHOLD, SimilarityIndex, signature
+from job_queue import (
+    DEFAULT_BATCH_CONCURRENCY, MAX_BATCH_SIZE, RunBatch, RunJobQueue,
+    aggregate_batch, read_run_stream, read_run_summary, run_locked, summarize_progress
+)
+from llm_cache import cache_stats, purge_cache
+from profiles import ProfileNotFound, normalize_profile_id, resolve_profile
+from provider_stats import admission_stats, auto_order, provider_stats
+from resume_index import ResumeStructure
+from resume_snapshot import build_resume_info, get_snapshot_cache, snapshot_cache_stats
+from run_store import JobStore
 
 # Add the parent directory to the path to import our agents
 sys.path.append(str(Path(__file__).parent.parent))
 
-# Import our existing router and schemas
+# The ResumeRunRouter lives in TypeScript; reach it through the Node.js worker bridge
 try:
-    from agents.router import ResumeRunRouter
-    from agents.schemas import runConfigSchema
+    from bridge import NodeJSRouter
 except ImportError as e:
-    print(f"Warning: Could not import agents: {e}")
+    print(f"Warning: Could not import Node.js bridge: {e}")
     print("Make sure to run: cd orchestrator && npm install")
-    ResumeRunRouter = None
-    runConfigSchema = None
+    NodeJSRouter = None
 
 # Initialize FastMCP server
 mcp = FastMCP("AI Resume Orchestrator")
+mcp.add_middleware(metrics.ToolMetricsMiddleware())
+
+RUNS_ROOT = Path(__file__).parent.parent / "data" / "runs"
+
+# watch_run re-reads the run's stream.jsonl this often (seconds)
+WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "0.25"))
+MAX_WATCH_SECONDS = 3600
+FINISHED_STATUSES = ("completed", "needs_review", "failed")
+
+DEFAULT_PROVIDERS = {
+    "reviewer": "claude",
+    "swot": "claude",
+    "refiner": "claude",
+    "judge": "claude",
+    "finalizer": "claude"
+}
 
 # Global router instance
 router = None
 
+async def _execute_run(run_id: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Job queue runner: drive the whole pipeline through the Node.js bridge"""
+    await initialize_router()
+    if not router:
+        raise RuntimeError("ResumeRunRouter not available. Please check the setup.")
+    summary = await router.execute_run(run_id, config)
+    metrics.observe_run_summary(summary)
+    return summary
+
+async def _resume_run(run_id: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Job queue runner for resume_run: continue the pipeline from its first unfinished stage"""
+    await initialize_router()
+    if not router:
+        raise RuntimeError("ResumeRunRouter not available. Please check the setup.")
+    summary = await router.resume_run(run_id)
+    metrics.observe_run_summary(summary)
+    return summary
+
+# Queue jobs and batches, shared by every serve.py worker process
+job_store = JobStore()
+
+# Pipelines run in the background; RUN_CONCURRENCY bounds how many at once (per worker process)
+run_queue = RunJobQueue(_execute_run, store=job_store)
+# run_queue only holds the jobs of this worker, so the gauge is summed over workers
+metrics.track_run_states(lambda: {state: count for state, count in run_queue.stats().items() if state != "concurrency"}, per_worker=True)
+
+# Batches submitted through create_runs_batch in this process, by batch id
+batches: Dict[str, RunBatch] = {}
+
+# Fire-and-forget work (batches, index updates) that drain() waits for
+background_tasks: Set[asyncio.Task] = set()
+
+def _in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+_similar_runs: Optional[SimilarityIndex] = None
+
+
+def similar_runs() -> SimilarityIndex:
+    """
+    Job descriptions of past runs, for near-duplicate reuse and find_similar_runs
+    Opened on first use rather than at import, so loading the module touches no database
+    """
+    global _similar_runs
+    if _similar_runs is None:
+        _similar_runs = SimilarityIndex()
+    return _similar_runs
+
+def _run_status(run_id: str) -> Optional[str]:
+    """Status from the run's summary or its queue job; None when the run no longer exists"""
+    summary = read_run_summary(RUNS_ROOT, run_id)
+    if summary:
+        return summary.get("status")
+    job = run_queue.get(run_id)
+    if job:
+        return "failed" if job.status == "failed" else "pending"
+    return None
+
+async def drain(timeout: float):
+    """
+    Graceful shutdown (called by serve.py): stop taking runs, give queued and
+    running pipelines and background batches up to timeout seconds to finish,
+    then stop the Node.js workers. Runs cut short can be restarted with resume_run.
+    """
+    waiting = [asyncio.create_task(run_queue.drain(timeout)), *background_tasks]
+    await asyncio.wait(waiting, timeout=timeout)
+    if router:
+        await router.close()
+
 async def initialize_router():
-    """Initialize the ResumeRunRouter"""
+    """Initialize the Node.js router bridge"""
     global router
-    if ResumeRunRouter and not router:
+    if NodeJSRouter and not router:
         try:
-            router = ResumeRunRouter()
-            print("✅ ResumeRunRouter initialized successfully")
+            router = NodeJSRouter(str(Path(__file__).parent.parent / "orchestrator"))
+            print("✅ ResumeRunRouter bridge initialized successfully")
         except Exception as e:
-            print(f"❌ Failed to initialize ResumeRunRouter: {e}")
+            print(f"❌ Failed to initialize ResumeRunRouter bridge: {e}")
             router = None
 
 @mcp.tool
-async def list_runs(status: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+async def list_runs(
+    status: Optional[str] = None,
+    limit: Optional[int] = None,
+    profile_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
     List stored resume automation runs. Optionally filter by status or limit the number returned.
     
     Args:
         status: Filter runs by status (pending, running, needs_review, failed, completed)
         limit: Limit the number of runs returned (1-100)
+        profile_id: Only list runs for this resume profile
     
     Returns:
         Dictionary containing the list of runs
@@ -62,14 +172,12 @@ async def list_runs(status: Optional[str] = None, limit: Optional[int] = None) -
         return {"error": "ResumeRunRouter not available. Please check the setup."}
     
     try:
-        runs = await router.listRuns()
-        
-        # Apply filters
-        if status:
-            runs = [run for run in runs if run.get('status') == status]
-        
-        if limit:
-            runs = runs[:limit]
+        # Status, profile and limit are applied by the router's run index
+        runs = await router.list_runs(
+            status=status,
+            limit=limit,
+            profile_id=normalize_profile_id(profile_id) if profile_id else None
+        )
         
         return {
             "runs": runs,
@@ -82,25 +190,41 @@ async def list_runs(status: Optional[str] = None, limit: Optional[int] = None) -
 @mcp.tool
 async def get_run(run_id: str) -> Dict[str, Any]:
     """
-    Retrieve a specific run summary by its identifier.
+    Retrieve a specific run summary by its identifier, including per-role progress.
     
     Args:
         run_id: The unique identifier of the run
     
     Returns:
-        Dictionary containing the run details
+        Dictionary containing the run details and progress
     """
-    await initialize_router()
-    
-    if not router:
-        return {"error": "ResumeRunRouter not available. Please check the setup."}
-    
     try:
-        run = await router.getRun(run_id)
-        return {
+        if not RUN_ID_PATTERN.match(run_id):
+            return {"error": f"Invalid run id {run_id}"}
+        # Reading the summary snapshot and journal directly keeps polling cheap while pipelines run
+        run = read_run_summary(RUNS_ROOT, run_id)
+        job = run_queue.get(run_id)
+        
+        if not run and not job:
+            return {"error": f"Run {run_id} not found"}
+        
+        if not run:
+            # Queued, the router has not written its initial state yet
+            run = {
+                "id": run_id,
+                "status": "failed" if job.status == "failed" else "pending",
+                "config": job.config,
+                "artifacts": [{"role": role, "status": "pending"} for role in summarize_progress(None)["roles"]]
+            }
+        
+        response = {
             "run": run,
+            "progress": summarize_progress(run),
             "message": f"Retrieved run {run_id}"
         }
+        if job:
+            response["job"] = job.to_dict()
+        return response
     except Exception as e:
         return {"error": f"Failed to get run {run_id}: {str(e)}"}
 
@@ -108,18 +232,26 @@ async def get_run(run_id: str) -> Dict[str, Any]:
 async def create_run(
     job_description: str,
     dry_run: bool = False,
-    providers: Optional[Dict[str, str]] = None
+    providers: Optional[Dict[str, str]] = None,
+    profile_id: Optional[str] = None,
+    reuse: bool = True
 ) -> Dict[str, Any]:
     """
     Kick off a new resume automation run using the supplied configuration.
+    The pipeline runs in the background; poll get_run with the returned run_id for progress, or
+    call watch_run to receive role results and partial outputs as progress notifications.
+    When an earlier run of the same resume, dry-run mode and providers had a near-identical
+    job description, that run is returned instead (reused=true) and no pipeline is started.
     
     Args:
         job_description: The job description to optimize the resume for
         dry_run: Whether to run in dry-run mode (no actual changes)
-        providers: Dictionary mapping roles to LLM providers (groq, claude, gemini)
+        providers: Dictionary mapping roles to LLM providers (groq, claude, gemini, or auto)
+        profile_id: Resume profile to optimize (default: the repository's resume/)
+        reuse: Return a near-duplicate earlier run instead of starting a new one
     
     Returns:
-        Dictionary containing the run ID and summary
+        Dictionary containing the run ID and queue status, or the reused run and its artifacts
     """
     await initialize_router()
     
@@ -128,72 +260,609 @@ async def create_run(
     
     # Default providers if not provided
     if not providers:
-        providers = {
-            "reviewer": "claude",
-            "swot": "claude", 
-            "refiner": "claude",
-            "judge": "claude",
-            "finalizer": "claude"
-        }
+        providers = dict(DEFAULT_PROVIDERS)
     
     try:
+        resume_path = resolve_profile(profile_id)
+        profile = normalize_profile_id(profile_id)
+        snapshot = get_snapshot_cache(resume_path).snapshot()
+        sig = await asyncio.to_thread(signature, job_description)
+        if reuse and JD_REUSE:
+            matches = similar_runs().query(
+                job_description, JD_REUSE_THRESHOLD, 5, profile, snapshot.etag, dry_run, providers, sig=sig
+            )
+            for match in matches:
+                status = _run_status(match["run_id"])
+                if status and status != "failed":
+                    summary = read_run_summary(RUNS_ROOT, match["run_id"])
+                    return {
+                        "run_id": match["run_id"],
+                        "reused": True,
+                        "similarity": match["similarity"],
+                        "run_status": status,
+                        "artifacts": (summary or {}).get("artifacts", []),
+                        "message": (
+                            f"Reused run {match['run_id']} ({match['similarity']:.0%} similar job description, same resume). "
+                            "Pass reuse=false to start a new run."
+                        ),
+                        "status": "reused"
+                    }
+        
         config = {
             "jobDescription": job_description,
             "dryRun": dry_run,
-            "providers": providers
+            "providers": providers,
+            "profileId": profile
         }
+        if ATS_PREFILL:
+            # Local keyword coverage the Reviewer prompt starts from
+            config["ats"] = score_job_description(job_description, resume_terms(snapshot))
         
-        summary = await router.createRun(config)
+        run_id = str(uuid.uuid4())
+        job = run_queue.submit(run_id, config)
+        similar_runs().add(run_id, job_description, profile, snapshot.etag, dry_run, providers, sig=sig)
         
         return {
-            "run_id": summary.id,
-            "summary": summary,
-            "message": f"Created new resume run: {summary.id}",
-            "status": "success"
+            "run_id": run_id,
+            "reused": False,
+            "job": job.to_dict(),
+            "queue": run_queue.stats(),
+            "message": f"Queued new resume run: {run_id}. Poll get_run for progress.",
+            "status": "queued"
         }
     except Exception as e:
         return {"error": f"Failed to create run: {str(e)}"}
 
 @mcp.tool
-async def get_resume_info() -> Dict[str, Any]:
+async def watch_run(run_id: str, ctx: Context, timeout_s: float = 300) -> Dict[str, Any]:
+    """
+    Follow a run live until it finishes. Every role state change and every partial role output
+    (a reviewer keyword, a SWOT item, a refiner diff, ...) is sent as an MCP progress
+    notification as soon as the streaming LLM completion produces it; the notification message
+    is the event as JSON. Send a progress token with the call to receive them.
+    
+    Args:
+        run_id: The identifier of the run to follow
+        timeout_s: Stop following after this many seconds (at most 3600)
+    
+    Returns:
+        Dictionary containing the run as it ended (or stood at the timeout) and the number of events sent
+    """
+    try:
+        if not RUN_ID_PATTERN.match(run_id):
+            return {"error": f"Invalid run id {run_id}"}
+        if _run_status(run_id) is None:
+            return {"error": f"Run {run_id} not found"}
+        
+        deadline = time.monotonic() + min(max(timeout_s, 0), MAX_WATCH_SECONDS)
+        offset, sent, finished, settling = 0, 0, False, False
+        while not finished:
+            # Streams from every serve.py worker and router process land in the same file
+            events, offset = await asyncio.to_thread(read_run_stream, RUNS_ROOT, run_id, offset)
+            for event in events:
+                sent += 1
+                message = {key: value for key, value in event.items() if key not in ("runId", "at")}
+                await ctx.report_progress(progress=event.get("seq", sent), message=json.dumps(message))
+                if event.get("type") == "state":
+                    # A resumed run's stream holds the earlier attempt's final state; only the
+                    # latest attempt ends the watch, so a later "running" state resets it
+                    finished = event.get("status") in FINISHED_STATUSES
+            if finished or time.monotonic() >= deadline:
+                break
+            if _run_status(run_id) in FINISHED_STATUSES:
+                # The summary can land just before the last stream events; read once more
+                if settling and not events:
+                    finished = True
+                    break
+                settling = True
+            await asyncio.sleep(WATCH_POLL_INTERVAL)
+        
+        run = read_run_summary(RUNS_ROOT, run_id)
+        return {
+            "run_id": run_id,
+            "run": run,
+            "progress": summarize_progress(run),
+            "events": sent,
+            "finished": finished,
+            "message": f"Run {run_id} {'finished' if finished else 'still running'} after {sent} events"
+        }
+    except Exception as e:
+        return {"error": f"Failed to watch run {run_id}: {str(e)}"}
+
+@mcp.tool
+async def resume_run(run_id: str) -> Dict[str, Any]:
+    """
+    Restart a failed or interrupted run at the first stage that did not complete. Stages that
+    finished (reviewer, swot, ...) are not called again; their stored outputs are reused.
+    
+    Args:
+        run_id: The identifier of the failed or interrupted run
+    
+    Returns:
+        Dictionary containing the queued job and the roles whose outputs are reused
+    """
+    try:
+        if not RUN_ID_PATTERN.match(run_id):
+            return {"error": f"Invalid run id {run_id}"}
+        job = run_queue.get(run_id)
+        if job and not job.done:
+            return {"error": f"Run {run_id} is still {job.status}"}
+        if run_locked(RUNS_ROOT, run_id):
+            # Started outside this server's queue (another process or the orchestrator server)
+            return {"error": f"Run {run_id} is still running"}
+        summary = read_run_summary(RUNS_ROOT, run_id)
+        if not summary and job and job.config:
+            # Cut short while still queued (e.g. by a drain): nothing to reuse, start it over
+            job = run_queue.submit(run_id, job.config)
+            return {
+                "run_id": run_id,
+                "reused_roles": [],
+                "job": job.to_dict(),
+                "queue": run_queue.stats(),
+                "message": f"Run {run_id} never started; queued it again. Poll get_run for progress.",
+                "status": "queued"
+            }
+        if not summary:
+            return {"error": f"Run {run_id} not found"}
+        if summary.get("status") in ("completed", "needs_review"):
+            return {"error": f"Run {run_id} already finished ({summary['status']})"}
+        
+        reused = [
+            artifact["role"] for artifact in summary.get("artifacts", [])
+            if artifact.get("status") == "succeeded" and artifact.get("role") != "finalizer"
+        ]
+        job = run_queue.submit(run_id, summary.get("config") or {}, runner=_resume_run)
+        return {
+            "run_id": run_id,
+            "reused_roles": reused,
+            "job": job.to_dict(),
+            "queue": run_queue.stats(),
+            "message": f"Queued resume of run {run_id} reusing {len(reused)} completed roles. Poll get_run for progress.",
+            "status": "queued"
+        }
+    except Exception as e:
+        return {"error": f"Failed to resume run {run_id}: {str(e)}"}
+
+@mcp.tool
+async def create_runs_batch(
+    job_descriptions: List[str],
+    dry_run: bool = False,
+    providers: Optional[Dict[str, str]] = None,
+    concurrency: Optional[int] = None,
+    profile_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Kick off one resume automation run per job description with shared provider settings.
+    The runs go through the same queue as create_run, behind interactive runs, with at most
+    `concurrency` of this batch queued or running at once.
+    
+    Args:
+        job_descriptions: The job descriptions to optimize the resume for (up to 500)
+        dry_run: Whether to run in dry-run mode (no actual changes)
+        providers: Dictionary mapping roles to LLM providers (groq, claude, gemini, or auto)
+        concurrency: Maximum pipelines in flight for this batch
+        profile_id: Resume profile every run in the batch optimizes
+    
+    Returns:
+        Dictionary containing the batch ID and the run ID of every item
+    """
+    await initialize_router()
+    
+    if not router:
+        return {"error": "ResumeRunRouter not available. Please check the setup."}
+    
+    if not job_descriptions:
+        return {"error": "job_descriptions must not be empty"}
+    if len(job_descriptions) > MAX_BATCH_SIZE:
+        return {"error": f"A batch holds at most {MAX_BATCH_SIZE} job descriptions"}
+    if run_queue.draining:
+        return {"error": "Server is shutting down, not accepting new runs"}
+    
+    try:
+        resume_path = resolve_profile(profile_id)
+        shared_providers = providers or dict(DEFAULT_PROVIDERS)
+        profile = normalize_profile_id(profile_id)
+        snapshot = get_snapshot_cache(resume_path).snapshot()
+        terms = resume_terms(snapshot) if ATS_PREFILL else None
+        items = [
+            {
+                "runId": str(uuid.uuid4()),
+                "config": {
+                    "jobDescription": jd,
+                    "dryRun": dry_run,
+                    "providers": shared_providers,
+                    "profileId": profile,
+                    "priority": "batch",
+                    **({"ats": score_job_description(jd, terms)} if terms else {})
+                }
+            }
+            for jd in job_descriptions
+        ]
+        batch = RunBatch(
+            batch_id=str(uuid.uuid4()),
+            run_ids=[item["runId"] for item in items],
+            concurrency=max(1, concurrency or DEFAULT_BATCH_CONCURRENCY)
+        )
+        batches[batch.batch_id] = batch
+        job_store.put_batch(batch.to_record())
+        batch.task = _in_background(run_queue.run_batch(batch, items))
+        # Index the batch for later near-duplicate lookups without holding up the response
+        _in_background(asyncio.to_thread(
+            similar_runs().add_many,
+            [
+                (item["runId"], item["config"]["jobDescription"], profile, snapshot.etag, dry_run, shared_providers)
+                for item in items
+            ]
+        ))
+        
+        return {
+            **batch.to_dict(),
+            "run_ids": batch.run_ids,
+            "message": f"Queued batch {batch.batch_id} with {len(items)} runs. Poll get_batch for progress.",
+            "status": "queued"
+        }
+    except Exception as e:
+        return {"error": f"Failed to create batch: {str(e)}"}
+
+@mcp.tool
+async def find_similar_runs(
+    job_description: str,
+    profile_id: Optional[str] = None,
+    threshold: float = 0.5,
+    limit: int = 10,
+    same_resume: bool = False
+) -> Dict[str, Any]:
+    """
+    Find past runs whose job description is a near duplicate of this one (MinHash estimate of
+    word-shingle Jaccard similarity).
+    
+    Args:
+        job_description: The job description to look up
+        profile_id: Only consider runs of this resume profile
+        threshold: Minimum similarity, 0-1 (below ~0.5 some matches may be missed)
+        limit: Maximum number of runs to return
+        same_resume: Only consider runs made against the profile's current resume snapshot
+    
+    Returns:
+        Dictionary containing the matching runs, most similar first, with their status
+    """
+    try:
+        profile = normalize_profile_id(profile_id) if profile_id or same_resume else None
+        etag = get_snapshot_cache(resolve_profile(profile)).snapshot().etag if same_resume else None
+        matches = await asyncio.to_thread(similar_runs().query, job_description, threshold, limit, profile, etag)
+        runs = [{**match, "status": _run_status(match["run_id"])} for match in matches]
+        return {
+            "matches": runs,
+            "indexed": similar_runs().count(),
+            "message": f"Found {len(runs)} runs with similarity >= {threshold}"
+        }
+    except Exception as e:
+        return {"error": f"Failed to find similar runs: {str(e)}"}
+
+@mcp.tool
+async def get_batch(batch_id: str) -> Dict[str, Any]:
+    """
+    Report aggregate progress and per-item results for a batch created by create_runs_batch.
+    
+    Args:
+        batch_id: The identifier returned by create_runs_batch
+    
+    Returns:
+        Dictionary containing status counts and one entry per run
+    """
+    batch = batches.get(batch_id)
+    if not batch:
+        # Submitted through another worker process
+        record = job_store.get_batch(batch_id)
+        batch = RunBatch.from_record(record) if record else None
+    if not batch:
+        return {"error": f"Batch {batch_id} not found"}
+    
+    try:
+        summaries = {run_id: read_run_summary(RUNS_ROOT, run_id) for run_id in batch.run_ids}
+        # A run that failed before the router wrote its summary is only known to its job
+        jobs = {run_id: run_queue.get(run_id) for run_id, summary in summaries.items() if not summary}
+        return {
+            **batch.to_dict(),
+            **aggregate_batch(batch.run_ids, summaries, jobs),
+            "message": f"Retrieved batch {batch_id}"
+        }
+    except Exception as e:
+        return {"error": f"Failed to get batch {batch_id}: {str(e)}"}
+
+@mcp.tool
+async def get_resume_info(
+    known_hashes: Optional[Dict[str, str]] = None,
+    if_none_match: Optional[str] = None,
+    profile_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Get information about the current resume structure and available sections.
     
+    Args:
+        known_hashes: Section hashes (from section_hashes) the client already holds;
+            only sections whose hash differs are returned with content
+        if_none_match: Snapshot etag from a previous call; when it still matches,
+            no section content is returned
+        profile_id: Resume profile to describe (default: the repository's resume/)
+    
     Returns:
         Dictionary containing resume information
     """
     try:
-        resume_path = Path(__file__).parent.parent / "resume"
+        try:
+            resume_path = resolve_profile(profile_id)
+        except ProfileNotFound as e:
+            return {"error": str(e)}
         
-        if not resume_path.exists():
-            return {"error": "Resume directory not found"}
+        snapshot = get_snapshot_cache(resume_path).snapshot()
+        return {"profile_id": normalize_profile_id(profile_id), **build_resume_info(snapshot, known_hashes, if_none_match)}
+    except Exception as e:
+        return {"error": f"Failed to get resume info: {str(e)}"}
+
+@mcp.tool
+async def get_resume_outline(profile_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    List the resume's sections and their entries (keys, titles and line ranges) without any text.
+    
+    Args:
+        profile_id: Resume profile to describe (default: the repository's resume/)
+    
+    Returns:
+        Dictionary containing one item per section with its entries and bullet counts
+    """
+    try:
+        try:
+            resume_path = resolve_profile(profile_id)
+        except ProfileNotFound as e:
+            return {"error": str(e)}
         
-        # Get main resume file
-        main_file = resume_path / "cv.tex"
-        if main_file.exists():
-            with open(main_file, 'r', encoding='utf-8') as f:
-                main_content = f.read()
-        else:
-            main_content = None
+        snapshot = get_snapshot_cache(resume_path).snapshot()
+        sections = ResumeStructure(snapshot).outline()
+        return {
+            "profile_id": normalize_profile_id(profile_id),
+            "etag": snapshot.etag,
+            "sections": sections,
+            "message": f"Resume has {len(sections)} sections"
+        }
+    except Exception as e:
+        return {"error": f"Failed to get resume outline: {str(e)}"}
+
+@mcp.tool
+async def get_resume_section(
+    key: str,
+    profile_id: Optional[str] = None,
+    if_none_match: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Fetch one section, entry or bullet of the resume by its key, with its LaTeX and line range.
+    
+    Args:
+        key: Key from get_resume_outline, e.g. EXPERIENCE, EXPERIENCE/<entry> or EXPERIENCE/<entry>/<n>
+        profile_id: Resume profile to read (default: the repository's resume/)
+        if_none_match: Hash from a previous call; when it still matches, no text is returned
+    
+    Returns:
+        Dictionary containing the section or entry, its hash and the keys of its children
+    """
+    try:
+        try:
+            resume_path = resolve_profile(profile_id)
+        except ProfileNotFound as e:
+            return {"error": str(e)}
         
-        # Get includes directory
-        includes_path = resume_path / "includes"
-        sections = {}
-        if includes_path.exists():
-            for section_file in includes_path.glob("*.tex"):
-                with open(section_file, 'r', encoding='utf-8') as f:
-                    sections[section_file.name] = f.read()
+        node = ResumeStructure(get_snapshot_cache(resume_path).snapshot()).lookup(key)
+        if not node:
+            return {"error": f"No section or entry with key {key}"}
+        if if_none_match and if_none_match == node["hash"]:
+            node.pop("text")
+            return {**node, "not_modified": True, "message": f"{node['key']} unchanged since the supplied hash"}
+        return {**node, "not_modified": False, "message": f"Retrieved {node['kind']} {node['key']}"}
+    except Exception as e:
+        return {"error": f"Failed to get resume section {key}: {str(e)}"}
+
+@mcp.tool
+async def score_ats_coverage(job_description: str, profile_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Score the resume against a job description locally: ATS keywords, must-have and
+    nice-to-have coverage, and which keywords the resume is missing. No LLM call.
+    
+    Args:
+        job_description: The job description to score
+        profile_id: Resume profile to score (default: the repository's resume/)
+    
+    Returns:
+        Dictionary containing ats_keywords, coverage, matched/missing keywords and a weighted score
+    """
+    try:
+        try:
+            resume_path = resolve_profile(profile_id)
+        except ProfileNotFound as e:
+            return {"error": str(e)}
         
+        snapshot = get_snapshot_cache(resume_path).snapshot()
+        result = score_job_description(job_description, resume_terms(snapshot))
+        coverage = result["coverage"]
         return {
-            "resume_path": str(resume_path),
-            "main_file": str(main_file) if main_file.exists() else None,
-            "sections": list(sections.keys()),
-            "sections_content": sections,
-            "main_content": main_content,
-            "message": "Resume information retrieved successfully"
+            "profile_id": normalize_profile_id(profile_id),
+            "resume_etag": snapshot.etag,
+            **result,
+            "message": f"Must-have coverage {coverage['must_have_pct']}%, nice-to-have {coverage['nice_to_have_pct']}%"
         }
     except Exception as e:
-        return {"error": f"Failed to get resume info: {str(e)}"}
+        return {"error": f"Failed to score ATS coverage: {str(e)}"}
+
+@mcp.tool
+async def score_ats_batch(
+    job_descriptions: List[str],
+    profile_id: Optional[str] = None,
+    top: Optional[int] = None,
+    min_score: float = 0.0,
+    include_keywords: bool = False
+) -> Dict[str, Any]:
+    """
+    Score one resume against many job descriptions locally and rank them, to triage
+    which ones are worth a full pipeline run.
+    
+    Args:
+        job_descriptions: The job descriptions to score (up to 10000)
+        profile_id: Resume profile to score (default: the repository's resume/)
+        top: Only return the best N job descriptions
+        min_score: Only return job descriptions scoring at least this (0-100)
+        include_keywords: Return every keyword list, not just the missing must-haves
+    
+    Returns:
+        Dictionary containing the ranked results, each with its index in job_descriptions
+    """
+    if not job_descriptions:
+        return {"error": "job_descriptions must not be empty"}
+    if len(job_descriptions) > MAX_ATS_BATCH:
+        return {"error": f"A batch holds at most {MAX_ATS_BATCH} job descriptions"}
+    
+    try:
+        try:
+            resume_path = resolve_profile(profile_id)
+        except ProfileNotFound as e:
+            return {"error": str(e)}
+        
+        started = time.perf_counter()
+        snapshot = get_snapshot_cache(resume_path).snapshot()
+        # Up to MAX_ATS_BATCH descriptions take seconds; keep them off the event loop
+        results = await asyncio.to_thread(score_batch, job_descriptions, resume_terms(snapshot))
+        ranked = rank_scores(results, top, min_score, include_keywords)
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        return {
+            "profile_id": normalize_profile_id(profile_id),
+            "resume_etag": snapshot.etag,
+            "scored": len(results),
+            "duration_ms": duration_ms,
+            "results": ranked,
+            "message": f"Scored {len(results)} job descriptions in {duration_ms} ms; returning {len(ranked)}"
+        }
+    except Exception as e:
+        return {"error": f"Failed to score ATS batch: {str(e)}"}
+
+@mcp.tool
+async def build_resume(run_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build the resume PDF, reusing a cached PDF when the resume inputs are unchanged.
+    
+    Args:
+        run_id: Run to place final.pdf and build.log under (defaults to "manual")
+    
+    Returns:
+        Dictionary containing the build status and whether the build cache was hit
+    """
+    try:
+        result = await run_build(run_id or "manual")
+        cache = result["cache"] or "disabled"
+        return {**result, "message": f"Build {result['status']} (cache {cache}) in {result['duration_ms']} ms"}
+    except Exception as e:
+        return {"error": f"Failed to build resume: {str(e)}"}
+
+@mcp.tool
+async def get_llm_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit/miss statistics and size of the LLM response cache used by the pipeline roles.
+    
+    Returns:
+        Dictionary containing aggregated cache counters and entries per role
+    """
+    try:
+        stats = cache_stats()
+        return {**stats, "message": f"{stats['entries']} cached responses, hit rate {stats['hit_rate']}"}
+    except Exception as e:
+        return {"error": f"Failed to read LLM cache stats: {str(e)}"}
+
+@mcp.tool
+async def purge_llm_cache(role: Optional[str] = None, older_than_hours: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Purge cached LLM responses.
+    
+    Args:
+        role: Only purge responses for this role (reviewer, swot, refiner, judge, finalizer)
+        older_than_hours: Only purge responses not used for this many hours
+    
+    Returns:
+        Dictionary containing the number of removed entries
+    """
+    try:
+        result = purge_cache(role=role, older_than_hours=older_than_hours)
+        return {**result, "message": f"Purged {result['removed']} cached responses"}
+    except Exception as e:
+        return {"error": f"Failed to purge LLM cache: {str(e)}"}
+
+@mcp.tool
+async def preview_prompt(
+    role: str,
+    job_description: Optional[str] = None,
+    run_id: Optional[str] = None,
+    include_text: bool = True,
+    profile_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Preview the compacted prompt a pipeline role would be sent and its estimated token count.
+    
+    Args:
+        role: Pipeline role (reviewer, swot, refiner, judge, finalizer)
+        job_description: Job description to build the prompt for
+        run_id: Take the job description and upstream role outputs from an existing run
+        include_text: Return the system and user prompt text, not just the token counts
+        profile_id: Resume profile to build the prompt from (default: the run's profile)
+    
+    Returns:
+        Dictionary containing the prompt, its token estimate and what compaction dropped
+    """
+    if not job_description and not run_id:
+        return {"error": "Provide job_description or run_id"}
+    
+    await initialize_router()
+    
+    if not router:
+        return {"error": "ResumeRunRouter not available. Please check the setup."}
+    
+    try:
+        request = {
+            "role": role,
+            "jobDescription": job_description,
+            "runId": run_id,
+            "profileId": normalize_profile_id(profile_id) if profile_id else None
+        }
+        if ATS_PREFILL and job_description and role == "reviewer":
+            snapshot = get_snapshot_cache(resolve_profile(profile_id)).snapshot()
+            request["ats"] = score_job_description(job_description, resume_terms(snapshot))
+        preview = await router.preview_prompt({key: value for key, value in request.items() if value is not None})
+        if not include_text:
+            preview.pop("system", None)
+            preview.pop("user", None)
+        compaction = preview.get("compaction")
+        if compaction:
+            message = f"{role} prompt: ~{compaction['tokens']} tokens (budget {compaction['budget']}, uncompacted ~{compaction['fullTokens']})"
+        else:
+            message = f"{role} prompt: ~{preview['tokens']} tokens (compaction disabled)"
+        return {**preview, "message": message}
+    except Exception as e:
+        return {"error": f"Failed to preview {role} prompt: {str(e)}"}
+
+@mcp.tool
+async def get_metrics() -> Dict[str, Any]:
+    """
+    Export server metrics in the Prometheus text format: tool call counts, errors and
+    latency, bridge latency, per-role/provider LLM latency, build durations and run states.
+    The same text is served over HTTP at /metrics.
+    
+    Returns:
+        Dictionary containing the metrics text and its content type
+    """
+    return {
+        "content_type": metrics.CONTENT_TYPE,
+        "metrics": metrics.render()
+    }
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint (HTTP transports only)"""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 @mcp.tool
 async def check_health() -> Dict[str, Any]:
@@ -212,6 +881,9 @@ async def check_health() -> Dict[str, Any]:
     # Check if router is available
     await initialize_router()
     health_status["components"]["router"] = "available" if router else "unavailable"
+    if router:
+        health_status["router_workers"] = router.stats()
+    health_status["run_queue"] = run_queue.stats()
     
     # Check resume directory
     resume_path = Path(__file__).parent.parent / "resume"
@@ -220,6 +892,7 @@ async def check_health() -> Dict[str, Any]:
     # Check includes directory
     includes_path = resume_path / "includes"
     health_status["components"]["includes_directory"] = "available" if includes_path.exists() else "unavailable"
+    health_status["resume_cache"] = snapshot_cache_stats()
     
     # Check if any components are unavailable
     if any(status == "unavailable" for status in health_status["components"].values()):
@@ -232,6 +905,13 @@ async def get_available_providers() -> Dict[str, Any]:
     """
     Get information about available LLM providers and their configuration.
     
+    Each provider also carries its live stats per model (samples, p50/p95 latency,
+    error and timeout rate, health) from the last 30 minutes of router calls, and
+    `auto_order` is the order in which the `auto` provider setting picks them.
+    `admission` shows each provider's admission queue: depth by priority
+    (interactive, batch, dry_run), calls in flight, p50/p95 queue wait of recent
+    calls, and how many were shed or hit a rate limit.
+    
     Returns:
         Dictionary containing provider information
     """
@@ -256,25 +936,47 @@ async def get_available_providers() -> Dict[str, Any]:
         }
     }
     
+    stats = provider_stats()
+    admission = admission_stats()
+    for provider_id, info in providers.items():
+        info["stats"] = stats.get(provider_id, {})
+        info["admission"] = admission.get(provider_id, {})
+    
     available_count = sum(1 for p in providers.values() if p["available"])
     
     return {
         "providers": providers,
         "available_count": available_count,
         "total_count": len(providers),
+        "auto_order": auto_order([pid for pid, p in providers.items() if p["available"]], stats),
         "message": f"{available_count}/{len(providers)} providers are configured and available"
     }
 
 if __name__ == "__main__":
+    import serve
+    
     print("🚀 Starting AI Resume Orchestrator MCP Server...")
     print("📊 Available tools:")
     print("  - list_runs: List all resume optimization runs")
     print("  - get_run: Get detailed run information")
+    print("  - watch_run: Follow a run live, partial role outputs as progress notifications")
     print("  - create_run: Start new optimization pipeline")
+    print("  - create_runs_batch / get_batch: Fan out many job descriptions")
+    print("  - find_similar_runs: Past runs with a near-duplicate job description")
     print("  - get_resume_info: Get current resume structure")
+    print("  - get_resume_outline / get_resume_section: Section and entry keys, or one section by key")
+    print("  - score_ats_coverage / score_ats_batch: Local ATS keyword coverage, one or many job descriptions")
+    print("  - build_resume: Build the PDF (cached by input hash)")
     print("  - check_health: Check system health")
+    print("  - get_metrics: Prometheus metrics (also served at /metrics over HTTP)")
+    print("  - get_llm_cache_stats / purge_llm_cache: Inspect or clear the LLM response cache")
+    print("  - preview_prompt: Compacted prompt and token count for a role")
     print("  - get_available_providers: List configured LLM providers")
     print()
     
-    # Run the MCP server
-    mcp.run()
+    args = serve.build_parser("server").parse_args()
+    if args.transport == "stdio":
+        mcp.run()
+    else:
+        # Streamable HTTP or SSE under uvicorn, see serve.py
+        serve.serve(args)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Dependency-graph stage scheduler
+Python counterpart of agents/stage-scheduler.ts: each stage starts as soon as
+the stages it depends on have finished, so independent work overlaps, and
+every stage records when it started and how long it ran. Speculative stages
+may be discarded, e.g. a second refiner started while the judge decides.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+StageFn = Callable[..., Awaitable[Any]]
+
+
+class StageGraph:
+    def __init__(self):
+        self.timings: List[Dict[str, Any]] = []
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._discarded: set = set()
+
+    def stage(
+        self,
+        name: str,
+        depends_on: Sequence[str],
+        run: StageFn,
+        speculative: bool = False,
+    ) -> asyncio.Task:
+        """Schedule `run(*dependency_results)` once every dependency has finished"""
+        deps = [self._tasks[dep] for dep in depends_on]
+
+        async def execute():
+            results = await asyncio.gather(*deps)
+            record = {
+                "stage": name,
+                "dependsOn": list(depends_on),
+                "status": "succeeded",
+                "startedAt": datetime.now(timezone.utc).isoformat(),
+                "durationMs": 0,
+            }
+            if speculative:
+                record["speculative"] = True
+            self._records[name] = record
+            self.timings.append(record)
+            if name in self._discarded:
+                record["status"] = "discarded"
+                raise asyncio.CancelledError()
+            started = time.perf_counter()
+            try:
+                return await run(*results)
+            except Exception as e:
+                if record["status"] != "discarded":
+                    record["status"] = "failed"
+                    record["error"] = str(e)
+                raise
+            finally:
+                record["durationMs"] = round((time.perf_counter() - started) * 1000, 1)
+
+        task = asyncio.ensure_future(execute())
+        # Stages nobody ends up awaiting must not log "exception was never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._tasks[name] = task
+        return task
+
+    def discard(self, name: str, cancel: bool = True):
+        """Drop a speculative stage's result, cancelling it if it is still running"""
+        self._discarded.add(name)
+        record = self._records.get(name)
+        if record:
+            record["status"] = "discarded"
+            record.pop("error", None)
+        task = self._tasks.get(name)
+        if cancel and task and not task.done():
+            task.cancel()
+
+    def sequential_ms(self) -> float:
+        """Sum of all stage durations, i.e. the wall time of running them one after another"""
+        return round(sum(record["durationMs"] for record in self.timings if record["status"] != "discarded"), 1)
+
+__all__ = ['StageGraph']
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import pytest
+
+from ats_engine import ResumeTerms, TextTerms, get_matcher, score_job_description
+from resume_snapshot import ResumeSnapshotCache
+
+
+def write_resume(root: Path, skills: str) -> Path:
+    (root / "includes").mkdir(parents=True)
+    (root / "cv.tex").write_text("\\input{includes/section_skills}\n", encoding="utf-8")
+    (root / "includes" / "section_skills.tex").write_text(f"\\skill{{Skills}}{{{skills}}}\n", encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def embedded_resume(tmp_path):
+    root = write_resume(tmp_path / "resume", "C, C++, Python, Embedded Linux, device drivers, ARM Cortex-M, CAN bus, REST APIs, Node.js")
+    return ResumeTerms(ResumeSnapshotCache(root).snapshot())
+
+
+def terms(text: str):
+    return set(TextTerms.of(text, get_matcher()).terms)
+
+
+MARKETING_JD = """Marketing Manager
+We are a Series C startup growing fast.
+
+Requirements:
+- You ran campaigns for B2C brands and can do the reporting for the rest of the team
+- Lead the sales arm of our node network of partners
+- Work with drivers, resellers and the go to market team on the spring launch
+- Security of the brand voice, networking events, monitoring campaign performance
+- Shell out budget where it pays off, react fast to the market
+- SEO and CRM experience
+
+WHAT YOU CAN DO
+- Own the REST of the funnel
+"""
+
+
+def test_marketing_jd_has_no_technical_must_haves(embedded_resume):
+    result = score_job_description(MARKETING_JD, embedded_resume)
+    reported = set(result["ats_keywords"])
+    for term in ("C", "CAN", "RAN", "REST", "ARM", "Node.js", "Device drivers", "Go", "Spring", "Shell",
+                 "Security", "Networking", "Observability", "React", "Docker"):
+        assert term not in reported
+    assert result["must_have"]["matched"] == []
+
+
+@pytest.mark.parametrize("text", [
+    "Our Series C round closed last month.",
+    "The office is in a new building; CAN you help?",
+    "Please REST assured, our sales ARM is strong.",
+    "Go further with our team. Spring into the new season.",
+    "Hiring drivers and warehouse staff for the night shift.",
+])
+def test_plain_words_are_not_skills(text):
+    assert terms(text) == set()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("C/C++ and Python", {"C", "C++", "Python"}),
+    ("Go or Rust", {"Go", "Rust"}),
+    ("ARM Cortex-M, CAN bus and REST APIs", {"ARM", "CAN", "REST"}),
+    ("Java/Spring services", {"Java", "Spring"}),
+    ("Strong C programming skills", {"C"}),
+    ("5G NR and O-RAN", {"5G", "RAN"}),
+    ("sql, SQL and Sql", {"SQL"}),
+])
+def test_technical_spellings_still_match(text, expected):
+    assert expected <= terms(text)
+
+
+def test_embedded_jd_scores_against_the_resume(embedded_resume):
+    jd = "Requirements:\n- C and C++ on ARM Cortex-M\n- CAN bus, REST APIs\n\nNice to have:\n- Go or Rust\n"
+    result = score_job_description(jd, embedded_resume)
+    assert {"C", "C++", "ARM", "CAN", "REST"} <= set(result["must_have"]["matched"])
+    assert result["coverage"]["must_have_pct"] == 100.0
+    assert set(result["nice_to_have"]["missing"]) == {"Go", "Rust"}
@@ -0,0 +1,50 @@
+import pytest
+
+from diff_engine import ANNOTATION, apply_diffs
+
+SKILLS = "% SECTION:SKILLS\n\\skill{Languages}{C, Python}\n\\skill{Tools}{Git}\n"
+
+
+@pytest.fixture
+def resume(tmp_path):
+    root = tmp_path / "resume"
+    (root / "includes").mkdir(parents=True)
+    (root / "cv.tex").write_text("\\input{includes/section_skills}\n", encoding="utf-8")
+    (root / "includes" / "section_skills.tex").write_text(SKILLS, encoding="utf-8")
+    return root
+
+
+def diff(patch_type, anchor, content=""):
+    return {"target_file": "resume/includes/section_skills.tex", "patch_type": patch_type, "anchor": anchor, "content": content}
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_insert_and_replace_at_the_same_line_both_apply(resume, tmp_path, reverse):
+    diffs = [
+        diff("replace", "line:2", "\\skill{Languages}{C, C++, Python}"),
+        diff("insert", "SECTION:SKILLS", "\\skill{Focus}{Embedded Linux}"),
+    ]
+    if reverse:
+        diffs.reverse()
+    result = apply_diffs(diffs, dry_run=False, root=tmp_path, allowed=resume)
+    assert result["applied"] == 2
+    assert result["skipped"] == 0
+    assert (resume / "includes" / "section_skills.tex").read_text(encoding="utf-8").split("\n") == [
+        "% SECTION:SKILLS",
+        ANNOTATION,
+        "\\skill{Focus}{Embedded Linux}",
+        ANNOTATION,
+        "\\skill{Languages}{C, C++, Python}",
+        "\\skill{Tools}{Git}",
+        "",
+    ]
+
+
+def test_intersecting_replaces_are_skipped(resume, tmp_path):
+    diffs = [
+        diff("replace", "regex:Languages[^\\n]*\\n[^\\n]*Tools", "\\skill{All}{C, Git}"),
+        diff("delete", "line:3"),
+    ]
+    result = apply_diffs(diffs, dry_run=True, root=tmp_path, allowed=resume)
+    assert result["applicable"] == 1
+    assert result["files"][0]["skipped"][0]["index"] == 1
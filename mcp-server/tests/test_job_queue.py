@@ -0,0 +1,31 @@
+import os
+import socket
+import sys
+
+import pytest
+
+from job_queue import _worker_alive, worker_id
+
+HOST = socket.gethostname()
+
+
+def test_own_worker_is_alive():
+    assert _worker_alive(worker_id())
+
+
+def test_other_hosts_are_assumed_alive():
+    assert _worker_alive("elsewhere:1:1")
+
+
+def test_dead_pid_is_not_alive():
+    assert not _worker_alive(f"{HOST}:999999999:1")
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="boot tokens are checked through /proc")
+def test_reused_pid_is_not_alive():
+    # Same host and a live pid, but the process started at another time: a restart reused the pid
+    assert not _worker_alive(f"{HOST}:{os.getpid()}:1")
+
+
+def test_ids_without_a_boot_token_fall_back_to_the_pid():
+    assert _worker_alive(f"{HOST}:{os.getpid()}")
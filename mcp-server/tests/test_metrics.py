@@ -0,0 +1,58 @@
+import json
+import os
+import subprocess
+import sys
+
+import metrics
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def write_worker(directory, pid, values):
+    (directory / f"stats-{pid}-test.json").write_text(json.dumps({"pid": pid, "metrics": values}), encoding="utf-8")
+
+
+def sample(text, line_prefix):
+    return [line for line in text.splitlines() if line.startswith(line_prefix)]
+
+
+def test_render_sums_counters_and_histograms_of_other_workers(tmp_path, monkeypatch):
+    monkeypatch.setenv("MCP_METRICS_DIR", str(tmp_path))
+    buckets = len(metrics.tool_latency.buckets)
+    write_worker(tmp_path, os.getppid(), {
+        "mcp_tool_calls_total": [[["bench_tool"], 3]],
+        "mcp_tool_duration_seconds": [[["bench_tool"], [1] + [0] * (buckets - 1) + [0.002, 1]]],
+    })
+    # An exited worker still counts, its totals must not vanish from the sum
+    write_worker(tmp_path, dead_pid(), {"mcp_tool_calls_total": [[["bench_tool"], 2]]})
+
+    text = metrics.render()
+    assert sample(text, 'mcp_tool_calls_total{tool="bench_tool"}') == ['mcp_tool_calls_total{tool="bench_tool"} 5']
+    assert sample(text, 'mcp_tool_duration_seconds_count{tool="bench_tool"}') == ['mcp_tool_duration_seconds_count{tool="bench_tool"} 1']
+
+
+def test_per_worker_gauge_skips_exited_workers(tmp_path, monkeypatch):
+    monkeypatch.setenv("MCP_METRICS_DIR", str(tmp_path))
+    gauge = metrics.Gauge("test_runs", "Runs of this worker", ["state"])
+    metrics.registry.register(gauge)
+    try:
+        gauge.set_function(lambda: {("queued",): 1}, per_worker=True)
+        write_worker(tmp_path, os.getppid(), {"test_runs": [[["queued"], 2]]})
+        write_worker(tmp_path, dead_pid(), {"test_runs": [[["queued"], 4]]})
+        assert sample(metrics.render(), "test_runs{") == ['test_runs{state="queued"} 3']
+    finally:
+        metrics.registry._metrics.pop("test_runs")
+
+
+def test_flush_writes_this_worker(tmp_path, monkeypatch):
+    monkeypatch.setenv("MCP_METRICS_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "_last_written", None)
+    metrics.flush()
+    [written] = tmp_path.glob("stats-*.json")
+    assert json.loads(written.read_text(encoding="utf-8"))["pid"] == os.getpid()
+    # Its own file is not added a second time
+    assert metrics._other_workers() == []
@@ -45,6 +45,10 @@ const TOOLS = [
           minimum: 1,
           maximum: 100,
           description: 'Limit the number of runs returned'
+        },
+        profileId: {
+          type: 'string',
+          description: 'Only list runs for this resume profile'
         }
       }
     }
@@ -81,13 +85,17 @@ const TOOLS = [
         providers: {
           type: 'object',
           properties: {
-            reviewer: { type: 'string', enum: ['groq', 'claude', 'gemini'] },
-            swot: { type: 'string', enum: ['groq', 'claude', 'gemini'] },
-            refiner: { type: 'string', enum: ['groq', 'claude', 'gemini'] },
-            judge: { type: 'string', enum: ['groq', 'claude', 'gemini'] },
-            finalizer: { type: 'string', enum: ['groq', 'claude', 'gemini'] }
+            reviewer: { type: 'string', enum: ['groq', 'claude', 'gemini', 'auto'] },
+            swot: { type: 'string', enum: ['groq', 'claude', 'gemini', 'auto'] },
+            refiner: { type: 'string', enum: ['groq', 'claude', 'gemini', 'auto'] },
+            judge: { type: 'string', enum: ['groq', 'claude', 'gemini', 'auto'] },
+            finalizer: { type: 'string', enum: ['groq', 'claude', 'gemini', 'auto'] }
           },
           required: ['reviewer', 'swot', 'refiner', 'judge', 'finalizer']
+        },
+        profileId: {
+          type: 'string',
+          description: 'Resume profile to optimize (default: the repository resume/)'
         }
       },
       required: ['jobDescription', 'dryRun', 'providers']
@@ -113,16 +121,11 @@ app.post('/mcp/tools/:toolName', async (req, res) => {
 
     switch (toolName) {
       case 'list-runs':
-        const runs = await router.listRuns();
-        let filtered = runs;
-
-        if (args.status) {
-          filtered = filtered.filter((run: any) => run.status === args.status);
-        }
-
-        if (typeof args.limit === 'number') {
-          filtered = filtered.slice(0, args.limit);
-        }
+        const filtered = await router.listRuns({
+          status: args.status,
+          limit: typeof args.limit === 'number' ? args.limit : undefined,
+          profileId: typeof args.profileId === 'string' ? args.profileId : undefined
+        });
 
         result = {
           content: [
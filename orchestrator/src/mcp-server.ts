@@ -25,7 +25,8 @@ const runStatusValues = ['pending', 'running', 'needs_review', 'failed', 'comple
 
 const listRunsInputSchema = z.object({
   status: z.enum(runStatusValues).optional(),
-  limit: z.number().int().min(1).max(100).optional()
+  limit: z.number().int().min(1).max(100).optional(),
+  profileId: z.string().optional()
 });
 
 const getRunInputSchema = z.object({
@@ -36,12 +37,13 @@ const createRunInputSchema = z.object({
   jobDescription: z.string(),
   dryRun: z.boolean(),
   providers: z.object({
-    reviewer: z.enum(['groq', 'claude', 'gemini']),
-    swot: z.enum(['groq', 'claude', 'gemini']),
-    refiner: z.enum(['groq', 'claude', 'gemini']),
-    judge: z.enum(['groq', 'claude', 'gemini']),
-    finalizer: z.enum(['groq', 'claude', 'gemini'])
-  })
+    reviewer: z.enum(['groq', 'claude', 'gemini', 'auto']),
+    swot: z.enum(['groq', 'claude', 'gemini', 'auto']),
+    refiner: z.enum(['groq', 'claude', 'gemini', 'auto']),
+    judge: z.enum(['groq', 'claude', 'gemini', 'auto']),
+    finalizer: z.enum(['groq', 'claude', 'gemini', 'auto'])
+  }),
+  profileId: z.string().optional()
 });
 
 server.registerTool(
@@ -51,16 +53,7 @@ server.registerTool(
     inputSchema: listRunsInputSchema
   },
   async (args) => {
-    const runs = await router.listRuns();
-    let filtered = runs;
-
-    if (args.status) {
-      filtered = filtered.filter((run: any) => run.status === args.status);
-    }
-
-    if (typeof args.limit === 'number') {
-      filtered = filtered.slice(0, args.limit);
-    }
+    const filtered = await router.listRuns({ status: args.status, limit: args.limit, profileId: args.profileId });
 
     return {
       content: [
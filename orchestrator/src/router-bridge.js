@@ -2,39 +2,47 @@
 /**
  * Node.js Router Bridge for FastMCP
  * This script allows Python FastMCP to call Node.js router functions
+ *
+ * Usage:
+ *   tsx router-bridge.js <functionName> [argsJson]   one-shot call
+ *   tsx router-bridge.js --worker                    long-lived JSON-RPC worker
+ *   tsx router-bridge.js rebuildRunIndex             recreate data/runs/index.jsonl
+ *
+ * Worker mode speaks JSON-RPC 2.0 over stdin/stdout. Every message is framed
+ * with a `Content-Length: <bytes>\r\n\r\n` header so many requests can be in
+ * flight on the same process; responses carry the id of their request.
  */
 
-import { ResumeRunRouter } from '../agents/index.js';
+import { ResumeRunRouter } from '../../agents/router.ts';
 
 const router = new ResumeRunRouter();
 
-// Get command line arguments
-const [,, functionName, ...args] = process.argv;
+const handlers = {
+    listRuns: (params) => router.listRuns({ status: params.status, limit: params.limit, profileId: params.profileId }),
+    getRun: (params) => router.getRun(params.runId),
+    createRun: (params) => router.createRun(params, { runId: params.runId }),
+    resumeRun: (params) => router.resumeRun(params.runId),
+    rebuildRunIndex: () => router.rebuildRunIndex(),
+    previewPrompt: (params) => router.previewPrompt(params),
+    ping: () => ({ pong: true, pid: process.pid })
+};
 
-if (!functionName) {
-    console.error('Usage: node router-bridge.js <functionName> [args...]');
-    process.exit(1);
+async function dispatch(functionName, params) {
+    const handler = handlers[functionName];
+    if (!handler) {
+        throw new Error(`Unknown function: ${functionName}`);
+    }
+    return handler(params ?? {});
 }
 
-async function callFunction() {
+// ---------------------------------------------------------------------------
+// One-shot CLI mode
+// ---------------------------------------------------------------------------
+
+async function callFunction(functionName, args) {
     try {
-        let result;
         const argsObj = args.length > 0 ? JSON.parse(args[0]) : {};
-
-        switch (functionName) {
-            case 'listRuns':
-                result = await router.listRuns();
-                break;
-            case 'getRun':
-                result = await router.getRun(argsObj.runId);
-                break;
-            case 'createRun':
-                result = await router.createRun(argsObj);
-                break;
-            default:
-                throw new Error(`Unknown function: ${functionName}`);
-        }
-
+        const result = await dispatch(functionName, argsObj);
         console.log(JSON.stringify({ result }));
     } catch (error) {
         console.error(JSON.stringify({ error: error.message }));
@@ -42,4 +50,79 @@ async function callFunction() {
     }
 }
 
-callFunction();
+// ---------------------------------------------------------------------------
+// Worker mode
+// ---------------------------------------------------------------------------
+
+const HEADER_DELIMITER = Buffer.from('\r\n\r\n');
+
+function writeFrame(message) {
+    const body = Buffer.from(JSON.stringify(message), 'utf8');
+    process.stdout.write(`Content-Length: ${body.length}\r\n\r\n`);
+    process.stdout.write(body);
+}
+
+async function handleMessage(message) {
+    const { id, method, params } = message;
+    try {
+        const result = await dispatch(method, params);
+        writeFrame({ jsonrpc: '2.0', id, result: result ?? null });
+    } catch (error) {
+        writeFrame({
+            jsonrpc: '2.0',
+            id,
+            error: { code: -32000, message: error instanceof Error ? error.message : String(error) }
+        });
+    }
+}
+
+function runWorker() {
+    // stdout is reserved for protocol frames; route stray logging to stderr.
+    console.log = (...items) => console.error(...items);
+
+    let buffer = Buffer.alloc(0);
+
+    process.stdin.on('data', (chunk) => {
+        buffer = Buffer.concat([buffer, chunk]);
+        for (;;) {
+            const headerEnd = buffer.indexOf(HEADER_DELIMITER);
+            if (headerEnd === -1) return;
+            const header = buffer.subarray(0, headerEnd).toString('ascii');
+            const match = /Content-Length:\s*(\d+)/i.exec(header);
+            if (!match) {
+                console.error(`router-bridge: dropping malformed frame header: ${header}`);
+                buffer = buffer.subarray(headerEnd + HEADER_DELIMITER.length);
+                continue;
+            }
+            const length = Number(match[1]);
+            const bodyStart = headerEnd + HEADER_DELIMITER.length;
+            if (buffer.length < bodyStart + length) return;
+            const body = buffer.subarray(bodyStart, bodyStart + length).toString('utf8');
+            buffer = buffer.subarray(bodyStart + length);
+
+            let message;
+            try {
+                message = JSON.parse(body);
+            } catch (error) {
+                writeFrame({ jsonrpc: '2.0', id: null, error: { code: -32700, message: 'Parse error' } });
+                continue;
+            }
+            void handleMessage(message);
+        }
+    });
+
+    process.stdin.on('end', () => process.exit(0));
+    writeFrame({ jsonrpc: '2.0', method: 'ready', params: { pid: process.pid } });
+}
+
+// Get command line arguments
+const [,, functionName, ...args] = process.argv;
+
+if (functionName === '--worker') {
+    runWorker();
+} else if (!functionName) {
+    console.error('Usage: node router-bridge.js <functionName> [args...] | --worker');
+    process.exit(1);
+} else {
+    callFunction(functionName, args);
+}
@@ -1,8 +1,15 @@
+import { randomUUID } from 'crypto';
 import cors from 'cors';
 import express from 'express';
 import morgan from 'morgan';
 // NodeNext/ESM requires explicit .js extensions for local relative imports
 import { ResumeRunRouter } from '../../agents/router.js';
+import { runConfigSchema, runSummarySchema } from '../../agents/schemas.js';
+import type { RunStreamEvent } from '../../agents/run-stream.js';
+
+// Re-read a run's stream.jsonl this often, for runs executing in another process
+const STREAM_POLL_MS = 1000;
+const STREAM_HEARTBEAT_MS = 15000;
 
 const app = express();
 const router = new ResumeRunRouter();
@@ -15,9 +22,14 @@ app.get('/healthz', (_req, res) => {
   res.json({ status: 'ok' });
 });
 
-app.get('/runs', async (_req, res, next) => {
+app.get('/runs', async (req, res, next) => {
   try {
-    const runs = await router.listRuns();
+    const status = runSummarySchema.shape.status.safeParse(req.query.status);
+    const limit = Number(req.query.limit);
+    const runs = await router.listRuns({
+      status: status.success ? status.data : undefined,
+      limit: Number.isInteger(limit) && limit > 0 ? limit : undefined
+    });
     res.json(runs);
   } catch (error) {
     next(error);
@@ -33,8 +45,101 @@ app.get('/runs/:runId', async (req, res, next) => {
   }
 });
 
+/**
+ * Server-sent events of a run as it progresses: role and run state changes
+ * and partial role outputs while completions stream in (agents/run-stream.ts).
+ * `?after=<seq>` or a reconnecting client's Last-Event-ID skips events it has
+ * seen. The response ends after the run's final state; for a resumed run
+ * that is the final state of its latest attempt, not the one before the
+ * `running` state the resume recorded.
+ */
+app.get('/runs/:runId/events', async (req, res, next) => {
+  const runId = req.params.runId;
+  let lastSeq = Number(req.query.after ?? req.get('last-event-id') ?? 0) || 0;
+  let live = false;
+  let closed = false;
+  let finished = false;
+  const buffered: RunStreamEvent[] = [];
+
+  const send = (event: RunStreamEvent) => {
+    if (closed || event.seq <= lastSeq) return;
+    lastSeq = event.seq;
+    res.write(`id: ${event.seq}\nevent: ${event.type}\ndata: ${JSON.stringify(event)}\n\n`);
+    if (event.type === 'state') finished = event.status !== 'running';
+  };
+  // Close only once a batch ends on a final state, so a later attempt's `running` state keeps the stream open
+  const sendAll = (events: RunStreamEvent[]) => {
+    events.forEach(send);
+    if (finished) close();
+  };
+  // Subscribe before replaying the file so no event falls in between
+  const unsubscribe = router.onStream((event) => {
+    if (event.runId !== runId) return;
+    if (live) sendAll([event]);
+    else buffered.push(event);
+  });
+  const timers: NodeJS.Timeout[] = [];
+  const close = () => {
+    if (closed) return;
+    closed = true;
+    unsubscribe();
+    timers.forEach(clearInterval);
+    res.end();
+  };
+
+  try {
+    const replay = await router.readStream(runId, lastSeq);
+    res.writeHead(200, {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache',
+      Connection: 'keep-alive',
+      'X-Accel-Buffering': 'no'
+    });
+    req.on('close', close);
+    live = true;
+    sendAll([...replay, ...buffered]);
+  } catch (error) {
+    unsubscribe();
+    next(error);
+    return;
+  }
+  if (closed) return;
+
+  timers.push(
+    setInterval(() => {
+      router.readStream(runId, lastSeq).then(sendAll, () => undefined);
+    }, STREAM_POLL_MS),
+    setInterval(() => {
+      if (!closed) res.write(': keep-alive\n\n');
+    }, STREAM_HEARTBEAT_MS)
+  );
+});
+
+app.get('/runs/:runId/pdf', async (req, res, next) => {
+  try {
+    const run = await router.getRun(req.params.runId);
+    if (!run.pdfPath) {
+      res.status(404).json({ error: 'PDF not available' });
+      return;
+    }
+    res.sendFile(run.pdfPath);
+  } catch (error) {
+    next(error);
+  }
+});
+
 app.post('/runs', async (req, res, next) => {
   try {
+    if (req.query.wait === 'false') {
+      // Validate up front, then let the pipeline run in the background; clients poll GET /runs/:runId
+      const config = runConfigSchema.parse(req.body);
+      const runId = randomUUID();
+      router.createRun(config, { runId }).catch((error) => {
+        console.error(`Run ${runId} failed:`, error);
+      });
+      res.status(202).json({ runId });
+      return;
+    }
     const summary = await router.createRun(req.body);
     res.status(201).json({ runId: summary.id });
   } catch (error) {
@@ -3,13 +3,49 @@ set -euo pipefail
 
 RUN_ID="${1:-manual}"
 ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
-RESUME_DIR="${ROOT_DIR}/resume"
+# The router points RESUME_DIR at the run's profile (data/profiles/<id>/)
+RESUME_DIR="${RESUME_DIR:-${ROOT_DIR}/resume}"
+PROFILE_ID="${PROFILE_ID:-default}"
 OUTPUT_DIR="${ROOT_DIR}/data/runs/${RUN_ID}"
 API_URL="${TEXLIVE_URL:-http://texlive:5001/build}"
+CACHE_DIR="${BUILD_CACHE_DIR:-${ROOT_DIR}/data/cache/builds}"
 
 mkdir -p "${OUTPUT_DIR}"
 
-payload=$(printf '{"runId":"%s"}' "${RUN_ID}")
+# Hash every input that can change the PDF: sources, class/style files, fonts,
+# the photo, and today's date (cv.tex prints \today).
+input_hash() {
+  (
+    cd "${RESUME_DIR}"
+    {
+      find . -maxdepth 1 -type f \( -name 'cv.tex' -o -name '*.cls' -o -name '*.sty' -o -name 'fontawesomesymbols-*.tex' -o -name 'anurag.png' \)
+      find ./includes -type f -name '*.tex' 2>/dev/null
+      find ./fonts -type f 2>/dev/null
+    } | LC_ALL=C sort | xargs sha256sum
+    date +%F
+  ) | sha256sum | cut -c1-32
+}
+
+# Place a cached PDF into the run directory, sharing storage where possible.
+# The old final.pdf may be a hard link into the cache, so it is unlinked
+# first rather than written through.
+link_pdf() {
+  rm -f "$2"
+  ln "$1" "$2" 2>/dev/null || cp "$1" "$2"
+}
+
+HASH=""
+if [[ "${BUILD_CACHE_DISABLED:-0}" != "1" ]]; then
+  mkdir -p "${CACHE_DIR}"
+  HASH="$(input_hash)"
+  if [[ -f "${CACHE_DIR}/${HASH}.pdf" ]]; then
+    link_pdf "${CACHE_DIR}/${HASH}.pdf" "${OUTPUT_DIR}/final.pdf"
+    printf '{"status":"OK","runId":"%s","cache":"hit","inputHash":"%s"}\n' "${RUN_ID}" "${HASH}"
+    exit 0
+  fi
+fi
+
+payload=$(printf '{"runId":"%s","profileId":"%s"}' "${RUN_ID}" "${PROFILE_ID}")
 response=$(curl -s -S -X POST "${API_URL}" -H 'Content-Type: application/json' -d "${payload}")
 status=$(printf '%s' "${response}" | sed -n 's/.*"status":"\([^"]*\)".*/\1/p')
 
@@ -19,6 +55,28 @@ if [[ "${status}" != "OK" ]]; then
   exit 1
 fi
 
-if [[ -f "${RESUME_DIR}/cv.pdf" ]]; then
-  cp -f "${RESUME_DIR}/cv.pdf" "${OUTPUT_DIR}/final.pdf"
+# The local build service (mcp-server/latex_service.py) writes the PDF straight
+# into the run directory; the texlive service leaves it in resume/
+BUILT_PDF="${RESUME_DIR}/cv.pdf"
+if [[ "${response}" == *'"pdfPath"'* && -f "${OUTPUT_DIR}/final.pdf" ]]; then
+  BUILT_PDF="${OUTPUT_DIR}/final.pdf"
+fi
+
+if [[ -f "${BUILT_PDF}" ]]; then
+  if [[ -n "${HASH}" ]]; then
+    # Publish atomically so concurrent builds never see a partial PDF
+    tmp="${CACHE_DIR}/${HASH}.pdf.$$"
+    cp -f "${BUILT_PDF}" "${tmp}"
+    mv -f "${tmp}" "${CACHE_DIR}/${HASH}.pdf"
+    link_pdf "${CACHE_DIR}/${HASH}.pdf" "${OUTPUT_DIR}/final.pdf"
+  elif [[ "${BUILT_PDF}" != "${OUTPUT_DIR}/final.pdf" ]]; then
+    # A new file renamed over final.pdf, never a write through a cache link
+    tmp="${OUTPUT_DIR}/final.pdf.$$"
+    cp -f "${BUILT_PDF}" "${tmp}"
+    mv -f "${tmp}" "${OUTPUT_DIR}/final.pdf"
+  fi
+fi
+
+if [[ -n "${HASH}" ]]; then
+  printf '{"status":"OK","runId":"%s","cache":"miss","inputHash":"%s"}\n' "${RUN_ID}" "${HASH}"
 fi
@@ -7,11 +7,19 @@ app.use(express.json({ limit: '1mb' }));
 
 const WORKSPACE_ROOT = process.env.WORKSPACE_ROOT || '/workspace';
 const RESUME_DIR = process.env.RESUME_DIR || path.join(WORKSPACE_ROOT, 'resume');
+const PROFILES_DIR = process.env.RESUME_PROFILES_DIR || path.join(WORKSPACE_ROOT, 'data', 'profiles');
+const PROFILE_ID_PATTERN = /^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$/;
 
-function runLatex() {
+function resumeDirFor(profileId) {
+  if (!profileId || profileId === 'default') return RESUME_DIR;
+  if (!PROFILE_ID_PATTERN.test(profileId)) throw new Error(`Invalid profile id ${profileId}`);
+  return path.join(PROFILES_DIR, profileId);
+}
+
+function runLatex(resumeDir) {
   return new Promise((resolve) => {
     const child = spawn('latexmk', ['-pdf', '-interaction=nonstopmode', '-halt-on-error', 'cv.tex'], {
-      cwd: RESUME_DIR
+      cwd: resumeDir
     });
 
     let log = '';
@@ -22,17 +30,17 @@ function runLatex() {
       log += chunk.toString();
     });
     child.on('close', (code) => {
-      const cleaner = spawn('latexmk', ['-c'], { cwd: RESUME_DIR });
+      const cleaner = spawn('latexmk', ['-c'], { cwd: resumeDir });
       cleaner.on('close', () => resolve({ log, code: code ?? 1 }));
     });
   });
 }
 
 app.post('/build', async (req, res) => {
-  const { runId = 'manual' } = req.body ?? {};
+  const { runId = 'manual', profileId } = req.body ?? {};
   const started = Date.now();
   try {
-    const result = await runLatex();
+    const result = await runLatex(resumeDirFor(profileId));
     const durationMs = Date.now() - started;
     if (result.code !== 0) {
       return res.status(500).json({ status: 'FAILED', runId, durationMs, log: result.log });